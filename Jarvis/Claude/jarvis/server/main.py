@@ -16,10 +16,6 @@ app = FastAPI(
     version="0.1.0"
 )
 
-# Cargar configuracin
-with open("config.json", "r") as config_file:
-    config = json.load(config_file)
-
 @app.get("/")
 async def root():
     """Endpoint raz para verificar que el servidor est funcionando."""
@@ -28,6 +24,11 @@ async def root():
 # Aqu se importarn y registrarn los routers de los diferentes mdulos
 
 if __name__ == "__main__":
+    # Cargar configuracin (aqu y no al importar: el lanzador de produccin,
+    # Gemini/JarvisProject/server/launcher.py --config, lee este mismo archivo)
+    with open("config.json", "r") as config_file:
+        config = json.load(config_file)
+
     # Iniciar el servidor con la configuracin especificada
     uvicorn.run(
         "main:app",
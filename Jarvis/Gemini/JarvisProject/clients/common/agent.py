@@ -0,0 +1,263 @@
+# clients/common/agent.py
+
+import asyncio
+import inspect
+import json
+import os
+import platform
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict
+
+import websockets
+
+from .config import ClientConfig
+from .telemetry import TelemetryBuffer
+
+try:
+    import psutil
+except ImportError:  # Optional: without it the agent always uses the idle heartbeat rate
+    psutil = None
+
+CommandHandler = Callable[[Dict[str, Any]], Any | Awaitable[Any]]
+
+# Acks remembered to answer redelivered commands without running them again
+COMMAND_DEDUP_SIZE = 512
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2^attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class JarvisAgent:
+    """
+    Client agent shared by the Kali and Windows clients.
+
+    Keeps a single WebSocket session to the server (/ws), authenticating once per
+    connection. Heartbeats adapt to activity: every ``busy_interval`` seconds while
+    the CPU is busy, stretching by half each idle beat up to ``idle_interval`` (and
+    never beyond half of the server's idle timeout). Dropped connections are retried
+    with jittered exponential backoff so a server restart does not cause a
+    synchronized reconnect storm. With several server URLs (leader and standby) a
+    failed connection moves on to the next one after a short jitter, and only a
+    whole failed round backs off. Commands pushed by the server are dispatched to
+    handlers registered with on_command() and acknowledged over the same session.
+    Delivery is at-least-once: a command the server sends again (ack lost, session
+    dropped) is recognised by its command_id and answered with the earlier ack
+    instead of running twice.
+
+    Heartbeats carry CPU/memory figures and the status frame declares the task
+    kinds registered with on_task(), so the server's scheduler can place work here.
+
+    With psutil installed, the same figures are also sampled every
+    ``telemetry_interval`` seconds into a TelemetryBuffer, which keeps sampling
+    while disconnected and is uploaded as one compressed binary frame every
+    ``telemetry_upload_interval`` seconds or once ``telemetry_batch`` samples wait.
+    """
+
+    def __init__(self, config: ClientConfig):
+        self.config = config
+        self._handlers: Dict[str, CommandHandler] = {}
+        self._heartbeat_interval = config.busy_interval
+        self._server_idle_timeout: float | None = None
+        self._stopping = asyncio.Event()
+        self._command_tasks: set = set()  # Keeps running handlers referenced until they finish
+        self._acks: "OrderedDict[str, Dict[str, Any] | None]" = OrderedDict()  # Recent command_id -> ack (None: running)
+        self._task_handlers: Dict[str, CommandHandler] = {}
+        self._server_index = 0  # Which of config.session_urls to connect to
+        self.telemetry: TelemetryBuffer | None = None  # Created with the first sample's metric names
+        self._last_metrics: Dict[str, float] = {}
+        self._upload_due = asyncio.Event()
+        self.on_command("run_task", self._run_task)
+
+    def on_command(self, action: str, handler: CommandHandler | None = None):
+        """Registers a handler for pushed commands with the given "action". Usable as a decorator."""
+        def register(fn: CommandHandler) -> CommandHandler:
+            self._handlers[action] = fn
+            return fn
+        return register(handler) if handler is not None else register
+
+    def on_task(self, kind: str, handler: CommandHandler | None = None):
+        """
+        Registers a handler for scheduler tasks of the given kind; it receives the
+        task payload. Plain functions run in a worker thread so heartbeats keep flowing.
+        """
+        def register(fn: CommandHandler) -> CommandHandler:
+            self._task_handlers[kind] = fn
+            return fn
+        return register(handler) if handler is not None else register
+
+    async def _run_task(self, frame: Dict[str, Any]) -> Any:
+        handler = self._task_handlers.get(frame.get("kind"))
+        if handler is None:
+            raise LookupError(f"No handler for task kind: {frame.get('kind')}")
+        if inspect.iscoroutinefunction(handler):
+            return await handler(frame.get("payload"))
+        return await asyncio.to_thread(handler, frame.get("payload"))
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    # --- Activity ---
+
+    def _sample_metrics(self) -> Dict[str, float]:
+        if psutil is None:
+            return {}
+        metrics = {"cpu": psutil.cpu_percent(interval=None), "memory": psutil.virtual_memory().percent}
+        if hasattr(os, "getloadavg"):
+            metrics["load"] = os.getloadavg()[0]
+        return metrics
+
+    def next_heartbeat_interval(self, busy: bool) -> float:
+        """Busy: reset to the fast rate. Idle: grow by 50% up to the sparse rate."""
+        cap = self.config.idle_interval
+        if self._server_idle_timeout:
+            cap = min(cap, self._server_idle_timeout / 2)
+        if busy:
+            self._heartbeat_interval = self.config.busy_interval
+        else:
+            self._heartbeat_interval = min(cap, self._heartbeat_interval * 1.5)
+        return min(self._heartbeat_interval, cap)
+
+    # --- Session ---
+
+    async def _heartbeat_loop(self, ws) -> None:
+        while True:
+            # With telemetry sampling, reuse its figures: two callers would split psutil's CPU window
+            metrics = self._last_metrics if self.telemetry is not None else self._sample_metrics()
+            frame = {"type": "heartbeat"}
+            if metrics:
+                frame["metrics"] = metrics
+            await ws.send(json.dumps(frame))
+            busy = metrics.get("cpu", 0.0) >= self.config.busy_cpu_percent
+            await asyncio.sleep(self.next_heartbeat_interval(busy))
+
+    async def _telemetry_loop(self) -> None:
+        """Samples metrics for the whole agent lifetime, connected or not."""
+        interval = self.config.telemetry_interval
+        if psutil is None or interval <= 0:
+            return
+        while not self._stopping.is_set():
+            await asyncio.sleep(interval)
+            self._last_metrics = self._sample_metrics()
+            if self.telemetry is None:
+                self.telemetry = TelemetryBuffer(sorted(self._last_metrics), self.config.telemetry_capacity)
+            self.telemetry.append(self._last_metrics)
+            if len(self.telemetry) >= self.config.telemetry_batch:
+                self._upload_due.set()
+
+    async def _upload_loop(self, ws) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._upload_due.wait(), self.config.telemetry_upload_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._upload_due.clear()
+            if self.telemetry is not None and len(self.telemetry):
+                batch, count = self.telemetry.encode()
+                await ws.send(batch)
+                self.telemetry.discard(count)  # Only once sent: a dropped session keeps them for the next one
+
+    async def _run_command(self, ws, frame: Dict[str, Any]) -> None:
+        command_id = frame.get("command_id")
+        if command_id in self._acks:
+            previous = self._acks[command_id]
+            if previous is not None:  # Redelivery of a command already run: repeat its ack
+                await ws.send(json.dumps(previous))
+            return
+        self._acks[command_id] = None
+        while len(self._acks) > COMMAND_DEDUP_SIZE:
+            self._acks.popitem(last=False)
+        handler = self._handlers.get(frame.get("action"))
+        ack: Dict[str, Any] = {"type": "ack", "command_id": command_id}
+        if handler is None:
+            ack.update(ok=False, error=f"Unknown action: {frame.get('action')}")
+        else:
+            try:
+                result = handler(frame)
+                if inspect.isawaitable(result):
+                    result = await result
+                ack.update(ok=True, result=result)
+            except Exception as e:  # Report handler failures to the server instead of dying
+                ack.update(ok=False, error=str(e))
+        self._acks[command_id] = ack
+        await ws.send(json.dumps(ack))
+
+    async def _receive_loop(self, ws) -> None:
+        async for message in ws:
+            frame = json.loads(message)
+            if frame.get("type") == "command":
+                task = asyncio.create_task(self._run_command(ws, frame))
+                self._command_tasks.add(task)
+                task.add_done_callback(self._command_tasks.discard)
+            elif frame.get("type") == "error":
+                print(f"Server reported an error: {frame.get('detail')}")
+
+    async def _session(self) -> None:
+        """One connection lifetime: authenticate, then heartbeat and serve commands until it drops."""
+        url = self.config.session_urls[self._server_index]
+        async with websockets.connect(url, open_timeout=10,
+                                      ping_interval=20, ping_timeout=20) as ws:
+            await ws.send(json.dumps({"type": "auth", "client_id": self.config.client_id,
+                                      "secret": self.config.client_secret}))
+            welcome = json.loads(await ws.recv())
+            if welcome.get("type") != "welcome":
+                raise ConnectionError(f"Unexpected handshake reply: {welcome}")
+            self._server_idle_timeout = welcome.get("idle_timeout")
+            capabilities = sorted(set(self.config.capabilities) | set(self._task_handlers))
+            await ws.send(json.dumps({"type": "status", "status": "online", "details": {
+                "os": platform.system(), "host": platform.node(),
+                "capabilities": capabilities, "slots": self.config.task_slots,
+            }}))
+            print(f"Connected to {url} as {self.config.client_id}")
+
+            tasks = [asyncio.create_task(self._heartbeat_loop(ws)),
+                     asyncio.create_task(self._upload_loop(ws)),
+                     asyncio.create_task(self._receive_loop(ws)),
+                     asyncio.create_task(self._stopping.wait())]
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in tasks:
+                    task.cancel()
+            for task in done:
+                task.result()  # Re-raise connection errors so run() backs off
+
+    async def run(self) -> None:
+        """Connects and stays connected until stop() is called."""
+        if psutil is not None:
+            psutil.cpu_percent(interval=None)  # Prime the counter; the first reading is meaningless
+        sampler = asyncio.create_task(self._telemetry_loop())
+        try:
+            await self._connect_loop()
+        finally:
+            sampler.cancel()
+
+    async def _connect_loop(self) -> None:
+        attempt = 0
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            try:
+                await self._session()
+            except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException, ConnectionError) as e:
+                print(f"Connection to server lost: {e}")
+            if self._stopping.is_set():
+                break
+            # A session that lasted a while counts as healthy: start backing off from scratch
+            if time.monotonic() - started > self.config.backoff_max:
+                attempt = 0
+            servers = len(self.config.session_urls)
+            self._server_index = (self._server_index + 1) % servers
+            if self._server_index != 0:
+                # Another server (e.g. the standby taking over) may be up: try it almost at once
+                delay = random.uniform(0, min(self.config.backoff_base, 0.5))
+            else:
+                delay = backoff_delay(attempt, self.config.backoff_base, self.config.backoff_max)
+                attempt += 1
+            print(f"Reconnecting in {delay:.1f}s")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,83 @@
+# clients/common/config.py
+
+import os
+from dataclasses import dataclass, field
+from typing import List
+
+try:
+    from dotenv import load_dotenv
+except ImportError:  # Optional: plain environment variables work without it
+    load_dotenv = None
+
+
+@dataclass
+class ClientConfig:
+    # One URL, or a comma-separated list (leader first, then standby) tried in turn
+    server_url: str
+    client_id: str
+    client_secret: str
+    # Adaptive heartbeat: busy_interval while the machine is busy, stretching to idle_interval when idle
+    busy_interval: float = 5.0
+    idle_interval: float = 60.0
+    busy_cpu_percent: float = 50.0
+    # Reconnect backoff (seconds): full jitter between 0 and min(max, base * 2^attempt)
+    backoff_base: float = 1.0
+    backoff_max: float = 60.0
+    # Task kinds this machine accepts from the server's scheduler, and how many at once
+    capabilities: List[str] = field(default_factory=list)
+    task_slots: int = 1
+    # Telemetry: sampling period (0: off), upload period, samples that trigger an early upload, buffer size
+    telemetry_interval: float = 5.0
+    telemetry_upload_interval: float = 60.0
+    telemetry_batch: int = 120
+    telemetry_capacity: int = 4320
+
+    @property
+    def session_urls(self) -> List[str]:
+        """WebSocket URLs of the /ws session endpoint, one per configured server."""
+        urls = []
+        for url in self.server_url.split(","):
+            url = url.strip().rstrip("/")
+            if url.startswith("https://"):
+                url = "wss://" + url[len("https://"):]
+            elif url.startswith("http://"):
+                url = "ws://" + url[len("http://"):]
+            if url:
+                urls.append(url + "/ws")
+        return urls
+
+    @property
+    def session_url(self) -> str:
+        """WebSocket URL of the first configured server."""
+        return self.session_urls[0]
+
+
+def load_client_config(config_dir: str) -> ClientConfig:
+    """
+    Reads the client settings from <config_dir>/.env (same keys as .env_example),
+    falling back to the process environment.
+    """
+    dotenv_path = os.path.join(config_dir, ".env")
+    if load_dotenv is not None and os.path.exists(dotenv_path):
+        load_dotenv(dotenv_path=dotenv_path)
+
+    missing = [key for key in ("SERVER_URL", "CLIENT_ID", "CLIENT_SECRET") if not os.getenv(key)]
+    if missing:
+        raise RuntimeError(f"Missing client settings: {', '.join(missing)} (see {config_dir}/.env_example)")
+
+    return ClientConfig(
+        server_url=os.environ["SERVER_URL"],
+        client_id=os.environ["CLIENT_ID"],
+        client_secret=os.environ["CLIENT_SECRET"],
+        busy_interval=float(os.getenv("HEARTBEAT_BUSY_INTERVAL", 5)),
+        idle_interval=float(os.getenv("HEARTBEAT_IDLE_INTERVAL", 60)),
+        busy_cpu_percent=float(os.getenv("HEARTBEAT_BUSY_CPU_PERCENT", 50)),
+        backoff_base=float(os.getenv("RECONNECT_BACKOFF_BASE", 1)),
+        backoff_max=float(os.getenv("RECONNECT_BACKOFF_MAX", 60)),
+        capabilities=[c.strip() for c in os.getenv("CLIENT_CAPABILITIES", "").split(",") if c.strip()],
+        task_slots=int(os.getenv("TASK_SLOTS", 1)),
+        telemetry_interval=float(os.getenv("TELEMETRY_INTERVAL", 5)),
+        telemetry_upload_interval=float(os.getenv("TELEMETRY_UPLOAD_INTERVAL", 60)),
+        telemetry_batch=int(os.getenv("TELEMETRY_BATCH", 120)),
+        telemetry_capacity=int(os.getenv("TELEMETRY_BUFFER_SIZE", 4320)),
+    )
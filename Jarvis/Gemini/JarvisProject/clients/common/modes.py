@@ -0,0 +1,72 @@
+# clients/common/modes.py
+
+import asyncio
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+try:
+    import psutil
+except ImportError:  # Optional: without it only "start" actions can be applied
+    psutil = None
+
+if sys.platform == "win32" and psutil is not None:
+    PRIORITY_LEVELS = {"high": psutil.HIGH_PRIORITY_CLASS, "normal": psutil.NORMAL_PRIORITY_CLASS,
+                       "low": psutil.BELOW_NORMAL_PRIORITY_CLASS}
+else:
+    PRIORITY_LEVELS = {"high": -5, "normal": 0, "low": 10}  # nice values (negative needs root)
+
+
+class ModeApplier:
+    """
+    Applies the plans the server sends with the ``apply_mode`` command (see
+    server/app/services/modes.py). Register it with
+    ``agent.on_command("apply_mode", ModeApplier())``.
+
+    Plans are applied in a worker thread so the session keeps heartbeating.
+    A plan older than the last one applied (lower generation) is ignored.
+    """
+
+    def __init__(self):
+        self.mode: str | None = None
+        self.generation = 0
+
+    async def __call__(self, frame: Dict[str, Any]) -> Dict[str, Any]:
+        generation = frame.get("generation", 0)
+        if generation < self.generation:
+            return {"mode": self.mode, "skipped": "stale switch"}
+        self.generation = generation
+        errors = await asyncio.to_thread(self.apply, frame.get("plan") or [])
+        self.mode = frame.get("mode")
+        print(f"Mode switched to {self.mode} ({len(errors)} errors)")
+        return {"mode": self.mode, "errors": errors}
+
+    def apply(self, plan: List[Dict[str, Any]]) -> List[str]:
+        """Runs the actions in order; returns one message per action that failed."""
+        errors = []
+        running = self._running() if psutil is not None else {}
+        for action in plan:
+            try:
+                op = action.get("op")
+                if op == "stop":
+                    for process in running.pop(action["process"].lower(), []):
+                        process.terminate()
+                elif op == "start":
+                    if action.get("process", "").lower() not in running:
+                        subprocess.Popen(action["command"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                elif op == "priority":
+                    for process in running.get(action["process"].lower(), []):
+                        process.nice(PRIORITY_LEVELS[action.get("level", "normal")])
+                else:
+                    errors.append(f"Unknown op: {op}")
+            except Exception as e:  # One failing action should not stop the rest of the plan
+                errors.append(f"{action.get('op')} {action.get('process') or action.get('command')}: {e}")
+        return errors
+
+    @staticmethod
+    def _running() -> Dict[str, list]:
+        processes: Dict[str, list] = {}
+        for process in psutil.process_iter(["name"]):
+            name = (process.info.get("name") or "").lower()
+            processes.setdefault(name, []).append(process)
+        return processes
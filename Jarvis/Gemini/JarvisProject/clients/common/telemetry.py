@@ -0,0 +1,117 @@
+# clients/common/telemetry.py
+
+import gzip
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, Sequence, Tuple
+
+try:
+    import zstandard
+except ImportError:  # Optional: batches are gzip-compressed without it
+    zstandard = None
+
+# --- Batch format ---
+# Decoded by the server in server/app/services/telemetry.py (little-endian):
+#   magic b"JT" | version u8 (=1) | codec u8 (0 none, 1 gzip, 2 zstd), then the body compressed with codec:
+#   count u32 | columns u8 | t0_ms u64 (Unix time of the first sample)
+#   per column: name_len u8 | name (utf-8) | scale u16 (a value is stored as round(value * scale))
+#   count x i32: milliseconds since the previous sample (0 for the first)
+#   per column, count x i32: stored value minus the previous one (the first value as it is)
+# Steady sampling turns the time deltas into one repeated number and slow-moving
+# metrics into small ones, which is what makes the batches compress well.
+BATCH_HEADER = struct.Struct("<2sBB")
+BODY_HEADER = struct.Struct("<IBQ")
+BATCH_MAGIC = b"JT"
+BATCH_VERSION = 1
+CODEC_NONE, CODEC_GZIP, CODEC_ZSTD = 0, 1, 2
+DEFAULT_CODEC = CODEC_ZSTD if zstandard is not None else CODEC_GZIP
+
+_zstd_compressor = zstandard.ZstdCompressor(level=3) if zstandard is not None else None
+
+
+def compress(body: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        return _zstd_compressor.compress(body)
+    if codec == CODEC_GZIP:
+        return gzip.compress(body, 6, mtime=0)
+    return body
+
+
+def _deltas(values: array, first: int | None = None) -> array:
+    """i32 differences to the previous element; the first one is stored as ``first`` (default: as it is)."""
+    out = array("i", [values[0] if first is None else first])
+    out.extend(b - a for a, b in zip(values, values[1:]))
+    if sys.byteorder == "big":
+        out.byteswap()
+    return out
+
+
+class TelemetryBuffer:
+    """
+    Ring buffer of metric samples kept as ``array`` columns: 8 bytes for the
+    timestamp and 4 per metric per sample, no per-sample objects. When full
+    the oldest samples are overwritten (counted in ``dropped``), so an agent
+    that cannot reach the server keeps the most recent history.
+
+    encode() turns the oldest samples into a delta-encoded, compressed batch;
+    discard() drops them once the server has them.
+    """
+
+    def __init__(self, columns: Sequence[str], capacity: int = 720, scale: int = 100):
+        self.columns = tuple(columns)
+        self.capacity = capacity
+        self.scale = scale
+        self._times = array("q", bytes(8 * capacity))   # Unix milliseconds
+        self._values = [array("i", bytes(4 * capacity)) for _ in self.columns]
+        self._start = 0                                   # Slot of the oldest sample
+        self._count = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, values: Dict[str, float], ts: float | None = None) -> None:
+        """Adds one sample; a metric missing from ``values`` repeats its previous value."""
+        ts = time.time() if ts is None else ts
+        slot = (self._start + self._count) % self.capacity
+        previous = (slot - 1) % self.capacity
+        if self._count == self.capacity:
+            self._start = (self._start + 1) % self.capacity
+            self.dropped += 1
+        else:
+            self._count += 1
+        self._times[slot] = int(ts * 1000)
+        for name, column in zip(self.columns, self._values):
+            value = values.get(name)
+            column[slot] = round(value * self.scale) if value is not None else \
+                (column[previous] if self._count > 1 else 0)
+
+    def _ordered(self, column: array, count: int) -> array:
+        end = self._start + count
+        if end <= self.capacity:
+            return column[self._start:end]
+        return column[self._start:] + column[:end - self.capacity]
+
+    def encode(self, codec: int = DEFAULT_CODEC, limit: int | None = None) -> Tuple[bytes, int]:
+        """(batch, number of samples in it) for the oldest ``limit`` samples (default all)."""
+        count = self._count if limit is None else min(limit, self._count)
+        if not count:
+            return b"", 0
+        times = self._ordered(self._times, count)
+        parts = [BODY_HEADER.pack(count, len(self.columns), times[0])]
+        for name in self.columns:
+            encoded = name.encode()
+            parts.append(struct.pack("<B", len(encoded)) + encoded + struct.pack("<H", self.scale))
+        parts.append(_deltas(times, first=0).tobytes())
+        for column in self._values:
+            parts.append(_deltas(self._ordered(column, count)).tobytes())
+        body = b"".join(parts)
+        return BATCH_HEADER.pack(BATCH_MAGIC, BATCH_VERSION, codec) + compress(body, codec), count
+
+    def discard(self, count: int) -> None:
+        """Drops the oldest ``count`` samples (after they were uploaded)."""
+        count = min(count, self._count)
+        self._start = (self._start + count) % self.capacity
+        self._count -= count
@@ -1,7 +1,28 @@
 # Main script for Kali Linux client
-import time
+import asyncio
+import os
+import sys
 
-print('Jarvis Kali Client starting...')
-# Add connection logic here
-while True:
-    time.sleep(10)
\ No newline at end of file
+# Allow running as a script (python clients/kali/client_app.py) as well as a module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from clients.common.agent import JarvisAgent
+from clients.common.config import load_client_config
+from clients.common.modes import ModeApplier
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), "config")
+
+
+def main():
+    print('Jarvis Kali Linux Client starting...')
+    agent = JarvisAgent(load_client_config(CONFIG_DIR))
+    agent.on_command("apply_mode", ModeApplier())  # Gaming/study/programming switches from the server
+    # Register command handlers here, e.g. agent.on_command("ping", lambda frame: "pong")
+    try:
+        asyncio.run(agent.run())
+    except KeyboardInterrupt:
+        print('Jarvis Kali Linux Client stopped.')
+
+
+if __name__ == "__main__":
+    main()
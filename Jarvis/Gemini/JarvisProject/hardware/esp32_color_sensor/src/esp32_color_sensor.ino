@@ -1,12 +1,126 @@
 // Arduino code for ESP32 color sensor
+//
+// Samples the colour sensor at SAMPLE_HZ and streams the readings to the
+// server's /color WebSocket over one persistent connection, BATCH_SIZE
+// readings per binary frame. The server averages, classifies and debounces
+// them, and sends back a JSON "color_selection" event when a card selects a
+// system. Needs the "WebSockets" library (Markus Sattler / links2004).
+
+#include <WiFi.h>
+#include <WebSocketsClient.h>
+#include <Wire.h>
+
+#define COLOR_SENSOR_ADDR 0x29   // TCS34725
+
+// WiFi and server
+const char* ssid = "JarvisNetwork";
+const char* password = "your_secure_password";
+const char* serverHost = "your_server_ip";
+const uint16_t serverPort = 8000;
+// Must match an entry in server/config/known_clients.py
+const char* authHeaders = "X-Client-ID: esp32_color_1\r\nX-Client-Secret: ESP32_COLOR_SENSOR_KEY";
+
+// Sampling: 100 Hz in frames of 10 readings = 10 small messages per second
+const uint16_t SAMPLE_HZ = 100;
+const uint8_t BATCH_SIZE = 10;
+
+// Frame layout (little-endian), see server/app/services/color_sensor.py:
+// version u8 | count u8 | interval_ms u16 | t0_ms u32 | count x (r, g, b) u8
+const uint8_t FRAME_VERSION = 1;
+const size_t HEADER_SIZE = 8;
+uint8_t frame[HEADER_SIZE + 3 * 255];
+uint8_t frameCount = 0;
+uint32_t frameStart = 0;
+
+WebSocketsClient webSocket;
+bool connected = false;
+uint32_t nextSample = 0;
+
+void onWebSocketEvent(WStype_t type, uint8_t* payload, size_t length) {
+  switch (type) {
+    case WStype_CONNECTED:
+      connected = true;
+      frameCount = 0;  // Start a fresh batch on the new connection
+      Serial.println("Connected to /color");
+      break;
+    case WStype_DISCONNECTED:
+      connected = false;
+      Serial.println("Disconnected, retrying...");
+      break;
+    case WStype_TEXT:
+      // {"type": "color_selection", "color": ..., "target": ...}
+      Serial.printf("Server: %.*s\n", (int)length, (const char*)payload);
+      break;
+    default:
+      break;
+  }
+}
 
 void setup() {
   Serial.begin(115200);
   Serial.println("ESP32 Color Sensor Initializing...");
-  // Add sensor initialization code here
+
+  WiFi.begin(ssid, password);
+  while (WiFi.status() != WL_CONNECTED) {
+    delay(500);
+    Serial.print(".");
+  }
+  Serial.println("WiFi connected");
+
+  Wire.begin();
+  initColorSensor();
+
+  webSocket.begin(serverHost, serverPort, "/color");
+  webSocket.setExtraHeaders(authHeaders);
+  webSocket.onEvent(onWebSocketEvent);
+  webSocket.setReconnectInterval(2000);
+  webSocket.enableHeartbeat(15000, 3000, 2);  // Ping so dead connections are noticed
 }
 
 void loop() {
-  // Add color reading and communication logic here
-  delay(1000);
-}
\ No newline at end of file
+  webSocket.loop();
+
+  uint32_t now = millis();
+  if ((int32_t)(now - nextSample) < 0) {
+    return;
+  }
+  nextSample = now + 1000 / SAMPLE_HZ;
+
+  uint8_t red, green, blue;
+  readColorValues(&red, &green, &blue);
+  if (!connected) {
+    return;  // Readings taken while offline are dropped, not queued
+  }
+
+  if (frameCount == 0) {
+    frameStart = now;
+  }
+  uint8_t* reading = frame + HEADER_SIZE + 3 * frameCount;
+  reading[0] = red;
+  reading[1] = green;
+  reading[2] = blue;
+  frameCount++;
+
+  if (frameCount == BATCH_SIZE) {
+    uint16_t interval = 1000 / SAMPLE_HZ;
+    frame[0] = FRAME_VERSION;
+    frame[1] = frameCount;
+    memcpy(frame + 2, &interval, 2);    // ESP32 is little-endian
+    memcpy(frame + 4, &frameStart, 4);
+    webSocket.sendBIN(frame, HEADER_SIZE + 3 * frameCount);
+    frameCount = 0;
+  }
+}
+
+void initColorSensor() {
+  // Sensor-specific initialization (integration time, gain) goes here
+  Serial.println("Color sensor initialized");
+}
+
+void readColorValues(uint8_t* red, uint8_t* green, uint8_t* blue) {
+  // Replace with the sensor read, scaled to 0-255 per channel.
+  // Simulated readings for testing:
+  *red = random(0, 255);
+  *green = random(0, 255);
+  *blue = random(0, 255);
+}
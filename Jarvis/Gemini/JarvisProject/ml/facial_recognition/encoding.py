@@ -0,0 +1,65 @@
+# ml/facial_recognition/encoding.py
+"""
+Turns images into face embeddings with face_recognition (dlib) and enrolls them.
+
+Encoding is the slow part (hundreds of ms per image on a CPU); it only happens
+here, at enrollment, never at server startup. Enroll from the JarvisProject
+directory:
+    python -m ml.facial_recognition.encoding <name> photo1.jpg photo2.jpg ...
+"""
+
+import argparse
+from typing import Iterable
+
+import numpy as np
+
+from .gallery import DATA_DIR, EMBEDDING_DIM, FaceGallery
+
+try:
+    import face_recognition
+except ImportError:  # Optional: only needed to encode images; matching works on stored embeddings
+    face_recognition = None
+
+
+def _require_face_recognition() -> None:
+    if face_recognition is None:
+        raise RuntimeError("face_recognition is not installed (pip install face-recognition)")
+
+
+def encode_frame(image: np.ndarray) -> np.ndarray:
+    """Embeddings (k, 128) of every face in an RGB image array; k may be 0."""
+    _require_face_recognition()
+    encodings = face_recognition.face_encodings(image)
+    if not encodings:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+    return np.asarray(encodings, dtype=np.float32)
+
+
+def encode_files(paths: Iterable[str]) -> np.ndarray:
+    """Embeddings of the faces in the given image files, skipping images without a face."""
+    _require_face_recognition()
+    rows = []
+    for path in paths:
+        found = encode_frame(face_recognition.load_image_file(path))
+        if len(found) == 0:
+            print(f"No face found in {path}, skipped")
+        rows.append(found)
+    return np.concatenate(rows) if rows else np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("name", help="Label the faces are enrolled under")
+    parser.add_argument("images", nargs="+")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args()
+
+    embeddings = encode_files(args.images)
+    if len(embeddings) == 0:
+        raise SystemExit("No faces found; nothing enrolled")
+    size = FaceGallery(args.data_dir).enroll(args.name, embeddings)
+    print(f"Enrolled {len(embeddings)} embeddings for {args.name}; gallery now holds {size}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# ml/facial_recognition/gallery.py
+
+import json
+import os
+from typing import Iterable, List, NamedTuple, Sequence
+
+import numpy as np
+
+# Where enrolled embeddings live: gallery.npy (float32, one row per embedding),
+# gallery_norms.npy (squared row norms) and labels.json (one label per row)
+DATA_DIR = os.getenv("FACE_DATA_DIR", os.path.join(os.path.dirname(__file__), "data"))
+# face_recognition (dlib) embeddings have 128 dimensions; 0.6 is its usual match distance
+EMBEDDING_DIM = 128
+FACE_MATCH_TOLERANCE = float(os.getenv("FACE_MATCH_TOLERANCE", 0.6))
+# Gallery rows compared per block, bounding the (queries x rows) distance matrix
+MATCH_BLOCK_ROWS = int(os.getenv("FACE_MATCH_BLOCK_ROWS", 65536))
+
+
+class Match(NamedTuple):
+    label: str | None     # None when the closest profile is further than the tolerance
+    distance: float       # Euclidean distance to the closest enrolled embedding
+    index: int            # Row of that embedding in the gallery (-1 for an empty gallery)
+
+
+class FaceGallery:
+    """
+    Enrolled face embeddings as one contiguous float32 matrix.
+
+    The matrix is memory-mapped from DATA_DIR, so startup only maps the file
+    and never re-encodes images. Identifying a batch of query embeddings is one
+    matrix product against every enrolled row (per block of MATCH_BLOCK_ROWS),
+    using |g - q|^2 = |g|^2 - 2 g.q + |q|^2 with the |g|^2 column stored on disk.
+    A person may be enrolled with several embeddings; each row carries its label.
+    """
+
+    def __init__(self, data_dir: str = DATA_DIR, tolerance: float = FACE_MATCH_TOLERANCE):
+        self.data_dir = data_dir
+        self.tolerance = tolerance
+        self._matrix = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        self._sq_norms = np.empty(0, dtype=np.float32)
+        self.labels: List[str] = []
+        self.load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.data_dir, name)
+
+    def load(self) -> None:
+        """Maps the stored matrix (read-only); an empty gallery if nothing was enrolled yet."""
+        if not os.path.exists(self._path("gallery.npy")):
+            return
+        self._matrix = np.load(self._path("gallery.npy"), mmap_mode="r")
+        self._sq_norms = np.load(self._path("gallery_norms.npy"), mmap_mode="r")
+        with open(self._path("labels.json"), "r") as f:
+            self.labels = json.load(f)
+        if not (len(self.labels) == self._matrix.shape[0] == self._sq_norms.shape[0]):
+            raise ValueError(f"Face gallery files in {self.data_dir} are out of sync")
+
+    def __len__(self) -> int:
+        return self._matrix.shape[0]
+
+    @property
+    def people(self) -> List[str]:
+        return sorted(set(self.labels))
+
+    # --- Enrollment ---
+
+    def enroll(self, label: str, embeddings: np.ndarray | Sequence[float]) -> int:
+        """Adds one or more embeddings (shape (128,) or (k, 128)) for ``label``. Returns the new size."""
+        return self.enroll_many([(label, embeddings)])
+
+    def enroll_many(self, items: Iterable[tuple]) -> int:
+        """
+        Adds (label, embeddings) pairs in one rewrite of the gallery files.
+        Enrollment is rare next to identification, so the files are rewritten
+        (atomically) and mapped again rather than kept appendable.
+        """
+        new_rows, new_labels = [], []
+        for label, embeddings in items:
+            rows = np.asarray(embeddings, dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+            new_rows.append(rows)
+            new_labels.extend([label] * len(rows))
+        if not new_rows:
+            return len(self)
+
+        matrix = np.ascontiguousarray(np.concatenate([self._matrix, *new_rows]))
+        sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+        labels = self.labels + new_labels
+        # Drop the old mappings first: Windows cannot replace a file that is still mapped
+        self._matrix, self._sq_norms = matrix, sq_norms
+        os.makedirs(self.data_dir, exist_ok=True)
+        for name, array in (("gallery.npy", matrix), ("gallery_norms.npy", sq_norms)):
+            tmp = self._path(name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, self._path(name))
+        tmp = self._path("labels.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(labels, f)
+        os.replace(tmp, self._path("labels.json"))
+        self.load()
+        return len(self)
+
+    # --- Identification ---
+
+    def nearest(self, queries: np.ndarray) -> tuple:
+        """
+        Returns (row indices, distances) of the closest enrolled embedding for each
+        query row. Work is a few BLAS calls per MATCH_BLOCK_ROWS rows, never per profile.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+        # Local references: a concurrent enroll() swaps the arrays, never mutates them
+        matrix, sq_norms = self._matrix, self._sq_norms
+        count = queries.shape[0]
+        best_index = np.full(count, -1, dtype=np.int64)
+        best_d2 = np.full(count, np.inf, dtype=np.float32)
+        rows = np.arange(count)
+        for start in range(0, matrix.shape[0], MATCH_BLOCK_ROWS):
+            block = matrix[start:start + MATCH_BLOCK_ROWS]
+            # |g|^2 - 2 g.q; |q|^2 is the same for every row and added once below
+            d2 = queries @ block.T
+            d2 *= -2.0
+            d2 += sq_norms[start:start + MATCH_BLOCK_ROWS]
+            block_best = np.argmin(d2, axis=1)
+            block_d2 = d2[rows, block_best]
+            better = block_d2 < best_d2
+            best_index[better] = block_best[better] + start
+            best_d2[better] = block_d2[better]
+        best_d2 += np.einsum("ij,ij->i", queries, queries)
+        return best_index, np.sqrt(np.maximum(best_d2, 0.0))
+
+    def identify(self, queries: np.ndarray) -> List[Match]:
+        """Labels each query embedding with its closest enrolled person, or None if nobody is close enough."""
+        indices, distances = self.nearest(queries)
+        matches = []
+        for index, distance in zip(indices.tolist(), distances.tolist()):
+            label = self.labels[index] if index >= 0 and distance <= self.tolerance else None
+            matches.append(Match(label, distance, index))
+        return matches
@@ -0,0 +1,77 @@
+# ml/facial_recognition/matcher.py
+
+import asyncio
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+from .gallery import EMBEDDING_DIM, FaceGallery, Match
+
+# Frames arriving within this window (seconds) are identified together, up to FACE_MATCH_MAX_BATCH
+FACE_MATCH_MAX_WAIT = float(os.getenv("FACE_MATCH_MAX_WAIT", 0.005))
+FACE_MATCH_MAX_BATCH = int(os.getenv("FACE_MATCH_MAX_BATCH", 256))
+
+
+class BatchMatcher:
+    """
+    Batches concurrent identify() calls into one FaceGallery.identify() call.
+
+    The first embedding to arrive opens a window of ``max_wait`` seconds (closed
+    early once ``max_batch`` embeddings are waiting); everything queued by then is
+    stacked into one matrix and matched in a worker thread, so the event loop
+    keeps serving while NumPy runs.
+    """
+
+    def __init__(self, gallery: FaceGallery, max_batch: int = FACE_MATCH_MAX_BATCH,
+                 max_wait: float = FACE_MATCH_MAX_WAIT):
+        self.gallery = gallery
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._waiting: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._arrived = asyncio.Event()
+        self._full = asyncio.Event()
+        # Counters for tuning max_wait/max_batch
+        self.batches = 0
+        self.matched = 0
+
+    async def identify(self, embedding: np.ndarray) -> Match:
+        """Identifies one face embedding (shape (128,))."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append((np.asarray(embedding, dtype=np.float32).reshape(EMBEDDING_DIM), future))
+        self._arrived.set()
+        if len(self._waiting) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def identify_many(self, embeddings: np.ndarray) -> List[Match]:
+        """Identifies all faces found in one frame; they join the same batch."""
+        return list(await asyncio.gather(*(self.identify(e) for e in np.asarray(embeddings).reshape(-1, EMBEDDING_DIM))))
+
+    async def run(self) -> None:
+        """Background task that forms and matches batches until cancelled."""
+        while True:
+            await self._arrived.wait()
+            if len(self._waiting) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            batch, self._waiting = self._waiting[:self.max_batch], self._waiting[self.max_batch:]
+            if not self._waiting:
+                self._arrived.clear()
+            if len(self._waiting) < self.max_batch:
+                self._full.clear()
+
+            try:
+                matches = await asyncio.to_thread(self.gallery.identify, np.stack([e for e, _ in batch]))
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), match in zip(batch, matches):
+                if not future.done():
+                    future.set_result(match)
+            self.batches += 1
+            self.matched += len(batch)
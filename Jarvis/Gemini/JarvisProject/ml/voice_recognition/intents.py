@@ -0,0 +1,77 @@
+# ml/voice_recognition/intents.py
+
+import inspect
+import os
+import re
+import unicodedata
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Tuple
+
+# A partial hypothesis at least this settled may trigger an intent before the speaker finishes
+VOICE_PARTIAL_CONFIDENCE = float(os.getenv("VOICE_PARTIAL_CONFIDENCE", 0.85))
+# Final hypotheses below this are ignored
+VOICE_FINAL_CONFIDENCE = float(os.getenv("VOICE_FINAL_CONFIDENCE", 0.5))
+
+IntentHandler = Callable[[str], Any | Awaitable[Any]]
+
+
+def normalize(text: str) -> List[str]:
+    """Lower-case words without accents, so "Jarvis, ¿qué estado?" matches "que estado"."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.findall(r"[a-z0-9]+", text)
+
+
+class IntentMatch(NamedTuple):
+    name: str
+    phrase: str
+
+
+class IntentRouter:
+    """
+    Maps recognized text to named intents.
+    An intent matches when all words of one of its phrases appear in the text in
+    order (other words may sit in between), so it can fire on a partial result
+    as soon as the last needed word has been heard.
+    """
+
+    def __init__(self):
+        self._intents: List[Tuple[str, Tuple[str, ...], str]] = []
+        self._handlers: Dict[str, IntentHandler] = {}
+
+    def add(self, name: str, phrases: List[str], handler: IntentHandler | None = None) -> None:
+        for phrase in phrases:
+            self._intents.append((name, tuple(normalize(phrase)), phrase))
+        if handler is not None:
+            self._handlers[name] = handler
+
+    def on(self, name: str, *phrases: str):
+        """Decorator form of add()."""
+        def register(fn: IntentHandler) -> IntentHandler:
+            self.add(name, list(phrases), fn)
+            return fn
+        return register
+
+    def match(self, text: str) -> IntentMatch | None:
+        words = normalize(text)
+        best = None
+        for name, needed, phrase in self._intents:
+            position = 0
+            for word in needed:
+                try:
+                    position = words.index(word, position) + 1
+                except ValueError:
+                    break
+            else:
+                # Prefer the most specific phrase when several match
+                if best is None or len(needed) > best[0]:
+                    best = (len(needed), IntentMatch(name, phrase))
+        return best[1] if best else None
+
+    async def dispatch(self, name: str, text: str) -> Any:
+        handler = self._handlers.get(name)
+        if handler is None:
+            return None
+        result = handler(text)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
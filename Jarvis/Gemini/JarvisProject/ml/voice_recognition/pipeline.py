@@ -0,0 +1,201 @@
+# ml/voice_recognition/pipeline.py
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict
+
+from .intents import VOICE_FINAL_CONFIDENCE, VOICE_PARTIAL_CONFIDENCE, IntentRouter
+from .recognizers import Hypothesis, RecognizerFactory
+from .vad import SAMPLE_RATE, Segmenter
+
+# Recognition threads shared by all streams, and how many streams may be open at once
+VOICE_WORKERS = int(os.getenv("VOICE_WORKERS", 2))
+VOICE_MAX_STREAMS = int(os.getenv("VOICE_MAX_STREAMS", 16))
+
+EventSink = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class _Utterance:
+    __slots__ = ("number", "recognizer", "pending", "ended", "job", "started_at", "speech_end",
+                 "dispatched", "last_text")
+
+    def __init__(self, number: int):
+        self.number = number
+        self.recognizer = None
+        self.pending = bytearray()  # Speech not yet given to the recognizer
+        self.ended = False
+        self.job: asyncio.Task | None = None
+        self.started_at = time.perf_counter()
+        self.speech_end = 0         # Stream offset (bytes) where the speech ended
+        self.dispatched = False
+        self.last_text = ""
+
+
+class VoicePipeline:
+    """
+    Shared part of the voice pipeline: the recognizer factory, the intent router
+    and a bounded recognition pool.
+
+    At most ``workers`` recognition steps run at a time. Each utterance has at most
+    one step in flight; audio arriving meanwhile accumulates and goes into its next
+    step, so a slow engine gets fewer, larger chunks instead of a growing queue.
+    """
+
+    def __init__(self, recognizer_factory: RecognizerFactory | None, intents: IntentRouter,
+                 workers: int = VOICE_WORKERS, max_streams: int = VOICE_MAX_STREAMS,
+                 sample_rate: int = SAMPLE_RATE, partial_confidence: float = VOICE_PARTIAL_CONFIDENCE,
+                 final_confidence: float = VOICE_FINAL_CONFIDENCE):
+        self.recognizer_factory = recognizer_factory
+        self.intents = intents
+        self.partial_confidence = partial_confidence
+        self.final_confidence = final_confidence
+        self.sample_rate = sample_rate
+        self.max_streams = max_streams
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="voice")
+        self._slots = asyncio.Semaphore(workers)
+        self.streams = 0
+        # Counters
+        self.utterances = 0
+        self.steps = 0
+        self.intents_dispatched = 0
+        self.early_dispatches = 0  # Intents fired on a partial result
+        self.dropped_bytes = 0
+
+    @property
+    def available(self) -> bool:
+        return self.recognizer_factory is not None
+
+    def open_stream(self, on_event: EventSink) -> "VoiceStream | None":
+        """A new audio stream, or None when max_streams are already open."""
+        if self.streams >= self.max_streams:
+            return None
+        self.streams += 1
+        return VoiceStream(self, on_event)
+
+    async def run_in_pool(self, fn: Callable, *args) -> Any:
+        async with self._slots:
+            self.steps += 1
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"streams": self.streams, "utterances": self.utterances, "steps": self.steps,
+                "intents": self.intents_dispatched, "early_intents": self.early_dispatches,
+                "dropped_seconds": round(self.dropped_bytes / (2 * self.sample_rate), 3)}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class VoiceStream:
+    """
+    One client's audio: PCM chunks go through voice-activity detection, and each
+    utterance is recognized incrementally while it is still being spoken.
+
+    Events passed to ``on_event``: speech_start, partial (text changed), final,
+    intent (with "early": true when fired on a partial) and error.
+    """
+
+    def __init__(self, pipeline: VoicePipeline, on_event: EventSink):
+        self.pipeline = pipeline
+        self.on_event = on_event
+        self.segmenter = Segmenter(pipeline.sample_rate)
+        self._current: _Utterance | None = None
+        self._jobs: set = set()
+        self._closed = False
+
+    def _ms(self, offset: int) -> float:
+        return round(offset * 1000 / (2 * self.pipeline.sample_rate), 1)
+
+    async def feed(self, chunk: bytes) -> None:
+        """Adds 16-bit mono PCM audio; returns without waiting for recognition."""
+        for event, audio in self.segmenter.process(chunk):
+            await self._segment(event, audio)
+
+    async def close(self) -> None:
+        """Finishes an open utterance, waits for pending recognition and releases the stream slot."""
+        if self._closed:
+            return
+        self._closed = True
+        for event, audio in self.segmenter.flush():
+            await self._segment(event, audio)
+        if self._jobs:
+            await asyncio.gather(*self._jobs, return_exceptions=True)
+        self.pipeline.dropped_bytes += self.segmenter.dropped_bytes
+        self.pipeline.streams -= 1
+
+    async def _segment(self, event: str, audio: bytes) -> None:
+        if event == "start":
+            self.pipeline.utterances += 1
+            self._current = _Utterance(self.pipeline.utterances)
+            await self.on_event({"type": "speech_start", "utterance": self._current.number,
+                                 "at_ms": self._ms(self.segmenter.position)})
+            return
+        utterance = self._current
+        if utterance is None:
+            return
+        if event == "audio":
+            utterance.pending += audio
+        elif event == "end":
+            utterance.ended = True
+            utterance.speech_end = self.segmenter.last_voiced
+            self._current = None
+        if utterance.job is None:
+            utterance.job = asyncio.create_task(self._recognize(utterance))
+            self._jobs.add(utterance.job)
+            utterance.job.add_done_callback(self._jobs.discard)
+
+    def _step(self, utterance: _Utterance, audio: bytes, final: bool) -> Hypothesis:
+        """Runs on a pool thread; creating the recognizer here keeps model loading off the loop."""
+        if utterance.recognizer is None:
+            utterance.recognizer = self.pipeline.recognizer_factory(self.pipeline.sample_rate)
+        hypothesis = utterance.recognizer.accept(audio) if audio else None
+        return utterance.recognizer.finish() if final else hypothesis
+
+    async def _recognize(self, utterance: _Utterance) -> None:
+        try:
+            while utterance.pending or utterance.ended:
+                audio, final = bytes(utterance.pending), utterance.ended
+                utterance.pending.clear()
+                hypothesis = await self.pipeline.run_in_pool(self._step, utterance, audio, final)
+                if final:
+                    await self._final(utterance, hypothesis)
+                    break
+                await self._partial(utterance, hypothesis)
+        except Exception as e:
+            await self.on_event({"type": "error", "utterance": utterance.number, "detail": repr(e)})
+        finally:
+            utterance.job = None
+
+    async def _partial(self, utterance: _Utterance, hypothesis: Hypothesis) -> None:
+        if not hypothesis.text:
+            return
+        if hypothesis.text != utterance.last_text:
+            utterance.last_text = hypothesis.text
+            await self.on_event({"type": "partial", "utterance": utterance.number, "text": hypothesis.text,
+                                 "confidence": hypothesis.confidence})
+        if not utterance.dispatched and hypothesis.confidence >= self.pipeline.partial_confidence:
+            await self._dispatch(utterance, hypothesis, early=True)
+
+    async def _final(self, utterance: _Utterance, hypothesis: Hypothesis) -> None:
+        await self.on_event({"type": "final", "utterance": utterance.number, "text": hypothesis.text,
+                             "confidence": hypothesis.confidence, "speech_end_ms": self._ms(utterance.speech_end)})
+        if not utterance.dispatched and hypothesis.confidence >= self.pipeline.final_confidence:
+            await self._dispatch(utterance, hypothesis, early=False)
+
+    async def _dispatch(self, utterance: _Utterance, hypothesis: Hypothesis, early: bool) -> None:
+        match = self.pipeline.intents.match(hypothesis.text)
+        if match is None:
+            return
+        utterance.dispatched = True
+        self.pipeline.intents_dispatched += 1
+        self.pipeline.early_dispatches += early
+        event = {"type": "intent", "utterance": utterance.number, "intent": match.name,
+                 "text": hypothesis.text, "confidence": hypothesis.confidence, "early": early,
+                 "since_speech_start_ms": round((time.perf_counter() - utterance.started_at) * 1000, 1)}
+        try:
+            event["result"] = await self.pipeline.intents.dispatch(match.name, hypothesis.text)
+        except Exception as e:
+            event["error"] = repr(e)
+        await self.on_event(event)
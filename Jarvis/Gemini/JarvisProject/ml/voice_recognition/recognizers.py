@@ -0,0 +1,145 @@
+# ml/voice_recognition/recognizers.py
+
+import io
+import json
+import os
+import threading
+import wave
+from typing import Any, Callable, NamedTuple
+
+from .vad import SAMPLE_RATE
+
+try:
+    import vosk
+except ImportError:  # Optional: offline streaming recognition
+    vosk = None
+
+try:
+    import speech_recognition
+except ImportError:  # Optional: SpeechRecognition package (utterance-at-a-time engines)
+    speech_recognition = None
+
+# "vosk", "sphinx" or "none"; unset picks vosk when it and its model are available
+VOICE_ENGINE = os.getenv("VOICE_ENGINE")
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", os.path.join(os.path.dirname(__file__), "models", "vosk"))
+
+
+class Hypothesis(NamedTuple):
+    text: str
+    confidence: float  # 0..1; partial hypotheses report how settled the text is
+
+
+class Recognizer:
+    """
+    One utterance's worth of incremental recognition.
+    accept() is fed successive PCM chunks and returns the current partial
+    hypothesis; finish() returns the final one. Calls for one recognizer never
+    overlap, but may run on different pool threads.
+    """
+
+    def accept(self, pcm: bytes) -> Hypothesis:
+        raise NotImplementedError
+
+    def finish(self) -> Hypothesis:
+        raise NotImplementedError
+
+
+RecognizerFactory = Callable[[int], Recognizer]
+
+
+class VoskRecognizer(Recognizer):
+    """
+    Streaming Kaldi recognizer. Vosk partials carry no confidence, so a partial
+    counts as settled (0.9) once the same text came back twice in a row.
+    """
+
+    def __init__(self, model, sample_rate: int = SAMPLE_RATE):
+        self._recognizer = vosk.KaldiRecognizer(model, sample_rate)
+        self._recognizer.SetWords(True)
+        self._last_partial = ""
+        self._final_parts = []
+
+    def accept(self, pcm: bytes) -> Hypothesis:
+        if self._recognizer.AcceptWaveform(pcm):
+            # Vosk found an internal endpoint; keep that piece and start a new partial
+            self._final_parts.append(json.loads(self._recognizer.Result()).get("text", ""))
+            partial = ""
+        else:
+            partial = json.loads(self._recognizer.PartialResult()).get("partial", "")
+        text = " ".join(p for p in (*self._final_parts, partial) if p)
+        confidence = 0.9 if text and text == self._last_partial else 0.6
+        self._last_partial = text
+        return Hypothesis(text, confidence)
+
+    def finish(self) -> Hypothesis:
+        result = json.loads(self._recognizer.FinalResult())
+        words = result.get("result") or []
+        text = " ".join(p for p in (*self._final_parts, result.get("text", "")) if p)
+        confidence = sum(w.get("conf", 1.0) for w in words) / len(words) if words else (1.0 if text else 0.0)
+        return Hypothesis(text, confidence)
+
+
+class SphinxRecognizer(Recognizer):
+    """
+    CMU Sphinx through SpeechRecognition. It only decodes whole utterances, so
+    partials stay empty and the intent is dispatched on the final result.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self._engine = speech_recognition.Recognizer()
+        self._sample_rate = sample_rate
+        self._audio = io.BytesIO()
+
+    def accept(self, pcm: bytes) -> Hypothesis:
+        self._audio.write(pcm)
+        return Hypothesis("", 0.0)
+
+    def finish(self) -> Hypothesis:
+        audio = speech_recognition.AudioData(self._audio.getvalue(), self._sample_rate, 2)
+        try:
+            return Hypothesis(self._engine.recognize_sphinx(audio), 0.8)
+        except speech_recognition.UnknownValueError:
+            return Hypothesis("", 0.0)
+
+
+def read_wav(path: str) -> bytes:
+    """PCM frames of a 16-bit mono WAV file recorded at SAMPLE_RATE."""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1 or wav.getframerate() != SAMPLE_RATE:
+            raise ValueError(f"{path}: expected 16-bit mono PCM at {SAMPLE_RATE} Hz")
+        return wav.readframes(wav.getnframes())
+
+
+def load_vosk_model(path: str = VOSK_MODEL_PATH):
+    return vosk.Model(path)
+
+
+_vosk_model = None
+_vosk_lock = threading.Lock()
+
+
+def _shared_vosk_model():
+    global _vosk_model
+    with _vosk_lock:
+        if _vosk_model is None:
+            _vosk_model = load_vosk_model()
+    return _vosk_model
+
+
+def create_recognizer_factory(engine: str | None = VOICE_ENGINE,
+                              vosk_model: Callable[[], Any] | None = None) -> RecognizerFactory | None:
+    """
+    Picks the recognition engine. Nothing is loaded here: the Vosk model is
+    fetched from ``vosk_model()`` (default: loaded once and kept) the first
+    time a recognizer is created, on a pool thread.
+    Returns None when no engine is available.
+    """
+    if engine is None:
+        engine = "vosk" if vosk is not None and os.path.isdir(VOSK_MODEL_PATH) else (
+            "sphinx" if speech_recognition is not None else "none")
+    if engine == "vosk" and vosk is not None:
+        get_model = vosk_model or _shared_vosk_model
+        return lambda sample_rate: VoskRecognizer(get_model(), sample_rate)
+    if engine == "sphinx" and speech_recognition is not None:
+        return SphinxRecognizer
+    return None
@@ -0,0 +1,123 @@
+# ml/voice_recognition/vad.py
+
+import collections
+import os
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+try:
+    import webrtcvad
+except ImportError:  # Optional: falls back to the energy detector below
+    webrtcvad = None
+
+# Audio format used across the pipeline: 16-bit little-endian mono PCM
+SAMPLE_RATE = int(os.getenv("VOICE_SAMPLE_RATE", 16000))
+FRAME_MS = 20  # webrtcvad accepts 10, 20 or 30 ms frames
+# Energy detector: a frame is speech when it is this many dB above the tracked noise floor...
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", 12))
+# ...and above this absolute level (dBFS), so digital silence never counts
+VAD_MIN_DB = float(os.getenv("VAD_MIN_DB", -50))
+# Silence (ms) that ends an utterance, and audio (ms) kept from before speech was detected
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", 300))
+VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", 200))
+
+
+class VoiceActivityDetector:
+    """
+    Classifies fixed-size PCM frames as speech or not.
+    Uses webrtcvad when installed; otherwise compares frame energy with a noise
+    floor that follows the quietest recent frames.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, aggressiveness: int = 2):
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_rate * FRAME_MS // 1000 * 2
+        self._webrtc = webrtcvad.Vad(aggressiveness) if webrtcvad is not None else None
+        self.noise_db = VAD_MIN_DB
+
+    def is_speech(self, frame: bytes) -> bool:
+        if self._webrtc is not None:
+            return self._webrtc.is_speech(frame, self.sample_rate)
+        samples = np.frombuffer(frame, dtype="<i2").astype(np.float32)
+        level = 10 * np.log10(np.mean(samples * samples) / (32768.0 ** 2) + 1e-12)
+        speech = level >= VAD_MIN_DB and level >= self.noise_db + VAD_MARGIN_DB
+        # Noise floor: drops at once to quieter frames, creeps up slowly otherwise
+        if level < self.noise_db:
+            self.noise_db = level
+        elif not speech:
+            self.noise_db += 0.05 * (level - self.noise_db)
+        return bool(speech)
+
+
+class Segmenter:
+    """
+    Turns a stream of PCM chunks into utterances.
+
+    process() yields ("start", b""), ("audio", pcm) and ("end", b"") events.
+    Audio outside utterances is dropped here, before any recognition work;
+    ``dropped_bytes`` counts it. An utterance starts when most of the last few
+    frames are speech (including a short pre-roll) and ends after
+    VAD_HANGOVER_MS of non-speech.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, detector: VoiceActivityDetector | None = None):
+        self.detector = detector or VoiceActivityDetector(sample_rate)
+        self.frame_bytes = self.detector.frame_bytes
+        self._buffer = bytearray()
+        self._preroll: "collections.deque[Tuple[bytes, bool]]" = collections.deque(
+            maxlen=max(1, VAD_PREROLL_MS // FRAME_MS))
+        self._hangover_frames = max(1, VAD_HANGOVER_MS // FRAME_MS)
+        self._silent_frames = 0
+        self.in_speech = False
+        self.dropped_bytes = 0
+        self.speech_bytes = 0
+        # Stream offsets (bytes) of everything framed so far and of the end of the last speech frame
+        self.position = 0
+        self.last_voiced = 0
+
+    def process(self, chunk: bytes) -> Iterator[Tuple[str, bytes]]:
+        self._buffer += chunk
+        frames: List[bytes] = []
+        usable = len(self._buffer) - len(self._buffer) % self.frame_bytes
+        for offset in range(0, usable, self.frame_bytes):
+            frames.append(bytes(self._buffer[offset:offset + self.frame_bytes]))
+        del self._buffer[:usable]
+
+        speech_run = bytearray()
+        for frame in frames:
+            speech = self.detector.is_speech(frame)
+            self.position += self.frame_bytes
+            if speech:
+                self.last_voiced = self.position
+            if not self.in_speech:
+                if len(self._preroll) == self._preroll.maxlen:
+                    # The oldest frame leaves the pre-roll without ever reaching the recognizer
+                    self.dropped_bytes += self.frame_bytes
+                self._preroll.append((frame, speech))
+                voiced = sum(v for _, v in self._preroll)
+                if speech and voiced * 2 > self._preroll.maxlen:
+                    self.in_speech = True
+                    self._silent_frames = 0
+                    yield "start", b""
+                    speech_run += b"".join(f for f, _ in self._preroll)
+                    self._preroll.clear()
+                continue
+
+            speech_run += frame
+            self._silent_frames = 0 if speech else self._silent_frames + 1
+            if self._silent_frames >= self._hangover_frames:
+                self.speech_bytes += len(speech_run)
+                yield "audio", bytes(speech_run)
+                speech_run.clear()
+                self.in_speech = False
+                yield "end", b""
+        if speech_run:
+            self.speech_bytes += len(speech_run)
+            yield "audio", bytes(speech_run)
+
+    def flush(self) -> Iterator[Tuple[str, bytes]]:
+        """Ends an utterance still open when the stream closes."""
+        if self.in_speech:
+            self.in_speech = False
+            yield "end", b""
@@ -0,0 +1,96 @@
+# server/app/api/color_router.py
+
+import time
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+
+from ..core.registry import client_registry
+from ..core.security import AuthenticatedClient
+from ..models.color import ColorReading
+from ..services.color_sensor import FrameError, color_sensors
+from ..services.replication import failover_node
+from .session_router import authenticate_websocket
+
+router = APIRouter()
+
+# A streaming sensor counts as a sign of life at most this often (seconds)
+COLOR_TOUCH_INTERVAL = 1.0
+
+
+def _touch(sensor_id: str) -> None:
+    if client_registry.touch(sensor_id, status="online") is None:
+        client_registry.register(sensor_id)
+        client_registry.touch(sensor_id, status="online")
+
+
+@router.websocket("/color")
+async def color_stream(websocket: WebSocket):
+    """
+    Persistent channel for colour sensors (ESP32).
+    After authenticating (same as /ws), the sensor sends binary frames, each a
+    batch of RGB readings (format in services/color_sensor.py). Nothing is
+    answered per frame; only selection events are sent back as JSON.
+    """
+    await websocket.accept()
+    if not failover_node.is_leader:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Standby server")
+        return
+    sensor_id = await authenticate_websocket(websocket)
+    if sensor_id is None:
+        return
+    _touch(sensor_id)
+    client_registry.update(sensor_id, connection="color")
+    last_touch = time.monotonic()
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            data = message.get("bytes")
+            if not data:
+                continue
+            try:
+                events = color_sensors.ingest_frame(sensor_id, data)
+            except FrameError:
+                continue  # Counted in /color/stats; one bad frame should not drop the stream
+            if events:
+                for event in events:
+                    await websocket.send_json(event)
+                await color_sensors.publish(events)
+            now = time.monotonic()
+            if now - last_touch >= COLOR_TOUCH_INTERVAL:
+                client_registry.touch(sensor_id, status=None)
+                last_touch = now
+    except WebSocketDisconnect:
+        pass
+    finally:
+        color_sensors.disconnect(sensor_id)
+        client_registry.update(sensor_id, status="disconnected", connection=None)
+
+
+@router.post("/color")
+async def post_color(reading: ColorReading, client_id: AuthenticatedClient):
+    """Single reading as JSON, for sensors that cannot keep a connection open. Fine at a few Hz, not at 100."""
+    _touch(client_id)
+    rgb = np.array([[reading.red, reading.green, reading.blue]], dtype=np.uint8)
+    events = color_sensors.ingest(client_id, np.array([time.time()]), rgb)
+    await color_sensors.publish(events)
+    return {"selected": color_sensors.sensor(client_id).selector.selected, "events": events}
+
+
+@router.get("/color/stats")
+async def get_color_stats(client_id: AuthenticatedClient):
+    """Readings and selection events per sensor, current selection and colour-to-system targets."""
+    return color_sensors.stats()
+
+
+@router.get("/color/{sensor_id}/readings")
+async def get_color_readings(sensor_id: str, client_id: AuthenticatedClient,
+                             count: int = Query(100, ge=1, le=10000)):
+    """The most recent readings from a sensor's ring buffer, oldest first."""
+    readings = color_sensors.recent(sensor_id, count)
+    if not readings:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No readings from '{sensor_id}'")
+    return {"sensor": sensor_id, "readings": readings}
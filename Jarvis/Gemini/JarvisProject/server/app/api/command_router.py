@@ -0,0 +1,91 @@
+# server/app/api/command_router.py
+
+import os
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from ..core.registry import client_registry
+from ..core.security import AuthenticatedClient
+from ..models.command import CommandAcks, CommandFanOut, CommandSubmission
+from ..services.commands import QueueFull, command_dispatcher
+
+# Longest a GET /commands/poll may be held open (seconds); keep it below proxy idle timeouts
+COMMAND_POLL_MAX_WAIT = float(os.getenv("COMMAND_POLL_MAX_WAIT", 30))
+
+router = APIRouter()
+
+
+# --- Sending commands ---
+
+@router.post("/commands", status_code=status.HTTP_202_ACCEPTED)
+async def submit_command(submission: CommandSubmission, client_id: AuthenticatedClient):
+    """
+    Queues a command for one client. It goes out over the client's WebSocket
+    session, or with its next long-poll; with ``wait`` the call returns once acked.
+    """
+    try:
+        command = command_dispatcher.submit(submission.client_id, submission.action, submission.args,
+                                            priority=submission.priority, ttl=submission.ttl,
+                                            idempotency_key=submission.idempotency_key)
+    except QueueFull as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    if submission.wait:
+        await command_dispatcher.wait(command, submission.wait)
+    return command.to_dict()
+
+
+@router.post("/commands/fanout", status_code=status.HTTP_202_ACCEPTED)
+async def fan_out_command(body: CommandFanOut, client_id: AuthenticatedClient):
+    """Sends one command to a group of clients; with ``wait`` the call returns once all have acked."""
+    targets = body.clients if body.clients is not None else [entry.client_id for entry in client_registry]
+    group = command_dispatcher.fan_out(targets, body.action, body.args, priority=body.priority, ttl=body.ttl,
+                                       idempotency_key=body.idempotency_key)
+    if body.wait:
+        await group.wait(body.wait)
+    return group.summary()
+
+
+@router.get("/commands/groups/{group_id}")
+async def get_command_group(group_id: str, client_id: AuthenticatedClient):
+    """Delivery state of a fan-out."""
+    group = command_dispatcher.group(group_id)
+    if group is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown group: {group_id}")
+    return group.summary()
+
+
+@router.get("/commands")
+async def get_command_stats(client_id: AuthenticatedClient):
+    """Queue depths, delivery counters and ack latency percentiles."""
+    return command_dispatcher.stats()
+
+
+# --- Receiving commands (clients without a WebSocket session) ---
+
+@router.get("/commands/poll")
+async def poll_commands(client_id: AuthenticatedClient, wait: float = Query(25, ge=0),
+                        limit: int = Query(10, ge=1, le=100)):
+    """
+    Long-poll for the calling client: answers as soon as commands are queued for
+    it, or with an empty list after ``wait`` seconds. Ack them with POST /commands/ack.
+    """
+    client_registry.touch(client_id, status=None)  # A poll is a sign of life
+    frames = await command_dispatcher.poll(client_id, min(wait, COMMAND_POLL_MAX_WAIT), limit)
+    return {"commands": frames}
+
+
+@router.post("/commands/ack")
+async def acknowledge_commands(body: CommandAcks, client_id: AuthenticatedClient):
+    """Acks of polled commands; acks for unknown or already finished commands are ignored."""
+    accepted = sum(command_dispatcher.acknowledge(client_id, ack.command_id, ack.model_dump())
+                   for ack in body.acks)
+    return {"accepted": accepted}
+
+
+@router.get("/commands/{command_id}")
+async def get_command(command_id: str, client_id: AuthenticatedClient):
+    """A command's delivery state and, once acked, the client's result or error."""
+    command = command_dispatcher.get(command_id)
+    if command is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown command: {command_id}")
+    return command.to_dict()
@@ -0,0 +1,74 @@
+# server/app/api/dashboard_router.py
+
+import asyncio
+import os
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import RedirectResponse
+
+from ..core.registry import client_registry
+from ..core.static_assets import StaticAssets
+from ..services.dashboard import dashboard_aggregates
+
+# Frontend folder: its dist/ build output when present, else public/ and src/ as they are
+WEB_UI_DIR = os.getenv("WEB_UI_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "..", "web_ui", "frontend"))
+
+router = APIRouter()
+_assets: StaticAssets | None = None
+
+
+def _static() -> StaticAssets:
+    global _assets
+    if _assets is None:  # Looked up on first use: nothing is read at import time
+        dist = os.path.join(WEB_UI_DIR, "dist")
+        roots = [dist] if os.path.isdir(dist) else [os.path.join(WEB_UI_DIR, "public"), os.path.join(WEB_UI_DIR, "src")]
+        _assets = StaticAssets(roots)
+    return _assets
+
+
+def _current() -> None:
+    # merge() (state restore, replication) bypasses the sinks; recount if the fleet size drifted
+    if len(dashboard_aggregates) != len(client_registry):
+        dashboard_aggregates.rebuild(client_registry)
+
+
+# --- Aggregates ---
+# Unauthenticated like /status, which the web UI reads as well
+
+@router.get("/dashboard/summary")
+async def get_dashboard_summary():
+    """Client counts by status and OS and a histogram of heartbeat ages."""
+    _current()
+    return {"version": client_registry.version, **dashboard_aggregates.summary()}
+
+
+@router.get("/dashboard/slowest")
+async def get_slowest_clients(limit: int = Query(10, ge=1, le=100)):
+    """Top-N clients by average heartbeat interval."""
+    _current()
+    return {"clients": dashboard_aggregates.slowest(limit)}
+
+
+# --- Frontend ---
+
+@router.get("/ui", include_in_schema=False)
+async def web_ui_root():
+    return RedirectResponse("/ui/")
+
+
+@router.get("/ui/{path:path}", include_in_schema=False)
+async def get_web_ui_asset(path: str, request: Request):
+    """Frontend files, pre-compressed (br/gzip) and with cache headers (see core/static_assets.py)."""
+    assets = _static()
+    file_path = await asyncio.to_thread(assets.resolve, path)
+    if file_path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    asset = await asyncio.to_thread(assets.load, file_path)
+    headers = {"ETag": asset.etag, "Vary": "Accept-Encoding",
+               "Cache-Control": assets.cache_control(file_path, "v" in request.query_params)}
+    if request.headers.get("if-none-match") == asset.etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    coding, body = assets.choose(asset, request.headers.get("accept-encoding", ""))
+    if coding != "identity":
+        headers["Content-Encoding"] = coding
+    return Response(body, media_type=asset.content_type, headers=headers)
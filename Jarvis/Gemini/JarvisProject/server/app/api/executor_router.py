@@ -0,0 +1,15 @@
+# server/app/api/executor_router.py
+
+from fastapi import APIRouter
+
+from ..core.executor import execution_pool
+from ..core.loop_monitor import loop_lag_monitor
+from ..core.security import AuthenticatedClient
+
+router = APIRouter()
+
+
+@router.get("/executor")
+async def get_executor_stats(client_id: AuthenticatedClient):
+    """Per-job-type load (running, waiting, rejected, average run/wait time) and event-loop lag."""
+    return {**execution_pool.stats(), "loop_lag": loop_lag_monitor.stats()}
@@ -0,0 +1,50 @@
+# server/app/api/failover_router.py
+
+import asyncio
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+
+from ..services.replication import failover_node
+from ..core.logs import get_logger
+
+log = get_logger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/failover/status")
+async def get_failover_status():
+    """Role of this server and, on a standby, how far it trails the leader (lag_seq, lag_ms)."""
+    return failover_node.status()
+
+
+@router.websocket("/replication")
+async def replication_feed(websocket: WebSocket):
+    """
+    Streams the replication log to a standby.
+    The standby opens with {"type": "subscribe", "secret": ..., "epoch": ..., "from_seq": ...}
+    and receives a snapshot when it cannot resume from from_seq, then entries and heartbeats.
+    Refused (403 on the handshake) unless a peer and a replication secret are configured.
+    """
+    if not failover_node.enabled or not failover_node.secret:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    try:
+        frame = await asyncio.wait_for(websocket.receive_json(), 10)
+    except (asyncio.TimeoutError, ValueError, WebSocketDisconnect):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Subscribe frame required")
+        return
+    if not isinstance(frame, dict) or not failover_node.check_secret(frame.get("secret")):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid replication secret")
+        return
+    if not failover_node.is_leader:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Not the leader")
+        return
+
+    log.info("replication_subscribed")
+    try:
+        await failover_node.stream(websocket.send_json, frame.get("epoch"), int(frame.get("from_seq") or 0))
+    except (WebSocketDisconnect, RuntimeError, OSError):
+        pass
+    log.info("replication_unsubscribed")
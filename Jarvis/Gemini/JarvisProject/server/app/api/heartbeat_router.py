@@ -0,0 +1,111 @@
+# server/app/api/heartbeat_router.py
+
+import json
+from typing import Any, List, Tuple, get_args
+
+from fastapi import APIRouter, HTTPException, Request, status
+
+from ..core.auth_index import auth_index
+from ..core.registry import client_registry
+from ..core.security import AuthenticatedClient
+from ..core.serialization import MSGPACK_TYPES, FastJSONResponse
+from ..models.status import ReportedStatus
+
+try:
+    import msgpack
+except ImportError:  # Optional: only needed for application/msgpack payloads
+    msgpack = None
+
+router = APIRouter()
+
+MAX_BATCH_SIZE = 5000
+REPORTED_STATUSES = frozenset(get_args(ReportedStatus))
+
+
+def _decode_body(request: Request, body: bytes) -> Any:
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+    if content_type in MSGPACK_TYPES:
+        if msgpack is None:
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                detail="msgpack is not installed on the server")
+        try:
+            return msgpack.unpackb(body, raw=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid msgpack body")
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body")
+
+
+def _parse_item(item: Any) -> Tuple[str, str] | str:
+    """Returns (client_id, status) or an error string. Items are "id", ["id", "status"] or {"client_id", "status"}."""
+    if isinstance(item, str):
+        return item, "online"
+    if isinstance(item, (list, tuple)) and 1 <= len(item) <= 2:
+        client_id, item_status = item[0], item[1] if len(item) == 2 else "online"
+    elif isinstance(item, dict):
+        client_id, item_status = item.get("client_id"), item.get("status", "online")
+    else:
+        return "invalid item"
+    if not isinstance(client_id, str) or not client_id:
+        return "invalid client_id"
+    if item_status not in REPORTED_STATUSES:
+        return "invalid status"
+    return client_id, item_status
+
+
+@router.post("/heartbeat/batch")
+async def batch_heartbeat(request: Request, relay_id: AuthenticatedClient):
+    """
+    Bulk heartbeats from a gateway/relay fronting many machines.
+    The relay authenticates once with its own headers and must be allowed to
+    report for each client ("relay_for" in the client config).
+
+    Body (JSON, or msgpack with Content-Type: application/msgpack):
+        {"heartbeats": ["id", ["id", "status"], {"client_id": "id", "status": "busy"}, ...]}
+    The whole batch is validated in one pass and applied to the registry in one call.
+    Statuses are one of ReportedStatus (models/status.py); the default is "online".
+    The response lists one result per item, in order: "ok", "registered" or an error
+    ("duplicate" for a client_id already seen earlier in the batch).
+    """
+    payload = _decode_body(request, await request.body())
+    items = payload.get("heartbeats") if isinstance(payload, dict) else None
+    if not isinstance(items, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Body must be an object with a 'heartbeats' list")
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"At most {MAX_BATCH_SIZE} heartbeats per batch")
+
+    results: List[str | None] = []
+    accepted: List[Tuple[str, str]] = []
+    seen = set()
+    for item in items:
+        parsed = _parse_item(item)
+        if isinstance(parsed, str):
+            results.append(parsed)
+            continue
+        client_id = parsed[0]
+        if client_id in seen:
+            results.append("duplicate")
+            continue
+        seen.add(client_id)
+        if client_id != relay_id and not auth_index.can_relay_for(relay_id, client_id):
+            results.append("forbidden")
+            continue
+        accepted.append(parsed)
+        results.append(None)  # Filled in once the batch is applied
+
+    applied = client_registry.touch_many(accepted)
+    pending = iter(accepted)
+    for i, result in enumerate(results):
+        if result is None:
+            results[i] = "registered" if applied[next(pending)[0]] else "ok"
+
+    # msgpack when the relay sends Accept: application/msgpack (core/serialization.py)
+    return FastJSONResponse({
+        "accepted": len(accepted),
+        "rejected": len(items) - len(accepted),
+        "results": results,
+    })
@@ -0,0 +1,30 @@
+# server/app/api/liveness_router.py
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from ..core.security import AuthenticatedClient
+from ..services.liveness import liveness_detector
+
+router = APIRouter()
+
+
+@router.get("/liveness")
+async def get_liveness_stats(client_id: AuthenticatedClient):
+    """Clients per liveness state, transition counters and the cost of the last tick."""
+    return liveness_detector.stats()
+
+
+@router.get("/liveness/events")
+async def get_liveness_events(client_id: AuthenticatedClient, limit: int = Query(100, ge=1, le=1000)):
+    """Most recent suspect/offline/online transitions, newest first."""
+    events = list(liveness_detector.events)[-limit:]
+    return {"events": events[::-1]}
+
+
+@router.get("/liveness/{target_id}")
+async def get_client_liveness(target_id: str, client_id: AuthenticatedClient):
+    """A client's heartbeat statistics, current suspicion level (phi) and time left before each threshold."""
+    view = liveness_detector.describe(target_id)
+    if view is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown client: {target_id}")
+    return view
@@ -0,0 +1,73 @@
+# server/app/api/metrics_router.py
+
+import hmac
+import os
+from collections import Counter
+from typing import Dict
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+try:
+    import psutil
+except ImportError:  # Optional: without it the process gauges are left out
+    psutil = None
+
+from ..core.connections import connection_manager
+from ..core.executor import execution_pool
+from ..core.logs import rate_limit_filter
+from ..core.loop_monitor import loop_lag_monitor
+from ..core.metrics import Labels, metrics
+from ..core.registry import client_registry
+
+# Bearer token a scraper must send; empty leaves /metrics open (it carries no secrets)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+router = APIRouter()
+
+
+# --- Gauges computed at scrape time ---
+
+def _clients_by_status() -> Dict[Labels, float]:
+    return {(state,): count for state, count in Counter(entry.status for entry in client_registry).items()}
+
+
+def _loop_lag() -> Dict[Labels, float]:
+    stats = loop_lag_monitor.stats()
+    if not stats["samples"]:
+        return {}
+    return {("0.5",): stats["p50_ms"] / 1000, ("0.99",): stats["p99_ms"] / 1000,
+            ("1",): stats["window_max_ms"] / 1000}
+
+
+def _executor_jobs() -> Dict[Labels, float]:
+    values = {}
+    for job_type, job in execution_pool.stats()["jobs"].items():
+        values[(job_type, "running")] = job["running"]
+        values[(job_type, "waiting")] = job["waiting"]
+    return values
+
+
+metrics.gauge("jarvis_clients", "Clients in the registry by status", ("status",), collect=_clients_by_status)
+metrics.gauge("jarvis_websocket_sessions", "Open client WebSocket sessions",
+              collect=lambda: {(): len(connection_manager.connected_clients())})
+metrics.gauge("jarvis_event_loop_lag_seconds", "Event-loop lag over the monitor window", ("quantile",),
+              collect=_loop_lag)
+metrics.gauge("jarvis_executor_jobs", "Off-loop jobs by type and state", ("job_type", "state"),
+              collect=_executor_jobs)
+metrics.gauge("jarvis_log_lines_suppressed", "Log lines dropped by the rate limiter since start",
+              collect=lambda: {(): rate_limit_filter.suppressed})
+if psutil is not None:
+    # psutil.Process() reads /proc, so it is created on the first scrape rather than at import
+    metrics.gauge("jarvis_process_resident_bytes", "Resident memory of the server process",
+                  collect=lambda: {(): psutil.Process().memory_info().rss})
+    metrics.gauge("jarvis_process_cpu_seconds", "CPU time used by the server process",
+                  collect=lambda: {(): sum(psutil.Process().cpu_times()[:2])})
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(authorization: str | None = Header(default=None)):
+    """Prometheus text exposition of all server metrics."""
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Metrics token required")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,37 @@
+# server/app/api/mode_router.py
+
+from fastapi import APIRouter, HTTPException, status
+
+from ..core.security import AuthenticatedClient
+from ..models.mode import ModeSwitch
+from ..services.modes import MODE_SWITCH_TIMEOUT, mode_manager
+
+router = APIRouter()
+
+
+@router.get("/modes")
+async def get_modes(client_id: AuthenticatedClient):
+    """Available modes, the current one, plan cache counters and switch latency percentiles."""
+    return mode_manager.stats()
+
+
+@router.get("/modes/{mode}/plan/{target_id}")
+async def get_mode_plan(mode: str, target_id: str, client_id: AuthenticatedClient):
+    """The actions a client would receive for a mode."""
+    try:
+        return {"mode": mode, "client_id": target_id, "plan": mode_manager.plan_for(target_id, mode)}
+    except KeyError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e.args[0]))
+
+
+@router.post("/modes/{mode}")
+async def switch_mode(mode: str, client_id: AuthenticatedClient, body: ModeSwitch | None = None):
+    """
+    Switches the fleet to a mode: every affected client gets its plan at once and
+    the call returns when all have acked (or timed out), with per-client results.
+    """
+    body = body or ModeSwitch()
+    try:
+        return await mode_manager.switch(mode, body.clients, timeout=body.timeout or MODE_SWITCH_TIMEOUT)
+    except KeyError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e.args[0]))
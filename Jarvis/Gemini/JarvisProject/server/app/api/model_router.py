@@ -0,0 +1,14 @@
+# server/app/api/model_router.py
+
+from fastapi import APIRouter
+
+from ..core.security import AuthenticatedClient
+from ..services.model_registry import model_registry
+
+router = APIRouter()
+
+
+@router.get("/models")
+async def get_model_stats(client_id: AuthenticatedClient):
+    """Per-model state, load time, hit rate and resident size, plus the memory budget in use."""
+    return model_registry.stats()
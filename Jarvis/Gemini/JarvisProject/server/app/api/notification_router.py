@@ -0,0 +1,23 @@
+# server/app/api/notification_router.py
+
+from fastapi import APIRouter, HTTPException, status
+
+from ..core.security import AuthenticatedClient
+from ..services.notifications import notification_dispatcher
+
+router = APIRouter()
+
+
+@router.get("/notifications")
+async def get_notification_stats(client_id: AuthenticatedClient):
+    """Sinks, produced/delivered/digest counters and undelivered notifications per sink."""
+    return {**notification_dispatcher.stats(), "pending": await notification_dispatcher.pending()}
+
+
+@router.post("/notifications/test", status_code=status.HTTP_202_ACCEPTED)
+async def send_test_notification(client_id: AuthenticatedClient):
+    """Queues a test notification to every configured sink."""
+    if not notification_dispatcher.enabled:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="No notification sinks configured")
+    notification_dispatcher.notify("test", client_id, f"Test notification requested by {client_id}")
+    return {"message": "Test notification queued"}
@@ -0,0 +1,156 @@
+# server/app/api/session_router.py
+
+import asyncio
+import json
+import os
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+
+from ..core.connections import connection_manager
+from ..core.executor import Overloaded
+from ..core.registry import client_registry
+from ..core.security import get_authenticated_client
+from ..services.commands import command_dispatcher
+from ..services.replication import failover_node
+from ..services.telemetry import TelemetryError, telemetry_store
+from ..services.timeseries import timeseries_store
+from ..services.scheduler import task_scheduler
+from ..core.logs import get_logger
+
+log = get_logger(__name__)
+
+router = APIRouter()
+
+# Seconds a session may stay silent before the server drops it.
+# Clients should send a heartbeat frame well within this window.
+SESSION_IDLE_TIMEOUT = float(os.getenv("SESSION_IDLE_TIMEOUT", 90))
+# Seconds a client has to send its auth frame when it did not use headers
+SESSION_AUTH_TIMEOUT = float(os.getenv("SESSION_AUTH_TIMEOUT", 10))
+
+
+async def authenticate_websocket(websocket: WebSocket) -> str | None:
+    """
+    Authenticates the session once, either from the X-Client-ID / X-Client-Secret
+    handshake headers or from a first frame: {"type": "auth", "client_id": ..., "secret": ...}.
+    Returns the client_id, or None after closing the socket on failure.
+    """
+    client_id = websocket.headers.get("x-client-id")
+    secret = websocket.headers.get("x-client-secret")
+    if not client_id or not secret:
+        try:
+            frame = await asyncio.wait_for(websocket.receive_json(), SESSION_AUTH_TIMEOUT)
+        except (asyncio.TimeoutError, ValueError):
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Auth frame required")
+            return None
+        if not isinstance(frame, dict) or frame.get("type") != "auth":
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Auth frame required")
+            return None
+        client_id, secret = frame.get("client_id"), frame.get("secret")
+
+    try:
+        return await get_authenticated_client(x_client_id=client_id, x_client_secret=secret)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return None
+    except Overloaded as e:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=str(e))
+        return None
+
+
+def _mark_online(client_id: str) -> None:
+    if client_registry.touch(client_id, status="online") is None:
+        client_registry.register(client_id)
+        client_registry.touch(client_id, status="online")
+    client_registry.update(client_id, connection="websocket")
+
+
+def _mark_disconnected(client_id: str) -> None:
+    client_registry.update(client_id, status="disconnected", connection=None)
+
+
+async def _handle_frame(client_id: str, websocket: WebSocket, frame: dict) -> None:
+    """Applies one client frame. Heartbeats are not answered to keep traffic minimal."""
+    frame_type = frame.get("type")
+
+    if frame_type == "heartbeat":
+        client_registry.touch(client_id, status="online")
+        metrics = frame.get("metrics")
+        if isinstance(metrics, dict):
+            # Load figures feed task placement (see services/scheduler.py)
+            task_scheduler.update_worker(client_id, cpu=metrics.get("cpu"), memory=metrics.get("memory"))
+            timeseries_store.record_metrics(client_id, metrics)
+        return
+    # Any other frame is also a sign of life
+    client_registry.touch(client_id, status=None)
+
+    if frame_type == "status":
+        client_registry.update(client_id, status=frame.get("status", "online"))
+        details = frame.get("details")
+        if details is not None:
+            client_registry.update(client_id, details=details)
+        if isinstance(details, dict) and isinstance(details.get("capabilities"), list):
+            task_scheduler.update_worker(client_id, capabilities=details["capabilities"],
+                                         slots=details.get("slots"))
+    elif frame_type == "ack":
+        # Dispatcher commands first; anything else was pushed with connection_manager.push_command
+        if not command_dispatcher.acknowledge(client_id, frame.get("command_id"), frame):
+            connection_manager.acknowledge(client_id, frame.get("command_id"), frame)
+    elif frame_type == "ping":
+        await websocket.send_json({"type": "pong"})
+    else:
+        await websocket.send_json({"type": "error", "detail": f"Unknown frame type: {frame_type}"})
+
+
+@router.websocket("/ws")
+async def client_session(websocket: WebSocket):
+    """
+    Long-lived client session.
+    The client authenticates once, then sends heartbeat/status/ack frames over the
+    same connection and receives pushed commands; binary frames carry telemetry
+    batches. While the session is open the client counts as online; closing it
+    marks the client as disconnected.
+    """
+    await websocket.accept()
+    if not failover_node.is_leader:
+        # The client rotates to its next server URL
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Standby server")
+        return
+    client_id = await authenticate_websocket(websocket)
+    if client_id is None:
+        return
+
+    await connection_manager.connect(client_id, websocket)
+    _mark_online(client_id)
+    await websocket.send_json({"type": "welcome", "client_id": client_id,
+                               "idle_timeout": SESSION_IDLE_TIMEOUT})
+    log.info("session_opened", client_id=client_id)
+    command_dispatcher.connected(client_id)  # Commands queued while the client was away
+
+    try:
+        while True:
+            message = await asyncio.wait_for(websocket.receive(), SESSION_IDLE_TIMEOUT)
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                # Binary frames are telemetry batches (services/telemetry.py); nothing is answered unless bad
+                client_registry.touch(client_id, status=None)
+                try:
+                    telemetry_store.ingest(client_id, message["bytes"])
+                except TelemetryError as e:
+                    await websocket.send_json({"type": "error", "detail": f"Telemetry batch refused: {e}"})
+                continue
+            frame = json.loads(message["text"])
+            if not isinstance(frame, dict):
+                await websocket.send_json({"type": "error", "detail": "Frames must be JSON objects"})
+                continue
+            await _handle_frame(client_id, websocket, frame)
+    except asyncio.TimeoutError:
+        await websocket.close(code=status.WS_1001_GOING_AWAY, reason="Idle timeout")
+    except (WebSocketDisconnect, ValueError):
+        pass
+    finally:
+        if connection_manager.disconnect(client_id, websocket):
+            _mark_disconnected(client_id)
+            task_scheduler.remove_worker(client_id)
+            command_dispatcher.disconnected(client_id)
+            log.info("session_closed", client_id=client_id)
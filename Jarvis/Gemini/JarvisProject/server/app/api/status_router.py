@@ -0,0 +1,238 @@
+# server/app/api/status_router.py
+
+import asyncio
+import re
+import secrets
+import time
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from ..core.executor import execution_pool
+from ..core.registry import ClientEntry, client_registry
+from ..core.serialization import MSGPACK_MEDIA_TYPE, FastJSONResponse, dumps_json, dumps_msgpack, msgpack_wanted
+from ..models.status import ClientStatus, StatusDelta, StatusHistory, StatusPage
+from ..services.timeseries import FLEET_SERIES, RESOLUTION_NAMES, timeseries_store
+
+router = APIRouter()
+
+STATUS_FIELDS = ("status", "last_seen", "registered_at", "connection", "details")
+MAX_PAGE_SIZE = 1000
+# Seconds between SSE keep-alive comments when nothing changes
+STREAM_KEEPALIVE = 15.0
+# Buckets per metric a history view gets when it does not pick a resolution
+HISTORY_MAX_POINTS = 720
+HISTORY_RESOLUTION = "^(" + "|".join(RESOLUTION_NAMES) + ")$"
+# Versions restart at 0 with every process (and differ between workers); the boot
+# epoch goes into ETags, SSE ids and "since" cursors so one from another run never matches
+BOOT_EPOCH = secrets.token_hex(4)
+CURSOR_PATTERN = r"^([0-9a-f]+-)?[0-9]+$"
+
+# Encoded full snapshot per format (True: msgpack) with the registry version it was built at
+_snapshot_cache: Dict[bool, Tuple[int, bytes]] = {}
+
+
+def _parse_fields(fields: str | None) -> List[str] | None:
+    if fields is None:
+        return None
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = set(selected) - set(STATUS_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(STATUS_FIELDS)}",
+        )
+    return selected
+
+
+def _render(entries: Iterable[ClientEntry], fields: List[str] | None) -> Dict[str, Dict[str, Any]]:
+    rendered = {}
+    for entry in entries:
+        data = entry.to_dict()
+        rendered[entry.client_id] = data if fields is None else {f: data[f] for f in fields if f in data}
+    return rendered
+
+
+def _cursor(version: int) -> str:
+    return f"{BOOT_EPOCH}-{version}"
+
+
+def _parse_cursor(value: str) -> Tuple[str | None, int]:
+    """Splits "<epoch>-<version>" (or a bare "<version>") into (epoch, version)."""
+    epoch, _, version = value.rpartition("-")
+    return epoch or None, int(version)
+
+
+def _delta(cursor: str, fields: List[str] | None) -> Dict[str, Any]:
+    """
+    Changes after the ``cursor`` version, or a full snapshot flagged "full" if the
+    log is too short or the cursor comes from another run or worker.
+    """
+    epoch, since = _parse_cursor(cursor)
+    delta = None
+    if epoch in (None, BOOT_EPOCH):
+        delta = client_registry.changes_since(since)
+    if delta is None or since > delta[0]:
+        version = client_registry.version
+        return {"epoch": BOOT_EPOCH, "version": version, "since": since, "full": True,
+                "changed": _render(client_registry, fields), "removed": []}
+    version, changed, removed = delta
+    return {"epoch": BOOT_EPOCH, "version": version, "since": since, "full": False,
+            "changed": _render(changed, fields), "removed": removed}
+
+
+def _snapshot_response(version: int, etag: str) -> Response:
+    """The plain {client_id: state} map, encoded once per registry version and format."""
+    wanted = msgpack_wanted()
+    cached = _snapshot_cache.get(wanted)
+    if cached is None or cached[0] != version:
+        snapshot = client_registry.snapshot()
+        cached = _snapshot_cache[wanted] = (version, dumps_msgpack(snapshot) if wanted else dumps_json(snapshot))
+    return Response(cached[1], media_type=MSGPACK_MEDIA_TYPE if wanted else "application/json",
+                    headers={"ETag": etag, "Vary": "Accept"})
+
+
+@router.get("/status", response_model=Union[Dict[str, ClientStatus], StatusPage, StatusDelta])
+async def get_system_status(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: str | None = Query(None, description="Comma-separated subset of " + ", ".join(STATUS_FIELDS)),
+    since: str | None = Query(None, pattern=CURSOR_PATTERN,
+                              description="Only return clients changed after this version (\"<epoch>-<version>\")"),
+    # Optional: Protect this endpoint too, maybe only allow specific clients (like web_ui)
+    # client_id: AuthenticatedClient
+    ):
+    """
+    Returns the status of currently active/registered clients.
+
+    Without query parameters the body is the plain {client_id: state} map.
+    With offset/limit/fields it is a page: {"version", "total", "offset", "limit", "clients"}.
+    With since=<epoch>-<version> only changed and removed clients are returned.
+    The ETag is the boot epoch and registry version, so an unchanged fleet answers 304.
+    Bodies are JSON, or msgpack with ``Accept: application/msgpack``.
+    """
+    # TODO: Implement proper authorization (e.g., only allow web_ui or admin clients)
+    version = client_registry.version
+    etag = f'"{_cursor(version)}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    selected = _parse_fields(fields)
+    if since is not None:
+        return FastJSONResponse(_delta(since, selected), headers={"ETag": etag})
+    if limit is None and offset == 0 and selected is None:
+        return _snapshot_response(version, etag)
+
+    limit = limit or MAX_PAGE_SIZE
+    return FastJSONResponse({
+        "epoch": BOOT_EPOCH,
+        "version": version,
+        "total": len(client_registry),
+        "offset": offset,
+        "limit": limit,
+        "clients": _render(client_registry.page(offset, limit), selected),
+    }, headers={"ETag": etag})
+
+
+def _read_history(client_id: str, metrics: List[str] | None, start: float, end: float,
+                  resolution: str | None, max_points: int) -> Dict[str, Any] | None:
+    metrics = metrics or timeseries_store.metrics_of(client_id)
+    if not metrics:
+        return None
+    return timeseries_store.history(client_id, metrics, start, end, resolution, max_points)
+
+
+async def _history(client_id: str, metrics: List[str] | None, start: float | None, end: float | None,
+                   resolution: str | None, max_points: int) -> Dict[str, Any]:
+    if not timeseries_store.enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client history is not recorded")
+    end = time.time() if end is None else end
+    start = end - 3600 if start is None else start
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    # Segment reads (listdir, memory maps) and the wait for a running flush stay off the event loop
+    history = await execution_pool.run("history_query", _read_history, client_id, metrics, start, end,
+                                       resolution, max_points)
+    if history is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No history for: {client_id}")
+    return history
+
+
+@router.get("/status/history", response_model=StatusHistory)
+async def get_fleet_history(
+    start: float | None = Query(None, description="Unix time (default: an hour before end)"),
+    end: float | None = Query(None, description="Unix time (default: now)"),
+    resolution: str | None = Query(None, pattern=HISTORY_RESOLUTION),
+    max_points: int = Query(HISTORY_MAX_POINTS, ge=1, le=10_000),
+    ):
+    """
+    Clients per status (and in total) over time, sampled every second and read
+    from the rollups: per bucket the average, min and max count. Without
+    ``resolution`` the finest of 1s/1m/1h giving at most ``max_points`` buckets is used.
+    """
+    return FastJSONResponse(await _history(FLEET_SERIES, None, start, end, resolution, max_points))
+
+
+@router.get("/status/history/{target_id}", response_model=StatusHistory)
+async def get_client_history(
+    target_id: str,
+    metric: List[str] | None = Query(None, description="Only these metrics (default: all recorded)"),
+    start: float | None = Query(None, description="Unix time (default: an hour before end)"),
+    end: float | None = Query(None, description="Unix time (default: now)"),
+    resolution: str | None = Query(None, pattern=HISTORY_RESOLUTION),
+    max_points: int = Query(HISTORY_MAX_POINTS, ge=1, le=10_000),
+    ):
+    """
+    History of one client: "heartbeat" (seconds since the previous heartbeat, so
+    count is heartbeats per bucket and max the longest silence) and the resource
+    metrics it reports (cpu, memory, ...), as avg/min/max/count per bucket.
+    """
+    return FastJSONResponse(await _history(target_id, metric, start, end, resolution, max_points))
+
+
+def _sse(event: str, payload: Dict[str, Any]) -> str:
+    return f"id: {_cursor(payload['version'])}\nevent: {event}\ndata: {dumps_json(payload).decode()}\n\n"
+
+
+@router.get("/status/stream")
+async def stream_system_status(
+    request: Request,
+    interval: float = Query(1.0, ge=0.1, le=60.0),
+    fields: str | None = Query(None),
+    ):
+    """
+    Server-Sent Events feed of status changes.
+    Sends a "snapshot" event first (or a "delta" when resuming with Last-Event-ID),
+    then a "delta" event whenever the registry version moves.
+    """
+    selected = _parse_fields(fields)
+    last_event_id = request.headers.get("last-event-id")
+
+    async def events():
+        if last_event_id and re.match(CURSOR_PATTERN, last_event_id):
+            payload = _delta(last_event_id, selected)
+            yield _sse("delta", payload)
+        else:
+            payload = {"epoch": BOOT_EPOCH, "version": client_registry.version,
+                       "clients": _render(client_registry, selected)}
+            yield _sse("snapshot", payload)
+        last_version = payload["version"]
+        idle = 0.0
+
+        while not await request.is_disconnected():
+            await asyncio.sleep(interval)
+            if client_registry.version == last_version:
+                idle += interval
+                if idle >= STREAM_KEEPALIVE:
+                    idle = 0.0
+                    yield ": keep-alive\n\n"
+                continue
+            idle = 0.0
+            payload = _delta(_cursor(last_version), selected)
+            last_version = payload["version"]
+            yield _sse("delta", payload)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,32 @@
+# server/app/api/task_router.py
+
+from fastapi import APIRouter, HTTPException, status
+
+from ..core.security import AuthenticatedClient
+from ..models.task import TaskSubmission
+from ..services.scheduler import task_scheduler
+
+router = APIRouter()
+
+
+@router.post("/tasks", status_code=status.HTTP_202_ACCEPTED)
+async def submit_task(submission: TaskSubmission, client_id: AuthenticatedClient):
+    """Queues a task for the least-loaded client that declares its kind as a capability."""
+    task = task_scheduler.submit(submission.kind, submission.payload, priority=submission.priority,
+                                 max_retries=submission.max_retries, timeout=submission.timeout)
+    return task.to_dict()
+
+
+@router.get("/tasks/{task_id}")
+async def get_task(task_id: str, client_id: AuthenticatedClient):
+    """Returns a task's state and, once finished, its result or error."""
+    task = task_scheduler.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown task: {task_id}")
+    return task.to_dict()
+
+
+@router.get("/tasks")
+async def get_scheduler_stats(client_id: AuthenticatedClient):
+    """Queue depths and counters of the scheduler."""
+    return task_scheduler.stats()
@@ -0,0 +1,56 @@
+# server/app/api/telemetry_router.py
+
+import json
+import time
+from typing import List
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, Request, status
+
+from ..core.registry import client_registry
+from ..core.security import AuthenticatedClient
+from ..services.telemetry import TelemetryError, telemetry_store
+
+router = APIRouter()
+
+
+@router.post("/telemetry")
+async def post_telemetry(request: Request, client_id: AuthenticatedClient):
+    """
+    Metric samples of the calling client. The body is a batch built by the agent's
+    TelemetryBuffer (format in services/telemetry.py), or, for clients that cannot
+    batch, one JSON sample such as {"t": 1718000000.5, "cpu": 12.5, "memory": 40.1}.
+    Agents with a /ws session send the same batches as binary frames instead.
+    """
+    body = await request.body()
+    client_registry.touch(client_id, status=None)  # A sign of life, like any session frame
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            sample = json.loads(body)
+            times = np.array([float(sample.pop("t", time.time()))])
+            values = {str(name): np.array([float(value)]) for name, value in sample.items()}
+        except (ValueError, TypeError, AttributeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON object of numbers")
+        telemetry_store.ingest_columns(client_id, times, values, wire_bytes=len(body))
+        return {"samples": 1}
+    try:
+        return {"samples": telemetry_store.ingest(client_id, body)}
+    except TelemetryError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/telemetry")
+async def get_telemetry_stats(client_id: AuthenticatedClient):
+    """Batches, samples, bytes received per sample and decode cost."""
+    return telemetry_store.stats()
+
+
+@router.get("/telemetry/{target_id}")
+async def get_client_telemetry(target_id: str, client_id: AuthenticatedClient,
+                               limit: int = Query(120, ge=1, le=10_000),
+                               metric: List[str] | None = Query(None, description="Only these metrics")):
+    """The latest samples of a client as columns (Unix times and one list per metric)."""
+    series = telemetry_store.latest(target_id, limit, metric)
+    if series is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No telemetry from: {target_id}")
+    return {"client_id": target_id, **series}
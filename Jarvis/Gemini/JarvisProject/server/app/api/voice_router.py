@@ -0,0 +1,62 @@
+# server/app/api/voice_router.py
+
+import json
+
+from fastapi import APIRouter, WebSocket, status
+
+from ..core.security import AuthenticatedClient
+from ..services.replication import failover_node
+from ..services.voice import voice_pipeline
+from .session_router import authenticate_websocket
+
+router = APIRouter()
+
+
+@router.websocket("/voice")
+async def voice_stream(websocket: WebSocket):
+    """
+    Streams voice commands.
+    After authenticating (same as /ws), the client sends binary frames of 16-bit
+    mono PCM at 16 kHz and a {"type": "end"} text frame when done. The server
+    answers with speech_start, partial, final and intent events as JSON while
+    audio is still arriving.
+    """
+    await websocket.accept()
+    if not failover_node.is_leader:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Standby server")
+        return
+    client_id = await authenticate_websocket(websocket)
+    if client_id is None:
+        return
+    if not voice_pipeline.available:
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="No speech engine installed")
+        return
+    stream = voice_pipeline.open_stream(websocket.send_json)
+    if stream is None:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Too many voice streams")
+        return
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                await stream.feed(message["bytes"])
+            elif message.get("text"):
+                try:
+                    frame = json.loads(message["text"])
+                except ValueError:
+                    frame = None
+                if isinstance(frame, dict) and frame.get("type") == "end":
+                    await stream.close()  # Waits for the last final/intent events
+                    await websocket.close()
+                    return
+    finally:
+        await stream.close()
+
+
+@router.get("/voice/stats")
+async def get_voice_stats(client_id: AuthenticatedClient):
+    """Pipeline counters: open streams, utterances, recognition steps, intents (early ones fired on partials)."""
+    return voice_pipeline.stats()
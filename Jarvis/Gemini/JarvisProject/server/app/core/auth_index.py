@@ -0,0 +1,184 @@
+# server/app/core/auth_index.py
+
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+from server.config.known_clients import clients_file_mtime, load_clients
+from .logs import get_logger
+
+log = get_logger(__name__)
+
+HASH_SCHEME = "pbkdf2_sha256"
+DEFAULT_ITERATIONS = int(os.getenv("JARVIS_AUTH_HASH_ITERATIONS", 100_000))
+
+
+def hash_secret(secret: str, iterations: int = DEFAULT_ITERATIONS, salt: bytes | None = None) -> str:
+    """Returns a 'pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>' string for the config."""
+    salt = salt or secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", secret.encode(), salt, iterations)
+    return f"{HASH_SCHEME}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def verify_secret_hash(secret: str, encoded: str) -> bool:
+    """Checks a secret against a hash_secret() string in constant time."""
+    try:
+        scheme, iterations, salt_hex, hash_hex = encoded.split("$")
+        if scheme != HASH_SCHEME:
+            return False
+        expected = bytes.fromhex(hash_hex)
+        digest = hashlib.pbkdf2_hmac("sha256", secret.encode(), bytes.fromhex(salt_hex), int(iterations))
+    except ValueError:
+        return False
+    return hmac.compare_digest(digest, expected)
+
+
+class AuthIndex:
+    """
+    Precomputed credential index used by get_authenticated_client.
+
+    No plaintext secret is kept. Plaintext entries from the client config are turned
+    into a keyed BLAKE2b digest (process-local key) when the index is built, so they
+    verify with one fast hash and a constant-time compare. Entries configured with
+    "secret_hash" need a PBKDF2 run; once verified, the client's fast digest is
+    cached for ``cache_ttl`` seconds in a bounded LRU so repeat requests skip it.
+
+    The index is rebuilt (and the cache cleared) when the clients file changes;
+    the file's mtime is checked at most every ``reload_interval`` seconds.
+    """
+
+    def __init__(self,
+                 loader: Callable[[], dict] = load_clients,
+                 source_mtime: Callable[[], float | None] = clients_file_mtime,
+                 cache_ttl: float = float(os.getenv("JARVIS_AUTH_CACHE_TTL", 60)),
+                 cache_size: int = int(os.getenv("JARVIS_AUTH_CACHE_SIZE", 4096)),
+                 reload_interval: float = 2.0):
+        self._loader = loader
+        self._source_mtime = source_mtime
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+
+        self._key = secrets.token_bytes(32)
+        self._fast: Dict[str, bytes] = {}       # client_id -> digest of a plaintext secret
+        self._hashed: Dict[str, str] = {}       # client_id -> pbkdf2 hash string
+        self._relays: Dict[str, frozenset | None] = {}  # relay client_id -> allowed ids (None = any)
+        self._cache: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded_mtime: float | None = None
+        self._next_reload_check = 0.0
+        self._loaded = False
+
+    def _digest(self, secret: str) -> bytes:
+        return hashlib.blake2b(secret.encode(), key=self._key, digest_size=32).digest()
+
+    def load(self) -> None:
+        """(Re)builds the index from the client config and drops cached credentials."""
+        mtime = self._source_mtime()
+        fast, hashed, relays = {}, {}, {}
+        for client_id, info in self._loader().items():
+            relay_for = info.get("relay_for")
+            if relay_for:
+                relays[client_id] = None if relay_for == "*" else frozenset(relay_for)
+            if info.get("secret_hash"):
+                hashed[client_id] = info["secret_hash"]
+            elif info.get("secret"):
+                fast[client_id] = self._digest(info["secret"])
+        with self._lock:
+            self._fast, self._hashed, self._relays = fast, hashed, relays
+            self._cache.clear()
+            self._loaded_mtime = mtime
+            self._loaded = True
+        self._next_reload_check = time.monotonic() + self.reload_interval
+
+    def _maybe_reload(self) -> None:
+        if not self._loaded:
+            self.load()
+            return
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return
+        self._next_reload_check = now + self.reload_interval
+        mtime = self._source_mtime()
+        if mtime != self._loaded_mtime:
+            log.info("auth_index_reload", reason="client config changed")
+            try:
+                self.load()
+            except (OSError, ValueError) as e:
+                # Keep serving the previous index; retry once the file changes again
+                self._loaded_mtime = mtime
+                log.error("auth_index_reload_failed", error=str(e))
+
+    def is_known(self, client_id: str) -> bool:
+        self._maybe_reload()
+        return client_id in self._fast or client_id in self._hashed
+
+    def can_relay_for(self, relay_id: str, client_id: str) -> bool:
+        """True if relay_id may report heartbeats on behalf of client_id ("relay_for" in the config)."""
+        if relay_id not in self._relays:
+            return False
+        allowed = self._relays[relay_id]
+        known = client_id in self._fast or client_id in self._hashed
+        return known and (allowed is None or client_id in allowed)
+
+    def verify_cached(self, client_id: str, secret: str) -> bool | None:
+        """
+        Checks the secret without running PBKDF2. Returns None when only the slow
+        hash can decide; callers on the event loop then run verify() off the loop.
+        """
+        self._maybe_reload()
+        digest = self._digest(secret)
+
+        expected = self._fast.get(client_id)
+        if expected is not None:
+            return hmac.compare_digest(digest, expected)
+        if client_id not in self._hashed:
+            return False
+
+        with self._lock:
+            cached = self._cache.get(client_id)
+            if cached is not None:
+                cached_digest, expires_at = cached
+                if expires_at > time.monotonic():
+                    self._cache.move_to_end(client_id)
+                    if hmac.compare_digest(digest, cached_digest):
+                        return True
+                else:
+                    del self._cache[client_id]
+        return None
+
+    def verify(self, client_id: str, secret: str) -> bool:
+        """Returns True if the secret is valid for client_id."""
+        result = self.verify_cached(client_id, secret)
+        if result is not None:
+            return result
+
+        encoded = self._hashed.get(client_id)
+        if encoded is None or not verify_secret_hash(secret, encoded):
+            return False
+        digest, now = self._digest(secret), time.monotonic()
+        with self._lock:
+            self._cache[client_id] = (digest, now + self.cache_ttl)
+            self._cache.move_to_end(client_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return True
+
+
+# Shared index, built at startup (see main.py lifespan) or on first use
+auth_index = AuthIndex()
+
+
+if __name__ == "__main__":
+    # Helper to produce a "secret_hash" value for the client config:
+    #   python -m server.app.core.auth_index <secret>
+    if len(sys.argv) != 2:
+        print("Usage: python -m server.app.core.auth_index <secret>")
+        sys.exit(1)
+    print(hash_secret(sys.argv[1]))
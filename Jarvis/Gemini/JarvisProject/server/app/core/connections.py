@@ -0,0 +1,101 @@
+# server/app/core/connections.py
+
+import asyncio
+import uuid
+from typing import Any, Dict, Tuple
+
+from fastapi import WebSocket
+
+
+class ConnectionManager:
+    """
+    Keeps track of the open WebSocket session of every connected client.
+
+    A client holds at most one session; a newer connection replaces the older one.
+    The manager is also the server-push path: commands are sent over the open
+    session and the client answers with an ``ack`` frame carrying the same id.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, WebSocket] = {}
+        self._pending_acks: Dict[str, Tuple[str, asyncio.Future]] = {}  # command_id -> (client_id, future)
+
+    def is_connected(self, client_id: str) -> bool:
+        return client_id in self._sessions
+
+    def connected_clients(self) -> list[str]:
+        return list(self._sessions)
+
+    async def connect(self, client_id: str, websocket: WebSocket) -> None:
+        """Registers an accepted session, closing any previous one for the same client."""
+        previous = self._sessions.get(client_id)
+        self._sessions[client_id] = websocket
+        if previous is not None and previous is not websocket:
+            try:
+                await previous.close(code=4000, reason="Replaced by a newer session")
+            except RuntimeError:
+                pass  # Already closed
+
+    def disconnect(self, client_id: str, websocket: WebSocket) -> bool:
+        """
+        Forgets the session if it is still the current one.
+        Returns False when the session had already been replaced.
+        """
+        if self._sessions.get(client_id) is not websocket:
+            return False
+        del self._sessions[client_id]
+        # Commands still waiting for an ack from this session will never get one
+        for owner, future in list(self._pending_acks.values()):
+            if owner == client_id and not future.done():
+                future.set_exception(ConnectionError(f"Client '{client_id}' disconnected"))
+        return True
+
+    async def send(self, client_id: str, message: Dict[str, Any]) -> bool:
+        """Pushes a frame to a client. Returns False if the client has no open session."""
+        websocket = self._sessions.get(client_id)
+        if websocket is None:
+            return False
+        try:
+            await websocket.send_json(message)
+        except (RuntimeError, ConnectionError):
+            self.disconnect(client_id, websocket)
+            return False
+        return True
+
+    async def push_command(self, client_id: str, command: Dict[str, Any],
+                           timeout: float | None = None) -> Any:
+        """
+        Sends a command frame and, if ``timeout`` is given, waits for its ack.
+        Returns the ack payload, or the command id when not waiting.
+        Raises LookupError if the client is not connected, ConnectionError if it
+        disconnects before acking and asyncio.TimeoutError if no ack arrives in time.
+        """
+        # Random ids: another client must not be able to guess (and ack) this one
+        command_id = str(command.get("command_id") or uuid.uuid4().hex)
+        frame = {"type": "command", "command_id": command_id, **command}
+        if timeout is None:
+            if not await self.send(client_id, frame):
+                raise LookupError(f"Client '{client_id}' has no open session")
+            return command_id
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending_acks[command_id] = (client_id, future)
+        try:
+            if not await self.send(client_id, frame):
+                raise LookupError(f"Client '{client_id}' has no open session")
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending_acks.pop(command_id, None)
+
+    def acknowledge(self, client_id: str, command_id: str, payload: Dict[str, Any]) -> bool:
+        """Resolves a pending command with the ack payload; only the client it was sent to may ack it."""
+        pending = self._pending_acks.get(str(command_id))
+        if pending is None or pending[0] != client_id or pending[1].done():
+            return False
+        future = pending[1]
+        future.set_result(payload)
+        return True
+
+
+# Single manager shared by the whole app
+connection_manager = ConnectionManager()
@@ -0,0 +1,160 @@
+# server/app/core/executor.py
+
+import asyncio
+import functools
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, NamedTuple
+
+# Shared thread pool for blocking I/O and for native code that releases the GIL (hashlib, NumPy)
+EXEC_THREAD_WORKERS = int(os.getenv("EXEC_THREAD_WORKERS", 8))
+
+
+class JobLimits(NamedTuple):
+    concurrency: int   # Jobs of this type running at once
+    queue: int         # Jobs of this type waiting; beyond that callers get Overloaded
+
+
+# Job types submitted by the app. Override one with EXEC_LIMIT_<NAME>=<concurrency>:<queue>,
+# e.g. EXEC_LIMIT_AUTH_HASH=8:512. Unknown types get DEFAULT_LIMITS.
+# Voice recognition runs on its own bounded pool of VOICE_WORKERS threads shared by all
+# streams (ml/voice_recognition/pipeline.py), the face matcher batches into asyncio.to_thread
+# (ml/facial_recognition/matcher.py), and colour windows are classified inline, a palette
+# lookup cheaper than a pool hop.
+JOB_TYPES: Dict[str, JobLimits] = {
+    "auth_hash": JobLimits(4, 256),       # PBKDF2 secret checks (see core/security.py)
+    "history_query": JobLimits(2, 32),    # Segment reads for /status/history (services/timeseries.py)
+}
+DEFAULT_LIMITS = JobLimits(4, 100)
+
+
+class Overloaded(Exception):
+    """Raised when a job type's queue is full; answered with 429 and Retry-After (see main.py)."""
+
+    def __init__(self, job_type: str, retry_after: int):
+        super().__init__(f"Too many pending '{job_type}' jobs, retry in {retry_after}s")
+        self.job_type = job_type
+        self.retry_after = retry_after
+
+
+class _JobType:
+    __slots__ = ("name", "limits", "slots", "running", "waiting", "completed", "failed", "rejected",
+                 "avg_seconds", "avg_wait")
+
+    def __init__(self, name: str, limits: JobLimits):
+        self.name = name
+        self.limits = limits
+        self.slots = asyncio.Semaphore(limits.concurrency)
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.avg_seconds = 0.0  # Moving averages, used for Retry-After
+        self.avg_wait = 0.0
+
+    def retry_after(self) -> int:
+        expected = self.avg_seconds * (self.waiting + 1) / self.limits.concurrency
+        return max(1, math.ceil(expected))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"concurrency": self.limits.concurrency, "queue": self.limits.queue,
+                "running": self.running, "waiting": self.waiting, "completed": self.completed,
+                "failed": self.failed, "rejected": self.rejected,
+                "avg_ms": round(self.avg_seconds * 1000, 2), "avg_wait_ms": round(self.avg_wait * 1000, 2)}
+
+
+def _limits_from_env(name: str) -> JobLimits | None:
+    value = os.getenv(f"EXEC_LIMIT_{name.upper()}")
+    if not value:
+        return None
+    concurrency, queue = value.split(":")
+    return JobLimits(int(concurrency), int(queue))
+
+
+class ExecutionPool:
+    """
+    Runs blocking work away from the event loop.
+
+    ``await run(job_type, fn, *args)`` executes ``fn`` in the shared thread pool.
+    Each job type has its own concurrency limit and a bounded wait queue; a call
+    that finds the queue full fails at once with Overloaded instead of piling up,
+    so heartbeats and other async handlers keep their latency however much
+    blocking work is submitted. Jobs should spend their time in I/O or in native
+    code that releases the GIL; pure-Python CPU work would still starve the loop.
+
+    start() after shutdown() builds a fresh pool (a second lifespan in the same
+    process, e.g. tests or reload).
+    """
+
+    def __init__(self, thread_workers: int = EXEC_THREAD_WORKERS):
+        self.thread_workers = thread_workers
+        self._threads: ThreadPoolExecutor | None = None
+        self._types: Dict[str, _JobType] = {}
+        self.start()
+
+    def start(self) -> None:
+        """Creates the thread pool if it is not running; job types keep their limits."""
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="exec")
+            # Semaphores belong to the loop that used them; the new lifespan may run another loop
+            self._types = {name: _JobType(name, state.limits) for name, state in self._types.items()}
+
+    def configure(self, job_type: str, limits: JobLimits) -> None:
+        """Sets a job type's limits; takes effect for jobs submitted afterwards."""
+        self._types[job_type] = _JobType(job_type, limits)
+
+    def _type(self, job_type: str) -> _JobType:
+        state = self._types.get(job_type)
+        if state is None:
+            limits = _limits_from_env(job_type) or JOB_TYPES.get(job_type) or DEFAULT_LIMITS
+            state = self._types[job_type] = _JobType(job_type, limits)
+        return state
+
+    async def run(self, job_type: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Runs ``fn(*args, **kwargs)`` as a job of ``job_type``.
+        Raises Overloaded when the type's queue is full.
+        """
+        state = self._type(job_type)
+        if state.slots.locked() and state.waiting >= state.limits.queue:
+            state.rejected += 1
+            raise Overloaded(job_type, state.retry_after())
+
+        queued_at = time.perf_counter()
+        state.waiting += 1
+        try:
+            await state.slots.acquire()
+        finally:
+            state.waiting -= 1
+        started_at = time.perf_counter()
+        state.avg_wait += 0.1 * (started_at - queued_at - state.avg_wait)
+        state.running += 1
+        try:
+            if self._threads is None:
+                self.start()
+            call = functools.partial(fn, *args, **kwargs)
+            result = await asyncio.get_running_loop().run_in_executor(self._threads, call)
+        except BaseException:
+            state.failed += 1
+            raise
+        finally:
+            state.running -= 1
+            state.slots.release()
+            state.avg_seconds += 0.1 * (time.perf_counter() - started_at - state.avg_seconds)
+        state.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"thread_workers": self.thread_workers,
+                "jobs": {name: state.to_dict() for name, state in self._types.items()}}
+
+    def shutdown(self) -> None:
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+
+
+execution_pool = ExecutionPool()
@@ -0,0 +1,171 @@
+# server/app/core/logs.py
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from typing import Any, Dict, Tuple
+
+# json (one object per line, for log shippers) or text (for a terminal)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Per message type: sustained lines per second and burst before lines are suppressed (and counted)
+LOG_RATE_PER_SECOND = float(os.getenv("LOG_RATE_PER_SECOND", 20))
+LOG_BURST = int(os.getenv("LOG_BURST", 50))
+
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per (logger, event): a flood of the same message (e.g. 5,000
+    clients expiring at once) is cut down to ``burst`` lines plus ``rate`` per
+    second, and the next line that gets through carries ``suppressed=<n>``.
+    StructuredLogger asks before it builds a record, so a suppressed line costs
+    a dict lookup; as a logging.Filter it covers plain stdlib loggers too.
+    """
+
+    def __init__(self, rate: float = LOG_RATE_PER_SECOND, burst: int = LOG_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[Tuple[str, str], list] = {}  # key -> [tokens, last refill, suppressed]
+        self.suppressed = 0
+
+    def check(self, name: str, event: str, level: int) -> int | None:
+        """None if the line is suppressed, else how many were suppressed before it."""
+        if level >= logging.ERROR:
+            return 0  # Errors are never dropped
+        key = (name, event)
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now, 0]
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if bucket[0] < 1:
+            bucket[2] += 1
+            self.suppressed += 1
+            return None
+        bucket[0] -= 1
+        suppressed, bucket[2] = bucket[2], 0
+        return suppressed
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        suppressed = self.check(record.name, str(record.msg), record.levelno)
+        if suppressed:
+            record.suppressed = suppressed
+        return suppressed is not None
+
+
+rate_limit_filter = RateLimitFilter()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, Any] = {"ts": round(record.created, 3), "level": record.levelname.lower(),
+                                "logger": record.name, "event": record.getMessage()}
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """``time level logger: event key=value ...``"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = " ".join(f"{key}={value}" for key, value in vars(record).items() if key not in _STANDARD_ATTRS)
+        line = (f"{self.formatTime(record, '%H:%M:%S')} {record.levelname:<7} {record.name}: "
+                f"{record.getMessage()}{' ' + fields if fields else ''}")
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class StructuredLogger:
+    """
+    ``log.info("client_registered", client_id=...)``: an event name plus fields.
+    Disabled levels cost one comparison. Enabled ones build the record without
+    the stack walk logging does to find the caller (the event name says where
+    it came from) and leave formatting and writing to the listener thread.
+    """
+
+    __slots__ = ("_logger",)
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(name)
+
+    def _log(self, level: int, event: str, fields: Dict[str, Any]) -> None:
+        if self._logger.isEnabledFor(level):
+            suppressed = rate_limit_filter.check(self._logger.name, event, level)
+            if suppressed is None:
+                return
+            if suppressed:
+                fields["suppressed"] = suppressed
+            exc_info = fields.pop("exc_info", None)
+            if exc_info is True:
+                exc_info = sys.exc_info()
+            self._logger.handle(self._logger.makeRecord(self._logger.name, level, "", 0, event, (),
+                                                        exc_info, extra=fields))
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self._log(logging.ERROR, event, fields)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(name)
+
+
+_listener: logging.handlers.QueueListener | None = None
+_handler: logging.Handler | None = None
+
+
+def configure_logging() -> None:
+    """
+    Routes the "server" loggers through a queue: callers only enqueue the record,
+    and a listener thread formats it and writes to stdout, so no request waits on
+    a terminal or a pipe. Safe to call more than once.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return
+    root = logging.getLogger("server")
+    root.setLevel(LOG_LEVEL)
+    root.propagate = False
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(log_queue)
+    # The record is enqueued as is; formatting happens on the listener thread
+    handler.prepare = lambda record: record
+    root.addHandler(handler)
+    _handler = handler
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Writes out what is still queued and stops the listener thread."""
+    global _listener, _handler
+    if _listener is not None:
+        logging.getLogger("server").removeHandler(_handler)
+        _listener.stop()
+        _listener, _handler = None, None
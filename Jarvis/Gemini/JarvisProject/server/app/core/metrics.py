@@ -0,0 +1,233 @@
+# server/app/core/metrics.py
+
+import bisect
+import gc
+import math
+import time
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+Labels = Tuple[str, ...]
+
+# Request latency buckets (seconds): fine below 10 ms, where heartbeats live
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+GC_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[Any]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def latency_percentiles(values: Iterable[float]) -> Dict[str, float | None]:
+    """p50/p95/p99 in milliseconds of a window of durations in seconds (None while it is empty)."""
+    ordered = sorted(values)
+    if not ordered:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+# --- Metric types ---
+# Updates are plain dict operations on the event loop thread: no locks, no
+# allocation once a label combination has been seen.
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+
+    def samples(self) -> Iterable[Tuple[str, Labels, Tuple[str, ...], float]]:
+        """(suffix, label names, label values, value) for the exposition."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, names, values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield "", self.labelnames, labels, value
+
+
+class Gauge(Metric):
+    """Set directly, or computed at scrape time by ``collect()`` returning {labels: value}."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 collect: Callable[[], Dict[Labels, float]] | None = None):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._collect = collect
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self._values[labels] = value
+
+    def samples(self):
+        values = self._collect() if self._collect is not None else self._values
+        for labels, value in values.items():
+            yield "", self.labelnames, labels, value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, list] = {}  # labels -> [per-bucket counts (+Inf last), sum, count]
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def quantile(self, q: float, labels: Labels = ()) -> float | None:
+        """Upper bound of the bucket holding the q-quantile (as histogram_quantile would estimate)."""
+        series = self._series.get(labels)
+        if series is None or not series[2]:
+            return None
+        rank, seen = q * series[2], 0
+        for bound, count in zip(self.buckets + (math.inf,), series[0]):
+            seen += count
+            if seen >= rank:
+                return bound
+        return math.inf
+
+    def samples(self):
+        bucket_names = self.labelnames + ("le",)
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                yield "_bucket", bucket_names, labels + (_format_value(bound),), cumulative
+            yield "_sum", self.labelnames, labels, total
+            yield "_count", self.labelnames, labels, count
+
+
+class MetricsRegistry:
+    """Holds the metrics and renders them in the Prometheus text format (version 0.0.4)."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = (), collect=None) -> Gauge:
+        return self.register(Gauge(name, help, labelnames, collect))
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:  # One broken collector must not take the whole scrape down
+                lines.append(f"# {metric.name} collection failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "jarvis_http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status"))
+AUTH_FAILURES = metrics.counter(
+    "jarvis_auth_failures_total", "Rejected client credentials by reason", ("reason",))
+GC_PAUSE_SECONDS = metrics.histogram(
+    "jarvis_gc_pause_seconds", "Garbage collector pauses by generation", ("generation",), GC_BUCKETS)
+
+
+# --- Request timing ---
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request into HTTP_REQUEST_SECONDS.
+    The route label is the matched path template (``/tasks/{task_id}``), never
+    the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start,
+                                         (scope["method"], route.path if route is not None else "unmatched",
+                                          str(status)))
+
+
+# --- GC pauses ---
+
+_gc_started: float | None = None
+
+
+def _gc_callback(phase: str, info: Dict[str, Any]) -> None:
+    global _gc_started
+    if phase == "start":
+        _gc_started = time.perf_counter()
+    elif _gc_started is not None:
+        GC_PAUSE_SECONDS.observe(time.perf_counter() - _gc_started, (str(info["generation"]),))
+        _gc_started = None
+
+
+def install_gc_metrics() -> None:
+    if _gc_callback not in gc.callbacks:
+        gc.callbacks.append(_gc_callback)
@@ -0,0 +1,398 @@
+# server/app/core/registry.py
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from .logs import get_logger
+
+log = get_logger(__name__)
+
+# Offset that turns a time.monotonic() value into a Unix timestamp for display
+_WALL_OFFSET = time.time() - time.monotonic()
+
+
+@lru_cache(maxsize=4096)
+def _iso_second(seconds: int) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()[:-6]  # Without "+00:00"
+
+
+def monotonic_to_iso(ts: float | None) -> str | None:
+    """Same string as datetime.isoformat(); the date part is formatted once per second (/status at scale)."""
+    if ts is None:
+        return None
+    wall = ts + _WALL_OFFSET
+    seconds = math.floor(wall)
+    micros = round((wall - seconds) * 1e6)
+    if micros >= 1_000_000:
+        seconds, micros = seconds + 1, micros - 1_000_000
+    if micros:
+        return f"{_iso_second(seconds)}.{micros:06d}+00:00"
+    return _iso_second(seconds) + "+00:00"
+
+
+class ClientEntry:
+    """State of one active client. Timestamps are time.monotonic() floats."""
+
+    __slots__ = ("client_id", "status", "registered_at", "last_seen", "connection", "details", "_bucket")
+
+    def __init__(self, client_id: str, now: float):
+        self.client_id = client_id
+        self.status = "registered"
+        self.registered_at = now
+        self.last_seen = now
+        self.connection: str | None = None
+        self.details: Dict[str, Any] | None = None
+        self._bucket: int | None = None  # Expiry wheel slot the entry currently sits in
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "status": self.status,
+            "last_seen": monotonic_to_iso(self.last_seen),
+            "registered_at": monotonic_to_iso(self.registered_at),
+        }
+        if self.connection is not None:
+            data["connection"] = self.connection
+        if self.details is not None:
+            data["details"] = self.details
+        return data
+
+    def to_record(self) -> Dict[str, Any]:
+        """Flat form written to the state store, with Unix timestamps."""
+        return {
+            "client_id": self.client_id,
+            "status": self.status,
+            "registered_at": self.registered_at + _WALL_OFFSET,
+            "last_seen": self.last_seen + _WALL_OFFSET,
+            "connection": self.connection,
+            "details": self.details,
+        }
+
+
+class _Shard:
+    __slots__ = ("lock", "entries", "wheel", "next_tick")
+
+    def __init__(self, first_tick: int):
+        self.lock = threading.Lock()
+        self.entries: Dict[str, ClientEntry] = {}
+        self.wheel: Dict[int, set] = {}  # tick -> client_ids whose expiry falls in that tick
+        self.next_tick = first_tick       # First tick not yet expired
+
+
+class ClientRegistry:
+    """
+    Sharded store of active clients with timer-wheel expiry.
+
+    Clients are spread over ``shards`` dicts, each guarded by its own lock, so
+    concurrent updates from threads only contend within a shard. Every entry sits
+    in the wheel slot of its expiry tick (``expiry`` seconds after last_seen,
+    rounded to ``granularity``); touching a client moves it between slots in O(1),
+    and expire() only visits the slots that have come due, so the cost is
+    O(elapsed ticks + expired clients) rather than a scan of the whole fleet.
+
+    Every change bumps a registry-wide ``version``. A change log ordered by version
+    (client_id -> version of its last change, tombstones included) lets
+    changes_since() return a delta in O(changed clients); once more than
+    ``max_tombstones`` removals are retained the oldest log entries are dropped
+    and older versions need a full snapshot again.
+
+    The registry lives in process memory. Sinks attached with attach_sink() see
+    every change: the write-behind buffer (services/state_store.py) queues it for
+    the storage backend and the replication log (services/replication.py) ships
+    it to a standby server. merge() brings in state persisted by earlier runs or
+    other workers without echoing it back to the sinks.
+    """
+
+    def __init__(self, shards: int = 16, expiry: float = 300.0, granularity: float = 1.0,
+                 max_tombstones: int = 10_000):
+        self.expiry = expiry
+        self.granularity = granularity
+        first_tick = self._tick(time.monotonic())
+        self._shards = [_Shard(first_tick) for _ in range(shards)]
+        self._sinks: List[Any] = []
+
+        self.version = 0
+        self.max_tombstones = max_tombstones
+        self._changes: "OrderedDict[str, int]" = OrderedDict()
+        self._tombstones: set = set()
+        self._delta_floor = 0          # Deltas can only be served for since >= this
+        self._changes_lock = threading.Lock()
+        self._sorted_ids: List[str] | None = None  # Cached page order, reset on add/remove
+
+    def attach_sink(self, sink) -> None:
+        """Forwards every later change to ``sink.put(client_id, record)`` / ``sink.delete(client_id)``."""
+        self._sinks.append(sink)
+
+    def detach_sink(self, sink) -> None:
+        if sink in self._sinks:
+            self._sinks.remove(sink)
+
+    def _persist(self, entry: ClientEntry, membership: bool = False) -> None:
+        self._record_change(entry.client_id, membership=membership)
+        if self._sinks:
+            record = entry.to_record()
+            for sink in self._sinks:
+                sink.put(entry.client_id, record)
+
+    def _forget(self, client_id: str) -> None:
+        self._record_change(client_id, removed=True)
+        for sink in self._sinks:
+            sink.delete(client_id)
+
+    def _record_change(self, client_id: str, membership: bool = False, removed: bool = False) -> None:
+        """Bumps the version and moves client_id to the end of the change log."""
+        with self._changes_lock:
+            self.version += 1
+            self._changes[client_id] = self.version
+            self._changes.move_to_end(client_id)
+            if membership or removed:
+                self._sorted_ids = None
+            if removed:
+                self._tombstones.add(client_id)
+                while len(self._tombstones) > self.max_tombstones:
+                    oldest, oldest_version = self._changes.popitem(last=False)
+                    self._tombstones.discard(oldest)
+                    self._delta_floor = oldest_version
+            else:
+                self._tombstones.discard(client_id)
+
+    def _tick(self, ts: float) -> int:
+        return int(ts // self.granularity)
+
+    def _shard(self, client_id: str) -> _Shard:
+        return self._shards[hash(client_id) % len(self._shards)]
+
+    @staticmethod
+    def _schedule(shard: _Shard, entry: ClientEntry, tick: int) -> None:
+        """Moves an entry to the wheel slot of its new expiry tick. Caller holds the lock."""
+        if entry._bucket == tick:
+            return
+        if entry._bucket is not None:
+            slot = shard.wheel.get(entry._bucket)
+            if slot is not None:
+                slot.discard(entry.client_id)
+                if not slot:
+                    del shard.wheel[entry._bucket]
+        shard.wheel.setdefault(tick, set()).add(entry.client_id)
+        entry._bucket = tick
+
+    # --- Updates ---
+
+    def register(self, client_id: str, now: float | None = None) -> ClientEntry:
+        """Creates or resets a client entry."""
+        now = time.monotonic() if now is None else now
+        shard = self._shard(client_id)
+        with shard.lock:
+            entry = shard.entries.get(client_id)
+            added = entry is None
+            if added:
+                entry = shard.entries[client_id] = ClientEntry(client_id, now)
+            else:
+                entry.status = "registered"
+                entry.registered_at = entry.last_seen = now
+            self._schedule(shard, entry, self._tick(now + self.expiry) + 1)
+            self._persist(entry, membership=added)
+            return entry
+
+    def touch(self, client_id: str, status: str | None = "online", now: float | None = None) -> ClientEntry | None:
+        """
+        Records a sign of life and optionally a new status.
+        Returns None if the client is not registered.
+        """
+        now = time.monotonic() if now is None else now
+        shard = self._shard(client_id)
+        with shard.lock:
+            entry = shard.entries.get(client_id)
+            if entry is None:
+                return None
+            entry.last_seen = now
+            if status is not None:
+                entry.status = status
+            self._schedule(shard, entry, self._tick(now + self.expiry) + 1)
+            self._persist(entry)
+            return entry
+
+    def touch_many(self, heartbeats: Iterable[Tuple[str, str]], now: float | None = None) -> Dict[str, bool]:
+        """
+        Applies a batch of (client_id, status) heartbeats, taking each shard lock once.
+        Unregistered clients are registered on the fly, like /heartbeat does.
+        Returns {client_id: True if it was auto-registered}.
+        """
+        now = time.monotonic() if now is None else now
+        tick = self._tick(now + self.expiry) + 1
+        by_shard: Dict[int, List[Tuple[str, str]]] = {}
+        for client_id, status in heartbeats:
+            by_shard.setdefault(hash(client_id) % len(self._shards), []).append((client_id, status))
+
+        results = {}
+        for index, items in by_shard.items():
+            shard = self._shards[index]
+            with shard.lock:
+                for client_id, status in items:
+                    entry = shard.entries.get(client_id)
+                    added = entry is None
+                    if added:
+                        entry = shard.entries[client_id] = ClientEntry(client_id, now)
+                    entry.last_seen = now
+                    entry.status = status
+                    self._schedule(shard, entry, tick)
+                    self._persist(entry, membership=added)
+                    results[client_id] = added
+        return results
+
+    def update(self, client_id: str, **fields: Any) -> ClientEntry | None:
+        """Sets attributes (status, connection, details) on an entry without touching last_seen."""
+        shard = self._shard(client_id)
+        with shard.lock:
+            entry = shard.entries.get(client_id)
+            if entry is None:
+                return None
+            for name, value in fields.items():
+                setattr(entry, name, value)
+            self._persist(entry)
+            return entry
+
+    def remove(self, client_id: str) -> bool:
+        shard = self._shard(client_id)
+        with shard.lock:
+            entry = shard.entries.pop(client_id, None)
+            if entry is None:
+                return False
+            slot = shard.wheel.get(entry._bucket)
+            if slot is not None:
+                slot.discard(client_id)
+                if not slot:
+                    del shard.wheel[entry._bucket]
+        self._forget(client_id)
+        return True
+
+    def expire(self, now: float | None = None) -> List[str]:
+        """Removes clients not seen for ``expiry`` seconds and returns their ids."""
+        now = time.monotonic() if now is None else now
+        current = self._tick(now)
+        expired = []
+        for shard in self._shards:
+            with shard.lock:
+                # Jump straight to the earliest occupied slot when the wheel is sparse
+                if shard.wheel and current - shard.next_tick > len(shard.wheel):
+                    due = sorted(t for t in shard.wheel if t <= current)
+                else:
+                    due = range(shard.next_tick, current + 1)
+                for tick in due:
+                    for client_id in shard.wheel.pop(tick, ()):
+                        del shard.entries[client_id]
+                        expired.append(client_id)
+                shard.next_tick = current + 1
+        for client_id in expired:
+            self._forget(client_id)
+        return expired
+
+    def merge(self, records: Iterable[Dict[str, Any]], now: float | None = None,
+              authoritative: bool = False) -> int:
+        """
+        Loads persisted records (see ClientEntry.to_record) without re-queuing them.
+        A record only replaces a local entry if it was seen more recently, unless
+        ``authoritative`` (replicated from the leader, see services/replication.py);
+        records older than the expiry window are skipped. Returns the number applied.
+        """
+        now = time.monotonic() if now is None else now
+        applied = 0
+        for record in records:
+            last_seen = record["last_seen"] - _WALL_OFFSET
+            if last_seen + self.expiry <= now:
+                continue
+            client_id = record["client_id"]
+            shard = self._shard(client_id)
+            with shard.lock:
+                entry = shard.entries.get(client_id)
+                if entry is not None and entry.last_seen >= last_seen and not authoritative:
+                    continue
+                added = entry is None
+                if added:
+                    entry = shard.entries[client_id] = ClientEntry(client_id, last_seen)
+                entry.status = record["status"]
+                entry.registered_at = record["registered_at"] - _WALL_OFFSET
+                entry.last_seen = last_seen
+                entry.connection = record.get("connection")
+                entry.details = record.get("details")
+                self._schedule(shard, entry, self._tick(last_seen + self.expiry) + 1)
+            self._record_change(client_id, membership=added)
+            applied += 1
+        return applied
+
+    # --- Reads ---
+
+    def get(self, client_id: str) -> ClientEntry | None:
+        return self._shard(client_id).entries.get(client_id)
+
+    def __contains__(self, client_id: str) -> bool:
+        return client_id in self._shard(client_id).entries
+
+    def __len__(self) -> int:
+        return sum(len(shard.entries) for shard in self._shards)
+
+    def __iter__(self) -> Iterator[ClientEntry]:
+        for shard in self._shards:
+            with shard.lock:
+                entries = list(shard.entries.values())
+            yield from entries
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Returns {client_id: state} in the JSON shape served by /status."""
+        return {entry.client_id: entry.to_dict() for entry in self}
+
+    def page(self, offset: int, limit: int) -> List[ClientEntry]:
+        """Returns entries ordered by client_id; the order is cached until a client joins or leaves."""
+        with self._changes_lock:
+            sorted_ids = self._sorted_ids
+        if sorted_ids is None:
+            sorted_ids = sorted(entry.client_id for entry in self)
+            with self._changes_lock:
+                self._sorted_ids = sorted_ids
+        entries = (self.get(client_id) for client_id in sorted_ids[offset:offset + limit])
+        return [entry for entry in entries if entry is not None]
+
+    def changes_since(self, since: int) -> Tuple[int, List[ClientEntry], List[str]] | None:
+        """
+        Returns (version, changed entries, removed client_ids) for changes after
+        version ``since``, or None when the log no longer reaches back that far.
+        """
+        with self._changes_lock:
+            if since < self._delta_floor:
+                return None
+            version = self.version
+            changed_ids = []
+            for client_id in reversed(self._changes):
+                if self._changes[client_id] <= since:
+                    break
+                changed_ids.append(client_id)
+        changed, removed = [], []
+        for client_id in changed_ids:
+            entry = self.get(client_id)
+            if entry is None:
+                removed.append(client_id)
+            else:
+                changed.append(entry)
+        return version, changed, removed
+
+    async def run_expiry(self, interval: float | None = None) -> None:
+        """Background task that expires stale clients every ``interval`` seconds."""
+        interval = interval or self.granularity
+        while True:
+            await asyncio.sleep(interval)
+            for client_id in self.expire():
+                log.info("client_expired", client_id=client_id, expiry_seconds=self.expiry)
+
+
+# Registry of active clients shared by the whole app. Held in memory; with
+# STATE_BACKEND=sqlite|redis it is persisted and restored at startup (services/state_store.py)
+client_registry = ClientRegistry(
+    shards=int(os.getenv("REGISTRY_SHARDS", 16)),
+    expiry=float(os.getenv("CLIENT_EXPIRY_SECONDS", 300)),
+)
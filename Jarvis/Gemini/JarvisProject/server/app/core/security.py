@@ -3,12 +3,10 @@
 from fastapi import Header, HTTPException, status, Depends
 from typing import Annotated # Use Annotated for Depends with metadata in newer FastAPI/Python
 
-# Import helper functions from our config
-from server.config.known_clients import get_client_secret, is_known_client
-
-# Dictionary to store active clients (in-memory, will be lost on restart)
-# TODO: Persist this data (e.g., Redis, DB) for robustness and failover
-active_clients = {}
+# Precomputed credential index built from the client config
+from .auth_index import auth_index
+from .executor import execution_pool
+from .metrics import AUTH_FAILURES
 
 async def get_authenticated_client(
     x_client_id: Annotated[str | None, Header()] = None,
@@ -20,21 +18,26 @@ async def get_authenticated_client(
     Raises HTTPException otherwise.
     """
     if not x_client_id or not x_client_secret:
+        AUTH_FAILURES.inc(("missing_headers",))
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Client ID and Secret headers are required",
         )
 
-    if not is_known_client(x_client_id):
+    if not auth_index.is_known(x_client_id):
+        AUTH_FAILURES.inc(("unknown_client",))
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Unknown Client ID: {x_client_id}",
         )
 
-    expected_secret = get_client_secret(x_client_id)
-    if not expected_secret or x_client_secret != expected_secret:
-        # Basic timing attack mitigation (compare length first) - though constant time compare is better
-        # For real security, use secrets.compare_digest
+    # Constant-time comparison against hashed secrets (see auth_index.py);
+    # an uncached PBKDF2 check takes milliseconds, so it runs off the event loop
+    valid = auth_index.verify_cached(x_client_id, x_client_secret)
+    if valid is None:
+        valid = await execution_pool.run("auth_hash", auth_index.verify, x_client_id, x_client_secret)
+    if not valid:
+        AUTH_FAILURES.inc(("bad_secret",))
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid Client Secret",
@@ -0,0 +1,125 @@
+# server/app/core/serialization.py
+
+import json
+import os
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Mapping
+
+from starlette.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # Optional: responses are encoded with the json module instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional: without it every client gets JSON
+    msgpack = None
+
+# Accept values (and request Content-Types) meaning msgpack
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# Per-key pre-encoded responses kept (e.g. one registration ack per client)
+PRE_ENCODED_CACHE_SIZE = int(os.getenv("PRE_ENCODED_CACHE_SIZE", 4096))
+
+# Whether the current request asked for msgpack; set by ContentNegotiationMiddleware
+_msgpack_wanted: ContextVar[bool] = ContextVar("msgpack_wanted", default=False)
+
+
+def _default(obj: Any) -> Any:
+    """Types neither encoder handles itself: NumPy arrays and scalars, Pydantic models, sets."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def dumps_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def dumps_msgpack(content: Any) -> bytes:
+    return msgpack.packb(content, default=_default)
+
+
+def msgpack_wanted() -> bool:
+    return _msgpack_wanted.get()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Default response class of the app: JSON encoded with orjson, or msgpack
+    when the request's Accept header asks for it. Endpoints with large bodies
+    return it directly, which also skips FastAPI's jsonable_encoder pass over
+    the result (a Python-level walk of every value).
+    """
+
+    def render(self, content: Any) -> bytes:
+        if _msgpack_wanted.get():
+            self.media_type = MSGPACK_MEDIA_TYPE
+            return dumps_msgpack(content)
+        return dumps_json(content)
+
+    def init_headers(self, headers: Mapping[str, str] | None = None) -> None:
+        super().init_headers(headers)
+        if msgpack is not None:
+            self.raw_headers.append((b"vary", b"Accept"))  # Caches must keep the two encodings apart
+
+
+class PreEncoded:
+    """A fixed body encoded once per format and sent as is (health checks, acks)."""
+
+    __slots__ = ("json", "msgpack")
+
+    def __init__(self, content: Any):
+        self.json = dumps_json(content)
+        self.msgpack = dumps_msgpack(content) if msgpack is not None else None
+
+    def response(self, status_code: int = 200) -> Response:
+        if self.msgpack is not None and _msgpack_wanted.get():
+            return Response(self.msgpack, status_code, {"Vary": "Accept"}, MSGPACK_MEDIA_TYPE)
+        if self.msgpack is not None:
+            return Response(self.json, status_code, {"Vary": "Accept"}, "application/json")
+        return Response(self.json, status_code, media_type="application/json")
+
+
+class PreEncodedCache:
+    """PreEncoded bodies built by ``factory(key)``, the ``size`` most recently used kept."""
+
+    def __init__(self, factory: Callable[[Any], Any], size: int = PRE_ENCODED_CACHE_SIZE):
+        self._get = lru_cache(maxsize=size)(lambda key: PreEncoded(factory(key)))
+
+    def response(self, key: Any, status_code: int = 200) -> Response:
+        return self._get(key).response(status_code)
+
+
+class ContentNegotiationMiddleware:
+    """
+    Pure ASGI middleware noting whether the request accepts msgpack, for the
+    response classes above to read when they render (machine clients send
+    ``Accept: application/msgpack``; browsers and everyone else get JSON).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or msgpack is None:
+            return await self.app(scope, receive, send)
+        wanted = False
+        for name, value in scope["headers"]:
+            if name == b"accept":
+                wanted = b"msgpack" in value
+                break
+        token = _msgpack_wanted.set(wanted)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _msgpack_wanted.reset(token)
@@ -0,0 +1,129 @@
+# server/app/core/settings.py
+
+import importlib.util
+import json
+import os
+import time
+from typing import Any, Dict, Literal
+
+from pydantic import BaseModel, Field
+
+try:
+    import psutil
+except ImportError:  # Optional: without it the startup report has no RSS
+    psutil = None
+
+_SERVER_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+# .env candidates, first existing one wins (same order main.py used to load them in)
+ENV_FILES = (os.path.join(_SERVER_DIR, "config", ".env"), os.path.join(_SERVER_DIR, ".env"))
+# JSON config with a "server" section ({"host", "port", "workers", ...}), as in Claude/jarvis/config.json.
+# Its "debug" flag is not read: auto-reload is only enabled explicitly ("reload", SERVER_RELOAD, --reload)
+DEFAULT_CONFIG_FILE = os.path.join(_SERVER_DIR, "config", "config.json")
+# Set by the launcher (Unix time) so every worker can report how long its startup took
+LAUNCH_TIME_ENV = "JARVIS_LAUNCH_TIME"
+# State kept in each worker process whatever STATE_BACKEND says: with several workers a
+# command, task or mode change only reaches clients whose WebSocket that same worker holds
+PER_PROCESS_STATE = ("WebSocket sessions", "commands (/commands)", "scheduled tasks (/tasks)",
+                     "liveness detection", "mode switches")
+
+# Environment variable -> settings field; the environment wins over config.json
+_ENV_FIELDS = {
+    "SERVER_HOST": "host",
+    "SERVER_PORT": "port",
+    "SERVER_WORKERS": "workers",
+    "SERVER_LOOP": "loop",
+    "SERVER_HTTP": "http",
+    "SERVER_BACKLOG": "backlog",
+    "SERVER_RELOAD": "reload",
+    "LOG_LEVEL": "log_level",
+}
+
+
+class ServerSettings(BaseModel):
+    """How the server process is run. Feature settings stay with their modules (os.getenv)."""
+    host: str = "0.0.0.0"
+    port: int = Field(8000, ge=1, le=65535)
+    workers: int = Field(1, ge=1, description="Worker processes sharing one listening socket")
+    loop: Literal["auto", "uvloop", "asyncio"] = "auto"
+    http: Literal["auto", "httptools", "h11"] = "auto"
+    backlog: int = Field(2048, ge=1)
+    reload: bool = Field(False, description="Development only; forces a single worker")
+    log_level: str = "info"
+
+    def check_workers(self) -> str | None:
+        """
+        Raises ValueError for several workers over the in-memory registry (each would
+        answer /status differently); otherwise returns a warning for several workers.
+        """
+        if self.reload or self.workers == 1:
+            return None
+        if os.getenv("STATE_BACKEND", "memory").lower() == "memory":
+            raise ValueError(f"workers={self.workers} needs a shared client registry: set STATE_BACKEND=sqlite "
+                             "or redis, or run a single worker")
+        return (f"{self.workers} workers: the client registry is shared through STATE_BACKEND, but "
+                f"{', '.join(PER_PROCESS_STATE)} stay per worker process")
+
+    def resolved_loop(self) -> str:
+        if self.loop == "auto":
+            return "uvloop" if importlib.util.find_spec("uvloop") is not None else "asyncio"
+        return self.loop
+
+    def resolved_http(self) -> str:
+        if self.http == "auto":
+            return "httptools" if importlib.util.find_spec("httptools") is not None else "h11"
+        return self.http
+
+
+def load_env_file(path: str | None = None) -> str | None:
+    """
+    Copies a .env file into os.environ without overriding variables that are
+    already set. Runs before the app is imported, so the modules' os.getenv
+    constants (and the workers, which inherit the environment) see the values.
+    """
+    candidates = [path] if path else ENV_FILES
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            from dotenv import dotenv_values
+
+            for key, value in dotenv_values(candidate).items():
+                if value is not None:
+                    os.environ.setdefault(key, value)
+            return candidate
+    return None
+
+
+def _config_file_values(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        server = json.load(f).get("server", {})
+    return {key: server[key] for key in ServerSettings.model_fields if key in server}
+
+
+def load_settings(env_file: str | None = None, config_file: str | None = None, **overrides: Any) -> ServerSettings:
+    """
+    Builds the settings from, lowest to highest priority: defaults, config.json,
+    the environment (including the .env file) and explicit overrides (command line).
+    """
+    load_env_file(env_file)
+    values: Dict[str, Any] = {}
+    config_file = config_file or os.getenv("JARVIS_CONFIG_FILE", DEFAULT_CONFIG_FILE)
+    if os.path.exists(config_file):
+        values.update(_config_file_values(config_file))
+    for variable, field in _ENV_FIELDS.items():
+        if os.getenv(variable):
+            values[field] = os.environ[variable]
+    values.update({key: value for key, value in overrides.items() if value is not None})
+    return ServerSettings(**values)
+
+
+def startup_report() -> Dict[str, Any]:
+    """Seconds since the launcher started (or since this process started) and resident size."""
+    report: Dict[str, Any] = {"pid": os.getpid()}
+    launched = os.getenv(LAUNCH_TIME_ENV)
+    if launched:
+        report["startup_ms"] = round((time.time() - float(launched)) * 1000)
+    if psutil is not None:
+        process = psutil.Process()
+        if not launched:
+            report["startup_ms"] = round((time.time() - process.create_time()) * 1000)
+        report["rss_mb"] = round(process.memory_info().rss / 2**20, 1)
+    return report
@@ -0,0 +1,114 @@
+# server/app/core/static_assets.py
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from typing import Dict, List, NamedTuple, Tuple
+
+try:
+    import brotli
+except ImportError:  # Optional: without it assets are served gzip-compressed only
+    brotli = None
+
+# Cache lifetime (seconds) of unversioned assets; versioned ones are cached for a year
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", 3600))
+# Files smaller than this are sent as they are
+STATIC_MIN_COMPRESS_BYTES = int(os.getenv("STATIC_MIN_COMPRESS_BYTES", 512))
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# main.3f2a1b9c.js, app-5d41402a.css: a content hash in the name means the URL changes with the content
+_HASHED_NAME = re.compile(r"[.-][0-9a-f]{8,}\.")
+_COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml", "application/xml")
+
+
+class Asset(NamedTuple):
+    content_type: str
+    etag: str
+    mtime: float
+    bodies: Dict[str, bytes]  # content-coding ("identity", "gzip", "br") -> body
+
+
+def _accepted(header: str) -> List[str]:
+    """Codings from Accept-Encoding, skipping the ones refused with q=0."""
+    codings = []
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        codings.append(name.strip().lower())
+    return codings
+
+
+class StaticAssets:
+    """
+    Serves files from ``roots`` (first match wins) with every variant prepared once:
+    prebuilt ``<file>.br`` / ``<file>.gz`` next to the file are used as they are,
+    otherwise the file is compressed on first request (brotli when installed,
+    gzip) and kept in memory until its mtime changes.
+
+    Caching: HTML is ``no-cache`` (always revalidated, answered 304 while the
+    ETag matches) so a deploy shows up at once; hashed file names and URLs
+    carrying ``?v=`` are immutable for a year; anything else gets ``max_age``.
+    """
+
+    def __init__(self, roots: List[str], max_age: int = STATIC_MAX_AGE,
+                 min_compress: int = STATIC_MIN_COMPRESS_BYTES):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.max_age = max_age
+        self.min_compress = min_compress
+        self._cache: Dict[str, Asset] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, path: str) -> str | None:
+        """Absolute file path for a URL path, never outside the roots."""
+        path = path.lstrip("/") or "index.html"
+        for root in self.roots:
+            candidate = os.path.abspath(os.path.join(root, path))
+            if candidate.startswith(root + os.sep) and os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def load(self, file_path: str) -> Asset:
+        """Asset for a resolved path, built on first use. Blocking; call it off the event loop."""
+        mtime = os.stat(file_path).st_mtime
+        asset = self._cache.get(file_path)
+        if asset is not None and asset.mtime == mtime:
+            return asset
+        with open(file_path, "rb") as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+        bodies = {"identity": body}
+        if content_type.startswith(_COMPRESSIBLE) and len(body) >= self.min_compress:
+            for coding, suffix, compress in (("br", ".br", brotli.compress if brotli is not None else None),
+                                             ("gzip", ".gz", lambda data: gzip.compress(data, 9, mtime=0))):
+                prebuilt = file_path + suffix
+                if os.path.isfile(prebuilt) and os.stat(prebuilt).st_mtime >= mtime:
+                    with open(prebuilt, "rb") as f:
+                        bodies[coding] = f.read()
+                elif compress is not None:
+                    bodies[coding] = compress(body)
+        if content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+        asset = Asset(content_type, f'"{hashlib.sha1(body).hexdigest()[:16]}"', mtime, bodies)
+        with self._lock:
+            self._cache[file_path] = asset
+        return asset
+
+    def cache_control(self, file_path: str, versioned: bool) -> str:
+        if file_path.endswith(".html"):
+            return "no-cache"
+        if versioned or _HASHED_NAME.search(os.path.basename(file_path)):
+            return IMMUTABLE
+        return f"public, max-age={self.max_age}"
+
+    @staticmethod
+    def choose(asset: Asset, accept_encoding: str) -> Tuple[str, bytes]:
+        """Smallest variant the client accepts."""
+        accepted = _accepted(accept_encoding)
+        for coding in ("br", "gzip"):
+            if coding in asset.bodies and (coding in accepted or "*" in accepted):
+                return coding, asset.bodies[coding]
+        return "identity", asset.bodies["identity"]
@@ -1,99 +1,251 @@
 # server/app/main.py
 
-from fastapi import FastAPI, HTTPException, Depends, status
-import uvicorn
+from fastapi import FastAPI, HTTPException, Depends, Request, status
+from fastapi.responses import JSONResponse
 import os
-from dotenv import load_dotenv
-from datetime import datetime, timezone
 from typing import Dict, Any
+from contextlib import asynccontextmanager
+import asyncio
 
-# Import security dependency and active clients store
-from .core.security import AuthenticatedClient, active_clients
+# Import security dependency and active clients registry
+from .core.security import AuthenticatedClient
+from .core.registry import client_registry
+from .core.auth_index import auth_index
+from .core.executor import Overloaded, execution_pool
+from .core.loop_monitor import loop_lag_monitor
+from .core.logs import configure_logging, get_logger, shutdown_logging
+from .core.metrics import MetricsMiddleware, install_gc_metrics
+from .core.serialization import ContentNegotiationMiddleware, FastJSONResponse, PreEncoded, PreEncodedCache
+from .core.settings import startup_report
+from .services.state_store import WriteBehindBuffer, create_state_store
+from .services.replication import failover_node
+from .services.voice import voice_pipeline
+from .services.model_registry import MODEL_PRELOAD, model_registry
+from .services.notifications import notification_dispatcher
+from .services.dashboard import dashboard_aggregates
+from .services.commands import command_dispatcher
+from .services.modes import mode_manager
+from .services.liveness import liveness_detector
+from .services.telemetry import telemetry_store
+from .services.timeseries import TIMESERIES_ENABLED, timeseries_store
+from .models.status import Message
+from .api import (color_router, command_router, dashboard_router, executor_router, failover_router, heartbeat_router,
+                  liveness_router, metrics_router, mode_router, model_router, notification_router, session_router,
+                  status_router, task_router, telemetry_router, voice_router)
 
-# Load environment variables (e.g., for port)
-# Ensure .env is in server/config/ or specify path
-dotenv_path = os.path.join(os.path.dirname(__file__), '..', 'config', '.env')
-if os.path.exists(dotenv_path):
-    load_dotenv(dotenv_path=dotenv_path)
-else:
-     # Fallback if .env doesn't exist in config, try server/ directory
-     dotenv_path_alt = os.path.join(os.path.dirname(__file__), '..', '.env')
-     if os.path.exists(dotenv_path_alt):
-          load_dotenv(dotenv_path=dotenv_path_alt)
-     # else: print a warning or rely on system env vars
+log = get_logger(__name__)
+
+# No file I/O at import time: the .env file and config.json are read by the
+# launcher (server/launcher.py) before the workers import this module, and the
+# rest (credentials, persisted state, models) is loaded in the lifespan below.
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown hooks."""
+    # Log records are written by a background thread; GC pauses feed /metrics
+    configure_logging()
+    install_gc_metrics()
+
+    # A failover pair must share a replication secret (the feed carries every client and task)
+    failover_node.validate()
+
+    # Off-loop pools, rebuilt if an earlier lifespan in this process shut them down
+    execution_pool.start()
+
+    # Build the credential index once so the first request does not pay for it
+    auth_index.load()
+
+    # Mode profiles: a malformed MODE_PROFILES_FILE stops startup with the entry at fault
+    mode_manager.reload()
+
+    # Restore persisted client state and queue later changes for write-behind
+    state_store = create_state_store()
+    flush_task = None
+    if state_store is not None:
+        restored = client_registry.merge(state_store.load())
+        log.info("state_restored", clients=restored)
+        write_behind = WriteBehindBuffer(state_store, flush_interval=float(os.getenv("STATE_FLUSH_INTERVAL", 1)))
+        client_registry.attach_sink(write_behind)
+        flush_task = asyncio.create_task(write_behind.run(client_registry))
+
+    # Dashboard counts are kept up to date on every registry change, starting from what was restored
+    dashboard_aggregates.rebuild(client_registry)
+    client_registry.attach_sink(dashboard_aggregates)
+
+    # ML models: only list them here; they load on first use (or in the background if preloaded)
+    model_registry.discover()
+    model_registry.preload(MODEL_PRELOAD)
+
+    # Record changes for a hot standby and, on a standby, follow the leader
+    failover_node.attach()
+    failover_task = asyncio.create_task(failover_node.run())
+
+    # Alerts on clients going offline/online; the registry only appends to its in-memory queue
+    notify_task = None
+    if notification_dispatcher.enabled:
+        client_registry.attach_sink(notification_dispatcher)
+        notify_task = asyncio.create_task(notification_dispatcher.run())
+
+    # Adaptive suspect/offline marks from each client's heartbeat rhythm, well before expiry removes it
+    liveness_detector.rebuild(client_registry)
+    client_registry.attach_sink(liveness_detector)
+    liveness_task = asyncio.create_task(liveness_detector.run())
+
+    # Client history on disk (heartbeats, resource metrics, fleet counts) with 1s/1m/1h rollups
+    history_task = None
+    if TIMESERIES_ENABLED:
+        timeseries_store.open()
+        client_registry.attach_sink(timeseries_store)
+        telemetry_store.add_listener(timeseries_store.record_columns)
+        history_task = asyncio.create_task(
+            timeseries_store.run(fleet=lambda: dashboard_aggregates.summary()["by_status"]))
+
+    expiry_task = asyncio.create_task(client_registry.run_expiry())
+    lag_task = asyncio.create_task(loop_lag_monitor.run())
+    # Command redelivery after missed acks and expiry at deadlines
+    command_task = asyncio.create_task(command_dispatcher.run())
+    log.info("worker_started", **startup_report())
+    yield
+    expiry_task.cancel()
+    liveness_task.cancel()
+    lag_task.cancel()
+    command_task.cancel()
+    execution_pool.shutdown()
+    failover_task.cancel()
+    voice_pipeline.close()
+    model_registry.close()
+    if notify_task is not None:
+        notify_task.cancel()
+        await asyncio.gather(notify_task, return_exceptions=True)  # Writes what is still buffered
+    if history_task is not None:
+        history_task.cancel()
+        await asyncio.gather(history_task, return_exceptions=True)  # Writes the open buckets
+    if flush_task is not None:
+        flush_task.cancel()
+        await asyncio.gather(flush_task, return_exceptions=True)  # Runs the final flush
+        state_store.close()
+    shutdown_logging()
 
 
 app = FastAPI(
     title="Jarvis Central Server",
     description="Core server for the Jarvis personal assistant system.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
+    # orjson (or msgpack for Accept: application/msgpack) for every endpoint returning plain data
+    default_response_class=FastJSONResponse,
 )
 
+# --- Middleware ---
+
+# Paths a standby still serves; everything else is answered by the leader only
+STANDBY_PATHS = {"/", "/failover/status", "/metrics"}
+
+@app.middleware("http")
+async def standby_guard(request: Request, call_next):
+    """A standby refuses client traffic so clients move on to the leader."""
+    if not failover_node.is_leader and request.url.path not in STANDBY_PATHS:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            content={"detail": "Standby server, try the leader"},
+                            headers={"Retry-After": "1"})
+    return await call_next(request)
+
+# Notes whether the client accepts msgpack, for the response classes in core/serialization.py
+app.add_middleware(ContentNegotiationMiddleware)
+# Outermost: per-route latency histograms include the time spent in the middleware above
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """A full job queue (see core/executor.py) tells the client when to come back."""
+    return JSONResponse(status_code=status.HTTP_429_TOO_MANY_REQUESTS, content={"detail": str(exc)},
+                        headers={"Retry-After": str(exc.retry_after)})
+
 # --- Endpoints ---
 
-@app.get("/")
+# Hot responses, encoded once (per client for the acks) instead of on every request
+HEALTH_RESPONSE = PreEncoded({"message": "Jarvis Server is running"})
+REGISTERED_ACKS = PreEncodedCache(lambda client_id: {"message": f"Client '{client_id}' registered successfully"})
+HEARTBEAT_ACKS = PreEncodedCache(lambda client_id: {"message": f"Heartbeat from '{client_id}' received"})
+
+@app.get("/", response_model=Message)
 async def read_root():
     """Root endpoint for health check."""
-    return {"message": "Jarvis Server is running"}
+    return HEALTH_RESPONSE.response()
 
-@app.post("/register")
+@app.post("/register", response_model=Message)
 async def register_client(client_id: AuthenticatedClient):
     """
     Endpoint for clients to announce they are online.
     Requires valid X-Client-ID and X-Client-Secret headers.
     """
-    now = datetime.now(timezone.utc)
-    active_clients[client_id] = {
-        "status": "registered",
-        "last_seen": now.isoformat(),
-        "registered_at": now.isoformat()
-    }
-    print(f"Client registered/re-registered: {client_id}")
-    return {"message": f"Client '{client_id}' registered successfully"}
-
-@app.post("/heartbeat")
+    client_registry.register(client_id)
+    log.info("client_registered", client_id=client_id)
+    return REGISTERED_ACKS.response(client_id)
+
+@app.post("/heartbeat", response_model=Message)
 async def client_heartbeat(client_id: AuthenticatedClient):
     """
     Endpoint for clients to send periodic heartbeats.
     Requires valid X-Client-ID and X-Client-Secret headers.
     """
-    if client_id not in active_clients:
+    if client_registry.touch(client_id, status="online") is None: # Or update status based on payload later
         # Optional: Auto-register if heartbeat received from authenticated but unknown client
         # raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not registered. Please register first.")
-        print(f"Heartbeat from known but not actively registered client: {client_id}. Registering now.")
+        log.info("heartbeat_auto_register", client_id=client_id)
         await register_client(client_id) # Call register function directly
         return {"message": f"Client '{client_id}' heartbeat received (auto-registered)"}
 
-
-    now = datetime.now(timezone.utc)
-    active_clients[client_id]["last_seen"] = now.isoformat()
-    active_clients[client_id]["status"] = "online" # Or update based on payload later
     # print(f"Heartbeat received from: {client_id}") # Can be noisy
-    return {"message": f"Heartbeat from '{client_id}' received"}
-
-@app.get("/status")
-async def get_system_status(
-    # Optional: Protect this endpoint too, maybe only allow specific clients (like web_ui)
-    # client_id: AuthenticatedClient
-    ):
-    """Returns the status of currently active/registered clients."""
-    # TODO: Implement proper authorization (e.g., only allow web_ui or admin clients)
-    return active_clients
-
-@app.get("/protected_test")
+    return HEARTBEAT_ACKS.response(client_id)
+
+@app.get("/protected_test", response_model=Message)
 async def protected_route_test(client_id: AuthenticatedClient):
     """A simple protected endpoint to test authentication."""
     return {"message": f"Hello authenticated client: {client_id}"}
 
+# --- API routers ---
+# Persistent WebSocket session (heartbeats, status and command acks over one connection)
+app.include_router(session_router.router, tags=["Sessions"])
+# Fleet status: paginated, delta (?since=) and streaming (/status/stream) views
+app.include_router(status_router.router, tags=["Status"])
+# Bulk heartbeats from gateway/relay clients
+app.include_router(heartbeat_router.router, tags=["Heartbeats"])
+# Distributed tasks placed on capable clients
+app.include_router(task_router.router, tags=["Tasks"])
+# Hot-standby replication log and failover status
+app.include_router(failover_router.router, tags=["Failover"])
+# Streaming voice commands (VAD, incremental recognition, intents)
+app.include_router(voice_router.router, tags=["Voice"])
+# Warm ML model registry stats
+app.include_router(model_router.router, tags=["Models"])
+# Off-loop execution pools and event-loop lag
+app.include_router(executor_router.router, tags=["Executor"])
+# ESP32 colour sensor stream (binary RGB batches) and system selection
+app.include_router(color_router.router, tags=["Color sensor"])
+# Operation modes (gaming, study, programming) switched across the fleet
+app.include_router(mode_router.router, tags=["Modes"])
+# Offline/online alerts: outbox, digests and per-sink rate limits
+app.include_router(notification_router.router, tags=["Notifications"])
+# Prometheus metrics: route latency, auth failures, clients, loop lag, GC pauses
+app.include_router(metrics_router.router, tags=["Metrics"])
+# Dashboard aggregates (by status/OS, heartbeat ages, slowest clients) and the web UI files
+app.include_router(dashboard_router.router, tags=["Dashboard"])
+# Commands to clients: per-client priority queues, acks and redelivery, fan-out, long-poll fallback
+app.include_router(command_router.router, tags=["Commands"])
+# Heartbeat-driven liveness (phi-accrual): per-client suspicion and suspect/offline transitions
+app.include_router(liveness_router.router, tags=["Liveness"])
+# Client metrics in compressed columnar batches (also accepted as binary /ws frames)
+app.include_router(telemetry_router.router, tags=["Telemetry"])
+
 # --- Placeholder for future API routers ---
-# from .api import auth_router, command_router # Example hypothetical routers
+# from .api import auth_router # Example hypothetical router
 # app.include_router(auth_router.router, prefix="/auth", tags=["Authentication"])
-# app.include_router(command_router.router, prefix="/commands", tags=["Commands"])
 
 # --- Server Startup ---
 if __name__ == "__main__":
-    port = int(os.getenv("SERVER_PORT", 8000))
-    host = os.getenv("SERVER_HOST", "0.0.0.0") # Listen on all interfaces by default
-    print(f"Starting Jarvis Server on {host}:{port}")
-    # Use uvicorn programmatically or run via 'uvicorn server.app.main:app --reload'
-    uvicorn.run(app, host=host, port=port)
\ No newline at end of file
+    # Same as 'python -m server.launcher' (settings, workers, uvloop/httptools)
+    from server.launcher import main
+
+    main()
\ No newline at end of file
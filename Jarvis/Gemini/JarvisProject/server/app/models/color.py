@@ -0,0 +1,10 @@
+# server/app/models/color.py
+
+from pydantic import BaseModel, Field
+
+
+class ColorReading(BaseModel):
+    """Body of POST /color (the JSON the original sketch sends)."""
+    red: int = Field(..., ge=0, le=255)
+    green: int = Field(..., ge=0, le=255)
+    blue: int = Field(..., ge=0, le=255)
@@ -0,0 +1,40 @@
+# server/app/models/command.py
+
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, Field
+
+
+class CommandSubmission(BaseModel):
+    """Body of POST /commands."""
+    client_id: str = Field(..., min_length=1, description="Client that should run the command")
+    action: str = Field(..., min_length=1, max_length=64)
+    args: Dict[str, Any] = Field(default_factory=dict, description="Sent along in the command frame")
+    priority: int = Field(0, description="Higher is delivered first")
+    ttl: float | None = Field(None, gt=0, le=86400, description="Seconds until the command is given up")
+    idempotency_key: str | None = Field(None, max_length=128, description="Resubmitting a key returns the same command")
+    wait: float | None = Field(None, gt=0, le=60, description="Seconds to wait for the ack before answering")
+
+
+class CommandFanOut(BaseModel):
+    """Body of POST /commands/fanout."""
+    clients: List[str] | None = Field(None, description="Target clients; default every registered client")
+    action: str = Field(..., min_length=1, max_length=64)
+    args: Dict[str, Any] = Field(default_factory=dict)
+    priority: int = 0
+    ttl: float | None = Field(None, gt=0, le=86400)
+    idempotency_key: str | None = Field(None, max_length=128, description="Applied per target client")
+    wait: float | None = Field(None, gt=0, le=60, description="Seconds to wait for every ack before answering")
+
+
+class CommandAck(BaseModel):
+    """One ack of a command received through GET /commands/poll."""
+    command_id: str
+    ok: bool = True
+    result: Any = None
+    error: str | None = None
+
+
+class CommandAcks(BaseModel):
+    """Body of POST /commands/ack."""
+    acks: List[CommandAck] = Field(..., max_length=1000)
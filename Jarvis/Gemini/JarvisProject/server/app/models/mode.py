@@ -0,0 +1,11 @@
+# server/app/models/mode.py
+
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class ModeSwitch(BaseModel):
+    """Optional body of POST /modes/{mode}."""
+    clients: List[str] | None = Field(None, description="Clients to switch; default every connected client")
+    timeout: float | None = Field(None, gt=0, le=60, description="Seconds each client has to ack")
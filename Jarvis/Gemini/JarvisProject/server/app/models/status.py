@@ -0,0 +1,64 @@
+# server/app/models/status.py
+
+from typing import Any, Dict, List, Literal
+
+from pydantic import BaseModel, Field
+
+
+class Message(BaseModel):
+    """Plain acknowledgement (/, /register, /heartbeat)."""
+    message: str
+
+
+# Statuses a client may report for itself; "suspect"/"offline" are only set by the
+# liveness detector and "disconnected"/"registered" by the server
+ReportedStatus = Literal["online", "busy", "idle"]
+
+
+class ClientStatus(BaseModel):
+    """One client in GET /status (see ClientEntry.to_dict)."""
+    status: str
+    last_seen: str | None = Field(None, description="ISO 8601, UTC")
+    registered_at: str | None = Field(None, description="ISO 8601, UTC")
+    connection: str | None = Field(None, description="\"websocket\" while a session is open")
+    details: Dict[str, Any] | None = None
+
+
+class StatusPage(BaseModel):
+    """GET /status with offset/limit/fields; clients hold only the selected fields."""
+    epoch: str = Field(..., description="Boot epoch of the serving process; versions restart with it")
+    version: int
+    total: int
+    offset: int
+    limit: int
+    clients: Dict[str, Dict[str, Any]]
+
+
+class StatusDelta(BaseModel):
+    """GET /status?since=<epoch>-<version>: clients changed and removed after that version."""
+    epoch: str = Field(..., description="Boot epoch of the serving process; versions restart with it")
+    version: int
+    since: int
+    full: bool = Field(..., description="The change log was too short, or the cursor came from another "
+                                        "process: changed holds every client")
+    changed: Dict[str, Dict[str, Any]]
+    removed: List[str]
+
+
+class MetricHistory(BaseModel):
+    """One metric in GET /status/history: per bucket, or raw values with resolution=raw."""
+    times: List[float]
+    count: List[int] | None = None
+    avg: List[float] | None = None
+    min: List[float] | None = None
+    max: List[float] | None = None
+    values: List[float] | None = None
+
+
+class StatusHistory(BaseModel):
+    """GET /status/history and /status/history/{client_id}."""
+    client_id: str
+    resolution: str
+    start: float
+    end: float
+    metrics: Dict[str, MetricHistory]
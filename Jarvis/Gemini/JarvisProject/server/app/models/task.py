@@ -0,0 +1,14 @@
+# server/app/models/task.py
+
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class TaskSubmission(BaseModel):
+    """Body of POST /tasks."""
+    kind: str = Field(..., min_length=1, max_length=64, description="Capability a client needs to run the task")
+    payload: Any = None
+    priority: int = Field(0, description="Higher runs first")
+    max_retries: int = Field(2, ge=0, le=10)
+    timeout: float | None = Field(None, gt=0, description="Seconds to wait for the client's result")
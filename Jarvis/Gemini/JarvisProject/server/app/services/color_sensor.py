@@ -0,0 +1,291 @@
+# server/app/services/color_sensor.py
+
+import os
+import struct
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from ..core.connections import connection_manager
+from ..core.logs import get_logger
+
+log = get_logger(__name__)
+
+# --- Binary frames ---
+# One WebSocket binary message carries a batch of readings (little-endian):
+#   version u8 (=1) | count u8 | interval_ms u16 | t0_ms u32 (device millis() of the first reading)
+#   followed by count x (r u8, g u8, b u8)
+FRAME_HEADER = struct.Struct("<BBHI")
+FRAME_VERSION = 1
+
+# Readings kept per sensor (about a minute at 100 Hz)
+COLOR_RING_SIZE = int(os.getenv("COLOR_RING_SIZE", 8192))
+# Readings are averaged over windows of this length before classification
+COLOR_WINDOW_MS = int(os.getenv("COLOR_WINDOW_MS", 100))
+# Consecutive windows that must agree before a selection event is raised
+COLOR_DEBOUNCE_WINDOWS = int(os.getenv("COLOR_DEBOUNCE_WINDOWS", 3))
+# Averages darker than this (r+g+b) mean "no card in front of the sensor"
+COLOR_MIN_BRIGHTNESS = int(os.getenv("COLOR_MIN_BRIGHTNESS", 60))
+# Maximum chromaticity distance to a palette colour for it to count as a match
+COLOR_MAX_DISTANCE = float(os.getenv("COLOR_MAX_DISTANCE", 0.12))
+# Which system each colour selects, e.g. "red=windows_pc_1,green=kali_pc_1"
+COLOR_TARGETS = dict(pair.split("=", 1) for pair in os.getenv("COLOR_TARGETS", "").split(",") if "=" in pair)
+
+# Reference colours the sensor is expected to see
+PALETTE: Dict[str, Tuple[int, int, int]] = {
+    "red": (200, 40, 40),
+    "green": (40, 180, 60),
+    "blue": (40, 60, 200),
+    "yellow": (200, 180, 40),
+    "white": (200, 200, 200),
+}
+
+
+class FrameError(ValueError):
+    """A binary frame that does not follow the format above."""
+
+
+def parse_frame(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns (device times in seconds, RGB uint8 array of shape (count, 3)) for one frame."""
+    if len(data) < FRAME_HEADER.size:
+        raise FrameError("Frame shorter than its header")
+    version, count, interval_ms, t0_ms = FRAME_HEADER.unpack_from(data)
+    if version != FRAME_VERSION:
+        raise FrameError(f"Unsupported frame version {version}")
+    if len(data) != FRAME_HEADER.size + 3 * count:
+        raise FrameError(f"Frame announces {count} readings but carries {len(data) - FRAME_HEADER.size} bytes")
+    rgb = np.frombuffer(data, dtype=np.uint8, count=3 * count, offset=FRAME_HEADER.size).reshape(count, 3)
+    times = (t0_ms + interval_ms * np.arange(count, dtype=np.float64)) / 1000.0
+    return times, rgb
+
+
+def encode_frame(t0_ms: int, interval_ms: int, readings) -> bytes:
+    """Builds a frame from (r, g, b) tuples; the sketch does the same in C."""
+    readings = np.asarray(readings, dtype=np.uint8).reshape(-1, 3)
+    return FRAME_HEADER.pack(FRAME_VERSION, len(readings), interval_ms, t0_ms & 0xFFFFFFFF) + readings.tobytes()
+
+
+# --- Storage ---
+
+class ColorRing:
+    """Fixed-size ring buffer of timestamped RGB readings; old readings are overwritten."""
+
+    def __init__(self, size: int = COLOR_RING_SIZE):
+        self.size = size
+        self.times = np.zeros(size, dtype=np.float64)
+        self.rgb = np.zeros((size, 3), dtype=np.uint8)
+        self.total = 0  # Readings ever written
+
+    def extend(self, times: np.ndarray, rgb: np.ndarray) -> None:
+        count = len(times)
+        if count > self.size:
+            times, rgb, skipped = times[-self.size:], rgb[-self.size:], count - self.size
+            self.total += skipped
+            count = self.size
+        start = self.total % self.size
+        first = min(count, self.size - start)
+        self.times[start:start + first] = times[:first]
+        self.rgb[start:start + first] = rgb[:first]
+        if first < count:  # Wraps around
+            self.times[:count - first] = times[first:]
+            self.rgb[:count - first] = rgb[first:]
+        self.total += count
+
+    def latest(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """The last ``count`` readings, oldest first."""
+        count = min(count, self.total, self.size)
+        index = (np.arange(self.total - count, self.total)) % self.size
+        return self.times[index], self.rgb[index]
+
+    def __len__(self) -> int:
+        return min(self.total, self.size)
+
+
+# --- Selection ---
+
+def _chromaticity(rgb: np.ndarray) -> np.ndarray:
+    rgb = np.asarray(rgb, dtype=np.float64)
+    return rgb / np.maximum(rgb.sum(axis=-1, keepdims=True), 1.0)
+
+
+class ColorSelector:
+    """
+    Turns a high-rate reading stream into rare selection events.
+
+    Readings are averaged per COLOR_WINDOW_MS window (downsampling), each window
+    average is classified against the palette by chromaticity (so brightness
+    does not matter), and a colour is only selected once it has won
+    COLOR_DEBOUNCE_WINDOWS windows in a row and differs from the current
+    selection. Taking the card away (a dark or unmatched reading for as long)
+    clears the selection, so showing the same card again selects it again.
+    """
+
+    def __init__(self, palette: Dict[str, Tuple[int, int, int]] = PALETTE, window_ms: int = COLOR_WINDOW_MS,
+                 debounce: int = COLOR_DEBOUNCE_WINDOWS, min_brightness: int = COLOR_MIN_BRIGHTNESS,
+                 max_distance: float = COLOR_MAX_DISTANCE):
+        self.names = list(palette)
+        self.references = _chromaticity(np.array([palette[name] for name in self.names]))
+        self.window = window_ms / 1000.0
+        self.debounce = debounce
+        self.min_brightness = min_brightness
+        self.max_distance = max_distance
+        self.selected: str | None = None
+        self._window_index: int | None = None  # Window still being filled
+        self._sum = np.zeros(3)
+        self._count = 0
+        self._candidate: str | None = None
+        self._streak = 0
+        self.windows = 0
+
+    def classify(self, mean_rgb: np.ndarray) -> str | None:
+        if mean_rgb.sum() < self.min_brightness:
+            return None
+        distances = np.linalg.norm(self.references - _chromaticity(mean_rgb), axis=1)
+        best = int(distances.argmin())
+        return self.names[best] if distances[best] <= self.max_distance else None
+
+    def feed(self, times: np.ndarray, rgb: np.ndarray) -> List[Tuple[float, str | None]]:
+        """Adds readings; returns (window end time, colour or None when cleared) for each selection change."""
+        changes = []
+        windows = np.floor(times / self.window).astype(np.int64)
+        # Readings arrive in order, so a batch splits into runs that share a window
+        bounds = np.flatnonzero(np.diff(windows)) + 1
+        for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(windows)]):
+            index = int(windows[start])
+            if self._window_index is not None and index != self._window_index:
+                if self._close_window():
+                    changes.append(((self._window_index + 1) * self.window, self.selected))
+                self._sum[:], self._count = 0, 0
+            self._window_index = index
+            self._sum += rgb[start:end].sum(axis=0)
+            self._count += end - start
+        return changes
+
+    def _close_window(self) -> bool:
+        """Classifies the finished window; True when the selection changed."""
+        self.windows += 1
+        colour = self.classify(self._sum / self._count)
+        if colour == self._candidate:
+            self._streak += 1
+        else:
+            self._candidate, self._streak = colour, 1
+        if self._streak == self.debounce and colour != self.selected:
+            self.selected = colour
+            return True
+        return False
+
+
+# --- Hub ---
+
+class _Sensor:
+    __slots__ = ("ring", "selector", "offset", "frames", "bad_frames", "connected_at", "last_seen")
+
+    def __init__(self):
+        self.ring = ColorRing()
+        self.selector = ColorSelector()
+        self.offset: float | None = None  # Server time minus device time
+        self.frames = 0
+        self.bad_frames = 0
+        self.connected_at = time.time()
+        self.last_seen = self.connected_at
+
+
+SelectionListener = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class ColorSensorHub:
+    """
+    Ingests colour readings from every sensor, keeps the recent ones in a ring
+    buffer per sensor and publishes selection events to listeners.
+    """
+
+    def __init__(self, targets: Dict[str, str] = COLOR_TARGETS):
+        self.targets = targets
+        self._sensors: Dict[str, _Sensor] = {}
+        self._listeners: List[SelectionListener] = []
+        self.readings = 0
+        self.events = 0
+
+    def add_listener(self, listener: SelectionListener) -> None:
+        self._listeners.append(listener)
+
+    def sensor(self, sensor_id: str) -> _Sensor:
+        sensor = self._sensors.get(sensor_id)
+        if sensor is None:
+            sensor = self._sensors[sensor_id] = _Sensor()
+        return sensor
+
+    def ingest(self, sensor_id: str, times: np.ndarray, rgb: np.ndarray) -> List[Dict[str, Any]]:
+        """Stores device-timed readings; returns the selection events they caused."""
+        sensor = self.sensor(sensor_id)
+        now = time.time()
+        sensor.last_seen = now
+        sensor.frames += 1
+        if not len(times):
+            return []
+        # Anchor device time to server time; re-anchor after a device reboot or a large drift
+        if sensor.offset is None or abs(sensor.offset + times[-1] - now) > 1.0:
+            sensor.offset = now - times[-1]
+        sensor.ring.extend(times + sensor.offset, rgb)
+        self.readings += len(times)
+
+        # Windows follow the device clock, which is steady even when frames arrive in bursts
+        events = []
+        for at, colour in sensor.selector.feed(times, rgb):
+            events.append({"type": "color_selection", "sensor": sensor_id, "color": colour,
+                           "target": self.targets.get(colour) if colour else None,
+                           "at": round(at + sensor.offset, 3)})
+        self.events += len(events)
+        return events
+
+    def ingest_frame(self, sensor_id: str, data: bytes) -> List[Dict[str, Any]]:
+        try:
+            times, rgb = parse_frame(data)
+        except FrameError:
+            self.sensor(sensor_id).bad_frames += 1
+            raise
+        return self.ingest(sensor_id, times, rgb)
+
+    async def publish(self, events: List[Dict[str, Any]]) -> None:
+        for event in events:
+            for listener in self._listeners:
+                try:
+                    await listener(event)
+                except Exception as e:
+                    log.error("color_listener_failed", error=str(e))
+
+    def disconnect(self, sensor_id: str) -> None:
+        sensor = self._sensors.get(sensor_id)
+        if sensor is not None:
+            sensor.offset = None  # The device clock may restart with the next connection
+
+    def recent(self, sensor_id: str, count: int) -> List[Dict[str, Any]]:
+        sensor = self._sensors.get(sensor_id)
+        if sensor is None:
+            return []
+        times, rgb = sensor.ring.latest(count)
+        return [{"at": round(float(t), 3), "rgb": [int(c) for c in value]} for t, value in zip(times, rgb)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"readings": self.readings, "selection_events": self.events, "targets": self.targets,
+                "sensors": {sensor_id: {"selected": sensor.selector.selected,
+                                        "target": self.targets.get(sensor.selector.selected),
+                                        "buffered": len(sensor.ring), "readings": sensor.ring.total,
+                                        "frames": sensor.frames, "bad_frames": sensor.bad_frames,
+                                        "windows": sensor.selector.windows,
+                                        "last_seen": sensor.last_seen}
+                            for sensor_id, sensor in self._sensors.items()}}
+
+
+color_sensors = ColorSensorHub()
+
+
+async def _notify_target(event: Dict[str, Any]) -> None:
+    """Tells the selected system it was picked (over its /ws session, if it has one open)."""
+    if event["target"] is not None:
+        await connection_manager.send(event["target"], {"type": "selected", "by": event["sensor"],
+                                                        "color": event["color"]})
+
+
+color_sensors.add_listener(_notify_target)
@@ -0,0 +1,427 @@
+# server/app/services/commands.py
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Iterable, List
+
+from ..core.connections import connection_manager
+from ..core.logs import get_logger
+from ..core.metrics import latency_percentiles
+
+log = get_logger(__name__)
+
+# Commands waiting per client; when full, a new one only gets in by displacing a lower-priority one
+COMMAND_QUEUE_SIZE = int(os.getenv("COMMAND_QUEUE_SIZE", 100))
+# Seconds a command stays deliverable when the caller sets no deadline
+COMMAND_TTL = float(os.getenv("COMMAND_TTL", 300))
+# Seconds to wait for an ack before the command is delivered again
+COMMAND_ACK_TIMEOUT = float(os.getenv("COMMAND_ACK_TIMEOUT", 10))
+# Unacked commands a client may have in flight over its WebSocket; the rest wait in its queue
+COMMAND_WINDOW = int(os.getenv("COMMAND_WINDOW", 8))
+# Finished commands kept for lookups and idempotent resubmission
+COMMAND_HISTORY = int(os.getenv("COMMAND_HISTORY", 10_000))
+# How often deadlines and ack timeouts are checked (seconds)
+COMMAND_TICK = float(os.getenv("COMMAND_TICK", 0.1))
+COMMAND_LATENCY_WINDOW = int(os.getenv("COMMAND_LATENCY_WINDOW", 10_000))
+
+QUEUED, DELIVERED, ACKED, FAILED, EXPIRED, DROPPED = "queued", "delivered", "acked", "failed", "expired", "dropped"
+FINISHED = frozenset((ACKED, FAILED, EXPIRED, DROPPED))
+
+
+class QueueFull(Exception):
+    """A client's queue is full of commands at least as important as the new one."""
+
+
+class Command:
+    __slots__ = ("command_id", "client_id", "action", "args", "priority", "deadline", "idempotency_key",
+                 "group_id", "state", "attempts", "via", "result", "error", "created_at", "delivered_at",
+                 "finished_at", "_seq", "_done")
+
+    def __init__(self, command_id: str, client_id: str, action: str, args: Dict[str, Any], priority: int,
+                 deadline: float, idempotency_key: str | None, group_id: str | None, seq: int):
+        self.command_id = command_id
+        self.client_id = client_id
+        self.action = action
+        self.args = args
+        self.priority = priority
+        self.deadline = deadline             # time.monotonic()
+        self.idempotency_key = idempotency_key
+        self.group_id = group_id
+        self.state = QUEUED
+        self.attempts = 0
+        self.via: str | None = None          # "websocket" or "poll", last delivery
+        self.result: Any = None
+        self.error: str | None = None
+        self.created_at = time.monotonic()
+        self.delivered_at: float | None = None
+        self.finished_at: float | None = None
+        self._seq = seq
+        self._done: asyncio.Future | None = None
+
+    def __lt__(self, other: "Command") -> bool:
+        # Higher priority first, then submission order
+        return (-self.priority, self._seq) < (-other.priority, other._seq)
+
+    def frame(self) -> Dict[str, Any]:
+        """What the client receives; same shape as connection_manager.push_command frames."""
+        return {**self.args, "type": "command", "command_id": self.command_id, "action": self.action,
+                "attempt": self.attempts, "expires_in": round(max(0.0, self.deadline - time.monotonic()), 1)}
+
+    def to_dict(self) -> Dict[str, Any]:
+        latency = self.finished_at - self.created_at if self.finished_at is not None else None
+        return {"command_id": self.command_id, "client_id": self.client_id, "action": self.action,
+                "state": self.state, "priority": self.priority, "attempts": self.attempts, "via": self.via,
+                "group_id": self.group_id, "result": self.result, "error": self.error,
+                "latency_ms": round(latency * 1000, 2) if latency is not None else None}
+
+
+class CommandGroup:
+    """One command fanned out to several clients (see CommandDispatcher.fan_out)."""
+
+    def __init__(self, group_id: str, action: str):
+        self.group_id = group_id
+        self.action = action
+        self.commands: Dict[str, Command] = {}
+        self.rejected: Dict[str, str] = {}  # client_id -> reason
+        self.created_at = time.monotonic()
+
+    async def wait(self, timeout: float | None = None) -> None:
+        """Waits until every command of the group is finished (acked, failed or expired)."""
+        pending = [command for command in self.commands.values() if command.state not in FINISHED]
+        futures = []
+        for command in pending:
+            if command._done is None:
+                command._done = asyncio.get_running_loop().create_future()
+            futures.append(command._done)
+        if futures:
+            await asyncio.wait(futures, timeout=timeout)
+
+    def summary(self) -> Dict[str, Any]:
+        states: Dict[str, int] = {}
+        latencies: Dict[str, List[float]] = {}  # Last delivery path -> ack latencies
+        redelivered = 0
+        for command in self.commands.values():
+            states[command.state] = states.get(command.state, 0) + 1
+            redelivered += command.attempts > 1
+            if command.state == ACKED:
+                latencies.setdefault(command.via, []).append(command.finished_at - command.created_at)
+        finished = [command.finished_at for command in self.commands.values() if command.finished_at is not None]
+        complete = len(finished) == len(self.commands)
+        return {"group_id": self.group_id, "action": self.action, "clients": len(self.commands),
+                "states": states, "rejected": self.rejected, "complete": complete, "redelivered": redelivered,
+                "ack_latency": latency_percentiles([value for values in latencies.values() for value in values]),
+                "ack_latency_by_path": {via: latency_percentiles(values) for via, values in latencies.items()},
+                "completion_ms": round((max(finished) - self.created_at) * 1000, 2) if complete and finished
+                else None}
+
+
+class _ClientQueue:
+    __slots__ = ("heap", "in_flight", "poll_event", "delivering", "pollers")
+
+    def __init__(self):
+        self.heap: List[Command] = []              # Waiting commands, best first
+        self.in_flight: Dict[str, Command] = {}    # Delivered, not acked yet
+        self.poll_event: asyncio.Event | None = None
+        self.delivering = False
+        self.pollers = 0                           # Long-polls waiting on poll_event
+
+    def idle(self) -> bool:
+        return not self.heap and not self.in_flight and not self.delivering and not self.pollers
+
+
+class CommandDispatcher:
+    """
+    Server-to-client commands with at-least-once delivery.
+
+    Each client has a bounded priority queue. Commands go out over the client's
+    WebSocket session when it has one (up to ``window`` unacked at a time);
+    otherwise they wait for the client's next long-poll (GET /commands/poll).
+    A command is delivered again when no ack arrives within ``ack_timeout`` and
+    is given up at its deadline, so clients may see a command more than once
+    and must treat ``command_id`` as the deduplication key (the agent does).
+
+    Callers may pass an idempotency key: submitting the same key for the same
+    client again returns the existing command instead of queueing a second one.
+    fan_out() sends one command to many clients and tracks them as a group.
+
+    Deadlines and ack timeouts sit in two heaps checked every ``tick`` seconds,
+    so the periodic work only touches commands that have come due.
+    """
+
+    def __init__(self, queue_size: int = COMMAND_QUEUE_SIZE, ttl: float = COMMAND_TTL,
+                 ack_timeout: float = COMMAND_ACK_TIMEOUT, window: int = COMMAND_WINDOW,
+                 history: int = COMMAND_HISTORY, tick: float = COMMAND_TICK, connections=connection_manager):
+        self.queue_size = queue_size
+        self.ttl = ttl
+        self.ack_timeout = ack_timeout
+        self.window = window
+        self.history = history
+        self.tick = tick
+        self._connections = connections
+        self._queues: Dict[str, _ClientQueue] = {}
+        self._commands: Dict[str, Command] = {}
+        self._keys: Dict[tuple, str] = {}               # (client_id, idempotency key) -> command_id
+        self._finished: "deque[str]" = deque()          # Finished command ids, oldest first
+        self._groups: "OrderedDict[str, CommandGroup]" = OrderedDict()
+        self._deadlines: List[tuple] = []               # (deadline, seq, command_id)
+        self._resends: List[tuple] = []                 # (resend at, seq, command_id, attempt)
+        self._ids = itertools.count(1)
+        self._group_ids = itertools.count(1)
+        self._tasks: set = set()
+        self._latency: "deque[float]" = deque(maxlen=COMMAND_LATENCY_WINDOW)
+        self.counters = {"submitted": 0, "deduplicated": 0, "rejected": 0, "delivered": 0, "redelivered": 0,
+                         "duplicate_acks": 0, ACKED: 0, FAILED: 0, EXPIRED: 0, DROPPED: 0}
+
+    def _queue(self, client_id: str) -> _ClientQueue:
+        queue = self._queues.get(client_id)
+        if queue is None:
+            queue = self._queues[client_id] = _ClientQueue()
+        return queue
+
+    def _prune(self, client_id: str, queue: _ClientQueue) -> None:
+        """Drops a queue with nothing waiting, in flight or polling, so ids seen once do not pile up."""
+        if queue.idle() and self._queues.get(client_id) is queue:
+            del self._queues[client_id]
+
+    # --- Submitting ---
+
+    def submit(self, client_id: str, action: str, args: Dict[str, Any] | None = None, priority: int = 0,
+               ttl: float | None = None, idempotency_key: str | None = None,
+               group_id: str | None = None) -> Command:
+        """
+        Queues a command for one client and starts delivering it.
+        Raises QueueFull when the client's queue holds ``queue_size`` commands of
+        equal or higher priority; a lower-priority one is displaced otherwise.
+        """
+        if idempotency_key is not None:
+            existing = self._keys.get((client_id, idempotency_key))
+            if existing is not None and existing in self._commands:
+                self.counters["deduplicated"] += 1
+                return self._commands[existing]
+
+        queue = self._queue(client_id)
+        if len(queue.heap) >= self.queue_size:
+            lowest = max(queue.heap)
+            if lowest.priority >= priority:
+                self.counters["rejected"] += 1
+                raise QueueFull(f"Command queue of '{client_id}' is full")
+            self._finish(lowest, DROPPED, error="Displaced by a higher-priority command")
+
+        seq = next(self._ids)
+        command = Command(f"cmd-{seq}", client_id, action, dict(args or {}), priority,
+                          time.monotonic() + (self.ttl if ttl is None else ttl), idempotency_key, group_id, seq)
+        self._commands[command.command_id] = command
+        if idempotency_key is not None:
+            self._keys[(client_id, idempotency_key)] = command.command_id
+        heapq.heappush(queue.heap, command)
+        heapq.heappush(self._deadlines, (command.deadline, seq, command.command_id))
+        self.counters["submitted"] += 1
+        self._kick(client_id, queue)
+        return command
+
+    def fan_out(self, client_ids: Iterable[str], action: str, args: Dict[str, Any] | None = None,
+                priority: int = 0, ttl: float | None = None, idempotency_key: str | None = None) -> CommandGroup:
+        """Submits the same command to every client; clients with a full queue are listed as rejected."""
+        group = CommandGroup(f"grp-{next(self._group_ids)}", action)
+        for client_id in client_ids:
+            try:
+                group.commands[client_id] = self.submit(client_id, action, args, priority, ttl, idempotency_key,
+                                                        group.group_id)
+            except QueueFull as e:
+                group.rejected[client_id] = str(e)
+        self._groups[group.group_id] = group
+        while len(self._groups) > max(1, self.history // 100):
+            self._groups.popitem(last=False)
+        return group
+
+    def get(self, command_id: str) -> Command | None:
+        return self._commands.get(command_id)
+
+    def group(self, group_id: str) -> CommandGroup | None:
+        return self._groups.get(group_id)
+
+    async def wait(self, command: Command, timeout: float | None = None) -> Command:
+        """Waits until the command is acked, failed or expired (or the timeout passes)."""
+        if command.state not in FINISHED:
+            if command._done is None:
+                command._done = asyncio.get_running_loop().create_future()
+            await asyncio.wait([command._done], timeout=timeout)
+        return command
+
+    # --- Delivery ---
+
+    def _kick(self, client_id: str, queue: _ClientQueue) -> None:
+        """Starts delivery over the session, or wakes the client's pending long-poll."""
+        if not queue.heap:
+            return
+        if self._connections.is_connected(client_id):
+            if not queue.delivering:
+                queue.delivering = True
+                task = asyncio.get_running_loop().create_task(self._deliver(client_id, queue))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        elif queue.poll_event is not None:
+            queue.poll_event.set()
+
+    def _mark_delivered(self, command: Command, queue: _ClientQueue, via: str) -> None:
+        now = time.monotonic()
+        command.state, command.via = DELIVERED, via
+        command.attempts += 1
+        if command.delivered_at is None:
+            command.delivered_at = now
+        queue.in_flight[command.command_id] = command
+        heapq.heappush(self._resends, (now + self.ack_timeout, command._seq, command.command_id, command.attempts))
+        self.counters["delivered"] += 1
+
+    async def _deliver(self, client_id: str, queue: _ClientQueue) -> None:
+        try:
+            while queue.heap and len(queue.in_flight) < self.window:
+                command = heapq.heappop(queue.heap)
+                self._mark_delivered(command, queue, "websocket")
+                if not await self._connections.send(client_id, command.frame()):
+                    self._requeue(command, queue)  # Session gone; the next poll or session picks it up
+                    break
+        finally:
+            queue.delivering = False
+            self._prune(client_id, queue)
+
+    def _requeue(self, command: Command, queue: _ClientQueue) -> None:
+        if queue.in_flight.pop(command.command_id, None) is not None and command.state == DELIVERED:
+            command.state = QUEUED
+            heapq.heappush(queue.heap, command)
+
+    async def poll(self, client_id: str, wait: float, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Long-poll: returns up to ``limit`` command frames for the client, waiting
+        up to ``wait`` seconds for one to arrive. Acks come back through acknowledge().
+        """
+        queue = self._queue(client_id)
+        deadline = time.monotonic() + wait
+        queue.pollers += 1
+        try:
+            while True:
+                frames = []
+                while queue.heap and len(frames) < limit:
+                    command = heapq.heappop(queue.heap)
+                    self._mark_delivered(command, queue, "poll")
+                    frames.append(command.frame())
+                remaining = deadline - time.monotonic()
+                if frames or remaining <= 0:
+                    return frames
+                if queue.poll_event is None:
+                    queue.poll_event = asyncio.Event()
+                try:
+                    await asyncio.wait_for(queue.poll_event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return []
+                finally:
+                    queue.poll_event.clear()
+        finally:
+            queue.pollers -= 1
+            self._prune(client_id, queue)
+
+    def acknowledge(self, client_id: str, command_id: str, payload: Dict[str, Any]) -> bool:
+        """
+        Applies a client's ack ({"ok": bool, "result"/"error": ...}). Returns False
+        for ids this dispatcher does not know (e.g. connection_manager.push_command ones).
+        Repeated acks of a redelivered command are counted and otherwise ignored.
+        """
+        command = self._commands.get(str(command_id))
+        if command is None or command.client_id != client_id:
+            return False
+        if command.state in FINISHED:
+            self.counters["duplicate_acks"] += 1
+            return True
+        ok = bool(payload.get("ok", True))
+        self._finish(command, ACKED if ok else FAILED, result=payload.get("result"), error=payload.get("error"))
+        queue = self._queues.get(client_id)
+        if queue is not None:
+            self._kick(client_id, queue)
+            self._prune(client_id, queue)
+        return True
+
+    def connected(self, client_id: str) -> None:
+        """A session opened: anything queued goes out over it."""
+        queue = self._queues.get(client_id)
+        if queue is not None:
+            self._kick(client_id, queue)
+
+    def disconnected(self, client_id: str) -> None:
+        """A session closed: commands it did not ack are queued again for the next session or poll."""
+        queue = self._queues.get(client_id)
+        if queue is None:
+            return
+        for command in [c for c in queue.in_flight.values() if c.via == "websocket"]:
+            self._requeue(command, queue)
+        if queue.poll_event is not None:
+            queue.poll_event.set()
+        self._prune(client_id, queue)
+
+    # --- Completion ---
+
+    def _finish(self, command: Command, state: str, result: Any = None, error: str | None = None) -> None:
+        queue = self._queues.get(command.client_id)
+        if queue is not None:
+            queue.in_flight.pop(command.command_id, None)
+            if command.state == QUEUED and command in queue.heap:
+                queue.heap.remove(command)
+                heapq.heapify(queue.heap)
+        command.state, command.result, command.error = state, result, error
+        command.finished_at = time.monotonic()
+        self.counters[state] += 1
+        if state == ACKED:
+            self._latency.append(command.finished_at - command.created_at)
+        if command._done is not None and not command._done.done():
+            command._done.set_result(command)
+
+        self._finished.append(command.command_id)
+        while len(self._finished) > self.history:
+            old = self._commands.pop(self._finished.popleft(), None)
+            if old is not None and old.idempotency_key is not None:
+                self._keys.pop((old.client_id, old.idempotency_key), None)
+
+    def expire_due(self, now: float | None = None) -> None:
+        """Gives up commands past their deadline and re-queues deliveries whose ack is overdue."""
+        now = time.monotonic() if now is None else now
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, _, command_id = heapq.heappop(self._deadlines)
+            command = self._commands.get(command_id)
+            if command is not None and command.state not in FINISHED:
+                self._finish(command, EXPIRED, error="Deadline passed before an ack")
+                queue = self._queues.get(command.client_id)
+                if queue is not None:
+                    self._prune(command.client_id, queue)
+        kicked = set()
+        while self._resends and self._resends[0][0] <= now:
+            _, _, command_id, attempt = heapq.heappop(self._resends)
+            command = self._commands.get(command_id)
+            if command is None or command.state != DELIVERED or command.attempts != attempt:
+                continue  # Acked, expired or already delivered again since
+            queue = self._queues[command.client_id]
+            self._requeue(command, queue)
+            self.counters["redelivered"] += 1
+            kicked.add(command.client_id)
+        for client_id in kicked:
+            self._kick(client_id, self._queues[client_id])
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick)
+            self.expire_due()
+
+    # --- Stats ---
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters,
+                "queued": sum(len(queue.heap) for queue in self._queues.values()),
+                "in_flight": sum(len(queue.in_flight) for queue in self._queues.values()),
+                "clients": len(self._queues), "known_commands": len(self._commands),
+                "ack_latency": latency_percentiles(self._latency)}
+
+
+# Dispatcher shared by the whole app
+command_dispatcher = CommandDispatcher()
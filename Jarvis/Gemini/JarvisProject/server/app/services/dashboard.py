@@ -0,0 +1,183 @@
+# server/app/services/dashboard.py
+
+import math
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+# Upper bounds (seconds) of the heartbeat-age histogram; older clients land in the last, open bucket
+DASHBOARD_AGE_BUCKETS = tuple(sorted(float(edge) for edge in
+                                     os.getenv("DASHBOARD_AGE_BUCKETS", "5,15,30,60,120,300").split(",")))
+# Weight of the newest interval in a client's average heartbeat interval
+DASHBOARD_INTERVAL_ALPHA = float(os.getenv("DASHBOARD_INTERVAL_ALPHA", 0.3))
+
+# Interval index: log-scale buckets, four per doubling (the top-N walk starts from the slowest bucket)
+_BUCKETS_PER_DOUBLING = 4
+
+
+def _interval_bucket(seconds: float) -> int:
+    return int(math.log2(max(seconds, 0.001)) * _BUCKETS_PER_DOUBLING)
+
+
+class _ClientStats:
+    __slots__ = ("status", "os", "last_seen", "second", "interval", "bucket")
+
+    def __init__(self):
+        self.status: str | None = None
+        self.os = "unknown"
+        self.last_seen: float | None = None  # Unix time, as in registry records
+        self.second: int | None = None        # Slot in DashboardAggregates._seen
+        self.interval: float | None = None    # Moving average of the heartbeat interval
+        self.bucket: int | None = None        # Slot in DashboardAggregates._by_interval
+
+
+class DashboardAggregates:
+    """
+    Fleet views for the web dashboard, kept up to date as a registry sink
+    (see ClientRegistry.attach_sink) so a request never walks the whole fleet:
+
+    - counts by status and by OS (``details["os"]`` reported by the client);
+    - heartbeat ages: clients are counted per last-seen second, so the
+      histogram costs one pass over at most ``expiry`` seconds of slots;
+    - slowest clients by average heartbeat interval, indexed in log-scale
+      buckets: top-N reads buckets from the slowest down until N are found.
+
+    Each update is a few dict operations under one lock (sinks are called from
+    whichever thread touched the registry).
+    """
+
+    def __init__(self, alpha: float = DASHBOARD_INTERVAL_ALPHA):
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._clients: Dict[str, _ClientStats] = {}
+        self._by_status: Counter = Counter()
+        self._by_os: Counter = Counter()
+        self._seen: Dict[int, int] = {}                 # last-seen second -> clients
+        self._by_interval: Dict[int, set] = {}          # interval bucket -> client_ids
+        self.updates = 0
+
+    # --- Registry sink ---
+
+    def put(self, client_id: str, record: Dict[str, Any]) -> None:
+        details = record.get("details") or {}
+        os_name = details.get("os") or "unknown"
+        last_seen = record["last_seen"]
+        with self._lock:
+            self.updates += 1
+            stats = self._clients.get(client_id)
+            if stats is None:
+                stats = self._clients[client_id] = _ClientStats()
+                self._by_os[os_name] += 1
+            elif stats.os != os_name:
+                self._by_os[stats.os] -= 1
+                self._by_os[os_name] += 1
+            stats.os = os_name
+            if stats.status != record["status"]:
+                if stats.status is not None:
+                    self._by_status[stats.status] -= 1
+                self._by_status[record["status"]] += 1
+                stats.status = record["status"]
+            if stats.last_seen is not None and last_seen > stats.last_seen:
+                interval = last_seen - stats.last_seen
+                stats.interval = interval if stats.interval is None else \
+                    stats.interval + self.alpha * (interval - stats.interval)
+                bucket = _interval_bucket(stats.interval)
+                self._move(self._by_interval, client_id, stats.bucket, bucket)
+                stats.bucket = bucket
+            if last_seen != stats.last_seen:
+                second = int(last_seen)
+                if second != stats.second:
+                    self._count(stats.second, -1)
+                    self._count(second, 1)
+                    stats.second = second
+                stats.last_seen = last_seen
+
+    def delete(self, client_id: str) -> None:
+        with self._lock:
+            stats = self._clients.pop(client_id, None)
+            if stats is None:
+                return
+            self.updates += 1
+            self._by_status[stats.status] -= 1
+            self._by_os[stats.os] -= 1
+            self._count(stats.second, -1)
+            self._move(self._by_interval, client_id, stats.bucket, None)
+
+    def _count(self, second: int | None, delta: int) -> None:
+        if second is None:
+            return
+        remaining = self._seen.get(second, 0) + delta
+        if remaining:
+            self._seen[second] = remaining
+        else:
+            self._seen.pop(second, None)
+
+    @staticmethod
+    def _move(index: Dict[int, set], client_id: str, old: int | None, new: int | None) -> None:
+        if old == new:
+            return
+        if old is not None:
+            members = index.get(old)
+            if members is not None:
+                members.discard(client_id)
+                if not members:
+                    del index[old]
+        if new is not None:
+            index.setdefault(new, set()).add(client_id)
+
+    def rebuild(self, registry) -> None:
+        """Recounts from the registry; needed after merge(), which does not call the sinks."""
+        with self._lock:
+            self._reset()
+        for entry in registry:
+            self.put(entry.client_id, entry.to_record())
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    # --- Views ---
+
+    def summary(self, now: float | None = None) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        edges = DASHBOARD_AGE_BUCKETS
+        ages = [0] * (len(edges) + 1)
+        with self._lock:
+            for second, count in self._seen.items():
+                age = now - second
+                index = 0
+                while index < len(edges) and age > edges[index]:
+                    index += 1
+                ages[index] += count
+            by_status = {status: count for status, count in self._by_status.items() if count}
+            by_os = {name: count for name, count in self._by_os.items() if count}
+            total = len(self._clients)
+        labels = [f"<={edge:g}s" for edge in edges] + [f">{edges[-1]:g}s"]
+        return {"total": total, "by_status": by_status, "by_os": by_os,
+                "heartbeat_age": dict(zip(labels, ages))}
+
+    def slowest(self, limit: int = 10, now: float | None = None) -> List[Dict[str, Any]]:
+        """Clients with the longest average heartbeat interval, slowest first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            candidates: List[Tuple[float, str]] = []
+            for bucket in sorted(self._by_interval, reverse=True):
+                candidates.extend((self._clients[client_id].interval, client_id)
+                                  for client_id in self._by_interval[bucket])
+                if len(candidates) >= limit:
+                    break
+            candidates.sort(reverse=True)
+            rows = []
+            for interval, client_id in candidates[:limit]:
+                stats = self._clients[client_id]
+                rows.append({"client_id": client_id, "avg_interval_s": round(interval, 2),
+                             "last_seen_age_s": round(now - stats.last_seen, 1), "status": stats.status,
+                             "os": stats.os})
+        return rows
+
+
+dashboard_aggregates = DashboardAggregates()
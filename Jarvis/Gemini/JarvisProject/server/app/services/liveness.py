@@ -0,0 +1,294 @@
+# server/app/services/liveness.py
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from statistics import NormalDist
+from typing import Any, Callable, Dict, List, Tuple
+
+from ..core.logs import get_logger
+from ..core.registry import client_registry
+
+log = get_logger(__name__)
+
+# Suspicion level (phi) at which a silent client becomes "suspect", and then "offline".
+# phi = 8 means the silence had a 1e-8 chance given the client's heartbeat history.
+LIVENESS_SUSPECT_PHI = float(os.getenv("LIVENESS_SUSPECT_PHI", 8))
+LIVENESS_OFFLINE_PHI = float(os.getenv("LIVENESS_OFFLINE_PHI", 12))
+# Heartbeat intervals remembered per client for the mean and deviation
+LIVENESS_WINDOW = int(os.getenv("LIVENESS_WINDOW", 20))
+# Floor of the deviation as a share of the mean: adaptive clients stretch their interval by half when idle
+LIVENESS_MIN_STD_RATIO = float(os.getenv("LIVENESS_MIN_STD_RATIO", 0.25))
+# Extra silence (seconds) always tolerated on top of the estimate (network hiccups, GC pauses)
+LIVENESS_ACCEPTABLE_PAUSE = float(os.getenv("LIVENESS_ACCEPTABLE_PAUSE", 2))
+# Interval assumed for a client with no history yet (seconds)
+LIVENESS_FIRST_INTERVAL = float(os.getenv("LIVENESS_FIRST_INTERVAL", 60))
+# Signs of life closer together than this (e.g. a status frame right after a heartbeat) are not intervals
+LIVENESS_MIN_SAMPLE = float(os.getenv("LIVENESS_MIN_SAMPLE", 1))
+# Timer wheel resolution and check period (seconds)
+LIVENESS_TICK = float(os.getenv("LIVENESS_TICK", 0.5))
+LIVENESS_EVENT_HISTORY = int(os.getenv("LIVENESS_EVENT_HISTORY", 1000))
+
+ONLINE, SUSPECT, OFFLINE = "online", "suspect", "offline"
+
+
+def phi_threshold_z(phi: float) -> float:
+    """Standard deviations above the mean at which the suspicion level reaches ``phi``."""
+    return NormalDist().inv_cdf(1 - 10 ** -phi)
+
+
+class _ClientLiveness:
+    __slots__ = ("state", "last", "intervals", "total", "squares", "slot")
+
+    def __init__(self, last: float):
+        self.state = ONLINE
+        self.last = last                               # Unix time of the last sign of life
+        self.intervals: "deque[float]" = deque()
+        self.total = 0.0                               # Running sums over ``intervals``
+        self.squares = 0.0
+        self.slot: int | None = None                   # Wheel slot of the next deadline
+
+    def add(self, interval: float, window: int) -> None:
+        self.intervals.append(interval)
+        self.total += interval
+        self.squares += interval * interval
+        if len(self.intervals) > window:
+            old = self.intervals.popleft()
+            self.total -= old
+            self.squares -= old * old
+
+    def estimate(self, first_interval: float, min_std_ratio: float) -> Tuple[float, float]:
+        """(mean, deviation) of the heartbeat interval."""
+        count = len(self.intervals)
+        if not count:
+            return first_interval, first_interval / 4
+        mean = self.total / count
+        variance = max(0.0, self.squares / count - mean * mean)
+        return mean, max(math.sqrt(variance), mean * min_std_ratio)
+
+
+class LivenessDetector:
+    """
+    Adaptive liveness of clients from their heartbeats (phi-accrual failure detector).
+
+    Each client's recent heartbeat intervals give a mean and deviation; the
+    longer it stays silent, the less likely that silence is under a normal
+    distribution of its intervals, and phi = -log10(1 - F(silence)) grows. At
+    ``suspect_phi`` the client is marked "suspect", at ``offline_phi``
+    "offline", and the next sign of life brings it back "online". A client that
+    heartbeats every 5 s is flagged within seconds; one idling at 60 s is given
+    minutes, without a per-fleet timeout.
+
+    Because phi only depends on the silence, the moment each threshold is
+    crossed is known in advance (mean + pause + z * deviation after the last
+    heartbeat). That deadline is kept in a timer wheel like the registry's
+    expiry, moved on every heartbeat in O(1), and tick() only visits the slots
+    that came due: the work per tick is O(expiring clients), not O(fleet).
+
+    Heartbeats arrive as a registry sink (see ClientRegistry.attach_sink).
+    Transitions are applied by tick() on the event loop: the client's registry
+    status is set (so /status, the dashboard and notifications see it), the
+    event is logged and kept in ``events``, and listeners are called.
+    """
+
+    def __init__(self, registry=None, suspect_phi: float = LIVENESS_SUSPECT_PHI,
+                 offline_phi: float = LIVENESS_OFFLINE_PHI, window: int = LIVENESS_WINDOW,
+                 min_std_ratio: float = LIVENESS_MIN_STD_RATIO, acceptable_pause: float = LIVENESS_ACCEPTABLE_PAUSE,
+                 first_interval: float = LIVENESS_FIRST_INTERVAL, min_sample: float = LIVENESS_MIN_SAMPLE,
+                 granularity: float = LIVENESS_TICK):
+        self.registry = registry
+        self.suspect_phi = suspect_phi
+        self.offline_phi = offline_phi
+        self.window = window
+        self.min_std_ratio = min_std_ratio
+        self.acceptable_pause = acceptable_pause
+        self.first_interval = first_interval
+        self.min_sample = min_sample
+        self.granularity = granularity
+        self._z = {SUSPECT: phi_threshold_z(suspect_phi), OFFLINE: phi_threshold_z(offline_phi)}
+        self._lock = threading.Lock()
+        self._clients: Dict[str, _ClientLiveness] = {}
+        self._wheel: Dict[int, set] = {}               # slot -> client_ids whose next deadline falls in it
+        self._next_slot = self._slot(time.time())
+        self._recovered: List[Tuple[str, str]] = []    # (client_id, previous state), applied by the next tick
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self.events: "deque[Dict[str, Any]]" = deque(maxlen=LIVENESS_EVENT_HISTORY)
+        self.transitions = {SUSPECT: 0, OFFLINE: 0, ONLINE: 0}
+        self.ticks = 0
+        self.last_tick_ms = 0.0
+        self.last_tick_due = 0
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Calls ``callback(event)`` on every transition; it runs on the event loop and must not block."""
+        self._listeners.append(callback)
+
+    # --- Timer wheel ---
+
+    def _slot(self, ts: float) -> int:
+        return int(ts // self.granularity) + 1  # First slot that starts after ts
+
+    def _deadline(self, client: _ClientLiveness, state: str) -> float:
+        """When the client's phi reaches the threshold of ``state``."""
+        mean, std = client.estimate(self.first_interval, self.min_std_ratio)
+        return client.last + mean + self.acceptable_pause + self._z[state] * std
+
+    def _schedule(self, client_id: str, client: _ClientLiveness, deadline: float | None) -> None:
+        """Moves the client to the slot of its next deadline (None: none). Caller holds the lock."""
+        # A deadline already behind the wheel (e.g. a restored client) fires at the next tick
+        slot = max(self._slot(deadline), self._next_slot) if deadline is not None else None
+        if slot == client.slot:
+            return
+        if client.slot is not None:
+            members = self._wheel.get(client.slot)
+            if members is not None:
+                members.discard(client_id)
+                if not members:
+                    del self._wheel[client.slot]
+        if slot is not None:
+            self._wheel.setdefault(slot, set()).add(client_id)
+        client.slot = slot
+
+    # --- Registry sink ---
+
+    def put(self, client_id: str, record: Dict[str, Any]) -> None:
+        last_seen = record["last_seen"]
+        with self._lock:
+            client = self._clients.get(client_id)
+            if client is None:
+                client = self._clients[client_id] = _ClientLiveness(last_seen)
+            elif last_seen <= client.last:
+                return  # Status or details change, not a sign of life
+            else:
+                interval = last_seen - client.last
+                if interval >= self.min_sample:
+                    client.add(interval, self.window)
+                client.last = last_seen
+                if client.state != ONLINE:
+                    self._recovered.append((client_id, client.state))
+                    client.state = ONLINE
+            self._schedule(client_id, client, self._deadline(client, SUSPECT))
+
+    def delete(self, client_id: str) -> None:
+        with self._lock:
+            client = self._clients.pop(client_id, None)
+            if client is not None:
+                self._schedule(client_id, client, None)
+
+    def rebuild(self, registry) -> None:
+        """Starts tracking every registered client; needed after merge(), which does not call the sinks."""
+        for entry in registry:
+            record = entry.to_record()
+            with self._lock:
+                if entry.client_id in self._clients:
+                    continue
+            self.put(entry.client_id, record)
+
+    # --- Ticks ---
+
+    def tick(self, now: float | None = None) -> List[Dict[str, Any]]:
+        """Applies the transitions that came due and returns them as events."""
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        current = int(now // self.granularity)
+        changes: List[Tuple[str, str, str]] = []  # (client_id, from, to)
+        with self._lock:
+            # Jump straight to the occupied slots when the wheel is sparse (e.g. after a pause)
+            if self._wheel and current - self._next_slot > len(self._wheel):
+                due = sorted(slot for slot in self._wheel if slot <= current)
+            else:
+                due = range(self._next_slot, current + 1)
+            for slot in due:
+                for client_id in self._wheel.pop(slot, ()):
+                    client = self._clients[client_id]
+                    client.slot = None
+                    if client.state == ONLINE:
+                        client.state = SUSPECT
+                        changes.append((client_id, ONLINE, SUSPECT))
+                        offline_at = self._deadline(client, OFFLINE)
+                        if self._slot(offline_at) > current:
+                            self._schedule(client_id, client, offline_at)
+                            continue
+                    # Suspect and past the offline threshold too (a late tick can cross both at once)
+                    client.state = OFFLINE
+                    changes.append((client_id, SUSPECT, OFFLINE))
+            self._next_slot = current + 1
+            recovered, self._recovered = self._recovered, []
+        changes.extend((client_id, previous, ONLINE) for client_id, previous in recovered)
+
+        events = [self._apply(client_id, previous, state, now) for client_id, previous, state in changes]
+        self.ticks += 1
+        self.last_tick_due = len(changes)
+        self.last_tick_ms = (time.perf_counter() - started) * 1000
+        return events
+
+    def _apply(self, client_id: str, previous: str, state: str, now: float) -> Dict[str, Any]:
+        if self.registry is not None:
+            if state != ONLINE:
+                self.registry.update(client_id, status=state)
+            else:
+                # Only undo our own marks: a heartbeat sets "online" itself, other frames leave the status
+                entry = self.registry.get(client_id)
+                if entry is not None and entry.status in (SUSPECT, OFFLINE):
+                    self.registry.update(client_id, status=ONLINE)
+        self.transitions[state] += 1
+        event = {"client_id": client_id, "from": previous, "to": state, "at": now,
+                 "phi": round(self.phi(client_id, now), 2)}
+        self.events.append(event)
+        log.info("client_liveness", client_id=client_id, previous=previous, state=state, phi=event["phi"])
+        for callback in self._listeners:
+            try:
+                callback(event)
+            except Exception:
+                log.exception("liveness_listener_failed", client_id=client_id)
+        return event
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.granularity)
+            self.tick()
+
+    # --- Views ---
+
+    def phi(self, client_id: str, now: float | None = None) -> float:
+        """Current suspicion level of a client (0 while its silence is ordinary)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            client = self._clients.get(client_id)
+            if client is None:
+                return 0.0
+            mean, std = client.estimate(self.first_interval, self.min_std_ratio)
+            silence = now - client.last
+        tail = 1 - NormalDist(mean + self.acceptable_pause, std).cdf(silence)
+        return -math.log10(tail) if tail > 0 else math.inf
+
+    def describe(self, client_id: str, now: float | None = None) -> Dict[str, Any] | None:
+        now = time.time() if now is None else now
+        with self._lock:
+            client = self._clients.get(client_id)
+            if client is None:
+                return None
+            mean, std = client.estimate(self.first_interval, self.min_std_ratio)
+            state, silence, samples = client.state, now - client.last, len(client.intervals)
+            suspect_at = self._deadline(client, SUSPECT) - now
+            offline_at = self._deadline(client, OFFLINE) - now
+        return {"client_id": client_id, "state": state, "phi": round(self.phi(client_id, now), 2),
+                "silence_s": round(silence, 1), "mean_interval_s": round(mean, 2), "std_interval_s": round(std, 2),
+                "samples": samples, "suspect_in_s": round(max(0.0, suspect_at), 1),
+                "offline_in_s": round(max(0.0, offline_at), 1)}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            states = {ONLINE: 0, SUSPECT: 0, OFFLINE: 0}
+            for client in self._clients.values():
+                states[client.state] += 1
+            scheduled = sum(len(members) for members in self._wheel.values())
+        return {"clients": states, "scheduled": scheduled, "transitions": dict(self.transitions),
+                "ticks": self.ticks, "last_tick_ms": round(self.last_tick_ms, 3), "last_tick_due": self.last_tick_due,
+                "suspect_phi": self.suspect_phi, "offline_phi": self.offline_phi}
+
+
+# Detector shared by the app; main.py attaches it to client_registry as a sink
+liveness_detector = LivenessDetector(client_registry)
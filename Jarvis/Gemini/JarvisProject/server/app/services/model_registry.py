@@ -0,0 +1,302 @@
+# server/app/services/model_registry.py
+
+import asyncio
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+try:
+    import psutil
+except ImportError:  # Optional: without it the resident size is the model's known size alone
+    psutil = None
+
+from ..core.logs import get_logger
+
+log = get_logger(__name__)
+
+_ML_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "ml")
+# Folders scanned for models; each file or sub-folder becomes "<feature>/<name>"
+MODEL_DIRS = {
+    "voice_recognition": os.path.join(_ML_DIR, "voice_recognition", "models"),
+    "facial_recognition": os.path.join(_ML_DIR, "facial_recognition", "models"),
+}
+# Loaded models are evicted least-recently-used first once their total size exceeds this
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", 1024))
+# Comma-separated model names to load in the background right after startup
+MODEL_PRELOAD = [name.strip() for name in os.getenv("MODEL_PRELOAD", "").split(",") if name.strip()]
+
+Loader = Callable[[str], Any]
+
+
+# --- Loaders ---
+# Heavy libraries are imported inside the loaders, so none of them is imported
+# before a model that needs it is first used.
+
+def _load_vosk(path: str):
+    import vosk
+    return vosk.Model(path)
+
+
+def _load_saved_model(path: str):
+    import tensorflow as tf
+    return tf.saved_model.load(path)
+
+
+def _load_keras(path: str):
+    import tensorflow as tf
+    return tf.keras.models.load_model(path)
+
+
+def _load_cascade(path: str):
+    import cv2
+    return cv2.CascadeClassifier(path)
+
+
+def _load_dlib(path: str):
+    import dlib
+    if "shape_predictor" in os.path.basename(path):
+        return dlib.shape_predictor(path)
+    return dlib.face_recognition_model_v1(path)
+
+
+def _load_onnx(path: str):
+    import onnxruntime
+    return onnxruntime.InferenceSession(path)
+
+
+def _load_numpy(path: str):
+    import numpy as np
+    return np.load(path)
+
+
+def detect_loader(path: str) -> Loader | None:
+    """Picks a loader from the file suffix or, for folders, their layout. None for unknown files."""
+    if os.path.isdir(path):
+        if os.path.exists(os.path.join(path, "saved_model.pb")):
+            return _load_saved_model
+        if os.path.isdir(os.path.join(path, "am")) or os.path.isdir(os.path.join(path, "graph")):
+            return _load_vosk
+        return None
+    suffix = os.path.splitext(path)[1].lower()
+    return {".h5": _load_keras, ".keras": _load_keras, ".xml": _load_cascade, ".dat": _load_dlib,
+            ".onnx": _load_onnx, ".npy": _load_numpy}.get(suffix)
+
+
+def _disk_size(path: str | None) -> int:
+    if path is None or not os.path.exists(path):
+        return 0
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def _rss() -> int:
+    return psutil.Process().memory_info().rss if psutil is not None else 0
+
+
+def _known_size(entry: "_ModelEntry", model: Any) -> int:
+    """Size independent of allocator state: declared at register(), the model's nbytes, or its size on disk."""
+    if entry.size_bytes is not None:
+        return entry.size_bytes
+    nbytes = getattr(model, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return _disk_size(entry.path)
+
+
+class _ModelEntry:
+    __slots__ = ("name", "loader", "path", "size_bytes", "model", "future", "loads", "hits", "misses",
+                 "load_seconds", "resident_bytes", "last_used")
+
+    def __init__(self, name: str, loader: Loader, path: str | None, size_bytes: int | None = None):
+        self.name = name
+        self.loader = loader
+        self.path = path
+        self.size_bytes = size_bytes
+        self.model = None
+        self.future: Future | None = None  # Set while loading or loaded
+        self.loads = 0
+        self.hits = 0
+        self.misses = 0
+        self.load_seconds: float | None = None
+        self.resident_bytes = 0
+        self.last_used: float | None = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.model is not None:
+            state = "loaded"
+        elif self.future is not None:
+            state = "loading"
+        else:
+            state = "evicted" if self.loads else "unloaded"
+        requests = self.hits + self.misses
+        return {"state": state, "path": self.path, "loads": self.loads, "hits": self.hits,
+                "misses": self.misses, "hit_rate": round(self.hits / requests, 4) if requests else None,
+                "load_seconds": self.load_seconds, "resident_mb": round(self.resident_bytes / 2**20, 1),
+                "idle_seconds": round(time.monotonic() - self.last_used, 1) if self.last_used else None}
+
+
+class ModelRegistry:
+    """
+    Loads ML models on first use and keeps them warm within a memory budget.
+
+    Models are loaded on one background thread, never on the event loop, and
+    one at a time. A model's resident size is its known size (declared at
+    register(), its ``nbytes`` or its size on disk), or the process RSS growth
+    during the load when that is larger. RSS alone reads ~0 when the load reuses
+    memory freed by an eviction. Concurrent requests for a model that is
+    still loading share the same load. When the loaded models exceed the budget
+    the least recently used ones are dropped; callers still holding a reference
+    keep theirs alive until they let go.
+    """
+
+    def __init__(self, budget_bytes: float = MODEL_MEMORY_BUDGET_MB * 2**20):
+        self.budget_bytes = budget_bytes
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._lru: "OrderedDict[str, None]" = OrderedDict()  # Loaded models, least recently used first
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+        self.evictions = 0
+
+    def register(self, name: str, loader: Loader, path: str | None = None, size_bytes: int | None = None) -> None:
+        """
+        Makes a model available by name; ``loader(path)`` builds it when first requested.
+        ``size_bytes`` declares its in-memory size when neither nbytes nor the files tell it.
+        """
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _ModelEntry(name, loader, path, size_bytes)
+
+    def discover(self, model_dirs: Dict[str, str] = MODEL_DIRS) -> List[str]:
+        """Registers every recognizable model under the model folders (listing only, nothing is loaded)."""
+        found = []
+        for feature, directory in model_dirs.items():
+            if not os.path.isdir(directory):
+                continue
+            for entry in sorted(os.listdir(directory)):
+                path = os.path.join(directory, entry)
+                loader = detect_loader(path)
+                if loader is not None:
+                    name = f"{feature}/{os.path.splitext(entry)[0] if os.path.isfile(path) else entry}"
+                    self.register(name, loader, path)
+                    found.append(name)
+        return found
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    # --- Access ---
+
+    def load(self, name: str) -> Future:
+        """Future resolving to the model; starts loading it if needed. Counts a hit or a miss."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                raise KeyError(f"Unknown model: {name}")
+            entry.last_used = time.monotonic()
+            if entry.future is not None:
+                # Joining a load that is still running is not a warm hit
+                if entry.model is not None:
+                    entry.hits += 1
+                    self._lru.move_to_end(name)
+                else:
+                    entry.misses += 1
+                return entry.future
+            entry.misses += 1
+            entry.future = self._executor.submit(self._load, entry)
+            return entry.future
+
+    async def get(self, name: str) -> Any:
+        """Returns the model from async code without blocking the event loop."""
+        return await asyncio.wrap_future(self.load(name))
+
+    def get_blocking(self, name: str) -> Any:
+        """Returns the model from a worker thread (never call this on the event loop)."""
+        return self.load(name).result()
+
+    def preload(self, names: List[str]) -> None:
+        """Starts loading models in the background without waiting for them."""
+        for name in names:
+            if name in self._entries:
+                self.load(name)
+            else:
+                log.warning("model_preload_unknown", model=name)
+
+    # --- Loading and eviction ---
+
+    def _load(self, entry: _ModelEntry) -> Any:
+        rss_before = _rss()
+        start = time.perf_counter()
+        try:
+            model = entry.loader(entry.path)
+        except BaseException:
+            with self._lock:
+                entry.future = None  # The next request retries
+            raise
+        elapsed = time.perf_counter() - start
+        resident = max(_rss() - rss_before, _known_size(entry, model))
+
+        with self._lock:
+            entry.model = model
+            entry.loads += 1
+            entry.load_seconds = round(elapsed, 4)
+            entry.resident_bytes = resident
+            self._lru[entry.name] = None
+            evicted = self._evict_over_budget(keep=entry.name)
+        if evicted:
+            gc.collect()
+            log.info("models_evicted", models=evicted, budget_mb=round(self.budget_bytes / 2**20))
+        log.info("model_loaded", model=entry.name, seconds=round(elapsed, 2),
+                 resident_mb=round(entry.resident_bytes / 2**20, 1))
+        return model
+
+    def _evict_over_budget(self, keep: str) -> List[str]:
+        evicted = []
+        while self.resident_bytes() > self.budget_bytes and len(self._lru) > 1:
+            name = next(iter(self._lru))
+            if name == keep:
+                self._lru.move_to_end(name)
+                continue
+            self._lru.pop(name)
+            entry = self._entries[name]
+            entry.model, entry.future = None, None
+            self.evictions += 1
+            evicted.append(name)
+        return evicted
+
+    def evict(self, name: str) -> bool:
+        """Drops a loaded model now."""
+        with self._lock:
+            if name not in self._lru:
+                return False
+            self._lru.pop(name)
+            entry = self._entries[name]
+            entry.model, entry.future = None, None
+            self.evictions += 1
+        gc.collect()
+        return True
+
+    # --- Stats ---
+
+    def resident_bytes(self) -> int:
+        return sum(self._entries[name].resident_bytes for name in self._lru)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = sum(e.hits for e in self._entries.values())
+            requests = hits + sum(e.misses for e in self._entries.values())
+            return {"budget_mb": round(self.budget_bytes / 2**20, 1),
+                    "resident_mb": round(self.resident_bytes() / 2**20, 1),
+                    "loaded": list(self._lru), "evictions": self.evictions,
+                    "hit_rate": round(hits / requests, 4) if requests else None,
+                    "models": {name: entry.to_dict() for name, entry in self._entries.items()}}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,231 @@
+# server/app/services/modes.py
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+from ..core.connections import connection_manager
+from ..core.metrics import latency_percentiles
+from ..core.registry import client_registry
+
+# JSON file with the mode profiles; the built-in presets below are used when it does not exist
+MODE_PROFILES_FILE = os.getenv("MODE_PROFILES_FILE",
+                               os.path.join(os.path.dirname(__file__), "..", "..", "config", "modes.json"))
+# Seconds each client has to apply its plan and ack before it counts as failed
+MODE_SWITCH_TIMEOUT = float(os.getenv("MODE_SWITCH_TIMEOUT", 5))
+# Switches (and client acks) the latency percentiles are computed over
+MODE_LATENCY_WINDOW = 500
+
+# Presets. Each action is one of
+#   {"op": "stop", "process": name}
+#   {"op": "start", "command": [argv...], "process": name}   (skipped when already running)
+#   {"op": "priority", "process": name, "level": "high" | "normal" | "low"}
+# and may be limited with "os" (platform.system() of the client) or "capability"
+# (declared by the client in its status frame). Process names are examples; adjust them per machine.
+DEFAULT_PROFILES: Dict[str, Dict[str, Any]] = {
+    "gaming": {
+        "description": "Games in front, work apps and background sync closed",
+        "actions": [
+            {"op": "stop", "process": "Teams.exe", "os": "Windows"},
+            {"op": "stop", "process": "OneDrive.exe", "os": "Windows"},
+            {"op": "stop", "process": "Code.exe", "os": "Windows"},
+            {"op": "start", "command": ["steam"], "process": "steam.exe", "os": "Windows"},
+            {"op": "start", "command": ["discord"], "process": "Discord.exe", "os": "Windows"},
+            {"op": "priority", "process": "steam.exe", "level": "high", "os": "Windows"},
+            {"op": "priority", "process": "Discord.exe", "level": "low", "os": "Windows"},
+        ],
+    },
+    "study": {
+        "description": "No games or chat; notes and browser only",
+        "actions": [
+            {"op": "stop", "process": "steam.exe", "os": "Windows"},
+            {"op": "stop", "process": "Discord.exe", "os": "Windows"},
+            {"op": "stop", "process": "discord", "os": "Linux"},
+            {"op": "start", "command": ["firefox"], "process": "firefox"},
+        ],
+    },
+    "programming": {
+        "description": "Editor and tooling in front, games closed",
+        "actions": [
+            {"op": "stop", "process": "steam.exe", "os": "Windows"},
+            {"op": "start", "command": ["code"], "process": "Code.exe", "os": "Windows"},
+            {"op": "start", "command": ["code"], "process": "code", "os": "Linux"},
+            {"op": "priority", "process": "Code.exe", "level": "high", "os": "Windows"},
+            {"op": "priority", "process": "code", "level": "high", "os": "Linux"},
+        ],
+    },
+}
+
+# Plans run stops first (free resources), then starts, then priority changes
+_OP_ORDER = {"stop": 0, "start": 1, "priority": 2}
+
+Plan = Tuple[Dict[str, Any], ...]
+_PlanKey = Tuple[str, str | None, FrozenSet[str]]
+
+
+def validate_profiles(profiles: Any) -> Dict[str, Dict[str, Any]]:
+    """Checks the shape described above DEFAULT_PROFILES; raises ValueError naming the bad entry."""
+    if not isinstance(profiles, dict):
+        raise ValueError("mode profiles must be an object of {mode: profile}")
+    for mode, profile in profiles.items():
+        actions = profile.get("actions", []) if isinstance(profile, dict) else None
+        if not isinstance(actions, list):
+            raise ValueError(f"mode '{mode}': expected an object with an 'actions' list")
+        for i, action in enumerate(actions):
+            where = f"mode '{mode}', action {i}"
+            if not isinstance(action, dict) or action.get("op") not in _OP_ORDER:
+                raise ValueError(f"{where}: 'op' must be one of {', '.join(_OP_ORDER)}")
+            if not isinstance(action.get("process"), str):
+                raise ValueError(f"{where}: 'process' must be a process name")
+            command = action.get("command")
+            if action["op"] == "start" and (not isinstance(command, list) or not command
+                                            or not all(isinstance(arg, str) for arg in command)):
+                raise ValueError(f"{where}: 'command' must be a non-empty list of strings")
+            if action["op"] == "priority" and action.get("level") not in ("high", "normal", "low"):
+                raise ValueError(f"{where}: 'level' must be high, normal or low")
+    return profiles
+
+
+def load_profiles(path: str = MODE_PROFILES_FILE) -> Dict[str, Dict[str, Any]]:
+    """Reads and validates the profiles file, or returns the presets when it does not exist."""
+    if not os.path.exists(path):
+        return DEFAULT_PROFILES
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            return validate_profiles(json.load(f))
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}") from None
+
+
+class ModeManager:
+    """
+    Operation modes (gaming, study, programming) applied across the fleet.
+
+    A profile compiles into a plan per kind of client: the actions that apply
+    to its OS and capabilities, ordered and frozen. Plans are cached by
+    (mode, os, capabilities), so clients alike share one plan and repeated
+    switches do no compilation at all; the cache is dropped when the profiles
+    are reloaded.
+
+    switch() sends every connected client its plan as an ``apply_mode``
+    command over its /ws session, all at once, and waits for the acks. Switches
+    are serialized, and each carries a generation number so a client that
+    receives two switches out of order keeps the newest.
+    """
+
+    def __init__(self, profiles: Dict[str, Dict[str, Any]] | None = None):
+        # The presets until reload() reads MODE_PROFILES_FILE (main.py lifespan)
+        self.profiles = profiles if profiles is not None else DEFAULT_PROFILES
+        self._plans: Dict[_PlanKey, Plan] = {}
+        self._lock = asyncio.Lock()
+        self.current_mode: str | None = None
+        self.generation = 0
+        self.plan_hits = 0
+        self.plan_misses = 0
+        self.switches = 0
+        self._switch_latency: "deque[float]" = deque(maxlen=MODE_LATENCY_WINDOW)
+        self._client_latency: "deque[float]" = deque(maxlen=MODE_LATENCY_WINDOW * 10)
+        self.last_switch: Dict[str, Any] | None = None
+
+    def reload(self, profiles: Dict[str, Dict[str, Any]] | None = None) -> None:
+        self.profiles = profiles if profiles is not None else load_profiles()
+        self._plans.clear()
+
+    # --- Plans ---
+
+    def compile(self, mode: str, os_name: str | None, capabilities: FrozenSet[str]) -> Plan:
+        """Builds the plan of one mode for clients with this OS and capabilities."""
+        actions = []
+        for action in self.profiles[mode].get("actions", []):
+            if action.get("os") is not None and action["os"] != os_name:
+                continue
+            if action.get("capability") is not None and action["capability"] not in capabilities:
+                continue
+            actions.append({key: value for key, value in action.items() if key not in ("os", "capability")})
+        actions.sort(key=lambda a: _OP_ORDER.get(a.get("op"), len(_OP_ORDER)))
+        return tuple(actions)
+
+    def _client_key(self, mode: str, client_id: str) -> _PlanKey:
+        entry = client_registry.get(client_id)
+        details = entry.details if entry is not None and isinstance(entry.details, dict) else {}
+        return mode, details.get("os"), frozenset(details.get("capabilities") or ())
+
+    def plan_for(self, client_id: str, mode: str) -> Plan:
+        if mode not in self.profiles:
+            raise KeyError(f"Unknown mode: {mode}")
+        key = self._client_key(mode, client_id)
+        plan = self._plans.get(key)
+        if plan is None:
+            self.plan_misses += 1
+            plan = self._plans[key] = self.compile(*key)
+        else:
+            self.plan_hits += 1
+        return plan
+
+    # --- Switching ---
+
+    async def _apply(self, client_id: str, mode: str, generation: int, plan: Plan,
+                     timeout: float) -> Tuple[str, Dict[str, Any]]:
+        start = time.perf_counter()
+        try:
+            ack = await connection_manager.push_command(
+                client_id, {"action": "apply_mode", "mode": mode, "generation": generation, "plan": plan},
+                timeout=timeout)
+        except LookupError:
+            return client_id, {"ok": False, "error": "not connected"}
+        except ConnectionError as e:
+            return client_id, {"ok": False, "error": str(e)}
+        except asyncio.TimeoutError:
+            return client_id, {"ok": False, "error": f"no ack within {timeout}s"}
+        elapsed = time.perf_counter() - start
+        self._client_latency.append(elapsed)
+        if not ack.get("ok"):
+            return client_id, {"ok": False, "error": ack.get("error"), "ms": round(elapsed * 1000, 2)}
+        return client_id, {"ok": True, "result": ack.get("result"), "ms": round(elapsed * 1000, 2)}
+
+    async def switch(self, mode: str, client_ids: List[str] | None = None,
+                     timeout: float = MODE_SWITCH_TIMEOUT) -> Dict[str, Any]:
+        """
+        Switches the given clients (default: every connected one) to ``mode`` and
+        reports per-client results. Clients whose plan is empty are left alone.
+        Raises KeyError for an unknown mode.
+        """
+        if mode not in self.profiles:
+            raise KeyError(f"Unknown mode: {mode}")
+        async with self._lock:
+            start = time.perf_counter()
+            self.generation += 1
+            targets = client_ids if client_ids is not None else connection_manager.connected_clients()
+            plans = {client_id: self.plan_for(client_id, mode) for client_id in targets}
+            affected = [client_id for client_id, plan in plans.items() if plan]
+            results = dict(await asyncio.gather(
+                *(self._apply(client_id, mode, self.generation, plans[client_id], timeout)
+                  for client_id in affected)))
+            elapsed = time.perf_counter() - start
+
+            self.current_mode = mode
+            self.switches += 1
+            self._switch_latency.append(elapsed)
+            failed = {client_id: result["error"] for client_id, result in results.items() if not result["ok"]}
+            self.last_switch = {"mode": mode, "generation": self.generation, "clients": len(targets),
+                                "affected": len(affected), "applied": len(affected) - len(failed),
+                                "failed": failed, "complete": not failed, "ms": round(elapsed * 1000, 2)}
+            return {**self.last_switch, "results": results}
+
+    # --- Stats ---
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.plan_hits + self.plan_misses
+        return {"current_mode": self.current_mode, "generation": self.generation, "switches": self.switches,
+                "modes": {name: profile.get("description") for name, profile in self.profiles.items()},
+                "plan_cache": {"plans": len(self._plans), "hits": self.plan_hits, "misses": self.plan_misses,
+                               "hit_rate": round(self.plan_hits / lookups, 4) if lookups else None},
+                "switch_latency": latency_percentiles(self._switch_latency),
+                "client_ack_latency": latency_percentiles(self._client_latency),
+                "last_switch": self.last_switch}
+
+
+mode_manager = ModeManager()
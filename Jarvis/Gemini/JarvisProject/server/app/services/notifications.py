@@ -0,0 +1,485 @@
+# server/app/services/notifications.py
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.request
+import uuid
+from collections import deque
+from typing import Any, Dict, List, Tuple
+
+from ..core.logs import get_logger
+
+log = get_logger(__name__)
+
+# Comma-separated sinks to deliver to: log, ntfy, webhook (empty: notifications are off)
+NOTIFY_SINKS = [name.strip() for name in os.getenv("NOTIFY_SINKS", "").split(",") if name.strip()]
+# Outbox file; undelivered notifications survive a restart here
+NOTIFY_DB_PATH = os.getenv("NOTIFY_DB_PATH",
+                           os.path.join(os.path.dirname(__file__), "..", "..", "data", "notifications.db"))
+# ntfy topic URL (mobile push, e.g. https://ntfy.sh/<topic>) and generic JSON webhook URL
+NOTIFY_NTFY_URL = os.getenv("NOTIFY_NTFY_URL")
+NOTIFY_WEBHOOK_URL = os.getenv("NOTIFY_WEBHOOK_URL")
+# Per-sink token bucket: sustained notifications per minute and burst size
+NOTIFY_RATE_PER_MINUTE = float(os.getenv("NOTIFY_RATE_PER_MINUTE", 10))
+NOTIFY_BURST = int(os.getenv("NOTIFY_BURST", 5))
+# Seconds a notification is held so similar ones arriving meanwhile join its digest
+NOTIFY_COALESCE_WINDOW = float(os.getenv("NOTIFY_COALESCE_WINDOW", 2))
+# Events of one kind in a delivery round from which they are sent as a single digest
+NOTIFY_DIGEST_THRESHOLD = int(os.getenv("NOTIFY_DIGEST_THRESHOLD", 3))
+# How often produced events are written to the outbox (seconds) and how many may wait in memory
+NOTIFY_FLUSH_INTERVAL = float(os.getenv("NOTIFY_FLUSH_INTERVAL", 0.2))
+NOTIFY_BUFFER_SIZE = int(os.getenv("NOTIFY_BUFFER_SIZE", 10_000))
+# Delivery attempts before a notification is dropped
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", 8))
+# Seconds after which rows claimed by a worker that never finished (crashed, killed) are sent again
+NOTIFY_CLAIM_TIMEOUT = float(os.getenv("NOTIFY_CLAIM_TIMEOUT", 600))
+
+SEVERITY = {"client_offline": "warning", "client_expired": "warning", "client_online": "info"}
+# Digest titles per kind; {count} is the number of events folded in
+DIGEST_TITLES = {
+    "client_offline": "{count} clients went offline",
+    "client_expired": "{count} clients stopped sending heartbeats",
+    "client_online": "{count} clients are back online",
+}
+DIGEST_SUBJECTS = 20  # Subjects listed by name in a digest; the rest are counted
+
+
+# --- Rate limiting ---
+
+class TokenBucket:
+    """``rate`` tokens per second up to ``burst``; acquire() waits for a token."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> float:
+        """Takes a token, sleeping until one is available. Returns the seconds waited."""
+        waited = 0.0
+        while not self.try_acquire():
+            delay = (1 - self._tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
+
+
+# --- Sinks ---
+
+class NotificationSink:
+    """Delivers one notification; raising makes the dispatcher retry later."""
+
+    name = "sink"
+
+    def __init__(self, rate_per_minute: float = NOTIFY_RATE_PER_MINUTE, burst: int = NOTIFY_BURST):
+        self.bucket = TokenBucket(rate_per_minute / 60, burst)
+
+    async def send(self, notification: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+
+class FakeSink(NotificationSink):
+    """Keeps what it receives in ``sent``; ``fail_next`` makes the next sends fail. For tests and benchmarks."""
+
+    name = "fake"
+
+    def __init__(self, rate_per_minute: float = NOTIFY_RATE_PER_MINUTE, burst: int = NOTIFY_BURST,
+                 latency: float = 0.0):
+        super().__init__(rate_per_minute, burst)
+        self.latency = latency
+        self.sent: List[Dict[str, Any]] = []
+        self.fail_next = 0
+
+    async def send(self, notification: Dict[str, Any]) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_next:
+            self.fail_next -= 1
+            raise ConnectionError("Fake sink failure")
+        self.sent.append(notification)
+
+
+class LogSink(NotificationSink):
+    name = "log"
+
+    async def send(self, notification: Dict[str, Any]) -> None:
+        log.warning("notification", title=notification["title"], text=notification["message"],
+                    kind=notification["kind"], count=notification["count"])
+
+
+class WebhookSink(NotificationSink):
+    """POSTs the notification as JSON."""
+
+    name = "webhook"
+
+    def __init__(self, url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+
+    def _request(self, notification: Dict[str, Any]) -> urllib.request.Request:
+        return urllib.request.Request(self.url, data=json.dumps(notification).encode(), method="POST",
+                                      headers={"Content-Type": "application/json"})
+
+    def _post(self, notification: Dict[str, Any]) -> None:
+        with urllib.request.urlopen(self._request(notification), timeout=10) as response:
+            response.read()
+
+    async def send(self, notification: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._post, notification)
+
+
+class NtfySink(WebhookSink):
+    """Mobile push through an ntfy topic (https://ntfy.sh or self-hosted)."""
+
+    name = "ntfy"
+    PRIORITIES = {"info": "default", "warning": "high", "critical": "urgent"}
+
+    def _request(self, notification: Dict[str, Any]) -> urllib.request.Request:
+        return urllib.request.Request(self.url, data=notification["message"].encode(), method="POST",
+                                      headers={"Title": notification["title"],
+                                               "Priority": self.PRIORITIES.get(notification["severity"], "default"),
+                                               "Tags": notification["kind"]})
+
+
+def create_sinks(names: List[str] = NOTIFY_SINKS) -> List[NotificationSink]:
+    sinks = []
+    for name in names:
+        if name == "log":
+            sinks.append(LogSink())
+        elif name == "ntfy" and NOTIFY_NTFY_URL:
+            sinks.append(NtfySink(NOTIFY_NTFY_URL))
+        elif name == "webhook" and NOTIFY_WEBHOOK_URL:
+            sinks.append(WebhookSink(NOTIFY_WEBHOOK_URL))
+        else:
+            log.warning("notification_sink_skipped", sink=name, reason="unknown or missing its URL")
+    return sinks
+
+
+# --- Outbox ---
+
+Row = Tuple[int, str, str, str, str, float, int]  # id, kind, subject, severity, message, created_at, attempts
+
+
+class Outbox:
+    """
+    SQLite table of undelivered notifications, one row per (event, sink).
+    Every uvicorn worker shares the file, so a worker claims rows (state
+    "sending", claimed_by) in one UPDATE before sending them; rows another
+    worker claimed are skipped until their claim times out.
+    """
+
+    def __init__(self, path: str, claim_timeout: float = NOTIFY_CLAIM_TIMEOUT):
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.claim_timeout = claim_timeout
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Calls arrive from worker threads; the lock serialises them
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, sink TEXT, kind TEXT, subject TEXT, severity TEXT,"
+                " message TEXT, created_at REAL, attempts INTEGER DEFAULT 0, next_attempt_at REAL)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+            for column, definition in (("state", "TEXT DEFAULT 'pending'"), ("claimed_by", "TEXT"),
+                                       ("claimed_at", "REAL")):
+                if column not in columns:  # Outbox files written before claims existed
+                    self._conn.execute(f"ALTER TABLE outbox ADD COLUMN {column} {definition}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox(sink, next_attempt_at)")
+            self._conn.commit()
+
+    def add_many(self, rows: List[Tuple[str, str, str, str, str, float]]) -> None:
+        """Rows of (sink, kind, subject, severity, message, created_at)."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO outbox (sink, kind, subject, severity, message, created_at, next_attempt_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", [row + (row[5],) for row in rows])
+            self._conn.commit()
+
+    def next_due(self, sink: str) -> float | None:
+        """When the next row becomes sendable: its attempt time, or when a claim on it times out."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT MIN(CASE WHEN state = 'sending' THEN claimed_at + ? ELSE next_attempt_at END)"
+                " FROM outbox WHERE sink = ?", (self.claim_timeout, sink)).fetchone()[0]
+
+    def claim(self, sink: str, now: float, limit: int) -> List[Row]:
+        """Marks up to ``limit`` due rows as sent by this worker and returns them."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET state = 'sending', claimed_by = ?, claimed_at = ? WHERE id IN ("
+                " SELECT id FROM outbox WHERE sink = ? AND next_attempt_at <= ?"
+                " AND (state = 'pending' OR claimed_at <= ?) ORDER BY id LIMIT ?)",
+                (self.owner, now, sink, now, now - self.claim_timeout, limit))
+            self._conn.commit()
+            return self._conn.execute(
+                "SELECT id, kind, subject, severity, message, created_at, attempts FROM outbox"
+                " WHERE sink = ? AND state = 'sending' AND claimed_by = ? AND claimed_at = ? ORDER BY id",
+                (sink, self.owner, now)).fetchall()
+
+    def extend(self, ids: List[int], now: float) -> List[int]:
+        """Renews this worker's claim on ``ids``; returns those it still held (others were re-claimed)."""
+        with self._lock:
+            self._conn.executemany("UPDATE outbox SET claimed_at = ? WHERE id = ? AND state = 'sending'"
+                                   " AND claimed_by = ?", [(now, i, self.owner) for i in ids])
+            self._conn.commit()
+            placeholders = ",".join("?" * len(ids))
+            return [row[0] for row in self._conn.execute(
+                f"SELECT id FROM outbox WHERE id IN ({placeholders}) AND state = 'sending' AND claimed_by = ?",
+                (*ids, self.owner))]
+
+    def release(self, ids: List[int] | None = None) -> None:
+        """
+        Hands this worker's unsent claims back (all of them on shutdown), so they
+        need not wait for the timeout.
+        """
+        with self._lock:
+            if ids is None:
+                self._conn.execute("UPDATE outbox SET state = 'pending', claimed_by = NULL"
+                                   " WHERE state = 'sending' AND claimed_by = ?", (self.owner,))
+            else:
+                self._conn.executemany("UPDATE outbox SET state = 'pending', claimed_by = NULL"
+                                       " WHERE id = ? AND state = 'sending' AND claimed_by = ?",
+                                       [(i, self.owner) for i in ids])
+            self._conn.commit()
+
+    def delete(self, ids: List[int]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+            self._conn.commit()
+
+    def retry(self, ids: List[int], next_attempt_at: float) -> None:
+        with self._lock:
+            self._conn.executemany("UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?,"
+                                   " state = 'pending', claimed_by = NULL WHERE id = ?",
+                                   [(next_attempt_at, i) for i in ids])
+            self._conn.commit()
+
+    def pending(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT sink, COUNT(*) FROM outbox GROUP BY sink").fetchall())
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# --- Dispatcher ---
+
+def coalesce(rows: List[Row], threshold: int = NOTIFY_DIGEST_THRESHOLD) -> List[Tuple[Dict[str, Any], List[int]]]:
+    """Groups a delivery round by kind: (notification, outbox ids) pairs, one digest per crowded kind."""
+    by_kind: Dict[str, List[Row]] = {}
+    for row in rows:
+        by_kind.setdefault(row[1], []).append(row)
+    notifications = []
+    for kind, group in by_kind.items():
+        if len(group) >= threshold:
+            subjects = list(dict.fromkeys(row[2] for row in group))
+            listed = ", ".join(subjects[:DIGEST_SUBJECTS])
+            if len(subjects) > DIGEST_SUBJECTS:
+                listed += f" and {len(subjects) - DIGEST_SUBJECTS} more"
+            title = DIGEST_TITLES.get(kind, "{count} x " + kind).format(count=len(subjects))
+            notifications.append(({"kind": kind, "severity": group[0][3], "title": title, "message": listed,
+                                   "count": len(group), "subjects": subjects[:DIGEST_SUBJECTS],
+                                   "first_at": group[0][5], "last_at": group[-1][5]},
+                                  [row[0] for row in group]))
+        else:
+            for row in group:
+                notifications.append(({"kind": kind, "severity": row[3], "title": kind.replace("_", " "),
+                                       "message": row[4], "count": 1, "subjects": [row[2]],
+                                       "first_at": row[5], "last_at": row[5]}, [row[0]]))
+    return notifications
+
+
+class NotificationDispatcher:
+    """
+    Sends alerts (clients going offline, coming back) to phones and other sinks.
+
+    Producing is an append to an in-memory deque: notify() and the registry
+    hooks never do I/O, so register/heartbeat handlers are not slowed down. A
+    background task writes produced events to the SQLite outbox every
+    NOTIFY_FLUSH_INTERVAL, one row per sink; from there they survive restarts
+    until delivered.
+
+    Each sink has its own worker and token bucket. A worker holds the oldest
+    pending notification for NOTIFY_COALESCE_WINDOW, then claims everything due
+    and folds kinds with NOTIFY_DIGEST_THRESHOLD or more events into one digest,
+    so 200 clients dropping after a network blip become one message. Events
+    piling up while a sink is rate limited are folded the same way. Failed
+    deliveries are retried with exponential backoff.
+    """
+
+    def __init__(self, sinks: List[NotificationSink] | None = None, path: str = NOTIFY_DB_PATH,
+                 window: float = NOTIFY_COALESCE_WINDOW, threshold: int = NOTIFY_DIGEST_THRESHOLD,
+                 flush_interval: float = NOTIFY_FLUSH_INTERVAL, buffer_size: int = NOTIFY_BUFFER_SIZE):
+        self.sinks: List[NotificationSink] = list(sinks) if sinks is not None else []
+        self.path = path
+        self.window = window
+        self.threshold = threshold
+        self.flush_interval = flush_interval
+        self._incoming: deque = deque()
+        self._buffer_size = buffer_size
+        self._outbox: Outbox | None = None  # Opened by run(), so importing this module does no I/O
+        self._wake: Dict[str, asyncio.Event] = {}
+        self._last_status: Dict[str, str] = {}
+        self.produced = 0
+        self.dropped = 0
+        self.delivered = 0
+        self.digests = 0
+        self.failures = 0
+        self.expired = 0
+        self.rate_limited_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.sinks)
+
+    def add_sink(self, sink: NotificationSink) -> None:
+        self.sinks.append(sink)
+
+    # --- Producing (request path) ---
+
+    def notify(self, kind: str, subject: str, message: str, severity: str | None = None) -> None:
+        """Queues an event; returns at once. Dropped (and counted) when the buffer is full."""
+        if not self.sinks:
+            return
+        if len(self._incoming) >= self._buffer_size:
+            self.dropped += 1
+            return
+        self._incoming.append((kind, subject, severity or SEVERITY.get(kind, "info"), message, time.time()))
+        self.produced += 1
+
+    def put(self, client_id: str, record: Dict[str, Any]) -> None:
+        """Registry sink hook (see ClientRegistry.attach_sink): turns status changes into events."""
+        status = record["status"]
+        previous = self._last_status.get(client_id)
+        if status == previous or status == "suspect":  # Suspicion alone is not worth a message
+            return
+        self._last_status[client_id] = status
+        if status in ("disconnected", "offline"):
+            # A closed session followed by missed heartbeats (services/liveness.py) is one event
+            if previous not in ("disconnected", "offline"):
+                self.notify("client_offline", client_id, f"{client_id} went offline")
+        elif status == "online" and previous in ("disconnected", "offline"):
+            self.notify("client_online", client_id, f"{client_id} is back online")
+
+    def delete(self, client_id: str) -> None:
+        """Registry sink hook: a client removed by expiry. Its last status is forgotten with it."""
+        self._last_status.pop(client_id, None)
+        self.notify("client_expired", client_id, f"{client_id} stopped sending heartbeats")
+
+    # --- Background tasks ---
+
+    async def run(self) -> None:
+        self._outbox = await asyncio.to_thread(Outbox, self.path)
+        self._wake = {sink.name: asyncio.Event() for sink in self.sinks}
+        try:
+            await asyncio.gather(self._flush_loop(), *(self._deliver_loop(sink) for sink in self.sinks))
+        finally:
+            await asyncio.to_thread(self._flush)  # Nothing produced is lost on shutdown
+            self._outbox.release()
+            self._outbox.close()
+
+    def _flush(self) -> int:
+        events = []
+        while self._incoming:
+            events.append(self._incoming.popleft())
+        if events:
+            self._outbox.add_many([(sink.name, *event) for event in events for sink in self.sinks])
+        return len(events)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._incoming:
+                await asyncio.to_thread(self._flush)
+                for event in self._wake.values():
+                    event.set()
+
+    async def _wait(self, sink: NotificationSink, timeout: float) -> None:
+        wake = self._wake[sink.name]
+        try:
+            await asyncio.wait_for(wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        wake.clear()
+
+    async def _deliver_loop(self, sink: NotificationSink) -> None:
+        while True:
+            first = await asyncio.to_thread(self._outbox.next_due, sink.name)
+            now = time.time()
+            if first is None or first > now:
+                await self._wait(sink, 5.0 if first is None else min(first - now, 5.0))
+                continue
+            # Hold the round open so the rest of a burst joins the same digest
+            await asyncio.sleep(max(0.0, first + self.window - now))
+            # Claimed atomically: other worker processes polling the same outbox skip these rows
+            rows = await asyncio.to_thread(self._outbox.claim, sink.name, time.time(), 5000)
+            attempts = {row[0]: row[6] for row in rows}
+            for notification, ids in coalesce(rows, self.threshold):
+                self.rate_limited_seconds += await sink.bucket.acquire()
+                # A rate-limited wait can outlast NOTIFY_CLAIM_TIMEOUT: renew the claim, and leave
+                # the notification to the worker that re-claimed its rows meanwhile, if any
+                held = await asyncio.to_thread(self._outbox.extend, ids, time.time())
+                if len(held) < len(ids):
+                    await asyncio.to_thread(self._outbox.release, held)
+                    continue
+                await self._deliver(sink, notification, ids, max(attempts[i] for i in ids) + 1)
+
+    async def _deliver(self, sink: NotificationSink, notification: Dict[str, Any], ids: List[int],
+                       attempts: int) -> None:
+        try:
+            await sink.send(notification)
+        except Exception as e:  # Any sink failure is retried, the worker keeps going
+            self.failures += 1
+            if attempts >= NOTIFY_MAX_ATTEMPTS:
+                self.expired += len(ids)
+                log.error("notification_dropped", sink=sink.name, attempts=attempts, title=notification["title"])
+                await asyncio.to_thread(self._outbox.delete, ids)
+            else:
+                await asyncio.to_thread(self._outbox.retry, ids, time.time() + min(300, 2 ** attempts))
+                log.warning("notification_retry", sink=sink.name, attempts=attempts, error=str(e))
+            return
+        await asyncio.to_thread(self._outbox.delete, ids)
+        self.delivered += 1
+        if notification["count"] > 1:
+            self.digests += 1
+
+    # --- Stats ---
+
+    async def pending(self) -> Dict[str, int]:
+        """Undelivered notifications per sink, read from the outbox."""
+        if self._outbox is None:
+            return {}
+        return await asyncio.to_thread(self._outbox.pending)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sinks": [sink.name for sink in self.sinks], "produced": self.produced, "dropped": self.dropped,
+                "buffered": len(self._incoming), "delivered": self.delivered, "digests": self.digests,
+                "failures": self.failures, "expired": self.expired,
+                "rate_limited_seconds": round(self.rate_limited_seconds, 2)}
+
+
+notification_dispatcher = NotificationDispatcher(create_sinks())
@@ -0,0 +1,263 @@
+# server/app/services/replication.py
+
+import asyncio
+import hmac
+import itertools
+import json
+import os
+import time
+import urllib.request
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+try:
+    import websockets
+except ImportError:  # Optional: only a standby needs it to follow the leader
+    websockets = None
+
+from ..core.registry import client_registry
+from .scheduler import task_scheduler
+from ..core.logs import get_logger
+
+log = get_logger(__name__)
+
+# "leader" or "standby". A leader that finds its peer already leading starts as standby.
+FAILOVER_ROLE = os.getenv("FAILOVER_ROLE", "leader")
+# Base URL of the other server instance, e.g. http://10.0.0.2:8000 (unset: no failover)
+FAILOVER_PEER_URL = os.getenv("FAILOVER_PEER_URL")
+# Shared secret the standby presents when subscribing to the leader's log (required with a peer)
+REPLICATION_SECRET = os.getenv("REPLICATION_SECRET", "")
+# Seconds without contact from the leader before the standby takes over
+FAILOVER_TIMEOUT = float(os.getenv("FAILOVER_TIMEOUT", 3))
+# Entries kept for catching up; a standby further behind gets a fresh snapshot
+REPLICATION_LOG_SIZE = int(os.getenv("REPLICATION_LOG_SIZE", 100_000))
+# How often the leader ships new entries, and how often it sends a heartbeat when idle
+REPLICATION_BATCH_INTERVAL = float(os.getenv("REPLICATION_BATCH_INTERVAL", 0.05))
+REPLICATION_HEARTBEAT_INTERVAL = float(os.getenv("REPLICATION_HEARTBEAT_INTERVAL", 0.5))
+
+Entry = Tuple[int, float, str, Dict[str, Any]]  # (seq, unix time, kind, data)
+
+
+class ReplicationLog:
+    """
+    Append-only log of registry and task changes, numbered by seq.
+    Acts as a registry sink (put/delete) and a scheduler listener (task).
+    Only the last ``retention`` entries are kept in memory; ``epoch`` changes
+    with every process so a follower can tell its offsets no longer apply.
+    """
+
+    def __init__(self, retention: int = REPLICATION_LOG_SIZE):
+        self.epoch = uuid.uuid4().hex
+        self.seq = 0
+        self._entries: "deque[Entry]" = deque(maxlen=retention)
+
+    def append(self, kind: str, data: Dict[str, Any]) -> int:
+        self.seq += 1
+        self._entries.append((self.seq, time.time(), kind, data))
+        return self.seq
+
+    def put(self, client_id: str, record: Dict[str, Any]) -> None:
+        self.append("client", record)
+
+    def delete(self, client_id: str) -> None:
+        self.append("client_removed", {"client_id": client_id})
+
+    def task(self, task) -> None:
+        self.append("task", task.to_record())
+
+    def since(self, seq: int) -> List[Entry] | None:
+        """Entries after ``seq``, or None when some of them were already dropped."""
+        if seq >= self.seq:
+            return []
+        if not self._entries or seq + 1 < self._entries[0][0]:
+            return None
+        return list(itertools.islice(self._entries, seq + 1 - self._entries[0][0], None))
+
+
+class FailoverNode:
+    """
+    One side of a leader/standby pair.
+
+    The leader streams its ReplicationLog to the standby over /replication
+    (see api/failover_router.py): a snapshot first, then batches of entries
+    and periodic heartbeats. The standby applies them to its own registry and
+    keeps the task records aside. When it hears nothing for ``timeout`` seconds
+    it promotes itself: client sessions of the dead leader are marked
+    disconnected and unfinished tasks are queued again on this server.
+
+    There is no fencing: if the two nodes are partitioned rather than one of
+    them dead, both end up leading until an operator restarts one.
+    """
+
+    def __init__(self, registry, scheduler, role: str = FAILOVER_ROLE, peer_url: str | None = FAILOVER_PEER_URL,
+                 secret: str = REPLICATION_SECRET, timeout: float = FAILOVER_TIMEOUT):
+        self.registry = registry
+        self.scheduler = scheduler
+        self.role = role if peer_url else "leader"
+        self.peer_url = peer_url.rstrip("/") if peer_url else None
+        self.secret = secret
+        self.timeout = timeout
+        self.log = ReplicationLog()
+
+        # Follower state
+        self.leader_epoch: str | None = None
+        self.applied_seq = 0
+        self.leader_seq = 0
+        self.lag_ms: float | None = None
+        self.last_contact = time.monotonic()
+        self.promoted_at: float | None = None
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def is_leader(self) -> bool:
+        return self.role == "leader"
+
+    @property
+    def enabled(self) -> bool:
+        """Failover is on when a peer is configured; only then is /replication served."""
+        return self.peer_url is not None
+
+    def validate(self) -> None:
+        """Refuses to start a failover pair whose replication feed anyone could read."""
+        if self.enabled and not self.secret:
+            raise RuntimeError("FAILOVER_PEER_URL is set but REPLICATION_SECRET is empty")
+
+    def attach(self) -> None:
+        """Starts recording registry and task changes into the log."""
+        self.registry.attach_sink(self.log)
+        self.scheduler.add_listener(self.log.task)
+
+    def status(self) -> Dict[str, Any]:
+        return {"role": self.role, "clients": len(self.registry), "epoch": self.log.epoch, "seq": self.log.seq,
+                "leader_epoch": self.leader_epoch, "applied_seq": self.applied_seq,
+                "leader_seq": self.leader_seq, "lag_seq": max(0, self.leader_seq - self.applied_seq),
+                "lag_ms": self.lag_ms, "last_contact_age": round(time.monotonic() - self.last_contact, 3),
+                "promoted_at": self.promoted_at}
+
+    # --- Startup ---
+
+    def _peer_status(self) -> Dict[str, Any] | None:
+        try:
+            with urllib.request.urlopen(f"{self.peer_url}/failover/status", timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except (OSError, ValueError):
+            return None
+
+    async def run(self) -> None:
+        """Background task: checks who leads, then follows the leader until promoted."""
+        if self.peer_url is None:
+            return
+        if self.is_leader:
+            # A restarted former leader must not fight the standby that replaced it
+            peer = await asyncio.to_thread(self._peer_status)
+            if peer is not None and peer.get("role") == "leader":
+                log.warning("failover_peer_already_leading", peer=self.peer_url)
+                self.role = "standby"
+        if not self.is_leader:
+            await self._follow()
+
+    # --- Leader side ---
+
+    def _snapshot(self) -> Dict[str, Any]:
+        # Built synchronously on the event loop, so it matches log.seq exactly
+        return {"type": "snapshot", "epoch": self.log.epoch, "seq": self.log.seq,
+                "clients": [entry.to_record() for entry in self.registry],
+                "tasks": self.scheduler.records()}
+
+    def check_secret(self, secret: Any) -> bool:
+        # An empty secret would match an empty (or missing) one: never accept it
+        return (bool(self.secret) and isinstance(secret, str)
+                and hmac.compare_digest(secret.encode(), self.secret.encode()))
+
+    async def stream(self, send: Callable[[Dict[str, Any]], Awaitable[None]], epoch: str | None,
+                     from_seq: int) -> None:
+        """Feeds one follower until it disconnects (send raises) or this node stops leading."""
+        cursor = from_seq if epoch == self.log.epoch else -1
+        last_beat = 0.0
+        while self.is_leader:
+            entries = self.log.since(cursor) if cursor >= 0 else None
+            if entries is None:
+                snapshot = self._snapshot()
+                await send(snapshot)
+                cursor = snapshot["seq"]
+            elif entries:
+                await send({"type": "entries", "entries": entries})
+                cursor = entries[-1][0]
+            now = time.monotonic()
+            if now - last_beat >= REPLICATION_HEARTBEAT_INTERVAL:
+                await send({"type": "heartbeat", "seq": self.log.seq, "ts": time.time()})
+                last_beat = now
+            await asyncio.sleep(REPLICATION_BATCH_INTERVAL)
+
+    # --- Standby side ---
+
+    def _apply_client(self, kind: str, data: Dict[str, Any]) -> None:
+        if kind == "client":
+            self.registry.merge([data], authoritative=True)
+        elif kind == "client_removed":
+            self.registry.remove(data["client_id"])
+
+    def apply(self, frame: Dict[str, Any]) -> None:
+        """Applies one frame received from the leader."""
+        self.last_contact = time.monotonic()
+        frame_type = frame.get("type")
+        if frame_type == "snapshot":
+            current = {record["client_id"] for record in frame["clients"]}
+            for entry in list(self.registry):
+                if entry.client_id not in current:
+                    self.registry.remove(entry.client_id)
+            self.registry.merge(frame["clients"], authoritative=True)
+            self._tasks = {record["task_id"]: record for record in frame["tasks"]}
+            self.leader_epoch = frame["epoch"]
+            self.applied_seq = self.leader_seq = frame["seq"]
+            self.lag_ms = 0.0
+            log.info("replication_snapshot_applied", clients=len(current), tasks=len(self._tasks))
+        elif frame_type == "entries":
+            for seq, ts, kind, data in frame["entries"]:
+                if kind == "task":
+                    self._tasks[data["task_id"]] = data
+                else:
+                    self._apply_client(kind, data)
+                self.applied_seq = seq
+            self.leader_seq = max(self.leader_seq, self.applied_seq)
+            self.lag_ms = round((time.time() - frame["entries"][-1][1]) * 1000, 3)
+        elif frame_type == "heartbeat":
+            self.leader_seq = frame["seq"]
+            if self.applied_seq >= self.leader_seq:
+                self.lag_ms = 0.0
+
+    async def _follow(self) -> None:
+        if websockets is None:
+            log.error("replication_unavailable", reason="websockets is not installed")
+            return
+        url = self.peer_url.replace("https://", "wss://", 1).replace("http://", "ws://", 1) + "/replication"
+        self.last_contact = time.monotonic()
+        while not self.is_leader:
+            try:
+                async with websockets.connect(url, open_timeout=self.timeout) as ws:
+                    await ws.send(json.dumps({"type": "subscribe", "secret": self.secret,
+                                              "epoch": self.leader_epoch, "from_seq": self.applied_seq}))
+                    while True:
+                        self.apply(json.loads(await asyncio.wait_for(ws.recv(), self.timeout)))
+            except (OSError, asyncio.TimeoutError, ValueError, websockets.exceptions.WebSocketException) as e:
+                silent_for = time.monotonic() - self.last_contact
+                if silent_for >= self.timeout:
+                    self.promote(f"no contact from leader for {silent_for:.1f}s ({e!r})")
+                    return
+            await asyncio.sleep(min(0.2, self.timeout / 10))
+
+    def promote(self, reason: str) -> None:
+        """Takes over as leader with the replicated state."""
+        self.role = "leader"
+        self.promoted_at = time.time()
+        # Sessions were held by the old leader; clients reconnect here and mark themselves online
+        for entry in list(self.registry):
+            if entry.connection == "websocket":
+                self.registry.update(entry.client_id, status="disconnected", connection=None)
+        requeued = self.scheduler.restore(self._tasks.values())
+        self._tasks.clear()
+        log.warning("failover_promoted", reason=reason, requeued_tasks=requeued)
+
+
+failover_node = FailoverNode(client_registry, task_scheduler)
@@ -0,0 +1,381 @@
+# server/app/services/scheduler.py
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+
+from ..core.connections import connection_manager
+
+# Finished tasks kept for lookups and replication; older ones are dropped first
+TASK_HISTORY = int(os.getenv("TASK_HISTORY", 10_000))
+
+PENDING, QUEUED, RUNNING, DONE, FAILED = "pending", "queued", "running", "done", "failed"
+
+
+class Task:
+    __slots__ = ("task_id", "kind", "payload", "priority", "max_retries", "attempts", "timeout",
+                 "state", "worker", "result", "error", "submitted_at", "started_at", "finished_at",
+                 "_seq", "_done")
+
+    def __init__(self, task_id: str, kind: str, payload: Any, priority: int, max_retries: int,
+                 timeout: float, seq: int):
+        self.task_id = task_id
+        self.kind = kind
+        self.payload = payload
+        self.priority = priority
+        self.max_retries = max_retries
+        self.attempts = 0
+        self.timeout = timeout
+        self.state = PENDING
+        self.worker: str | None = None
+        self.result: Any = None
+        self.error: str | None = None
+        self.submitted_at = time.monotonic()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._seq = seq
+        self._done: asyncio.Future | None = None
+
+    def sort_key(self):
+        # Higher priority first, then submission order
+        return (-self.priority, self._seq)
+
+    def __lt__(self, other: "Task") -> bool:
+        return self.sort_key() < other.sort_key()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"task_id": self.task_id, "kind": self.kind, "state": self.state, "priority": self.priority,
+                "worker": self.worker, "attempts": self.attempts, "result": self.result, "error": self.error}
+
+    def to_record(self) -> Dict[str, Any]:
+        """Everything needed to rebuild the task on another server (see TaskScheduler.restore)."""
+        return {**self.to_dict(), "payload": self.payload, "max_retries": self.max_retries, "timeout": self.timeout}
+
+
+class Worker:
+    __slots__ = ("client_id", "capabilities", "slots", "cpu", "memory", "running", "queue", "version")
+
+    def __init__(self, client_id: str, capabilities: Iterable[str], slots: int):
+        self.client_id = client_id
+        self.capabilities = frozenset(capabilities)
+        self.slots = max(1, slots)
+        self.cpu = 0.0       # Percent, from the client's heartbeat
+        self.memory = 0.0    # Percent
+        self.running = 0
+        self.queue: List[Task] = []  # Heap of tasks assigned here but not started
+        self.version = 0             # Bumped on every load change; stale heap entries are skipped
+
+    def load(self) -> float:
+        """Placement score: occupancy of the task slots plus reported CPU pressure."""
+        return (self.running + len(self.queue)) / self.slots + self.cpu / 200.0
+
+
+# Sends a task to a client and returns its ack payload ({"ok": bool, "result"/"error": ...})
+SendTask = Callable[[str, Task], Awaitable[Dict[str, Any]]]
+
+
+def _number(value: Any) -> float | None:
+    """A finite number reported by a client, or None for anything else (ignored)."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return None
+    return float(value)
+
+
+async def send_over_session(client_id: str, task: Task) -> Dict[str, Any]:
+    """Default transport: a run_task command over the client's WebSocket session."""
+    return await connection_manager.push_command(client_id, {
+        "action": "run_task", "task_id": task.task_id, "kind": task.kind, "payload": task.payload,
+    }, timeout=task.timeout)
+
+
+class TaskScheduler:
+    """
+    Places tasks on the least-loaded client able to run them.
+
+    Clients declare capabilities (task kinds) and slots in their status frame and
+    report CPU/memory in heartbeats. A submitted task goes to the local queue
+    (a priority heap) of the capable worker with the lowest load; tasks nobody can
+    run wait in the global pending heap. A worker with a free slot and an empty
+    queue steals the best runnable task from the most loaded capable peer.
+    Failed or lost tasks are retried up to ``max_retries`` times elsewhere.
+
+    Finding the least-loaded worker uses one heap per capability holding
+    (load, version, client_id). A load change pushes a fresh entry and outdated
+    ones are discarded lazily when they reach the top, so placement is
+    O(log workers) instead of a scan of every capable client.
+    """
+
+    def __init__(self, send: SendTask = send_over_session, default_timeout: float = 300.0,
+                 history: int = TASK_HISTORY):
+        self._send = send
+        self.default_timeout = default_timeout
+        self.history = history
+        self._workers: Dict[str, Worker] = {}
+        self._by_capability: Dict[str, set] = {}
+        self._load_heaps: Dict[str, List[tuple]] = {}
+        self._queued = 0            # Tasks sitting in worker queues; 0 means nothing to steal
+        self._pending: List[Task] = []
+        self._tasks: Dict[str, Task] = {}
+        self._finished: "deque[str]" = deque()  # Finished task ids, oldest first
+        self._ids = itertools.count(1)
+        self._running: set = set()  # asyncio tasks executing dispatches
+        self.completed = 0
+        self.failed = 0
+        self._listeners: List[Callable[[Task], None]] = []
+
+    def add_listener(self, listener: Callable[[Task], None]) -> None:
+        """Calls ``listener(task)`` when a task is submitted and when it finishes (done or failed)."""
+        self._listeners.append(listener)
+
+    def _notify(self, task: Task) -> None:
+        for listener in self._listeners:
+            listener(task)
+
+    # --- Workers ---
+
+    def update_worker(self, client_id: str, capabilities: Iterable[str] | None = None,
+                      slots: int | None = None, cpu: float | None = None, memory: float | None = None) -> None:
+        """
+        Adds a worker or refreshes its capabilities and load figures. Figures come
+        straight from client frames; values that are not numbers are ignored.
+        """
+        if isinstance(slots, bool) or not isinstance(slots, int):
+            slots = None
+        cpu, memory = _number(cpu), _number(memory)
+        worker = self._workers.get(client_id)
+        if worker is None:
+            if capabilities is None:
+                return  # Only clients that declared capabilities take tasks
+            worker = self._workers[client_id] = Worker(client_id, capabilities, slots or 1)
+        elif capabilities is not None and frozenset(capabilities) != worker.capabilities:
+            self._unindex(worker)
+            worker.capabilities = frozenset(capabilities)
+        if slots is not None:
+            worker.slots = max(1, slots)
+        if cpu is not None:
+            worker.cpu = cpu
+        if memory is not None:
+            worker.memory = memory
+        for kind in worker.capabilities:
+            self._by_capability.setdefault(kind, set()).add(client_id)
+        self._reindex(worker)
+        self._drain_pending()
+        self._start_ready(worker)
+
+    def _reindex(self, worker: Worker) -> None:
+        """Publishes the worker's current load to the heaps of its capabilities."""
+        worker.version += 1
+        entry = (worker.load(), worker.version, worker.client_id)
+        for kind in worker.capabilities:
+            heap = self._load_heaps.setdefault(kind, [])
+            heapq.heappush(heap, entry)
+            if len(heap) > 4 * len(self._by_capability.get(kind, ())) + 64:
+                # Too many outdated entries: rebuild from the live workers
+                heap[:] = [(w.load(), w.version, w.client_id)
+                           for w in map(self._workers.get, self._by_capability.get(kind, ())) if w]
+                heapq.heapify(heap)
+
+    def _unindex(self, worker: Worker) -> None:
+        for kind in worker.capabilities:
+            ids = self._by_capability.get(kind)
+            if ids is not None:
+                ids.discard(worker.client_id)
+                if not ids:
+                    del self._by_capability[kind]
+
+    def remove_worker(self, client_id: str) -> None:
+        """Drops a worker (disconnected/expired); its queued tasks are placed again."""
+        worker = self._workers.pop(client_id, None)
+        if worker is None:
+            return
+        self._unindex(worker)
+        self._queued -= len(worker.queue)
+        for task in worker.queue:
+            task.state, task.worker = PENDING, None
+            self._place(task)
+        # Running tasks fail through their send() raising, which triggers a retry
+
+    # --- Tasks ---
+
+    def submit(self, kind: str, payload: Any = None, priority: int = 0, max_retries: int = 2,
+               timeout: float | None = None) -> Task:
+        seq = next(self._ids)
+        task = Task(f"t{seq}", kind, payload, priority, max_retries, timeout or self.default_timeout, seq)
+        self._tasks[task.task_id] = task
+        self._notify(task)
+        self._place(task)
+        return task
+
+    def restore(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Rebuilds tasks replicated from another server (Task.to_record). Finished
+        tasks keep their result; unfinished ones are placed again from scratch.
+        Returns the number of tasks re-queued.
+        """
+        requeued = 0
+        for record in records:
+            seq = int(record["task_id"].lstrip("t") or 0)
+            task = Task(record["task_id"], record["kind"], record.get("payload"), record["priority"],
+                        record["max_retries"], record["timeout"], seq)
+            task.attempts, task.result, task.error = record["attempts"], record["result"], record["error"]
+            self._tasks[task.task_id] = task
+            if seq >= next(self._ids):
+                self._ids = itertools.count(seq + 1)
+            if record["state"] in (DONE, FAILED):
+                task.state, task.worker = record["state"], record["worker"]
+                self._retire(task)
+            else:
+                self._place(task)
+                requeued += 1
+        return requeued
+
+    def get(self, task_id: str) -> Task | None:
+        return self._tasks.get(task_id)
+
+    async def wait(self, task_id: str, timeout: float | None = None) -> Task:
+        """Waits until the task is done or failed for good."""
+        task = self._tasks[task_id]
+        if task.state in (DONE, FAILED):
+            return task
+        if task._done is None:
+            task._done = asyncio.get_running_loop().create_future()
+        await asyncio.wait_for(asyncio.shield(task._done), timeout)
+        return task
+
+    def forget(self, task_id: str) -> None:
+        """Drops a finished task's record once its result has been collected."""
+        task = self._tasks.get(task_id)
+        if task is not None and task.state in (DONE, FAILED):
+            del self._tasks[task_id]
+
+    def _retire(self, task: Task) -> None:
+        """Adds a finished task to the history, dropping the oldest beyond ``history``."""
+        self._finished.append(task.task_id)
+        while len(self._finished) > self.history:
+            old = self._tasks.get(self._finished.popleft())
+            if old is not None and old.state in (DONE, FAILED):
+                del self._tasks[old.task_id]
+
+    def records(self) -> List[Dict[str, Any]]:
+        """All known tasks as Task.to_record() dicts (used for replication snapshots)."""
+        return [task.to_record() for task in self._tasks.values()]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": len(self._workers), "pending": len(self._pending),
+                "queued": sum(len(w.queue) for w in self._workers.values()),
+                "running": sum(w.running for w in self._workers.values()),
+                "completed": self.completed, "failed": self.failed}
+
+    # --- Placement ---
+
+    def _least_loaded(self, kind: str) -> Worker | None:
+        heap = self._load_heaps.get(kind)
+        while heap:
+            _, version, client_id = heap[0]
+            worker = self._workers.get(client_id)
+            if worker is not None and worker.version == version and kind in worker.capabilities:
+                return worker
+            heapq.heappop(heap)
+        return None
+
+    def _place(self, task: Task) -> None:
+        worker = self._least_loaded(task.kind)
+        if worker is None:
+            task.state = PENDING
+            heapq.heappush(self._pending, task)
+            return
+        task.state, task.worker = QUEUED, worker.client_id
+        heapq.heappush(worker.queue, task)
+        self._queued += 1
+        self._start_ready(worker)
+
+    def _drain_pending(self) -> None:
+        if not self._pending:
+            return
+        waiting, self._pending = self._pending, []
+        for task in sorted(waiting):
+            self._place(task)
+
+    def _steal(self, thief: Worker) -> Task | None:
+        """Takes the best task the thief can run from the most loaded peer sharing a capability."""
+        if not self._queued:
+            return None
+        peers = set()
+        for kind in thief.capabilities:
+            peers |= self._by_capability.get(kind, set())
+        peers.discard(thief.client_id)
+        victim, victim_task = None, None
+        for peer in map(self._workers.__getitem__, peers):
+            if not peer.queue or (victim is not None and peer.load() <= victim.load()):
+                continue
+            runnable = [t for t in peer.queue if t.kind in thief.capabilities]
+            if runnable:
+                victim, victim_task = peer, min(runnable)
+        if victim is None:
+            return None
+        victim.queue.remove(victim_task)
+        heapq.heapify(victim.queue)
+        self._reindex(victim)
+        victim_task.worker = thief.client_id
+        return victim_task
+
+    def _start_ready(self, worker: Worker) -> None:
+        while worker.running < worker.slots:
+            if worker.queue:
+                task = heapq.heappop(worker.queue)
+            else:
+                task = self._steal(worker)
+                if task is None:
+                    break
+            self._queued -= 1
+            worker.running += 1
+            task.state, task.started_at = RUNNING, time.monotonic()
+            task.attempts += 1
+            job = asyncio.get_running_loop().create_task(self._execute(worker, task))
+            self._running.add(job)
+            job.add_done_callback(self._running.discard)
+        self._reindex(worker)
+
+    async def _execute(self, worker: Worker, task: Task) -> None:
+        try:
+            ack = await self._send(worker.client_id, task)
+            ok, error = bool(ack.get("ok", True)), ack.get("error")
+        except (LookupError, asyncio.TimeoutError, ConnectionError, RuntimeError) as e:
+            ack, ok, error = {}, False, str(e) or type(e).__name__
+        finally:
+            # Released even when the send is cancelled or fails unexpectedly. The slot
+            # belongs to the Worker the task was dispatched to; after a reconnect the
+            # client is registered again as a fresh Worker
+            worker.running -= 1
+
+        if self._workers.get(worker.client_id) is not worker:
+            worker = None
+
+        if ok:
+            task.state, task.result = DONE, ack.get("result")
+            self.completed += 1
+        elif task.attempts <= task.max_retries:
+            task.error = error
+            task.worker = None
+            self._place(task)
+        else:
+            task.state, task.error = FAILED, error
+            self.failed += 1
+
+        if task.state in (DONE, FAILED):
+            task.finished_at = time.monotonic()
+            if task._done is not None and not task._done.done():
+                task._done.set_result(task)
+            self._notify(task)
+            self._retire(task)
+        if worker is not None:
+            self._start_ready(worker)
+
+
+# Scheduler shared by the whole app
+task_scheduler = TaskScheduler()
@@ -0,0 +1,334 @@
+# server/app/services/state_store.py
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List
+
+from ..core.logs import get_logger
+
+log = get_logger(__name__)
+
+Record = Dict[str, Any]  # See ClientEntry.to_record()
+
+
+class StateStore:
+    """Persistence interface behind the client registry."""
+
+    # True when other processes (uvicorn workers) read and write the same state
+    shared = True
+
+    def load(self, since: float = 0.0) -> List[Record]:
+        """Returns records whose last_seen (Unix time) is newer than ``since``."""
+        raise NotImplementedError
+
+    def save_many(self, records: List[Record]) -> None:
+        raise NotImplementedError
+
+    def delete_many(self, client_ids: List[str]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteStateStore(StateStore):
+    """Embedded store: one SQLite file in WAL mode, upserted in batches."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Calls arrive from the write-behind thread; the lock serialises them
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS clients ("
+                " client_id TEXT PRIMARY KEY, status TEXT, registered_at REAL,"
+                " last_seen REAL, connection TEXT, details TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS clients_last_seen ON clients(last_seen)")
+            self._conn.commit()
+
+    def load(self, since: float = 0.0) -> List[Record]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT client_id, status, registered_at, last_seen, connection, details"
+                " FROM clients WHERE last_seen > ?", (since,)
+            ).fetchall()
+        return [
+            {"client_id": r[0], "status": r[1], "registered_at": r[2], "last_seen": r[3],
+             "connection": r[4], "details": json.loads(r[5]) if r[5] else None}
+            for r in rows
+        ]
+
+    def save_many(self, records: List[Record]) -> None:
+        rows = [
+            (r["client_id"], r["status"], r["registered_at"], r["last_seen"], r["connection"],
+             json.dumps(r["details"]) if r["details"] is not None else None)
+            for r in records
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO clients (client_id, status, registered_at, last_seen, connection, details)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(client_id) DO UPDATE SET status=excluded.status,"
+                " registered_at=excluded.registered_at, last_seen=excluded.last_seen,"
+                " connection=excluded.connection, details=excluded.details",
+                rows,
+            )
+            self._conn.commit()
+
+    def delete_many(self, client_ids: List[str]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM clients WHERE client_id = ?", [(c,) for c in client_ids])
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RespError(RuntimeError):
+    """Error reply from the server (the connection stays usable)."""
+
+
+class RespConnection:
+    """
+    Minimal blocking client for the Redis serialization protocol (RESP2).
+    Any I/O or protocol failure drops the socket (it may be half way through a
+    reply and out of step) and the next call connects again.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._sock: socket.socket | None = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._file = self._sock.makefile("rb")
+
+    def _disconnect(self) -> None:
+        for closable in (self._file, self._sock):
+            if closable is not None:
+                try:
+                    closable.close()
+                except OSError:
+                    pass
+        self._sock = self._file = None
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read_reply(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("RESP server closed the connection")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            return RespError(payload.decode())  # Raised once every reply is read
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._file.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("RESP server closed the connection")
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected RESP reply: {line!r}")
+
+    def pipeline(self, commands: List[list]) -> list:
+        """Sends all commands in one write and returns their replies in order."""
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                self._sock.sendall(b"".join(self._encode(cmd) for cmd in commands))
+                replies = [self._read_reply() for _ in commands]
+            except (OSError, ValueError):  # ConnectionError and timeouts are OSErrors
+                self._disconnect()
+                raise
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def execute(self, *args):
+        return self.pipeline([list(args)])[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+
+class RedisStateStore(StateStore):
+    """
+    Store speaking the Redis protocol. All clients live in one hash
+    (``key``: client_id -> JSON record) next to a sorted set
+    (``key``:seen: client_id scored by last_seen), so load(since) reads only
+    the clients seen after ``since`` instead of the whole hash. Batches become
+    one HSET and one ZADD per chunk, sent in a single pipeline.
+    Can run against Redis or the stand-in in server/scripts/resp_standin.py.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, key: str = "jarvis:clients",
+                 chunk_size: int = 1000):
+        self.key = key
+        self.index_key = key + ":seen"
+        self.chunk_size = chunk_size
+        self._conn = RespConnection(host, port)
+        self._conn.execute("PING")
+
+    def load(self, since: float = 0.0) -> List[Record]:
+        if since <= 0:
+            # Full load at startup: the whole hash, records written before the index existed included
+            flat = self._conn.execute("HGETALL", self.key) or []
+            return [json.loads(value) for value in flat[1::2]]
+        client_ids = self._conn.execute("ZRANGEBYSCORE", self.index_key, f"({since!r}", "+inf") or []
+        records = []
+        for i in range(0, len(client_ids), self.chunk_size):
+            values = self._conn.execute("HMGET", self.key, *client_ids[i:i + self.chunk_size])
+            # A client deleted between the two reads has no hash field left
+            records += [json.loads(value) for value in values if value is not None]
+        return records
+
+    def save_many(self, records: List[Record]) -> None:
+        commands = []
+        for i in range(0, len(records), self.chunk_size):
+            chunk = records[i:i + self.chunk_size]
+            command, index = ["HSET", self.key], ["ZADD", self.index_key]
+            for r in chunk:
+                command += [r["client_id"], json.dumps(r, separators=(",", ":"))]
+                index += [repr(float(r["last_seen"])), r["client_id"]]
+            commands += [command, index]
+        if commands:
+            self._conn.pipeline(commands)
+
+    def delete_many(self, client_ids: List[str]) -> None:
+        if client_ids:
+            self._conn.pipeline([["HDEL", self.key, *client_ids], ["ZREM", self.index_key, *client_ids]])
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class WriteBehindBuffer:
+    """
+    Coalesces registry changes and flushes them to a StateStore in batches.
+
+    put()/delete() only update an in-memory dict keyed by client_id, so a client
+    that heartbeats ten times between flushes costs one row write. The flush runs
+    in a worker thread every ``flush_interval`` seconds, keeping store I/O off the
+    request path. For shared stores, state written by other workers is merged back
+    into the registry every ``sync_interval`` seconds.
+    """
+
+    def __init__(self, store: StateStore, flush_interval: float = 1.0, sync_interval: float = 5.0):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.sync_interval = sync_interval
+        self._pending: Dict[str, Record | None] = {}  # None marks a deletion
+        self.flushed_records = 0
+        self.flush_count = 0
+
+    def put(self, client_id: str, record: Record) -> None:
+        self._pending[client_id] = record
+
+    def delete(self, client_id: str) -> None:
+        self._pending[client_id] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def drain(self) -> Dict[str, Record | None]:
+        """Takes the pending changes. Call from the thread that does put()/delete()."""
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def flush(self) -> int:
+        """Drains and writes everything pending (blocking). Returns the batch size."""
+        return self.write(self.drain())
+
+    def write(self, pending: Dict[str, Record | None]) -> int:
+        """Writes a drained batch to the store (blocking)."""
+        if not pending:
+            return 0
+        records = [r for r in pending.values() if r is not None]
+        deleted = [client_id for client_id, r in pending.items() if r is None]
+        if records:
+            self.store.save_many(records)
+        if deleted:
+            self.store.delete_many(deleted)
+        self.flushed_records += len(pending)
+        self.flush_count += 1
+        return len(pending)
+
+    async def run(self, registry) -> None:
+        """Background task: periodic flushes plus, for shared stores, merging peers' state."""
+        last_sync = time.time()
+        next_sync = time.monotonic() + self.sync_interval
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                batch = self.drain()
+                try:
+                    await asyncio.to_thread(self.write, batch)
+                    if self.store.shared and time.monotonic() >= next_sync:
+                        since, last_sync = last_sync - self.sync_interval, time.time()
+                        records = await asyncio.to_thread(self.store.load, since)
+                        registry.merge(records)
+                        next_sync = time.monotonic() + self.sync_interval
+                except (sqlite3.Error, OSError, RuntimeError) as e:
+                    log.error("state_flush_failed", error=str(e), batch=len(batch))
+                    # Put the batch back unless a newer change arrived meanwhile
+                    for client_id, record in batch.items():
+                        self._pending.setdefault(client_id, record)
+        finally:
+            # Final flush on shutdown so the last heartbeats are not lost
+            await asyncio.to_thread(self.write, self.drain())
+
+
+def create_state_store() -> StateStore | None:
+    """
+    Builds the backend selected by STATE_BACKEND:
+    "memory" (default, nothing persisted), "sqlite" (STATE_SQLITE_PATH) or
+    "redis" (STATE_REDIS_HOST / STATE_REDIS_PORT).
+    """
+    backend = os.getenv("STATE_BACKEND", "memory").lower()
+    if backend == "memory":
+        return None
+    if backend == "sqlite":
+        default_path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "jarvis_state.db")
+        return SQLiteStateStore(os.getenv("STATE_SQLITE_PATH", default_path))
+    if backend == "redis":
+        return RedisStateStore(
+            host=os.getenv("STATE_REDIS_HOST", "127.0.0.1"),
+            port=int(os.getenv("STATE_REDIS_PORT", 6379)),
+        )
+    raise ValueError(f"Unknown STATE_BACKEND: {backend}")
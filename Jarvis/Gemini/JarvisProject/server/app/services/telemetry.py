@@ -0,0 +1,215 @@
+# server/app/services/telemetry.py
+
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from ..core.logs import get_logger
+
+try:
+    import zstandard
+except ImportError:  # Optional: without it zstd batches are refused and clients fall back to gzip
+    zstandard = None
+
+log = get_logger(__name__)
+
+# --- Batch format ---
+# Written by clients/common/telemetry.py (TelemetryBuffer.encode), little-endian:
+#   magic b"JT" | version u8 (=1) | codec u8 (0 none, 1 gzip, 2 zstd), then the body compressed with codec:
+#   count u32 | columns u8 | t0_ms u64 (Unix time of the first sample)
+#   per column: name_len u8 | name (utf-8) | scale u16 (a value is stored as round(value * scale))
+#   count x i32: milliseconds since the previous sample (0 for the first)
+#   per column, count x i32: stored value minus the previous one (the first value as it is)
+BATCH_HEADER = struct.Struct("<2sBB")
+BODY_HEADER = struct.Struct("<IBQ")
+BATCH_MAGIC = b"JT"
+BATCH_VERSION = 1
+CODEC_NONE, CODEC_GZIP, CODEC_ZSTD = 0, 1, 2
+
+# Largest decompressed batch accepted (bytes); guards against compression bombs
+TELEMETRY_MAX_BATCH_BYTES = int(os.getenv("TELEMETRY_MAX_BATCH_BYTES", 4 * 1024 * 1024))
+# Samples kept in memory per client (four hours at one sample every 5 s, ~60 KB with four metrics)
+TELEMETRY_RING_SIZE = int(os.getenv("TELEMETRY_RING_SIZE", 2880))
+TELEMETRY_MAX_COLUMNS = 32
+
+
+class TelemetryError(ValueError):
+    """A batch that does not follow the format above, or uses a codec this server lacks."""
+
+
+def _decompress(codec: int, data: memoryview, limit: int) -> bytes:
+    if codec == CODEC_NONE:
+        body = bytes(data)
+    elif codec == CODEC_GZIP:
+        decompressor = zlib.decompressobj(wbits=31)
+        body = decompressor.decompress(data, limit)
+        if decompressor.unconsumed_tail:
+            raise TelemetryError(f"Batch larger than {limit} bytes once decompressed")
+    elif codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise TelemetryError("zstd batches are not supported by this server (install zstandard)")
+        try:
+            body = zstandard.ZstdDecompressor().decompress(data, max_output_size=limit)
+        except zstandard.ZstdError as e:
+            raise TelemetryError(f"Bad zstd data: {e}")
+    else:
+        raise TelemetryError(f"Unknown codec {codec}")
+    if len(body) > limit:
+        raise TelemetryError(f"Batch larger than {limit} bytes once decompressed")
+    return body
+
+
+def decode_batch(data: bytes, limit: int = TELEMETRY_MAX_BATCH_BYTES) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Returns (Unix times in seconds, {metric: values}) as float64 columns, oldest first."""
+    if len(data) < BATCH_HEADER.size:
+        raise TelemetryError("Batch shorter than its header")
+    magic, version, codec = BATCH_HEADER.unpack_from(data)
+    if magic != BATCH_MAGIC or version != BATCH_VERSION:
+        raise TelemetryError("Not a telemetry batch (bad magic or version)")
+    try:
+        body = _decompress(codec, memoryview(data)[BATCH_HEADER.size:], limit)
+    except zlib.error as e:
+        raise TelemetryError(f"Bad gzip data: {e}")
+
+    if len(body) < BODY_HEADER.size:
+        raise TelemetryError("Batch body shorter than its header")
+    count, columns, t0_ms = BODY_HEADER.unpack_from(body)
+    if columns > TELEMETRY_MAX_COLUMNS:
+        raise TelemetryError(f"More than {TELEMETRY_MAX_COLUMNS} columns")
+    offset = BODY_HEADER.size
+    names: List[Tuple[str, int]] = []
+    try:
+        for _ in range(columns):
+            length = body[offset]
+            name = body[offset + 1:offset + 1 + length].decode()
+            (scale,) = struct.unpack_from("<H", body, offset + 1 + length)
+            names.append((name, scale or 1))
+            offset += 3 + length
+    except (IndexError, struct.error, UnicodeDecodeError):
+        raise TelemetryError("Truncated or malformed column table")
+    if len(body) != offset + 4 * count * (columns + 1):
+        raise TelemetryError(f"Batch announces {count} samples of {columns} columns but the size differs")
+
+    # Undo the delta encoding with one cumulative sum per column
+    deltas = np.frombuffer(body, dtype="<i4", count=count * (columns + 1), offset=offset).reshape(columns + 1, count)
+    sums = np.cumsum(deltas, axis=1, dtype=np.int64)
+    times = (t0_ms + sums[0]) / 1000.0
+    values = {name: sums[index + 1] / scale for index, (name, scale) in enumerate(names)}
+    return times, values
+
+
+# --- Storage ---
+
+class _ClientSeries:
+    """Ring of samples for one client: a time column and one float32 column per metric, sharing positions."""
+
+    __slots__ = ("size", "times", "columns", "total")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.times = np.zeros(size, dtype=np.float64)
+        self.columns: Dict[str, np.ndarray] = {}
+        self.total = 0  # Samples ever written
+
+    def _column(self, name: str) -> np.ndarray:
+        column = self.columns.get(name)
+        if column is None:
+            column = self.columns[name] = np.full(self.size, np.nan, dtype=np.float32)
+        return column
+
+    def extend(self, times: np.ndarray, values: Dict[str, np.ndarray]) -> None:
+        count = len(times)
+        if count > self.size:
+            times = times[-self.size:]
+            values = {name: column[-self.size:] for name, column in values.items()}
+            self.total += count - self.size
+            count = self.size
+        slots = (self.total + np.arange(count)) % self.size
+        self.times[slots] = times
+        for name, column in self.columns.items():
+            if name not in values:
+                column[slots] = np.nan  # Metric absent from this batch
+        for name, column in values.items():
+            self._column(name)[slots] = column
+        self.total += count
+
+    def latest(self, count: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        count = min(count, self.total, self.size)
+        slots = np.arange(self.total - count, self.total) % self.size
+        return self.times[slots], {name: column[slots] for name, column in self.columns.items()}
+
+
+class TelemetryStore:
+    """
+    Client metrics received in batches (see the format above), decoded with a
+    few NumPy operations per batch straight into per-client columns: a ring of
+    ``ring_size`` samples per client, one float32 array per metric.
+    """
+
+    def __init__(self, ring_size: int = TELEMETRY_RING_SIZE, max_batch_bytes: int = TELEMETRY_MAX_BATCH_BYTES):
+        self.ring_size = ring_size
+        self.max_batch_bytes = max_batch_bytes
+        self._series: Dict[str, _ClientSeries] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, np.ndarray, Dict[str, np.ndarray]], None]] = []
+        self.batches = 0
+        self.samples = 0
+        self.bad_batches = 0
+        self.wire_bytes = 0
+        self.decode_seconds = 0.0
+
+    def add_listener(self, callback: Callable[[str, np.ndarray, Dict[str, np.ndarray]], None]) -> None:
+        """Calls ``callback(client_id, times, values)`` with every decoded batch; it must not block."""
+        self._listeners.append(callback)
+
+    def ingest(self, client_id: str, data: bytes) -> int:
+        """Decodes one batch into the client's columns; returns the number of samples. Raises TelemetryError."""
+        started = time.perf_counter()
+        try:
+            times, values = decode_batch(data, self.max_batch_bytes)
+        except TelemetryError:
+            self.bad_batches += 1
+            raise
+        self.ingest_columns(client_id, times, values, wire_bytes=len(data))
+        self.decode_seconds += time.perf_counter() - started
+        return len(times)
+
+    def ingest_columns(self, client_id: str, times: np.ndarray, values: Dict[str, np.ndarray],
+                       wire_bytes: int = 0) -> None:
+        with self._lock:
+            self.wire_bytes += wire_bytes
+            series = self._series.get(client_id)
+            if series is None:
+                series = self._series[client_id] = _ClientSeries(self.ring_size)
+            series.extend(times, values)
+            self.batches += 1
+            self.samples += len(times)
+        for callback in self._listeners:
+            callback(client_id, times, values)
+
+    def latest(self, client_id: str, count: int, metrics: List[str] | None = None) -> Dict[str, Any] | None:
+        with self._lock:
+            series = self._series.get(client_id)
+            if series is None:
+                return None
+            times, columns = series.latest(count)
+        if metrics:
+            columns = {name: column for name, column in columns.items() if name in metrics}
+        return {"times": times.tolist(),
+                "metrics": {name: [None if np.isnan(v) else round(float(v), 3) for v in column]
+                            for name, column in columns.items()}}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"clients": len(self._series), "batches": self.batches, "samples": self.samples,
+                "bad_batches": self.bad_batches, "wire_bytes": self.wire_bytes,
+                "bytes_per_sample": round(self.wire_bytes / self.samples, 2) if self.samples else None,
+                "decode_us_per_sample": round(self.decode_seconds / self.samples * 1e6, 3) if self.samples else None,
+                "zstd": zstandard is not None}
+
+
+telemetry_store = TelemetryStore()
@@ -0,0 +1,703 @@
+# server/app/services/timeseries.py
+
+import asyncio
+import json
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+from ..core.logs import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Optional: without it (Windows) there is one worker and no directory lock is taken
+    fcntl = None
+
+log = get_logger(__name__)
+
+# Record client history at all (false: nothing is written and /status/history answers 404)
+TIMESERIES_ENABLED = os.getenv("TIMESERIES_ENABLED", "true").lower() in ("1", "true", "yes")
+# Segment directory; every worker process writes its own worker-<n> subdirectory and reads all of them
+TIMESERIES_DIR = os.getenv("TIMESERIES_DIR",
+                           os.path.join(os.path.dirname(__file__), "..", "..", "data", "timeseries"))
+# Largest segment in rows. A window's first segment is sized for the rows the resolution can
+# hold there (series x buckets per window) or for the first write; each following one doubles
+TIMESERIES_SEGMENT_ROWS = int(os.getenv("TIMESERIES_SEGMENT_ROWS", 1 << 20))
+# Smallest segment in rows, so a quiet window does not end up as many tiny files
+TIMESERIES_MIN_SEGMENT_ROWS = 4096
+# Metrics recorded per client; names come from the clients, later ones are not recorded
+TIMESERIES_MAX_SERIES_PER_CLIENT = int(os.getenv("TIMESERIES_MAX_SERIES_PER_CLIENT", 64))
+# Seconds of history kept per resolution; older windows are deleted by the compaction pass
+TIMESERIES_RETENTION_RAW = float(os.getenv("TIMESERIES_RETENTION_RAW", 3600))
+TIMESERIES_RETENTION_1S = float(os.getenv("TIMESERIES_RETENTION_1S", 6 * 3600))
+TIMESERIES_RETENTION_1M = float(os.getenv("TIMESERIES_RETENTION_1M", 30 * 86400))
+TIMESERIES_RETENTION_1H = float(os.getenv("TIMESERIES_RETENTION_1H", 365 * 86400))
+# Seconds between writes of buffered points and closed rollup buckets to the segments
+TIMESERIES_FLUSH_INTERVAL = float(os.getenv("TIMESERIES_FLUSH_INTERVAL", 1))
+# Seconds between compaction passes (sort and merge closed windows, apply retention)
+TIMESERIES_COMPACT_INTERVAL = float(os.getenv("TIMESERIES_COMPACT_INTERVAL", 300))
+# Seconds a rollup bucket stays open after its end for samples that arrive late
+TIMESERIES_LATENESS = float(os.getenv("TIMESERIES_LATENESS", 5))
+
+# Series of fleet-wide gauges (clients per status), stored like a client's
+FLEET_SERIES = "*"
+
+
+class Resolution(NamedTuple):
+    name: str
+    step: float       # Bucket width in seconds (0: raw points)
+    window: int       # Seconds of data per segment directory
+    retention: float
+
+
+RESOLUTIONS = (
+    Resolution("raw", 0, 600, TIMESERIES_RETENTION_RAW),
+    Resolution("1s", 1, 600, TIMESERIES_RETENTION_1S),
+    Resolution("1m", 60, 3600, TIMESERIES_RETENTION_1M),
+    Resolution("1h", 3600, 86400, TIMESERIES_RETENTION_1H),
+)
+ROLLUPS = RESOLUTIONS[1:]
+RESOLUTION_NAMES = {resolution.name: resolution for resolution in RESOLUTIONS}
+
+# One .npy file per column. Rollup rows are partial aggregates of a (series, bucket):
+# rows of the same bucket (late samples, several workers) merge by adding counts
+# and sums and taking the min of mins / max of maxes, at query and compaction time.
+RAW_COLUMNS = (("sid", "<u4"), ("value", "<f4"), ("t", "<f8"))
+ROLLUP_COLUMNS = (("sid", "<u4"), ("count", "<u4"), ("sum", "<f8"), ("min", "<f4"), ("max", "<f4"), ("t", "<f8"))
+
+
+# --- Segments ---
+
+class _Part:
+    """
+    One segment: a directory with a memory-mapped .npy file per column.
+
+    "p<seq>" parts are append-only, in arrival order. The time column is written
+    last, so the row count is the index of the first zero time, for a reader in
+    another process as much as after a crash. "s<seq>" parts are written by
+    compaction, sorted by (series, time), and replace every part up to <seq>.
+    """
+
+    __slots__ = ("path", "columns", "sorted", "count", "capacity")
+
+    def __init__(self, path: str, columns: Dict[str, np.ndarray], is_sorted: bool):
+        self.path = path
+        self.columns = columns
+        self.sorted = is_sorted
+        self.capacity = len(columns["t"])
+        self.count = self.capacity if is_sorted else self._written()
+
+    def _written(self) -> int:
+        """Binary search for the first zero time: written rows form a prefix."""
+        t = self.columns["t"]
+        lo, hi = 0, len(t)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if t[mid] != 0:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    @classmethod
+    def create(cls, path: str, schema, capacity: int) -> "_Part":
+        """Creates the files under a temporary name and renames the directory, so readers never see half a part."""
+        staging = os.path.join(os.path.dirname(path), "." + os.path.basename(path))
+        os.makedirs(staging, exist_ok=True)
+        for name, dtype in schema:
+            np.lib.format.open_memmap(os.path.join(staging, name + ".npy"), mode="w+", dtype=dtype,
+                                      shape=(capacity,)).flush()
+        os.rename(staging, path)
+        return cls.open(path, writable=True)
+
+    @classmethod
+    def open(cls, path: str, writable: bool = False) -> "_Part":
+        columns = {entry[:-4]: np.load(os.path.join(path, entry), mmap_mode="r+" if writable else "r")
+                   for entry in os.listdir(path) if entry.endswith(".npy")}
+        return cls(path, columns, os.path.basename(path).startswith("s"))
+
+    def append(self, rows: Dict[str, np.ndarray], start: int) -> int:
+        """Writes rows from ``start`` on until the part is full; returns how many were written."""
+        written = min(self.capacity - self.count, len(rows["t"]) - start)
+        end = self.count + written
+        for name, column in self.columns.items():
+            if name != "t":
+                column[self.count:end] = rows[name][start:start + written]
+        self.columns["t"][self.count:end] = rows["t"][start:start + written]
+        self.count = end
+        return written
+
+    def select(self, sid: int, start: float, end: float) -> Dict[str, np.ndarray]:
+        """Rows of one series with start <= t < end."""
+        t = self.columns["t"]
+        if self.sorted:
+            lo, hi = np.searchsorted(self.columns["sid"], [sid, sid + 1])
+            first, last = lo + np.searchsorted(t[lo:hi], [start, end])
+            return {name: np.array(column[first:last]) for name, column in self.columns.items()}
+        count = self._written()
+        t = t[:count]
+        mask = (self.columns["sid"][:count] == sid) & (t >= start) & (t < end)
+        return {name: column[:count][mask] for name, column in self.columns.items()}
+
+    def rows(self) -> Dict[str, np.ndarray]:
+        count = self.count if self.sorted else self._written()
+        return {name: np.array(column[:count]) for name, column in self.columns.items()}
+
+
+def _part_seq(name: str) -> int:
+    return int(name[1:])
+
+
+def _live_parts(names: Iterable[str]) -> List[str]:
+    """Part names a reader should use: the newest sorted part and whatever was written after it."""
+    names = [name for name in names if name[:1] in ("p", "s")]
+    covered = max((_part_seq(name) for name in names if name[0] == "s"), default=-1)
+    return sorted((name for name in names if _part_seq(name) > covered or name == f"s{covered:06d}"),
+                  key=_part_seq)
+
+
+def _merge_rollups(rows: Dict[str, np.ndarray], keys: Tuple[str, ...] = ("t",)) -> Dict[str, np.ndarray]:
+    """Sorts rollup rows by ``keys`` (last one varies fastest) and merges rows sharing all of them."""
+    order = np.lexsort([rows[key] for key in reversed(keys)])
+    rows = {name: column[order] for name, column in rows.items()}
+    if not len(order):
+        return rows
+    boundary = np.zeros(len(order), dtype=bool)
+    boundary[0] = True
+    for key in keys:
+        boundary[1:] |= rows[key][1:] != rows[key][:-1]
+    starts = np.flatnonzero(boundary)
+    merged = {name: column[starts] for name, column in rows.items()}
+    merged["count"] = np.add.reduceat(rows["count"], starts)
+    merged["sum"] = np.add.reduceat(rows["sum"], starts)
+    merged["min"] = np.minimum.reduceat(rows["min"], starts)
+    merged["max"] = np.maximum.reduceat(rows["max"], starts)
+    return merged
+
+
+def _concat(chunks: List[Dict[str, np.ndarray]], schema) -> Dict[str, np.ndarray]:
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) if chunks else np.empty(0, dtype=dtype)
+            for name, dtype in schema}
+
+
+# --- Store ---
+
+class TimeSeriesStore:
+    """
+    Per-client history of heartbeats and resource metrics, on disk as
+    append-only, memory-mapped NumPy columns with rollups at 1s, 1m and 1h.
+
+    A series is a (client_id, metric) pair numbered in ``series.jsonl``. Samples
+    are buffered in memory and folded into open rollup buckets (count, sum, min,
+    max) as they arrive; every ``flush_interval`` the raw points and the buckets
+    that closed are appended to the segment of their time window. The
+    compaction pass sorts each closed window by (series, time), merges its
+    parts and partial buckets into one, and deletes windows past the
+    resolution's retention. A range query picks the coarsest rollup that still
+    gives enough points and binary-searches the sorted segments, so a month of
+    history is a few hundred rows read, not every raw point.
+    """
+
+    def __init__(self, directory: str = TIMESERIES_DIR, segment_rows: int = TIMESERIES_SEGMENT_ROWS,
+                 lateness: float = TIMESERIES_LATENESS, resolutions: Tuple[Resolution, ...] = RESOLUTIONS,
+                 max_series_per_client: int = TIMESERIES_MAX_SERIES_PER_CLIENT):
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self.max_series_per_client = max_series_per_client
+        self.lateness = lateness
+        self.resolutions = {resolution.name: resolution for resolution in resolutions}
+        self.rollups = [resolution for resolution in resolutions if resolution.step]
+        self.path: str | None = None      # This worker's subdirectory, set by open()
+        self._lock_file = None
+        self._lock = threading.Lock()     # Series table, buffers and open buckets (request path)
+        self._io_lock = threading.Lock()  # Segment writers (flush and compaction threads)
+
+        self._series: Dict[Tuple[str, str], int] = {}
+        self._series_per_client: Counter = Counter()
+        self._series_file = None
+        self._peers: Dict[str, Tuple[int, Dict[Tuple[str, str], int]]] = {}  # Other workers' series tables
+        self._raw: List[Tuple[float, int, float]] = []
+        self._raw_chunks: List[Dict[str, np.ndarray]] = []
+        # resolution -> bucket -> sid -> [count, sum, min, max]
+        self._open: Dict[str, Dict[int, Dict[int, List[float]]]] = {r.name: {} for r in self.rollups}
+        self._writers: Dict[Tuple[str, int], _Part] = {}
+        self._readers: Dict[str, _Part] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._columnar: set = set()       # Clients that send telemetry batches
+        self._fleet_statuses: set = set()
+
+        self.points = 0
+        self.series_rejected = 0          # Samples of metrics past a client's series limit
+        self.rows_written = 0
+        self.flush_seconds = 0.0
+        self.compactions = 0
+        self.windows_dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def open(self) -> None:
+        """Takes the first free worker-<n> directory (one per worker process) and loads its series table."""
+        index = 0
+        while True:
+            path = os.path.join(self.directory, f"worker-{index}")
+            os.makedirs(path, exist_ok=True)
+            if fcntl is None:
+                break
+            handle = open(os.path.join(path, "lock"), "a")
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                handle.close()
+                index += 1
+                continue
+            self._lock_file = handle
+            break
+        self.path = path
+        series_path = os.path.join(path, "series.jsonl")
+        self._series = self._read_series(series_path)
+        self._series_per_client = Counter(client_id for client_id, _ in self._series)
+        self._series_file = open(series_path, "a", encoding="utf-8")
+        log.info("timeseries_opened", path=path, series=len(self._series))
+
+    def close(self) -> None:
+        if self.path is None:
+            return
+        self.flush(everything=True)
+        self._series_file.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+        self.path = None
+
+    @staticmethod
+    def _read_series(path: str) -> Dict[Tuple[str, str], int]:
+        series = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.endswith("\n"):  # A line cut short by a crash is not a series yet
+                        client_id, metric = json.loads(line)
+                        series[(client_id, metric)] = len(series)
+        return series
+
+    def _sid(self, client_id: str, metric: str) -> int | None:
+        """Series number, assigned on first use; None past the client's series limit. Caller holds _lock."""
+        key = (client_id, metric)
+        sid = self._series.get(key)
+        if sid is None:
+            if self._series_per_client[client_id] >= self.max_series_per_client:
+                if self.series_rejected == 0:
+                    log.warning("timeseries_series_limit", client_id=client_id, metric=metric,
+                                limit=self.max_series_per_client)
+                self.series_rejected += 1
+                return None
+            sid = self._series[key] = len(self._series)
+            self._series_per_client[client_id] += 1
+            self._series_file.write(json.dumps([client_id, metric]) + "\n")
+        return sid
+
+    # --- Recording ---
+
+    def _fold(self, sid: int, ts: float, value: float) -> None:
+        """Adds one sample to its open bucket at every rollup resolution. Caller holds _lock."""
+        for resolution in self.rollups:
+            bucket = self._open[resolution.name].setdefault(int(ts // resolution.step), {})
+            acc = bucket.get(sid)
+            if acc is None:
+                bucket[sid] = [1, value, value, value]
+            else:
+                acc[0] += 1
+                acc[1] += value
+                if value < acc[2]:
+                    acc[2] = value
+                if value > acc[3]:
+                    acc[3] = value
+
+    def record(self, client_id: str, values: Dict[str, float], ts: float | None = None) -> None:
+        """One sample of one or more metrics of a client."""
+        if self.path is None:
+            return
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            for metric, value in values.items():
+                if value is None:
+                    continue
+                value = float(value)
+                sid = self._sid(client_id, metric)
+                if sid is None:
+                    continue
+                self._raw.append((ts, sid, value))
+                self._fold(sid, ts, value)
+                self.points += 1
+
+    def record_metrics(self, client_id: str, metrics: Dict[str, Any], ts: float | None = None) -> None:
+        """Resource figures carried by a heartbeat; skipped for clients whose telemetry batches carry them."""
+        if client_id in self._columnar:
+            return
+        self.record(client_id, {name: value for name, value in metrics.items()
+                                if isinstance(value, (int, float)) and not isinstance(value, bool)}, ts)
+
+    def record_columns(self, client_id: str, times: np.ndarray, values: Dict[str, np.ndarray]) -> None:
+        """A decoded telemetry batch (see services/telemetry.py); rolled up with one reduceat per bucket run."""
+        if self.path is None or not len(times):
+            return
+        with self._lock:
+            self._columnar.add(client_id)
+            for metric, column in values.items():
+                keep = ~np.isnan(column)
+                metric_times, column = times[keep], column[keep].astype(np.float64)
+                if not len(column):
+                    continue
+                sid = self._sid(client_id, metric)
+                if sid is None:
+                    continue
+                self._raw_chunks.append({"t": metric_times, "sid": np.full(len(column), sid, dtype=np.uint32),
+                                         "value": column.astype(np.float32)})
+                self.points += len(column)
+                for resolution in self.rollups:
+                    buckets = (metric_times // resolution.step).astype(np.int64)
+                    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+                    counts = np.diff(np.r_[starts, len(buckets)])
+                    rows = zip(buckets[starts].tolist(), counts.tolist(), np.add.reduceat(column, starts).tolist(),
+                               np.minimum.reduceat(column, starts).tolist(),
+                               np.maximum.reduceat(column, starts).tolist())
+                    open_buckets = self._open[resolution.name]
+                    for bucket, count, total, low, high in rows:
+                        series = open_buckets.setdefault(bucket, {})
+                        acc = series.get(sid)
+                        if acc is None:
+                            series[sid] = [count, total, low, high]
+                        else:
+                            acc[0] += count
+                            acc[1] += total
+                            acc[2] = min(acc[2], low)
+                            acc[3] = max(acc[3], high)
+
+    # --- Registry sink ---
+
+    def put(self, client_id: str, record: Dict[str, Any]) -> None:
+        """A heartbeat is a last_seen that moved; stored as the seconds since the previous one."""
+        last_seen = record["last_seen"]
+        previous = self._last_seen.get(client_id)
+        if previous is not None and last_seen <= previous:
+            return  # Status or details change, not a heartbeat
+        self._last_seen[client_id] = last_seen
+        if previous is not None:
+            self.record(client_id, {"heartbeat": last_seen - previous}, last_seen)
+
+    def delete(self, client_id: str) -> None:
+        self._last_seen.pop(client_id, None)
+        self._columnar.discard(client_id)
+
+    def record_fleet(self, by_status: Dict[str, int], ts: float | None = None) -> None:
+        """Clients per status; a status seen before but now empty is recorded as 0, not as a gap."""
+        self._fleet_statuses.update(by_status)
+        values = {f"status.{name}": by_status.get(name, 0) for name in self._fleet_statuses}
+        values["total"] = sum(by_status.values())
+        self.record(FLEET_SERIES, values, ts)
+
+    # --- Writing ---
+
+    def _take(self, now: float, everything: bool) -> Dict[str, Dict[str, np.ndarray]]:
+        """Buffered raw points and closed buckets as column arrays per resolution."""
+        with self._lock:
+            raw, self._raw = self._raw, []
+            chunks, self._raw_chunks = self._raw_chunks, []
+            self._series_file.flush()  # Series numbers reach the disk before rows that use them
+            closed = {}
+            for resolution in self.rollups:
+                open_buckets = self._open[resolution.name]
+                limit = (now - self.lateness) // resolution.step
+                due = [bucket for bucket in open_buckets if everything or bucket + 1 <= limit]
+                closed[resolution.name] = [(bucket, open_buckets.pop(bucket)) for bucket in due]
+
+        if raw:
+            t, sid, value = zip(*raw)
+            chunks.append({"t": np.array(t), "sid": np.array(sid, dtype=np.uint32),
+                           "value": np.array(value, dtype=np.float32)})
+        batches = {"raw": _concat(chunks, RAW_COLUMNS)}
+        for resolution in self.rollups:
+            buckets = closed[resolution.name]
+            sizes = [len(series) for _, series in buckets]
+            acc = np.array([a for _, series in buckets for a in series.values()], dtype=np.float64).reshape(-1, 4)
+            batches[resolution.name] = {
+                "t": np.repeat(np.array([bucket for bucket, _ in buckets], dtype=np.float64) * resolution.step,
+                               sizes),
+                "sid": np.fromiter((sid for _, series in buckets for sid in series), dtype=np.uint32,
+                                   count=int(sum(sizes))),
+                "count": acc[:, 0].astype(np.uint32), "sum": acc[:, 1],
+                "min": acc[:, 2].astype(np.float32), "max": acc[:, 3].astype(np.float32)}
+        return batches
+
+    def _window_path(self, resolution: Resolution, window: int) -> str:
+        return os.path.join(self.path, resolution.name, str(window))
+
+    def _part_rows(self, resolution: Resolution, previous: _Part | None, pending: int) -> int:
+        """Capacity of a window's next part: doubles the full one, else fits what the window can hold."""
+        if previous is not None:
+            rows = previous.capacity * 2
+        elif resolution.step:
+            rows = max(pending, len(self._series) * int(resolution.window // resolution.step))
+        else:
+            rows = pending * 2
+        return int(min(self.segment_rows, max(TIMESERIES_MIN_SEGMENT_ROWS, rows)))
+
+    def _write(self, resolution: Resolution, rows: Dict[str, np.ndarray], now: float) -> int:
+        """Appends rows to the current part of each window they fall in. Caller holds _io_lock."""
+        if not len(rows["t"]):
+            return 0
+        horizon = now - resolution.retention
+        windows = (rows["t"] // resolution.window).astype(np.int64) * resolution.window
+        written = 0
+        for window in np.unique(windows).tolist():
+            if window + resolution.window < horizon:
+                continue  # Late rows for a window retention already removed
+            selected = {name: column[windows == window] for name, column in rows.items()}
+            start = 0
+            while start < len(selected["t"]):
+                part = self._writers.get((resolution.name, window))
+                if part is None or part.count == part.capacity:
+                    path = self._window_path(resolution, window)
+                    os.makedirs(path, exist_ok=True)
+                    seq = max((_part_seq(name) for name in os.listdir(path) if name[:1] in ("p", "s")), default=0)
+                    schema = RAW_COLUMNS if not resolution.step else ROLLUP_COLUMNS
+                    capacity = self._part_rows(resolution, part, len(selected["t"]) - start)
+                    part = self._writers[(resolution.name, window)] = _Part.create(
+                        os.path.join(path, f"p{seq + 1:06d}"), schema, capacity)
+                start += part.append(selected, start)
+            written += len(selected["t"])
+        return written
+
+    def flush(self, now: float | None = None, everything: bool = False) -> int:
+        """Writes buffered points and closed buckets (all open buckets with ``everything``). Blocking."""
+        if self.path is None:
+            return 0
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        written = 0
+        with self._io_lock:  # Held from take to write, so a query finds the rows in memory or on disk
+            batches = self._take(now, everything)
+            for name, rows in batches.items():
+                written += self._write(self.resolutions[name], rows, now)
+        self.rows_written += written
+        self.flush_seconds += time.perf_counter() - started
+        return written
+
+    # --- Compaction ---
+
+    def compact(self, now: float | None = None) -> Dict[str, int]:
+        """Sorts and merges every closed window, deletes those past retention. Blocking."""
+        if self.path is None:
+            return {"compacted": 0, "dropped": 0}
+        now = time.time() if now is None else now
+        compacted = dropped = 0
+        for resolution in self.resolutions.values():
+            base = os.path.join(self.path, resolution.name)
+            if not os.path.isdir(base):
+                continue
+            for name in os.listdir(base):
+                window = int(name)
+                end = window + resolution.window
+                path = os.path.join(base, name)
+                if end < now - resolution.retention:
+                    with self._io_lock:
+                        self._writers.pop((resolution.name, window), None)
+                        shutil.rmtree(path, ignore_errors=True)
+                    dropped += 1
+                elif end + resolution.step + self.lateness < now:
+                    compacted += self._compact_window(resolution, window, path)
+        self.compactions += compacted
+        self.windows_dropped += dropped
+        if compacted or dropped:
+            log.info("timeseries_compacted", windows=compacted, dropped=dropped)
+        return {"compacted": compacted, "dropped": dropped}
+
+    def _compact_window(self, resolution: Resolution, window: int, path: str) -> int:
+        with self._io_lock:
+            # Rows arriving from now on start a new part, after the one written here
+            self._writers.pop((resolution.name, window), None)
+            names = _live_parts(os.listdir(path))
+        if not names or (len(names) == 1 and names[0][0] == "s"):
+            return 0
+        schema = RAW_COLUMNS if not resolution.step else ROLLUP_COLUMNS
+        rows = _concat([_Part.open(os.path.join(path, name)).rows() for name in names], schema)
+        if resolution.step:
+            rows = _merge_rollups(rows, ("sid", "t"))
+        else:
+            order = np.lexsort((rows["t"], rows["sid"]))
+            rows = {name: column[order] for name, column in rows.items()}
+
+        target = f"s{max(_part_seq(name) for name in names):06d}"
+        staging = os.path.join(path, "." + target)
+        os.makedirs(staging, exist_ok=True)
+        for name, dtype in schema:
+            np.save(os.path.join(staging, name + ".npy"), rows[name].astype(dtype, copy=False))
+        os.rename(staging, os.path.join(path, target))
+        # Readers already ignore what the new part covers; the files go once nobody can list them as live
+        for name in names:
+            if name != target:
+                shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+        return 1
+
+    # --- Queries ---
+
+    def _shards(self) -> List[Tuple[str, Dict[Tuple[str, str], int]]]:
+        """(directory, series table) of every worker, this one first."""
+        with self._lock:
+            shards = [(self.path, dict(self._series))]
+        for entry in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, entry)
+            if path == self.path or not entry.startswith("worker-"):
+                continue
+            series_path = os.path.join(path, "series.jsonl")
+            try:
+                size = os.path.getsize(series_path)
+            except OSError:
+                continue
+            cached = self._peers.get(path)
+            if cached is None or cached[0] != size:
+                cached = self._peers[path] = (size, self._read_series(series_path))
+            shards.append((path, cached[1]))
+        return shards
+
+    def _parts(self, window_path: str) -> List[_Part]:
+        try:
+            names = _live_parts(os.listdir(window_path))
+        except FileNotFoundError:
+            return []
+        parts = []
+        for name in names:
+            path = os.path.join(window_path, name)
+            part = self._readers.get(path)
+            if part is None:
+                try:
+                    part = self._readers[path] = _Part.open(path)
+                except (FileNotFoundError, ValueError):
+                    continue  # Compacted away while listing
+            parts.append(part)
+        live = {os.path.join(window_path, name) for name in names}
+        for path in [path for path in self._readers if os.path.dirname(path) == window_path and path not in live]:
+            del self._readers[path]
+        return parts
+
+    def pick_resolution(self, start: float, end: float, max_points: int, now: float | None = None) -> Resolution:
+        """The finest rollup that keeps the range under ``max_points`` buckets and still covers ``start``."""
+        now = time.time() if now is None else now
+        for resolution in self.rollups:
+            if (end - start) / resolution.step <= max_points and now - resolution.retention <= start:
+                return resolution
+        return self.rollups[-1]
+
+    def query(self, client_id: str, metric: str, start: float, end: float,
+              resolution: Resolution) -> Dict[str, np.ndarray]:
+        """Columns of one series in [start, end): t and value for raw points; t, count, sum, min, max for rollups."""
+        schema = RAW_COLUMNS if not resolution.step else ROLLUP_COLUMNS
+        if self.path is None:
+            return _concat([], schema)
+        if resolution.step:
+            start = start // resolution.step * resolution.step  # The bucket holding start is part of the range
+        chunks = []
+        first = int(start // resolution.window) * resolution.window
+        with self._io_lock:
+            for shard, series in self._shards():
+                sid = series.get((client_id, metric))
+                if sid is None:
+                    continue
+                for window in range(first, int(end) + 1, resolution.window):
+                    for part in self._parts(os.path.join(shard, resolution.name, str(window))):
+                        chunks.append(part.select(sid, start, end))
+            chunks.extend(self._buffered(client_id, metric, start, end, resolution))
+
+        rows = _concat(chunks, schema)
+        if resolution.step:
+            return _merge_rollups(rows)
+        order = np.argsort(rows["t"], kind="stable")
+        return {name: column[order] for name, column in rows.items()}
+
+    def _buffered(self, client_id: str, metric: str, start: float, end: float,
+                  resolution: Resolution) -> List[Dict[str, np.ndarray]]:
+        """Rows still in memory: raw points since the last flush, or open buckets."""
+        chunks = []
+        with self._lock:
+            sid = self._series.get((client_id, metric))
+            if sid is not None and not resolution.step:
+                buffered = [point for point in self._raw if point[1] == sid and start <= point[0] < end]
+                if buffered:
+                    t, _, value = zip(*buffered)
+                    chunks.append({"t": np.array(t), "sid": np.full(len(t), sid, dtype=np.uint32),
+                                   "value": np.array(value, dtype=np.float32)})
+                for chunk in self._raw_chunks:
+                    mask = (chunk["sid"] == sid) & (chunk["t"] >= start) & (chunk["t"] < end)
+                    if mask.any():
+                        chunks.append({name: column[mask] for name, column in chunk.items()})
+            elif sid is not None:
+                pending = [(bucket * resolution.step, acc) for bucket, series in self._open[resolution.name].items()
+                           if start <= bucket * resolution.step < end and (acc := series.get(sid)) is not None]
+                if pending:
+                    acc = np.array([a for _, a in pending], dtype=np.float64)
+                    chunks.append({"t": np.array([t for t, _ in pending]),
+                                   "sid": np.full(len(pending), sid, dtype=np.uint32),
+                                   "count": acc[:, 0].astype(np.uint32), "sum": acc[:, 1],
+                                   "min": acc[:, 2].astype(np.float32), "max": acc[:, 3].astype(np.float32)})
+        return chunks
+
+    def history(self, client_id: str, metrics: List[str], start: float, end: float,
+                resolution: str | None = None, max_points: int = 720) -> Dict[str, Any]:
+        """JSON view for /status/history: per metric, times with avg/min/max/count (or raw values)."""
+        chosen = self.resolutions[resolution] if resolution else self.pick_resolution(start, end, max_points)
+        result = {"client_id": client_id, "resolution": chosen.name, "start": start, "end": end, "metrics": {}}
+        for metric in metrics:
+            rows = self.query(client_id, metric, start, end, chosen)
+            if not chosen.step:
+                result["metrics"][metric] = {"times": rows["t"].tolist(),
+                                             "values": np.round(rows["value"].astype(np.float64), 3).tolist()}
+                continue
+            result["metrics"][metric] = {
+                "times": rows["t"].tolist(), "count": rows["count"].tolist(),
+                "avg": np.round(rows["sum"] / np.maximum(rows["count"], 1), 3).tolist(),
+                "min": np.round(rows["min"].astype(np.float64), 3).tolist(),
+                "max": np.round(rows["max"].astype(np.float64), 3).tolist()}
+        return result
+
+    def metrics_of(self, client_id: str) -> List[str]:
+        """Metric names recorded for a client by any worker."""
+        return sorted({metric for _, series in self._shards() for (owner, metric) in series if owner == client_id})
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            open_buckets = {name: sum(len(series) for series in buckets.values())
+                            for name, buckets in self._open.items()}
+            series = len(self._series)
+        return {"path": self.path, "series": series, "points": self.points, "series_rejected": self.series_rejected,
+                "rows_written": self.rows_written,
+                "open_buckets": open_buckets, "flush_seconds": round(self.flush_seconds, 3),
+                "compactions": self.compactions, "windows_dropped": self.windows_dropped}
+
+    async def run(self, fleet: Callable[[], Dict[str, int]] | None = None,
+                  flush_interval: float = TIMESERIES_FLUSH_INTERVAL,
+                  compact_interval: float = TIMESERIES_COMPACT_INTERVAL) -> None:
+        """Background task: fleet gauges and flushes every ``flush_interval``, compaction every ``compact_interval``."""
+        next_compaction = time.monotonic() + compact_interval
+        try:
+            while True:
+                await asyncio.sleep(flush_interval)
+                if fleet is not None:
+                    self.record_fleet(fleet())
+                try:
+                    await asyncio.to_thread(self.flush)
+                    if time.monotonic() >= next_compaction:
+                        await asyncio.to_thread(self.compact)
+                        next_compaction = time.monotonic() + compact_interval
+                except OSError as e:
+                    log.error("timeseries_write_failed", error=str(e))
+        finally:
+            await asyncio.to_thread(self.close)  # Open buckets are written as partial rows
+
+
+timeseries_store = TimeSeriesStore()
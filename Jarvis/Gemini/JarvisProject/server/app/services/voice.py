@@ -0,0 +1,24 @@
+# server/app/services/voice.py
+
+from ml.voice_recognition.intents import IntentRouter
+from ml.voice_recognition.pipeline import VoicePipeline
+from ml.voice_recognition.recognizers import VOSK_MODEL_PATH, create_recognizer_factory, load_vosk_model
+
+from ..core.registry import client_registry
+from .model_registry import model_registry
+
+# Intents spoken to the server over /voice; features register more with voice_intents.on(...)
+voice_intents = IntentRouter()
+
+
+@voice_intents.on("fleet_status", "status", "estado", "clientes conectados", "how many clients")
+def fleet_status(text: str):
+    online = sum(1 for entry in client_registry if entry.status == "online")
+    return {"clients": len(client_registry), "online": online}
+
+
+# The speech model lives in the model registry: loaded with the first utterance, evicted when memory is short
+model_registry.register("voice_recognition/vosk", load_vosk_model, VOSK_MODEL_PATH)
+voice_pipeline = VoicePipeline(
+    create_recognizer_factory(vosk_model=lambda: model_registry.get_blocking("voice_recognition/vosk")),
+    voice_intents)
@@ -0,0 +1,151 @@
+# server/benchmarks/bench_color_ingest.py
+"""
+Colour-sensor ingestion: persistent WebSocket with binary batches against one
+JSON POST per reading (what the original sketch did, new connection each time).
+
+1. In-process: how many readings per second ColorSensorHub.ingest_frame handles.
+2. Live server (uvicorn subprocess): N simulated sensors stream at --hz over
+   /color in frames of --batch readings, showing a different colour card every
+   second. Reports server CPU per second of streaming, bytes sent, and how many
+   selection events came back (one per card change, not one per reading).
+3. The same readings from one sensor as individual POST /color requests.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_color_ingest --sensors 10 --hz 100 --batch 10 --seconds 5
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+import psutil
+
+from server.app.services.color_sensor import ColorSensorHub, encode_frame
+
+from .bench_failover import free_port, wait_until
+from .bench_heartbeat_batch import write_clients_file
+
+CARDS = [(210, 35, 40), (0, 0, 0), (35, 175, 60), (0, 0, 0), (40, 55, 205), (0, 0, 0)]
+
+
+def readings(count: int, second: int, rng) -> np.ndarray:
+    card = np.array(CARDS[second % len(CARDS)])
+    return np.clip(card + rng.integers(-12, 12, (count, 3)), 0, 255)
+
+
+def in_process(batch: int, frames: int) -> None:
+    rng = np.random.default_rng(0)
+    hub = ColorSensorHub()
+    payloads = [encode_frame(i * batch * 10, 10, readings(batch, i * batch // 100, rng)) for i in range(frames)]
+    start = time.perf_counter()
+    for payload in payloads:
+        hub.ingest_frame("bench", payload)
+    elapsed = time.perf_counter() - start
+    print(f"in-process: {frames * batch / elapsed:,.0f} readings/s ({elapsed / frames * 1e6:.0f} us per {batch}-reading frame), "
+          f"{hub.events} selection events")
+
+
+def start_server(port: int, clients_file: str) -> subprocess.Popen:
+    env = dict(os.environ, JARVIS_CLIENTS_FILE=clients_file, STATE_BACKEND="memory", PYTHONPATH=os.getcwd())
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", "server.app.main:app", "--host", "127.0.0.1",
+                             "--port", str(port), "--log-level", "warning"], env=env, stdout=subprocess.DEVNULL)
+
+
+def cpu_seconds(process: psutil.Process) -> float:
+    times = process.cpu_times()
+    return times.user + times.system
+
+
+async def stream_sensors(port: int, sensors: int, hz: int, batch: int, seconds: float):
+    import websockets
+
+    sent_bytes, events = 0, 0
+    interval_ms = 1000 // hz
+
+    async def sensor(index: int):
+        nonlocal sent_bytes
+        rng = np.random.default_rng(index)
+        headers = {"X-Client-ID": f"bench_{index}", "X-Client-Secret": f"secret_{index}"}
+        async with websockets.connect(f"ws://127.0.0.1:{port}/color", additional_headers=headers) as ws:
+            async def receive():
+                nonlocal events
+                async for _ in ws:
+                    events += 1
+            receiver = asyncio.create_task(receive())
+            start = time.perf_counter()
+            frame_no = 0
+            while (elapsed := time.perf_counter() - start) < seconds:
+                t0_ms = frame_no * batch * interval_ms
+                payload = encode_frame(t0_ms, interval_ms, readings(batch, t0_ms // 1000, rng))
+                await ws.send(payload)
+                sent_bytes += len(payload)
+                frame_no += 1
+                await asyncio.sleep(max(0.0, frame_no * batch / hz - elapsed))
+            await asyncio.sleep(0.3)  # Let the last events arrive
+            receiver.cancel()
+
+    await asyncio.gather(*(sensor(i) for i in range(sensors)))
+    return sent_bytes, events
+
+
+async def post_readings(port: int, hz: int, seconds: float):
+    rng = np.random.default_rng(0)
+    headers = {"X-Client-ID": "bench_0", "X-Client-Secret": "secret_0"}
+    sent, sent_bytes = 0, 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        r, g, b = (int(c) for c in readings(1, int(elapsed), rng)[0])
+        body = f'{{"red":{r},"green":{g},"blue":{b}}}'
+        # A fresh client per reading, like HTTPClient.begin()/end() on the ESP32
+        async with httpx.AsyncClient() as client:
+            response = await client.post(f"http://127.0.0.1:{port}/color", content=body,
+                                         headers={**headers, "Content-Type": "application/json"})
+            assert response.status_code == 200, response.text
+        sent += 1
+        sent_bytes += len(body)
+        await asyncio.sleep(max(0.0, sent / hz - (time.perf_counter() - start)))
+    return sent, sent_bytes, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sensors", type=int, default=10)
+    parser.add_argument("--hz", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    in_process(args.batch, 5000)
+
+    port = free_port()
+    server = start_server(port, write_clients_file(args.sensors))
+    try:
+        wait_until(lambda: httpx.get(f"http://127.0.0.1:{port}/").status_code == 200, 20)
+        process = psutil.Process(server.pid)
+
+        before = cpu_seconds(process)
+        sent_bytes, events = asyncio.run(stream_sensors(port, args.sensors, args.hz, args.batch, args.seconds))
+        cpu = cpu_seconds(process) - before
+        total = args.sensors * args.hz * args.seconds
+        print(f"websocket: {args.sensors} sensors x {args.hz} Hz, {args.batch}/frame -> {total:,.0f} readings, "
+              f"{sent_bytes / total:.1f} bytes/reading, server CPU {cpu / args.seconds:.1%} "
+              f"({cpu / total * 1e6:.0f} us/reading), {events} selection events")
+
+        before = cpu_seconds(process)
+        sent, sent_bytes, elapsed = asyncio.run(post_readings(port, args.hz, args.seconds))
+        cpu = cpu_seconds(process) - before
+        print(f"POST/reading: 1 sensor, {sent / elapsed:.0f} readings/s achieved of {args.hz} Hz, "
+              f"{sent_bytes / sent:.1f} body bytes/reading (+ headers), server CPU {cpu / elapsed:.1%} "
+              f"({cpu / sent * 1e6:.0f} us/reading)")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# server/benchmarks/bench_command_fanout.py
+"""
+Command fan-out to a simulated fleet.
+
+Starts the server (uvicorn subprocess) and --clients simulated clients: most
+keep a /ws session, --poll-fraction of them have none and long-poll
+GET /commands/poll instead. Every client acks at once, except --lossy of the
+WebSocket clients, which ignore the first delivery of each command so it is
+only acked after the server redelivers it (--ack-timeout). Each round sends one
+command to the whole fleet through POST /commands/fanout and waits for every
+ack. Reports the time until the last ack, per-client ack latency split by
+delivery path, and the dispatcher's redelivery counters.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_command_fanout --clients 1000 --rounds 10 --poll-fraction 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from .bench_color_ingest import start_server
+from .bench_failover import free_port, percentile, wait_until
+from .bench_heartbeat_batch import write_clients_file
+
+
+def headers_for(index: int) -> dict:
+    return {"X-Client-ID": f"bench_{index}", "X-Client-Secret": f"secret_{index}"}
+
+
+async def session_client(port: int, index: int, lossy: bool, ready: asyncio.Event, counter: list) -> None:
+    import websockets
+
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws", open_timeout=30) as ws:
+        await ws.send(json.dumps({"type": "auth", "client_id": f"bench_{index}", "secret": f"secret_{index}"}))
+        await ws.recv()  # welcome
+        counter[0] += 1
+        if counter[0] == counter[1]:
+            ready.set()
+        async for message in ws:
+            frame = json.loads(message)
+            if frame.get("type") != "command" or (lossy and frame["attempt"] == 1):
+                continue
+            await ws.send(json.dumps({"type": "ack", "command_id": frame["command_id"], "ok": True}))
+
+
+async def polling_client(port: int, index: int) -> None:
+    # Raw HTTP/1.1 on one keep-alive connection: an httpx pool with 100 waiting
+    # polls costs the benchmark process more CPU than the server spends on them
+    head = "".join(f"{name}: {value}\r\n" for name, value in headers_for(index).items())
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+    async def request(method: str, target: str, body: bytes = b"") -> dict:
+        writer.write(f"{method} {target} HTTP/1.1\r\nHost: 127.0.0.1\r\n{head}Content-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        response = await reader.readuntil(b"\r\n\r\n")
+        length = next(int(line[15:]) for line in response.split(b"\r\n") if line[:15].lower() == b"content-length:")
+        return json.loads(await reader.readexactly(length))
+
+    try:
+        while True:
+            frames = (await request("GET", "/commands/poll?wait=20"))["commands"]
+            if frames:
+                acks = [{"command_id": frame["command_id"], "ok": True} for frame in frames]
+                await request("POST", "/commands/ack", json.dumps({"acks": acks}).encode())
+    finally:
+        writer.close()
+
+
+async def run(port: int, args) -> None:
+    polling = int(args.clients * args.poll_fraction)
+    sessions = args.clients - polling
+    lossy = int(sessions * args.lossy)
+    ready = asyncio.Event()
+    counter = [0, sessions]
+    tasks = []
+    for start in range(0, sessions, 100):  # Connect in waves, as a fleet coming up would
+        tasks += [asyncio.create_task(session_client(port, i, i < lossy, ready, counter))
+                  for i in range(start, min(start + 100, sessions))]
+        await asyncio.sleep(0.2)
+    await asyncio.wait_for(ready.wait(), 60)
+
+    tasks += [asyncio.create_task(polling_client(port, i)) for i in range(sessions, args.clients)]
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as http:
+        await asyncio.sleep(1)  # Let every poll reach the server
+
+        targets = [f"bench_{i}" for i in range(args.clients)]
+        caller, completion, summary = [], [], None
+        for round_ in range(args.rounds):
+            start = time.perf_counter()
+            summary = (await http.post("/commands/fanout", headers=headers_for(0),
+                                       json={"clients": targets, "action": "ping", "args": {"round": round_},
+                                             "wait": 30})).json()
+            caller.append(time.perf_counter() - start)
+            assert summary["complete"] and summary["states"] == {"acked": args.clients}, summary
+            completion.append(summary["completion_ms"] / 1000)
+        stats = (await http.get("/commands", headers=headers_for(0))).json()
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    measured = completion[1:] or completion  # The first round warms up connections and code paths
+    print(f"{args.rounds} fan-outs to {args.clients} clients ({sessions} WebSocket, {lossy} of them lossy, "
+          f"{polling} long-poll; ack timeout {args.ack_timeout}s):")
+    print(f"  last ack      p50={percentile(measured, 0.5) * 1000:.1f} ms p99={percentile(measured, 0.99) * 1000:.1f} ms "
+          f"(first round {completion[0] * 1000:.1f} ms)")
+    print(f"  caller-side   p50={percentile(caller[1:] or caller, 0.5) * 1000:.1f} ms")
+    print(f"  per-client    {stats['ack_latency']}")
+    for via, latency in sorted(summary["ack_latency_by_path"].items()):
+        print(f"  last round    {via:<9} {latency}")
+    print(f"  last round    {summary['redelivered']} commands redelivered")
+    print(f"  counters      delivered={stats['delivered']} redelivered={stats['redelivered']} "
+          f"duplicate_acks={stats['duplicate_acks']} acked={stats['acked']} expired={stats['expired']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--poll-fraction", type=float, default=0.1)
+    parser.add_argument("--lossy", type=float, default=0.0, help="Share of WebSocket clients dropping first deliveries")
+    parser.add_argument("--ack-timeout", type=float, default=1.0)
+    args = parser.parse_args()
+
+    os.environ["COMMAND_ACK_TIMEOUT"] = str(args.ack_timeout)
+    port = free_port()
+    server = start_server(port, write_clients_file(args.clients))
+    try:
+        wait_until(lambda: httpx.get(f"http://127.0.0.1:{port}/").status_code == 200, 20)
+        asyncio.run(run(port, args))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
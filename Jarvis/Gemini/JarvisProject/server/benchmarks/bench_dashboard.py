@@ -0,0 +1,89 @@
+# server/benchmarks/bench_dashboard.py
+"""
+Dashboard aggregates: update cost on the heartbeat path against per-request recomputation.
+
+A registry with --clients entries (mixed OS and heartbeat intervals) receives
+heartbeats with and without DashboardAggregates attached as a sink; then the
+summary and top-N views are read from the aggregates and, for comparison,
+recomputed from a full registry walk the way a /status-based dashboard would.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_dashboard --clients 10000 --reads 200
+"""
+
+import argparse
+import time
+from collections import Counter
+
+from .bench_failover import percentile
+
+
+class NullSink:
+    """Stands in for the sinks a server always has (replication log), so both runs build change records."""
+
+    def put(self, client_id, record):
+        pass
+
+    def delete(self, client_id):
+        pass
+
+
+def recompute(registry, limit: int, intervals: dict) -> dict:
+    """What every request would cost without the aggregates."""
+    now = time.monotonic()
+    by_status, by_os, ages = Counter(), Counter(), Counter()
+    for entry in registry:
+        by_status[entry.status] += 1
+        by_os[(entry.details or {}).get("os", "unknown")] += 1
+        ages[min(int(now - entry.last_seen) // 30, 10)] += 1
+    slowest = sorted(intervals.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return {"by_status": by_status, "by_os": by_os, "ages": ages, "slowest": slowest}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+
+    from server.app.core.registry import ClientRegistry
+    from server.app.services.dashboard import DashboardAggregates
+
+    operating_systems = ["Windows", "Linux", "Darwin"]
+    ids = [f"client_{i}" for i in range(args.clients)]
+    timings = {}
+    for label, aggregates in (("without aggregates", None), ("with aggregates", DashboardAggregates())):
+        registry = ClientRegistry()
+        registry.attach_sink(NullSink())
+        if aggregates is not None:
+            registry.attach_sink(aggregates)
+        base = time.monotonic()
+        for i, client_id in enumerate(ids):
+            registry.register(client_id, now=base)
+            registry.update(client_id, details={"os": operating_systems[i % 3]})
+        start = time.perf_counter()
+        for round_ in range(1, args.rounds + 1):
+            for i, client_id in enumerate(ids):
+                # Client i heartbeats every 5 + i % 60 seconds (simulated clock)
+                registry.touch(client_id, now=base + round_ * (5 + i % 60))
+        timings[label] = (time.perf_counter() - start) / (args.rounds * args.clients)
+        print(f"touch() {label}: {timings[label] * 1e6:.2f} us per heartbeat")
+    print(f"aggregate upkeep: {(timings['with aggregates'] - timings['without aggregates']) * 1e6:.2f} us "
+          f"per heartbeat")
+
+    intervals = {client_id: 5 + i % 60 for i, client_id in enumerate(ids)}
+    for label, read in (("summary (aggregates)", aggregates.summary),
+                        ("top-10 (aggregates)", lambda: aggregates.slowest(10)),
+                        ("full recompute", lambda: recompute(registry, 10, intervals))):
+        samples = []
+        for _ in range(args.reads):
+            start = time.perf_counter()
+            read()
+            samples.append(time.perf_counter() - start)
+        print(f"{label:<22} p50={percentile(samples, 0.5) * 1e3:.3f} ms p99={percentile(samples, 0.99) * 1e3:.3f} ms")
+    print("slowest:", [row["client_id"] for row in aggregates.slowest(3)], aggregates.summary()["by_os"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# server/benchmarks/bench_executor.py
+"""
+Heartbeat latency under CPU-heavy load, with and without the execution pool.
+
+Runs the app in-process (httpx ASGI transport) and keeps a steady stream of
+/heartbeat requests going while CPU-bound jobs (PBKDF2, native code that
+releases the GIL, like the auth_hash jobs) are submitted either directly on
+the event loop ("inline") or through execution_pool.run() ("pool"). Reports heartbeat
+latency and event-loop lag for both, and how many jobs were turned away
+with Overloaded (429) once the job type's queue was full.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_executor --seconds 5 --job-ms 30
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import time
+
+from .bench_heartbeat_batch import write_clients_file
+
+
+def cpu_job(iterations: int) -> bytes:
+    """CPU work in native code that releases the GIL, as a PBKDF2 secret check does."""
+    return hashlib.pbkdf2_hmac("sha256", b"secret", b"salt", iterations)
+
+
+def calibrate(job_ms: float) -> int:
+    start = time.perf_counter()
+    cpu_job(100_000)
+    return max(1, int(100_000 * job_ms / 1000 / (time.perf_counter() - start)))
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def scenario(mode: str, seconds: float, iterations: int, job_rate: float) -> None:
+    import httpx
+    from server.app.core.executor import ExecutionPool, JobLimits, Overloaded
+    from server.app.core.loop_monitor import LoopLagMonitor
+    from server.app.main import app
+
+    pool = ExecutionPool()
+    pool.configure("cpu_job", JobLimits(max(1, (os.cpu_count() or 2) - 1), 32))
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor_task = asyncio.create_task(monitor.run())
+
+    latencies, rejected, completed = [], 0, 0
+    deadline = time.perf_counter() + seconds
+
+    async def heartbeats(client):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            r = await client.post("/heartbeat", headers={"X-Client-ID": "bench_0", "X-Client-Secret": "secret_0"})
+            assert r.status_code == 200
+            latencies.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.01)
+
+    async def one_job():
+        nonlocal rejected, completed
+        try:
+            if mode == "inline":
+                cpu_job(iterations)
+            else:
+                await pool.run("cpu_job", cpu_job, iterations)
+            completed += 1
+        except Overloaded:
+            rejected += 1
+
+    async def jobs():
+        pending = set()
+        while time.perf_counter() < deadline:
+            task = asyncio.create_task(one_job())
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            await asyncio.sleep(1 / job_rate)
+        await asyncio.gather(*pending)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await asyncio.gather(heartbeats(client), jobs())
+    monitor_task.cancel()
+    pool.shutdown()
+
+    lag = monitor.stats()
+    print(f"{mode:>6}: heartbeats={len(latencies)} p50={percentile(latencies, 0.5):.1f} ms "
+          f"p99={percentile(latencies, 0.99):.1f} ms | loop lag p99={lag['p99_ms']} ms max={lag['max_ms']} ms "
+          f"| jobs done={completed} rejected(429)={rejected}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--job-ms", type=float, default=30.0, help="CPU time per job")
+    parser.add_argument("--job-rate", type=float, default=100.0, help="Jobs submitted per second")
+    args = parser.parse_args()
+
+    os.environ["JARVIS_CLIENTS_FILE"] = write_clients_file(1)
+    iterations = calibrate(args.job_ms)
+    print(f"job={args.job_ms} ms CPU, {args.job_rate}/s submitted for {args.seconds}s")
+    for mode in ("inline", "pool"):
+        asyncio.run(scenario(mode, args.seconds, iterations, args.job_rate))
+
+
+if __name__ == "__main__":
+    main()
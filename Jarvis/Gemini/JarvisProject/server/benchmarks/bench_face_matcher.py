@@ -0,0 +1,100 @@
+# server/benchmarks/bench_face_matcher.py
+"""
+Face matching throughput as the gallery grows.
+
+Enrolls random unit-length 128-d embeddings into a temporary gallery and reports
+matches per second for: a per-profile Python loop (the naive approach), one
+vectorized query at a time, a stacked batch, and concurrent identify() calls
+going through BatchMatcher. Also reports how long mapping the gallery takes at
+startup.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_face_matcher --sizes 100 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+import numpy as np
+
+from ml.facial_recognition.gallery import EMBEDDING_DIM, FaceGallery
+from ml.facial_recognition.matcher import BatchMatcher
+
+
+def random_embeddings(rng, count: int) -> np.ndarray:
+    rows = rng.standard_normal((count, EMBEDDING_DIM)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def rate(fn, matches: int, min_seconds: float = 0.5) -> float:
+    """Calls fn() until min_seconds have passed; returns matches per second."""
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return calls * matches / elapsed
+
+
+def loop_identify(gallery: FaceGallery, query: np.ndarray):
+    best, best_distance = None, float("inf")
+    for label, row in zip(gallery.labels, gallery._matrix):
+        distance = float(np.linalg.norm(row - query))
+        if distance < best_distance:
+            best, best_distance = label, distance
+    return best
+
+
+async def matcher_rate(gallery: FaceGallery, queries: np.ndarray, concurrency: int) -> float:
+    matcher = BatchMatcher(gallery, max_batch=concurrency)  # Close each window as soon as it is full
+    runner = asyncio.create_task(matcher.run())
+    start = time.perf_counter()
+    done = 0
+    while time.perf_counter() - start < 0.5:
+        await asyncio.gather(*(matcher.identify(q) for q in queries[:concurrency]))
+        done += concurrency
+    elapsed = time.perf_counter() - start
+    runner.cancel()
+    return done / elapsed
+
+
+def run(sizes, batch: int, loop_limit: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    queries = random_embeddings(rng, batch)
+    print(f"{'gallery':>8} {'load ms':>8} {'loop/s':>10} {'single/s':>10} {'batch/s':>11} {'matcher/s':>11}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            enrolled = random_embeddings(rng, size)
+            FaceGallery(data_dir).enroll_many((f"person_{i}", enrolled[i]) for i in range(size))
+
+            start = time.perf_counter()
+            gallery = FaceGallery(data_dir)
+            load_ms = (time.perf_counter() - start) * 1000
+
+            # A slightly perturbed enrolled face must come back as that person
+            probe = enrolled[size // 2] + 0.01 * random_embeddings(rng, 1)[0]
+            assert gallery.identify(probe)[0].label == f"person_{size // 2}"
+
+            loop = rate(lambda: loop_identify(gallery, queries[0]), 1) if size <= loop_limit else float("nan")
+            single = rate(lambda: gallery.identify(queries[0]), 1)
+            batched = rate(lambda: gallery.identify(queries), batch)
+            matcher = asyncio.run(matcher_rate(gallery, queries, batch))
+            print(f"{size:>8} {load_ms:>8.1f} {loop:>10.0f} {single:>10.0f} {batched:>11.0f} {matcher:>11.0f}")
+            del gallery
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--batch", type=int, default=64, help="Frames identified together")
+    parser.add_argument("--loop-limit", type=int, default=10000, help="Skip the Python loop above this size")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    run(args.sizes, args.batch, args.loop_limit, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# server/benchmarks/bench_failover.py
+"""
+Local two-process failover test.
+
+Starts a leader and a standby server (uvicorn subprocesses on free ports),
+registers clients on the leader through /heartbeat/batch and measures how long
+each batch takes to show up on the standby (replication lag). Then kills the
+leader with SIGKILL and measures how long it takes until the standby reports
+itself leader and accepts a client's /register (failover time).
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_failover --clients 2000 --rounds 50 --failover-timeout 2
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from .bench_heartbeat_batch import write_clients_file
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def start_server(port: int, role: str, peer_port: int, clients_file: str, timeout: float) -> subprocess.Popen:
+    env = dict(os.environ, JARVIS_CLIENTS_FILE=clients_file, FAILOVER_ROLE=role,
+               FAILOVER_PEER_URL=f"http://127.0.0.1:{peer_port}", REPLICATION_SECRET="bench_secret",
+               FAILOVER_TIMEOUT=str(timeout), STATE_BACKEND="memory", PYTHONPATH=os.getcwd())
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", "server.app.main:app", "--host", "127.0.0.1",
+                             "--port", str(port), "--log-level", "warning"], env=env)
+
+
+def wait_until(predicate, timeout: float, interval: float = 0.01) -> float:
+    """Polls predicate() until it is true; returns the seconds it took."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            if predicate():
+                return time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        time.sleep(interval)
+    raise TimeoutError("condition not reached")
+
+
+def run(count: int, rounds: int, failover_timeout: float) -> None:
+    clients_file = write_clients_file(count)
+    leader_port, standby_port = free_port(), free_port()
+    leader = start_server(leader_port, "leader", standby_port, clients_file, failover_timeout)
+    standby = None
+    http = httpx.Client(timeout=5)
+    leader_url, standby_url = f"http://127.0.0.1:{leader_port}", f"http://127.0.0.1:{standby_port}"
+    try:
+        wait_until(lambda: http.get(f"{leader_url}/").status_code == 200, 20)
+        standby = start_server(standby_port, "standby", leader_port, clients_file, failover_timeout)
+        wait_until(lambda: http.get(f"{standby_url}/failover/status").json()["leader_epoch"] is not None, 20)
+
+        def leader_status():
+            return http.get(f"{leader_url}/failover/status").json()
+
+        def standby_status():
+            return http.get(f"{standby_url}/failover/status").json()
+
+        # --- Replication lag ---
+        relay_headers = {"X-Client-ID": "bench_relay", "X-Client-Secret": "relay_secret"}
+        ids = [f"bench_{i}" for i in range(count)]
+        batch = max(1, count // rounds)
+        lags, reported = [], []
+        for r in range(rounds):
+            chunk = ids[(r * batch) % count:(r * batch) % count + batch]
+            assert http.post(f"{leader_url}/heartbeat/batch", json={"heartbeats": chunk},
+                             headers=relay_headers).status_code == 200
+            target = leader_status()["seq"]
+            lags.append(wait_until(lambda: standby_status()["applied_seq"] >= target, 10, 0.002) * 1000)
+            reported.append(standby_status()["lag_ms"] or 0.0)
+        replicated = standby_status()["clients"]
+        assert http.get(f"{standby_url}/status").status_code == 503, "standby must refuse client traffic"
+
+        # --- Failover ---
+        leader.send_signal(signal.SIGKILL)
+        leader.wait()
+        killed = time.perf_counter()
+        promoted = wait_until(lambda: standby_status()["role"] == "leader", failover_timeout * 5 + 10)
+        client_headers = {"X-Client-ID": "bench_0", "X-Client-Secret": "secret_0"}
+        wait_until(lambda: http.post(f"{standby_url}/register", headers=client_headers).status_code == 200, 10)
+        serving = time.perf_counter() - killed
+
+        print(f"clients={count} rounds={rounds} batch={batch} failover_timeout={failover_timeout}s")
+        print(f"clients on standby:         {replicated}")
+        print(f"replication lag p50:        {percentile(lags, 0.50):.1f} ms (observed)")
+        print(f"replication lag p99:        {percentile(lags, 0.99):.1f} ms (observed)")
+        print(f"replication lag mean:       {sum(reported) / len(reported):.1f} ms (standby lag_ms)")
+        print(f"leader killed -> promoted:  {promoted * 1000:.0f} ms")
+        print(f"leader killed -> serving:   {serving * 1000:.0f} ms")
+        print(json.dumps({"status_after_failover": standby_status()}))
+    finally:
+        http.close()
+        for process in (leader, standby):
+            if process is not None and process.poll() is None:
+                process.terminate()
+                process.wait()
+        os.unlink(clients_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--failover-timeout", type=float, default=2.0)
+    args = parser.parse_args()
+    run(args.clients, args.rounds, args.failover_timeout)
+
+
+if __name__ == "__main__":
+    main()
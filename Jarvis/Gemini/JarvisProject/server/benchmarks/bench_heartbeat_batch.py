@@ -0,0 +1,89 @@
+# server/benchmarks/bench_heartbeat_batch.py
+"""
+Heartbeat throughput: N individual /heartbeat calls against one /heartbeat/batch
+call carrying the same N heartbeats (JSON and msgpack). Runs the app in-process
+through httpx's ASGI transport, so the numbers exclude network cost.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_heartbeat_batch --clients 1000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+
+def write_clients_file(count: int) -> str:
+    clients = {f"bench_{i}": {"secret": f"secret_{i}"} for i in range(count)}
+    clients["bench_relay"] = {"secret": "relay_secret", "relay_for": "*"}
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(clients, f)
+    return path
+
+
+async def run(count: int, rounds: int) -> None:
+    import httpx
+    from server.app.main import app
+
+    try:
+        import msgpack
+    except ImportError:
+        msgpack = None
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        relay_headers = {"X-Client-ID": "bench_relay", "X-Client-Secret": "relay_secret"}
+        ids = [f"bench_{i}" for i in range(count)]
+        # Warm up: register everyone so both paths hit existing entries
+        await client.post("/heartbeat/batch", json={"heartbeats": ids}, headers=relay_headers)
+
+        async def individual():
+            for i, client_id in enumerate(ids):
+                r = await client.post("/heartbeat", headers={"X-Client-ID": client_id,
+                                                             "X-Client-Secret": f"secret_{i}"})
+                assert r.status_code == 200
+
+        async def batch_json():
+            r = await client.post("/heartbeat/batch", json={"heartbeats": ids}, headers=relay_headers)
+            assert r.status_code == 200 and r.json()["accepted"] == count
+
+        async def batch_msgpack():
+            body = msgpack.packb({"heartbeats": ids})
+            r = await client.post("/heartbeat/batch", content=body, headers={
+                **relay_headers, "Content-Type": "application/msgpack", "Accept": "application/msgpack"})
+            assert r.status_code == 200
+
+        cases = {"individual /heartbeat": individual, "batch (JSON)": batch_json}
+        if msgpack is not None:
+            cases["batch (msgpack)"] = batch_msgpack
+
+        print(f"{count} heartbeats per round, {rounds} rounds")
+        print(f"{'mode':<24}{'seconds/round':>14}{'heartbeats/s':>16}")
+        for name, case in cases.items():
+            start = time.perf_counter()
+            for _ in range(rounds):
+                await case()
+            elapsed = (time.perf_counter() - start) / rounds
+            print(f"{name:<24}{elapsed:>14.4f}{count / elapsed:>16.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    path = write_clients_file(args.clients)
+    os.environ["JARVIS_CLIENTS_FILE"] = path  # Must be set before the app is imported
+    try:
+        asyncio.run(run(args.clients, args.rounds))
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# server/benchmarks/bench_liveness.py
+"""
+Liveness detector: accuracy on simulated heartbeat patterns and cost per tick.
+
+1. Accuracy (simulated clock): --clients clients heartbeat with one of three
+   rhythms, steady 5 s (+-10%), adaptive (5 s growing by half per beat up to
+   45 s, like an idle agent, then back to busy) and jittery 30 s (+-40%).
+   --dead of them stop at a random moment. Reports false suspect/offline marks
+   among the living and how long after the last heartbeat the dead were marked
+   offline, against the fixed CLIENT_EXPIRY_SECONDS it took before.
+2. Cost: with --fleet clients tracked, the price of a heartbeat (put) and of a
+   tick when only a few clients come due, next to a tick that evaluates phi
+   for the whole fleet.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_liveness --clients 2000 --minutes 30 --fleet 100000
+"""
+
+import argparse
+import heapq
+import random
+import time
+
+from server.app.services.liveness import OFFLINE, SUSPECT, LivenessDetector
+
+from .bench_failover import percentile
+
+PROFILES = ("steady", "adaptive", "jittery")
+
+
+def next_interval(profile: str, state: dict, rng: random.Random) -> float:
+    if profile == "steady":
+        return 5 * rng.uniform(0.9, 1.1)
+    if profile == "jittery":
+        return 30 * rng.uniform(0.6, 1.4)
+    # Adaptive agent: idle stretches the interval by half per beat, activity resets it
+    if rng.random() < 0.02:
+        state["interval"] = 5.0
+    else:
+        state["interval"] = min(45.0, state.get("interval", 5.0) * 1.5)
+    return state["interval"]
+
+
+def accuracy(clients: int, dead: int, minutes: float, expiry: float, seed: int = 1) -> None:
+    rng = random.Random(seed)
+    detector = LivenessDetector()
+    start = time.time()
+    profiles = {f"c{i}": PROFILES[i % len(PROFILES)] for i in range(clients)}
+    states = {client_id: {} for client_id in profiles}
+    end = start + minutes * 60
+    dies_at = {client_id: rng.uniform(start + 300, end - 600) for client_id in rng.sample(list(profiles), dead)}
+    last_beat = {}
+    marked = {}  # client_id -> [(state, time)]
+    detector.add_listener(lambda event: marked.setdefault(event["client_id"], []).append((event["to"], event["at"])))
+
+    beats = [(start + rng.uniform(0, 5), client_id) for client_id in profiles]
+    heapq.heapify(beats)
+    now = start
+    while now < end:
+        now += detector.granularity
+        while beats and beats[0][0] <= now:
+            at, client_id = heapq.heappop(beats)
+            if at >= dies_at.get(client_id, end):
+                continue
+            detector.put(client_id, {"last_seen": at})
+            last_beat[client_id] = at
+            heapq.heappush(beats, (at + next_interval(profiles[client_id], states[client_id], rng), client_id))
+        detector.tick(now)
+
+    print(f"accuracy: {clients} clients over {minutes:g} simulated minutes, {dead} stop heartbeating")
+    for profile in PROFILES:
+        living = [c for c, p in profiles.items() if p == profile and c not in dies_at]
+        false_suspect = sum(1 for c in living for state, _ in marked.get(c, ()) if state == SUSPECT)
+        false_offline = sum(1 for c in living for state, _ in marked.get(c, ()) if state == OFFLINE)
+        detection = [at - last_beat[c] for c in dies_at if profiles[c] == profile
+                     for state, at in marked.get(c, ()) if state == OFFLINE]
+        missed = sum(1 for c in dies_at if profiles[c] == profile) - len(detection)
+        print(f"  {profile:<9} false suspect={false_suspect:<4} false offline={false_offline:<4} "
+              f"offline after p50={percentile(detection, 0.5):.0f}s p99={percentile(detection, 0.99):.0f}s "
+              f"(fixed expiry: {expiry:g}s){f', {missed} not detected' if missed else ''}")
+
+
+def cost(fleet: int, ticks: int, silent: int = 10, seed: int = 2) -> None:
+    rng = random.Random(seed)
+    detector = LivenessDetector()
+    now = time.time()
+    ids = [f"c{i}" for i in range(fleet)]
+    # History: ``silent`` clients beat every ~5 s and are about to go quiet, the rest every ~60 s
+    for index, client_id in enumerate(ids):
+        interval = 5 if index < silent else 60
+        for beat in range(8):
+            detector.put(client_id, {"last_seen": now - 8 * interval + beat * interval + rng.uniform(-1, 1)})
+
+    samples = []
+    for round_ in range(3):
+        started = time.perf_counter()
+        for client_id in ids[silent:]:
+            detector.put(client_id, {"last_seen": now + round_ * 6 + rng.uniform(-1, 1)})
+        samples.append((time.perf_counter() - started) / (fleet - silent))
+    print(f"cost with {fleet:,} clients tracked:")
+    print(f"  heartbeat (put)       {min(samples) * 1e6:.2f} us")
+
+    detector.tick(now)  # Catch the wheel up
+    due, tick_times = 0, []
+    for step in range(1, ticks + 1):
+        started = time.perf_counter()
+        due += len(detector.tick(now + step * detector.granularity))
+        tick_times.append(time.perf_counter() - started)
+    print(f"  tick (wheel)          p50={percentile(tick_times, 0.5) * 1e3:.3f} ms "
+          f"max={max(tick_times) * 1e3:.3f} ms ({due} transitions of {silent} silent clients in {ticks} ticks)")
+
+    started = time.perf_counter()
+    for client_id in ids:
+        detector.phi(client_id, now + 30)
+    print(f"  tick (phi per client) {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--dead", type=int, default=300)
+    parser.add_argument("--minutes", type=float, default=30)
+    parser.add_argument("--expiry", type=float, default=300, help="Fixed expiry to compare with (seconds)")
+    parser.add_argument("--fleet", type=int, default=100_000)
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args()
+
+    accuracy(args.clients, args.dead, args.minutes, args.expiry)
+    cost(args.fleet, args.ticks)
+
+
+if __name__ == "__main__":
+    main()
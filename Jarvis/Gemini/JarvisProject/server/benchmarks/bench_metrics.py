@@ -0,0 +1,126 @@
+# server/benchmarks/bench_metrics.py
+"""
+Cost of the instrumentation on the request path.
+
+1. Middleware: a one-route Starlette app is called directly through ASGI
+   (no sockets, no HTTP parsing) with and without MetricsMiddleware; the
+   difference per request is what the latency histogram costs every request.
+2. Primitives: Counter.inc, Histogram.observe and a structured log call that
+   is written (queued for the listener thread), rate-limited or below level.
+3. Scrape: rendering /metrics with --clients entries in the registry.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_metrics --requests 50000 --clients 10000
+"""
+
+import argparse
+import asyncio
+import importlib
+import logging
+import os
+import sys
+import time
+
+from .bench_failover import percentile
+
+
+def build_app(instrumented: bool):
+    from starlette.applications import Starlette
+    from starlette.middleware import Middleware
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Route
+
+    from server.app.core.metrics import MetricsMiddleware
+
+    async def heartbeat(request):
+        return PlainTextResponse("ok")
+
+    middleware = [Middleware(MetricsMiddleware)] if instrumented else []
+    return Starlette(routes=[Route("/clients/{client_id}/heartbeat", heartbeat, methods=["POST"])],
+                     middleware=middleware)
+
+
+async def drive(app, requests: int) -> list:
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": "/clients/bench_1/heartbeat", "raw_path": b"/clients/bench_1/heartbeat",
+             "query_string": b"", "root_path": "", "headers": [], "client": ("127.0.0.1", 1),
+             "server": ("127.0.0.1", 8000)}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await app(dict(scope), receive, send)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def per_call(fn, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--clients", type=int, default=10_000)
+    args = parser.parse_args()
+
+    results = {}
+    for _ in range(2):  # Second pass is the one reported; the first warms imports and routing
+        for instrumented in (False, True):
+            results[instrumented] = asyncio.run(drive(build_app(instrumented), args.requests))
+    for instrumented, label in ((False, "plain"), (True, "instrumented")):
+        timings = results[instrumented]
+        print(f"{label:>12}: mean={sum(timings) / len(timings) * 1e6:.1f} us "
+              f"p50={percentile(timings, 0.5) * 1e6:.1f} us p99={percentile(timings, 0.99) * 1e6:.1f} us")
+    overhead = (sum(results[True]) - sum(results[False])) / args.requests * 1e6
+    median = (percentile(results[True], 0.5) - percentile(results[False], 0.5)) * 1e6
+    print(f"middleware overhead: {overhead:.2f} us per request (mean), {median:.2f} us (median)")
+
+    from server.app.core.logs import configure_logging, get_logger, rate_limit_filter, shutdown_logging
+    from server.app.core.metrics import AUTH_FAILURES, HTTP_REQUEST_SECONDS
+
+    count = 200_000
+    labels = ("POST", "/heartbeat", "200")
+    print(f"Counter.inc:        {per_call(lambda: AUTH_FAILURES.inc(('bad_secret',)), count):.2f} us")
+    print(f"Histogram.observe:  {per_call(lambda: HTTP_REQUEST_SECONDS.observe(0.0012, labels), count):.2f} us")
+
+    # Log lines go to /dev/null so the terminal is not flooded; the listener thread does the writing
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    configure_logging()
+    log = get_logger("server.bench")
+    logging.getLogger("server").setLevel(logging.INFO)
+    rate_limit_filter.rate, rate_limit_filter.burst = 1e9, 10**9
+    written = per_call(lambda: log.info("client_registered", client_id="bench_1"), 20_000)
+    rate_limit_filter.rate, rate_limit_filter.burst = 0.0, 0
+    rate_limit_filter._buckets.clear()
+    suppressed = per_call(lambda: log.info("client_registered", client_id="bench_1"), count)
+    disabled = per_call(lambda: log.debug("client_registered", client_id="bench_1"), count)
+    shutdown_logging()
+    sys.stdout = stdout
+    print(f"log call written:   {written:.2f} us (queued; formatted on the listener thread)")
+    print(f"log call limited:   {suppressed:.2f} us ({rate_limit_filter.suppressed} suppressed)")
+    print(f"log call disabled:  {disabled:.2f} us")
+
+    importlib.import_module("server.app.api.metrics_router")  # Registers the scrape-time gauges
+    from server.app.core.metrics import metrics
+    from server.app.core.registry import client_registry
+
+    for i in range(args.clients):
+        client_registry.register(f"bench_{i}")
+    start = time.perf_counter()
+    body = metrics.render()
+    print(f"/metrics render with {args.clients} clients: {(time.perf_counter() - start) * 1000:.2f} ms, "
+          f"{len(body)} bytes")
+
+
+if __name__ == "__main__":
+    main()
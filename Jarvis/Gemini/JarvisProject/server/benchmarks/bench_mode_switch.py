@@ -0,0 +1,98 @@
+# server/benchmarks/bench_mode_switch.py
+"""
+Fleet-wide operation-mode switches.
+
+Starts the server (uvicorn subprocess), connects N simulated clients to /ws
+(half Windows, half Linux) that ack every apply_mode command after --apply-ms
+(standing in for stopping and starting processes), then switches modes
+--switches times through POST /modes/{mode}. Reports switch latency as seen by
+the caller, the server's own percentiles and how often a plan came from cache.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_mode_switch --clients 50 --switches 30 --apply-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from .bench_color_ingest import start_server
+from .bench_failover import free_port, percentile, wait_until
+from .bench_heartbeat_batch import write_clients_file
+
+MODES = ["gaming", "study", "programming"]
+
+
+async def fake_client(port: int, index: int, apply_ms: float, ready: asyncio.Event, counter: list) -> None:
+    import websockets
+
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws") as ws:
+        await ws.send(json.dumps({"type": "auth", "client_id": f"bench_{index}", "secret": f"secret_{index}"}))
+        await ws.recv()  # welcome
+        await ws.send(json.dumps({"type": "status", "status": "online",
+                                  "details": {"os": "Windows" if index % 2 else "Linux"}}))
+        counter[0] += 1
+        if counter[0] == counter[1]:
+            ready.set()
+        async for message in ws:
+            frame = json.loads(message)
+            if frame.get("type") == "command" and frame.get("action") == "apply_mode":
+                await asyncio.sleep(apply_ms / 1000)
+                await ws.send(json.dumps({"type": "ack", "command_id": frame["command_id"], "ok": True,
+                                          "result": {"mode": frame["mode"], "errors": []}}))
+
+
+async def run(port: int, clients: int, switches: int, apply_ms: float) -> None:
+    ready = asyncio.Event()
+    counter = [0, clients]
+    tasks = [asyncio.create_task(fake_client(port, i, apply_ms, ready, counter)) for i in range(clients)]
+    await asyncio.wait_for(ready.wait(), 30)
+    await asyncio.sleep(0.2)  # Let the status frames land
+
+    headers = {"X-Client-ID": "bench_0", "X-Client-Secret": "secret_0"}
+    latencies = []
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", headers=headers, timeout=30) as http:
+        for i in range(switches):
+            start = time.perf_counter()
+            report = (await http.post(f"/modes/{MODES[i % len(MODES)]}")).json()
+            latencies.append(time.perf_counter() - start)
+            assert report["complete"], report["failed"]
+            if i == 0:
+                print(f"first switch: {report['affected']}/{report['clients']} clients affected, "
+                      f"{latencies[0] * 1000:.1f} ms (plans compiled)")
+        stats = (await http.get("/modes")).json()
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"{switches} switches x {clients} clients (client apply {apply_ms} ms):")
+    print(f"  caller-side   p50={percentile(latencies, 0.5) * 1000:.1f} ms "
+          f"p99={percentile(latencies, 0.99) * 1000:.1f} ms max={max(latencies) * 1000:.1f} ms")
+    print(f"  server switch {stats['switch_latency']}")
+    print(f"  client acks   {stats['client_ack_latency']}")
+    print(f"  plan cache    {stats['plan_cache']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--switches", type=int, default=30)
+    parser.add_argument("--apply-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server(port, write_clients_file(args.clients))
+    try:
+        wait_until(lambda: httpx.get(f"http://127.0.0.1:{port}/").status_code == 200, 20)
+        asyncio.run(run(port, args.clients, args.switches, args.apply_ms))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# server/benchmarks/bench_model_registry.py
+"""
+Model registry behaviour and server startup time.
+
+1. Starts the server (uvicorn subprocess) and times how long until "/" answers.
+2. Registers synthetic models (NumPy buffers of a given size that take a while
+   to "load"), requests them with a skewed (Zipf-like) access pattern under a
+   memory budget smaller than all of them together, and reports hit rate,
+   evictions, load times and the longest event-loop stall seen meanwhile,
+   which stays small because loading happens off the loop.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_model_registry --models 8 --model-mb 64 --budget-mb 256
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from server.app.services.model_registry import ModelRegistry
+
+from .bench_failover import free_port
+
+
+def startup_time() -> float:
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "server.app.main:app", "--host", "127.0.0.1",
+                                "--port", str(port), "--log-level", "warning"],
+                               env=dict(os.environ, PYTHONPATH=os.getcwd()), stdout=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def synthetic_loader(size_mb: int, load_seconds: float):
+    def load(path):
+        time.sleep(load_seconds / 2)                      # I/O part
+        model = np.ones(size_mb * 2**20 // 8)             # Touches every page, so RSS grows
+        deadline = time.perf_counter() + load_seconds / 2  # CPU part (keeps the GIL briefly)
+        while time.perf_counter() < deadline:
+            model[:1024] += 1
+        return model
+    return load
+
+
+async def workload(registry: ModelRegistry, names, requests: int, seed: int):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(names))]
+    stalls = []
+
+    async def watch_loop():
+        while True:
+            before = time.perf_counter()
+            await asyncio.sleep(0.005)
+            stalls.append(time.perf_counter() - before - 0.005)
+
+    watcher = asyncio.create_task(watch_loop())
+    waits = []
+    for _ in range(requests):
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        await registry.get(name)
+        waits.append(time.perf_counter() - start)
+        await asyncio.sleep(0.002)
+    watcher.cancel()
+    return waits, stalls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=int, default=8)
+    parser.add_argument("--model-mb", type=int, default=64)
+    parser.add_argument("--budget-mb", type=int, default=256)
+    parser.add_argument("--load-seconds", type=float, default=0.3)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-startup", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_startup:
+        print(f"server start -> first '/' response: {startup_time() * 1000:.0f} ms")
+
+    registry = ModelRegistry(budget_bytes=args.budget_mb * 2**20)
+    names = [f"bench/model_{i}" for i in range(args.models)]
+    for name in names:
+        registry.register(name, synthetic_loader(args.model_mb, args.load_seconds))
+    waits, stalls = asyncio.run(workload(registry, names, args.requests, args.seed))
+    registry.close()
+
+    stats = registry.stats()
+    waits.sort()
+    print(f"models={args.models} x {args.model_mb} MB, budget={args.budget_mb} MB, requests={args.requests}")
+    print(f"hit rate:            {stats['hit_rate']:.1%}")
+    print(f"evictions:           {stats['evictions']}")
+    print(f"resident now:        {stats['resident_mb']} MB in {len(stats['loaded'])} models")
+    print(f"get() p50 / p99:     {waits[len(waits) // 2] * 1000:.2f} / {waits[int(0.99 * len(waits))] * 1000:.1f} ms")
+    print(f"max event-loop stall while loading: {max(stalls) * 1000:.1f} ms")
+    for name, model in stats["models"].items():
+        print(f"  {name}: {model['state']:8} loads={model['loads']} hit_rate={model['hit_rate']} "
+              f"load={model['load_seconds']}s resident={model['resident_mb']} MB")
+
+
+if __name__ == "__main__":
+    main()
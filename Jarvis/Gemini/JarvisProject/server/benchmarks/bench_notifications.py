@@ -0,0 +1,130 @@
+# server/benchmarks/bench_notifications.py
+"""
+Notification dispatcher: producer cost, burst coalescing and outbox durability.
+
+1. Producer cost: /heartbeat latency (in-process, httpx ASGI transport) with and
+   without the dispatcher attached to the registry, plus the cost of one notify().
+2. Burst: --burst clients go offline at once (a network blip). Counts how many
+   notifications reach a rate-limited FakeSink and how long the digest took.
+3. Durability: events are flushed to the outbox, the dispatcher is stopped
+   before delivering, and a new dispatcher on the same file delivers them.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_notifications --clients 500 --burst 200
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from .bench_failover import percentile
+from .bench_heartbeat_batch import write_clients_file
+
+
+async def heartbeat_latency(clients: int, rounds: int, dispatcher) -> list:
+    import httpx
+    from server.app.core.registry import client_registry
+    from server.app.main import app
+
+    if dispatcher is not None:
+        client_registry.attach_sink(dispatcher)
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(rounds):
+            for i in range(clients):
+                headers = {"X-Client-ID": f"bench_{i}", "X-Client-Secret": f"secret_{i}"}
+                start = time.perf_counter()
+                await client.post("/heartbeat", headers=headers)
+                latencies.append(time.perf_counter() - start)
+            # Flip everyone offline so the next round produces "back online" events
+            for i in range(clients):
+                client_registry.update(f"bench_{i}", status="disconnected")
+    if dispatcher is not None:
+        client_registry.detach_sink(dispatcher)
+    return latencies
+
+
+async def burst(count: int, path: str) -> None:
+    from server.app.services.notifications import FakeSink, NotificationDispatcher
+
+    sink = FakeSink(rate_per_minute=10, burst=5)
+    dispatcher = NotificationDispatcher([sink], path=path, window=1.0)
+    runner = asyncio.create_task(dispatcher.run())
+    await asyncio.sleep(0.1)
+    start = time.perf_counter()
+    for i in range(count):
+        dispatcher.put(f"node_{i}", {"status": "online"})
+    for i in range(count):
+        dispatcher.put(f"node_{i}", {"status": "disconnected"})
+        if i % 50 == 49:
+            await asyncio.sleep(0.05)  # The blip is spread over a few hundred ms
+    while not sink.sent:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(1.5)  # Anything else that was going to arrive
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    print(f"burst: {count} clients offline -> {len(sink.sent)} notification(s) delivered "
+          f"(first after {elapsed:.2f}s): \"{sink.sent[0]['title']}\"")
+
+
+async def durability(path: str) -> None:
+    from server.app.services.notifications import FakeSink, NotificationDispatcher, Outbox
+
+    dispatcher = NotificationDispatcher([FakeSink()], path=path, window=5.0)
+    runner = asyncio.create_task(dispatcher.run())
+    await asyncio.sleep(0.1)
+    for i in range(50):
+        dispatcher.notify("client_offline", f"node_{i}", f"node_{i} went offline")
+    await asyncio.sleep(0.5)  # Flushed to the outbox, still inside the coalescing window
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+
+    sink = FakeSink()
+    restarted = NotificationDispatcher([sink], path=path, window=0.1)
+    outbox = Outbox(path)
+    pending = sum(outbox.pending().values())
+    outbox.close()
+    runner = asyncio.create_task(restarted.run())
+    while not sink.sent:
+        await asyncio.sleep(0.01)
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    print(f"durability: {pending} events left in the outbox at stop, delivered after restart as "
+          f"{len(sink.sent)} notification(s) covering {sum(n['count'] for n in sink.sent)} events")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--burst", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ["JARVIS_CLIENTS_FILE"] = write_clients_file(args.clients)
+    from server.app.services.notifications import FakeSink, NotificationDispatcher
+
+    directory = tempfile.mkdtemp()
+    for label, dispatcher in (("without dispatcher", None),
+                              ("with dispatcher", NotificationDispatcher([FakeSink()],
+                                                                        path=os.path.join(directory, "hb.db")))):
+        latencies = asyncio.run(heartbeat_latency(args.clients, args.rounds, dispatcher))
+        produced = f", {dispatcher.produced} events queued" if dispatcher is not None else ""
+        print(f"/heartbeat {label}: p50={percentile(latencies, 0.5) * 1e6:.0f} us "
+              f"p99={percentile(latencies, 0.99) * 1e6:.0f} us{produced}")
+
+    dispatcher = NotificationDispatcher([FakeSink()], buffer_size=10**7)
+    start = time.perf_counter()
+    for i in range(100_000):
+        dispatcher.notify("client_offline", "bench", "bench went offline")
+    print(f"notify(): {(time.perf_counter() - start) / 100_000 * 1e6:.2f} us per call")
+
+    asyncio.run(burst(args.burst, os.path.join(directory, "burst.db")))
+    asyncio.run(durability(os.path.join(directory, "durable.db")))
+
+
+if __name__ == "__main__":
+    main()
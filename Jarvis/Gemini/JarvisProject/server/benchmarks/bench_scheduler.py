@@ -0,0 +1,81 @@
+# server/benchmarks/bench_scheduler.py
+"""
+Simulation harness for the distributed task scheduler.
+
+Hundreds of simulated clients with random capabilities, slot counts and speeds
+run tasks by sleeping; a small share of runs fail to exercise retries. Reports
+placement cost per submit, scheduling latency (submit -> start) percentiles and
+throughput.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_scheduler --clients 300 --tasks 20000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from server.app.services.scheduler import DONE, Task, TaskScheduler
+
+KINDS = ("compute", "gpu", "audio", "vision")
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def simulate(clients: int, tasks: int, task_ms: float, failure_rate: float, seed: int) -> None:
+    rng = random.Random(seed)
+    speed = {}
+
+    async def simulated_send(client_id: str, task: Task):
+        await asyncio.sleep(task_ms / 1000.0 * speed[client_id] * rng.uniform(0.5, 1.5))
+        if rng.random() < failure_rate:
+            return {"ok": False, "error": "simulated failure"}
+        return {"ok": True, "result": task.payload}
+
+    scheduler = TaskScheduler(send=simulated_send)
+    for i in range(clients):
+        client_id = f"sim_{i}"
+        speed[client_id] = rng.uniform(0.5, 2.0)
+        capabilities = rng.sample(KINDS, rng.randint(1, len(KINDS)))
+        scheduler.update_worker(client_id, capabilities=capabilities, slots=rng.randint(1, 4),
+                                cpu=rng.uniform(0, 100), memory=rng.uniform(0, 100))
+
+    start = time.perf_counter()
+    submitted = []
+    for i in range(tasks):
+        submitted.append(scheduler.submit(rng.choice(KINDS), payload=i, priority=rng.randint(0, 3)))
+    submit_cost = (time.perf_counter() - start) / tasks
+
+    await asyncio.gather(*(scheduler.wait(task.task_id) for task in submitted))
+    elapsed = time.perf_counter() - start
+
+    latencies = [(t.started_at - t.submitted_at) * 1000 for t in submitted]
+    stats = scheduler.stats()
+    print(f"clients={clients} tasks={tasks} task_ms={task_ms} failure_rate={failure_rate}")
+    print(f"completed={stats['completed']} failed={stats['failed']} "
+          f"retried={sum(t.attempts - 1 for t in submitted)}")
+    print(f"submit+place cost:      {submit_cost * 1e6:.1f} us/task")
+    print(f"scheduling latency p50: {percentile(latencies, 0.50):.1f} ms")
+    print(f"scheduling latency p99: {percentile(latencies, 0.99):.1f} ms")
+    print(f"mean latency:           {statistics.fmean(latencies):.1f} ms")
+    print(f"throughput:             {sum(t.state == DONE for t in submitted) / elapsed:.0f} tasks/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--task-ms", type=float, default=20.0, help="Mean simulated run time")
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(simulate(args.clients, args.tasks, args.task_ms, args.failure_rate, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# server/benchmarks/bench_startup.py
+"""
+Launcher startup time, per-worker memory and throughput by event loop/parser.
+
+1. Import: seconds to import server.app.main in a fresh interpreter (median
+   of --imports runs); this is what every worker pays before it can serve.
+2. Launch: for each configuration, starts `python -m server.launcher`, times
+   the first 200 from / and reads the RSS of every worker process, then runs
+   load_test's socket clients against it for --duration seconds.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_startup --workers 1,2 --clients 100 --duration 5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import httpx
+import psutil
+
+from .bench_failover import free_port, wait_until
+from .bench_heartbeat_batch import write_clients_file
+from .load_test import run_remote
+
+CONFIGURATIONS = (("asyncio", "h11"), ("uvloop", "httptools"))
+
+
+def import_seconds() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import server.app.main"], check=True,
+                   env=dict(os.environ, PYTHONPATH=os.getcwd()))
+    return time.perf_counter() - start
+
+
+def launch(port: int, workers: int, loop: str, http: str) -> subprocess.Popen:
+    # Several workers need a shared registry (see ServerSettings.check_workers)
+    state = {"STATE_BACKEND": "sqlite", "STATE_SQLITE_PATH": os.path.join(tempfile.mkdtemp(), "state.db")}
+    return subprocess.Popen([sys.executable, "-m", "server.launcher", "--host", "127.0.0.1", "--port", str(port),
+                             "--workers", str(workers), "--loop", loop, "--http", http, "--log-level", "warning"],
+                            env=dict(os.environ, PYTHONPATH=os.getcwd(), LOG_LEVEL="WARNING",
+                                     **(state if workers > 1 else {})),
+                            stdout=subprocess.DEVNULL)
+
+
+def worker_rss(parent: psutil.Process) -> list:
+    """RSS (MB) of the processes serving requests: the spawned workers, or the launcher itself with one."""
+    serving = [child for child in parent.children() if "spawn_main" in " ".join(child.cmdline())] or [parent]
+    return [round(process.memory_info().rss / 2**20, 1) for process in serving]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--imports", type=int, default=5)
+    parser.add_argument("--workers", default="1,2", help="Comma-separated worker counts")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    timings = [import_seconds() for _ in range(args.imports)]
+    print(f"import server.app.main: median {statistics.median(timings) * 1000:.0f} ms "
+          f"(min {min(timings) * 1000:.0f} ms, {args.imports} runs)")
+
+    os.environ["JARVIS_CLIENTS_FILE"] = write_clients_file(args.clients)
+    load = SimpleNamespace(duration=args.duration, interval=0.0, status_every=0, status_query="")
+    for workers in (int(count) for count in args.workers.split(",")):
+        for loop, http in CONFIGURATIONS:
+            port = free_port()
+            server = launch(port, workers, loop, http)
+            try:
+                ready = wait_until(lambda: httpx.get(f"http://127.0.0.1:{port}/").status_code == 200, 30)
+                time.sleep(0.5)  # Let every worker finish its lifespan startup
+                rss = worker_rss(psutil.Process(server.pid))
+                run = asyncio.run(run_remote(f"http://127.0.0.1:{port}", None, args.clients, load))
+            finally:
+                server.terminate()
+                server.wait()
+            heartbeat = run["endpoints"]["heartbeat"]
+            print(f"{workers} worker(s) {loop}/{http}: first response after {ready * 1000:.0f} ms, "
+                  f"RSS per worker {rss} MB; {args.clients} clients: {heartbeat['throughput_rps']} heartbeats/s "
+                  f"p50={heartbeat['p50_ms']} ms p99={heartbeat['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
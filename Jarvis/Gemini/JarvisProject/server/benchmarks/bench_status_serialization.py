@@ -0,0 +1,139 @@
+# server/benchmarks/bench_status_serialization.py
+"""
+/status serialization with --clients clients in the registry.
+
+1. Encoders (in process): the snapshot through FastAPI's default path
+   (jsonable_encoder, then json.dumps in JSONResponse), validated and dumped
+   by Pydantic against the typed model (FastAPI's path with a response
+   model), orjson and msgpack. Also the cost of building the snapshot itself.
+2. Requests (app in process through httpx's ASGI transport, so no network):
+   GET /status as the endpoint used to be written (a plain dict returned to
+   FastAPI's JSONResponse, mounted on the same app behind the same
+   middleware) against the current one, in JSON and msgpack, with the registry
+   changing between requests (every request encodes) and unchanged (the
+   encoded snapshot is reused). Also / and /register, whose bodies are now
+   pre-encoded.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_status_serialization --clients 10000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict
+
+from .bench_failover import percentile
+from .bench_heartbeat_batch import write_clients_file
+
+
+def timed(fn, runs: int):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return percentile(samples, 0.5), result
+
+
+def encoders(runs: int) -> None:
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    from server.app.core.registry import client_registry
+    from server.app.core.serialization import dumps_json, dumps_msgpack, msgpack, orjson
+    from server.app.models.status import ClientStatus
+
+    adapter = TypeAdapter(Dict[str, ClientStatus])
+    snapshot = client_registry.snapshot()
+    cases = {
+        "build snapshot (registry walk)": lambda: client_registry.snapshot(),
+        "jsonable_encoder + json.dumps": lambda: json.dumps(jsonable_encoder(snapshot), ensure_ascii=False,
+                                                            allow_nan=False, separators=(",", ":")).encode(),
+        "pydantic validate + dump_json": lambda: adapter.dump_json(adapter.validate_python(snapshot)),
+        "orjson" if orjson is not None else "json (orjson missing)": lambda: dumps_json(snapshot),
+    }
+    if msgpack is not None:
+        cases["msgpack"] = lambda: dumps_msgpack(snapshot)
+    print(f"encoders, {len(snapshot)} clients (median of {runs}):")
+    for label, case in cases.items():
+        seconds, body = timed(case, runs)
+        size = f"{len(body) / 1024:8.1f} KiB" if isinstance(body, bytes) else ""
+        print(f"  {label:<32} {seconds * 1e3:8.2f} ms {size}")
+
+
+async def requests(count: int, runs: int) -> None:
+    import httpx
+    from fastapi.responses import JSONResponse
+
+    from server.app.core.registry import client_registry
+    from server.app.core.security import AuthenticatedClient
+    from server.app.main import app
+
+    # The endpoints as they were: plain dicts returned to FastAPI's JSONResponse
+    async def old_status():
+        return client_registry.snapshot()
+
+    async def old_root():
+        return {"message": "Jarvis Server is running"}
+
+    async def old_register(client_id: AuthenticatedClient):
+        client_registry.register(client_id)
+        return {"message": f"Client '{client_id}' registered successfully"}
+
+    app.add_api_route("/before/status", old_status, response_class=JSONResponse)
+    app.add_api_route("/before/", old_root, response_class=JSONResponse)
+    app.add_api_route("/before/register", old_register, methods=["POST"], response_class=JSONResponse)
+
+    headers = {"X-Client-ID": "bench_0", "X-Client-Secret": "secret_0"}
+    msgpack_accept = {"Accept": "application/msgpack"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def measure(label, path, method="GET", changing=False, **kwargs):
+            samples, size = [], 0
+            for i in range(runs):
+                if changing:
+                    client_registry.touch(f"bench_{i % count}")  # New version: nothing cached
+                started = time.perf_counter()
+                response = await client.request(method, path, **kwargs)
+                samples.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.text
+                size = len(response.content)
+            print(f"  {label:<44} p50={percentile(samples, 0.5) * 1e3:8.3f} ms "
+                  f"p99={percentile(samples, 0.99) * 1e3:8.3f} ms {size / 1024:8.1f} KiB")
+
+        await client.post("/register", headers=headers)  # Warm up the credential check
+        print(f"requests, {count} clients ({runs} each):")
+        await measure("GET /status before", "/before/status", changing=True)
+        await measure("GET /status JSON (changing)", "/status", changing=True)
+        await measure("GET /status msgpack (changing)", "/status", changing=True, headers=msgpack_accept)
+        await measure("GET /status JSON (unchanged)", "/status")
+        await measure("GET /status msgpack (unchanged)", "/status", headers=msgpack_accept)
+        await measure("GET / before", "/before/")
+        await measure("GET / pre-encoded", "/")
+        await measure("POST /register before", "/before/register", method="POST", headers=headers)
+        await measure("POST /register pre-encoded", "/register", method="POST", headers=headers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ["JARVIS_CLIENTS_FILE"] = write_clients_file(args.clients)  # Before the app is imported
+    os.environ.setdefault("TIMESERIES_ENABLED", "false")
+    from server.app.core.registry import client_registry
+
+    for i in range(args.clients):
+        client_registry.register(f"bench_{i}")
+        client_registry.update(f"bench_{i}", status="online", connection="websocket",
+                               details={"os": "Windows" if i % 3 else "Linux", "hostname": f"host-{i}"})
+    encoders(args.runs)
+    asyncio.run(requests(args.clients, args.runs))
+
+
+if __name__ == "__main__":
+    main()
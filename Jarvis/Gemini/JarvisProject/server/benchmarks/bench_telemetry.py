@@ -0,0 +1,169 @@
+# server/benchmarks/bench_telemetry.py
+"""
+Client telemetry: bytes on the wire and server CPU per sample.
+
+1. Encoding (in process): a few hours of simulated agent metrics (cpu, memory,
+   load, sampled every 5 s) as one JSON object per sample, as gzip-compressed
+   JSON batches and as TelemetryBuffer batches (delta-encoded columns, raw,
+   gzip and, when installed, zstd), for several batch sizes. Also the client's
+   encode cost and the server's decode cost per sample.
+2. Live server (uvicorn subprocess): --clients clients send --samples samples
+   each, one JSON POST /telemetry per sample, then as --batch-sample batches
+   over POST /telemetry and as binary frames over /ws. Reports request bytes
+   (headers included) and server CPU per sample.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_telemetry --clients 20 --samples 1200 --batch 120
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import time
+
+import httpx
+import psutil
+
+from clients.common.telemetry import CODEC_GZIP, CODEC_NONE, CODEC_ZSTD, TelemetryBuffer, zstandard
+from server.app.services.telemetry import decode_batch
+
+from .bench_color_ingest import cpu_seconds, start_server
+from .bench_failover import free_port, wait_until
+from .bench_heartbeat_batch import write_clients_file
+
+COLUMNS = ("cpu", "load", "memory")
+
+
+def simulated_samples(count: int, seed: int = 0):
+    """(Unix time, metrics) every ~5 s: bursty CPU, slowly drifting memory, load following CPU."""
+    rng = random.Random(seed)
+    t, cpu, memory, load = time.time() - count * 5, 10.0, 45.0, 0.5
+    samples = []
+    for _ in range(count):
+        t += 5 + rng.uniform(-0.05, 0.05)
+        cpu = min(100.0, max(0.0, cpu + rng.gauss(0, 4) + (60 if rng.random() < 0.02 else 0) - 0.1 * (cpu - 10)))
+        memory = min(100.0, max(0.0, memory + rng.gauss(0, 0.05)))
+        load += (cpu / 25 - load) * 0.2
+        samples.append((t, {"cpu": round(cpu, 1), "memory": round(memory, 1), "load": round(load, 2)}))
+    return samples
+
+
+def buffer_for(samples) -> TelemetryBuffer:
+    buffer = TelemetryBuffer(COLUMNS, capacity=len(samples))
+    for t, metrics in samples:
+        buffer.append(metrics, t)
+    return buffer
+
+
+def encoding(total: int, batch_sizes) -> None:
+    samples = simulated_samples(total)
+    per_sample_json = sum(len(json.dumps({"t": round(t, 3), **m})) for t, m in samples) / total
+    print(f"encoding, {total} samples of {len(COLUMNS)} metrics (bytes per sample, body only):")
+    print(f"  one JSON object per sample       {per_sample_json:6.1f}")
+    codecs = [("columns raw", CODEC_NONE), ("columns gzip", CODEC_GZIP)]
+    if zstandard is not None:
+        codecs.append(("columns zstd", CODEC_ZSTD))
+    for size in batch_sizes:
+        chunks = [samples[i:i + size] for i in range(0, total - size + 1, size)]
+        json_gzip = sum(len(gzip.compress(json.dumps([{"t": round(t, 3), **m} for t, m in chunk]).encode(), 6,
+                                          mtime=0)) for chunk in chunks) / (len(chunks) * size)
+        row = [f"json gzip {json_gzip:5.1f}"]
+        for label, codec in codecs:
+            sizes, encode_time, decode_time = [], 0.0, 0.0
+            for chunk in chunks:
+                buffer = buffer_for(chunk)
+                started = time.perf_counter()
+                data, _ = buffer.encode(codec)
+                encode_time += time.perf_counter() - started
+                started = time.perf_counter()
+                decode_batch(data)
+                decode_time += time.perf_counter() - started
+                sizes.append(len(data))
+            count = len(chunks) * size
+            row.append(f"{label} {sum(sizes) / count:5.1f} "
+                       f"(encode {encode_time / count * 1e6:.1f} us, decode {decode_time / count * 1e6:.1f} us)")
+        print(f"  batches of {size:<4} " + " | ".join(row))
+
+
+async def post_raw(reader, writer, headers: str, body: bytes, content_type: str) -> int:
+    """One POST /telemetry on a keep-alive connection; returns the request size in bytes."""
+    request = (f"POST /telemetry HTTP/1.1\r\nHost: 127.0.0.1\r\n{headers}Content-Type: {content_type}\r\n"
+               f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+    writer.write(request)
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = next(int(line[15:]) for line in head.split(b"\r\n") if line[:15].lower() == b"content-length:")
+    await reader.readexactly(length)
+    assert head[9:12] == b"200", head
+    return len(request)
+
+
+async def upload(port: int, index: int, samples, mode: str, batch: int) -> int:
+    headers = f"X-Client-ID: bench_{index}\r\nX-Client-Secret: secret_{index}\r\n"
+    sent = 0
+    if mode == "ws":
+        import websockets
+
+        async with websockets.connect(f"ws://127.0.0.1:{port}/ws") as ws:
+            await ws.send(json.dumps({"type": "auth", "client_id": f"bench_{index}", "secret": f"secret_{index}"}))
+            await ws.recv()  # welcome
+            for start in range(0, len(samples), batch):
+                data, _ = buffer_for(samples[start:start + batch]).encode()
+                await ws.send(data)
+                sent += len(data) + 8  # Frame header with client mask
+            await ws.send(json.dumps({"type": "ping"}))
+            await ws.recv()  # pong: every batch before it has been ingested
+        return sent
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        if mode == "json":
+            for t, metrics in samples:
+                sent += await post_raw(reader, writer, headers, json.dumps({"t": round(t, 3), **metrics}).encode(),
+                                       "application/json")
+        else:
+            for start in range(0, len(samples), batch):
+                data, _ = buffer_for(samples[start:start + batch]).encode()
+                sent += await post_raw(reader, writer, headers, data, "application/octet-stream")
+    finally:
+        writer.close()
+    return sent
+
+
+async def live(port: int, server: psutil.Process, clients: int, total: int, batch: int) -> None:
+    samples = simulated_samples(total, seed=1)
+    print(f"live server, {clients} clients x {total} samples:")
+    for mode, label in (("json", "JSON POST per sample"), ("post", f"POST batches of {batch}"),
+                        ("ws", f"/ws binary batches of {batch}")):
+        before = cpu_seconds(server)
+        started = time.perf_counter()
+        sent = sum(await asyncio.gather(*(upload(port, i, samples, mode, batch) for i in range(clients))))
+        elapsed = time.perf_counter() - started
+        cpu = cpu_seconds(server) - before
+        count = clients * total
+        print(f"  {label:<26} {sent / count:7.1f} bytes/sample on the wire, "
+              f"server CPU {cpu / count * 1e6:7.1f} us/sample, {count / elapsed:,.0f} samples/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=1200, help="Per client in the live run")
+    parser.add_argument("--batch", type=int, default=120)
+    parser.add_argument("--encode-samples", type=int, default=8640)
+    args = parser.parse_args()
+
+    encoding(args.encode_samples, (12, 120, 720))
+
+    port = free_port()
+    server = start_server(port, write_clients_file(args.clients))
+    try:
+        wait_until(lambda: httpx.get(f"http://127.0.0.1:{port}/").status_code == 200, 20)
+        asyncio.run(live(port, psutil.Process(server.pid), args.clients, args.samples, args.batch))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
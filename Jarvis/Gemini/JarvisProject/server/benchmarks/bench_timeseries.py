@@ -0,0 +1,144 @@
+# server/benchmarks/bench_timeseries.py
+"""
+Client history store: ingest cost, disk per resolution and range queries.
+
+1. Ingest (simulated clock): --clients agents upload telemetry batches of 120
+   samples (cpu, memory, load every 5 s, as services/telemetry.py hands them
+   over) and heartbeat every 30 s, for --hours hours. The store is flushed
+   after every round of uploads and compacted every simulated hour, as its
+   background task would. Reports the cost per sample, the flush and
+   compaction times and the bytes on disk per resolution.
+2. Queries: one client's cpu over the last hour and the last --hours hours,
+   read from each resolution, next to the same hourly view computed by
+   scanning the raw points.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_timeseries --clients 200 --hours 24
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from server.app.services.timeseries import RESOLUTIONS, TimeSeriesStore
+
+from .bench_failover import percentile
+
+METRICS = ("cpu", "load", "memory")
+ROUND = 600  # Seconds of samples per upload round (120 samples every 5 s)
+
+
+def disk_bytes(path: str) -> int:
+    """Allocated bytes (sparse segment files count only what was written)."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.stat(os.path.join(root, name)).st_blocks * 512
+    return total
+
+
+def ingest(store: TimeSeriesStore, clients: int, hours: float, end: float, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    start = end - hours * 3600
+    ids = [f"client_{i}" for i in range(clients)]
+    cpu = rng.uniform(5, 30, clients)
+    memory = rng.uniform(30, 70, clients)
+    record_seconds = flush_seconds = compact_seconds = 0.0
+    flushes, compactions, samples = [], 0, 0
+    next_compaction = start + 3600
+    for round_start in np.arange(start, end, ROUND):
+        times = round_start + np.arange(ROUND // 5) * 5.0
+        started = time.perf_counter()
+        for index, client_id in enumerate(ids):
+            walk = np.clip(cpu[index] + np.cumsum(rng.normal(0, 3, len(times))), 0, 100)
+            cpu[index] = walk[-1]
+            values = {"cpu": walk, "load": walk / 25, "memory": np.full(len(times), memory[index])}
+            store.record_columns(client_id, times + index % 5, values)
+            for beat in np.arange(round_start, round_start + ROUND, 30.0):
+                store.put(client_id, {"last_seen": beat + random.uniform(-1, 1)})
+            samples += len(times) * len(METRICS)
+        record_seconds += time.perf_counter() - started
+
+        now = round_start + ROUND
+        started = time.perf_counter()
+        store.flush(now)
+        flushes.append(time.perf_counter() - started)
+        if now >= next_compaction:
+            started = time.perf_counter()
+            compactions += store.compact(now)["compacted"]
+            compact_seconds += time.perf_counter() - started
+            next_compaction += 3600
+    started = time.perf_counter()
+    store.flush(end + 3600)
+    compactions += store.compact(end + 3600)["compacted"]
+    compact_seconds += time.perf_counter() - started
+    flush_seconds = sum(flushes)
+
+    heartbeats = clients * hours * 120
+    print(f"ingest: {clients} clients x {hours:g} h, {samples:,} metric samples and {heartbeats:,.0f} heartbeats")
+    print(f"  record      {record_seconds / (samples + heartbeats) * 1e6:.2f} us per sample "
+          f"(batches and heartbeats, rollups included)")
+    print(f"  flush       {flush_seconds / (samples + heartbeats) * 1e6:.2f} us per sample, "
+          f"p50={percentile(flushes, 0.5) * 1e3:.1f} ms max={max(flushes) * 1e3:.1f} ms per round of {ROUND}s")
+    print(f"  compaction  {compact_seconds:.1f} s in total for {compactions} windows")
+    for resolution in RESOLUTIONS:
+        size = disk_bytes(os.path.join(store.path, resolution.name))
+        print(f"  disk {resolution.name:<4}   {size / 2**20:8.1f} MiB ({size / (samples + heartbeats):6.2f} bytes per sample)")
+
+
+def timed(fn, runs: int = 20):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return percentile(samples, 0.5), result
+
+
+def queries(store: TimeSeriesStore, hours: float, end: float) -> None:
+    print("queries (client_7 cpu, median of 20):")
+    raw = store.resolutions["raw"]
+    for label, span in (("last hour", 3600), (f"last {hours:g} h", hours * 3600)):
+        start = end - span
+        for resolution in store.rollups:
+            seconds, rows = timed(lambda: store.query("client_7", "cpu", start, end, resolution))
+            print(f"  {label:<10} {resolution.name:<4} {seconds * 1e3:8.2f} ms  {len(rows['t']):6} buckets")
+
+        def raw_scan():
+            rows = store.query("client_7", "cpu", start, end, raw)
+            hours_index = (rows["t"] // 3600).astype(np.int64)
+            starts = np.flatnonzero(np.r_[True, hours_index[1:] != hours_index[:-1]])
+            return {"count": np.diff(np.r_[starts, len(hours_index)]), "max": np.maximum.reduceat(rows["value"], starts),
+                    "points": len(rows["t"])}
+
+        seconds, result = timed(raw_scan)
+        print(f"  {label:<10} raw scan to hourly {seconds * 1e3:8.2f} ms  {result['points']:6} points read")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--hours", type=float, default=24)
+    args = parser.parse_args()
+
+    # Raw points kept for the whole run so the raw scan has something to compare with
+    resolutions = tuple(r._replace(retention=max(r.retention, (args.hours + 2) * 3600)) for r in RESOLUTIONS)
+    directory = tempfile.mkdtemp(prefix="bench_timeseries_")
+    store = TimeSeriesStore(directory, resolutions=resolutions)
+    try:
+        store.open()
+        end = float(int(time.time()) // 3600 * 3600)
+        ingest(store, args.clients, args.hours, end)
+        queries(store, args.hours, end)
+        store.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# server/benchmarks/bench_voice_pipeline.py
+"""
+End-to-end voice command latency: replays WAV files through the streaming
+pipeline (VAD -> incremental recognition on the worker pool -> intents) as if
+they were arriving live, several streams at once.
+
+Latency is measured from the end of speech (as found by the VAD) to the intent
+being dispatched; it is negative when the intent fired on a partial result
+before the speaker finished.
+
+By default the WAV files are generated: each word of a small vocabulary is a
+tone, and a tone recognizer decodes them incrementally, so the numbers cover
+the pipeline itself plus a configurable decoding cost (--decode-rtf, seconds
+of engine time per second of audio). With --engine vosk (or sphinx) recorded
+16 kHz mono WAV files from --wav-dir are decoded by that engine instead.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.bench_voice_pipeline --streams 8 --workers 2
+    python -m server.benchmarks.bench_voice_pipeline --no-early   # dispatch on final results only
+"""
+
+import argparse
+import asyncio
+import glob
+import os
+import statistics
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from ml.voice_recognition.intents import IntentRouter
+from ml.voice_recognition.pipeline import VoicePipeline
+from ml.voice_recognition.recognizers import Hypothesis, Recognizer, create_recognizer_factory, read_wav
+from ml.voice_recognition.vad import SAMPLE_RATE
+
+VOCABULARY = ["jarvis", "status", "how", "many", "clients", "are", "online", "lights", "on", "off",
+              "play", "music", "what", "time", "is", "it"]
+COMMANDS = ["jarvis status", "jarvis how many clients are online", "jarvis lights on",
+            "jarvis play music", "jarvis what time is it", "jarvis lights off"]
+WORD_SECONDS, GAP_SECONDS = 0.3, 0.05
+
+
+def tone_frequency(word: str) -> float:
+    return 400.0 + 100.0 * VOCABULARY.index(word)
+
+
+def synthesize(text: str, rng) -> np.ndarray:
+    """Silence, one tone per word, silence; with a little background noise throughout."""
+    parts = [np.zeros(int(0.6 * SAMPLE_RATE))]
+    for word in text.split():
+        t = np.arange(int(WORD_SECONDS * SAMPLE_RATE)) / SAMPLE_RATE
+        fade = np.minimum(1.0, np.minimum(t, t[::-1]) / 0.01)
+        parts.append(0.4 * np.sin(2 * np.pi * tone_frequency(word) * t) * fade)
+        parts.append(np.zeros(int(GAP_SECONDS * SAMPLE_RATE)))
+    parts.append(np.zeros(int(0.8 * SAMPLE_RATE)))
+    signal = np.concatenate(parts) + rng.normal(0, 0.002, sum(len(p) for p in parts))
+    return (np.clip(signal, -1, 1) * 32767).astype("<i2")
+
+
+def write_wav(path: str, samples: np.ndarray) -> None:
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+
+
+class ToneRecognizer(Recognizer):
+    """
+    Decodes the generated tone language incrementally: the dominant frequency of
+    each 20 ms frame names a word, and a word counts once it held for 100 ms.
+    Partials are reported settled (0.9) when unchanged since the previous call.
+    """
+
+    def __init__(self, sample_rate: int, decode_rtf: float):
+        self.sample_rate = sample_rate
+        self.decode_rtf = decode_rtf
+        self._buffer = np.empty(0, dtype=np.float32)
+        self._words = []
+        self._candidate, self._run = None, 0
+        self._last = ""
+
+    def accept(self, pcm: bytes) -> Hypothesis:
+        samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        time.sleep(len(samples) / self.sample_rate * self.decode_rtf)  # Engine time (releases the GIL)
+        self._buffer = np.concatenate([self._buffer, samples])
+        frame = self.sample_rate // 50
+        usable = len(self._buffer) - len(self._buffer) % frame
+        frames = self._buffer[:usable].reshape(-1, frame)
+        self._buffer = self._buffer[usable:]
+        spectrum = np.abs(np.fft.rfft(frames * np.hanning(frame), axis=1))
+        peaks = np.argmax(spectrum, axis=1) * self.sample_rate / frame
+        loud = spectrum.max(axis=1) > 5.0
+        for peak, is_loud in zip(peaks, loud):
+            word = None
+            if is_loud:
+                index = int(round((peak - 400.0) / 100.0))
+                word = VOCABULARY[index] if 0 <= index < len(VOCABULARY) else None
+            if word != self._candidate:
+                self._candidate, self._run = word, 0
+            self._run += 1
+            if word is not None and self._run == 5:
+                self._words.append(word)
+        text = " ".join(self._words)
+        confidence = 0.9 if text and text == self._last else 0.6
+        self._last = text
+        return Hypothesis(text, confidence)
+
+    def finish(self) -> Hypothesis:
+        return Hypothesis(" ".join(self._words), 0.95)
+
+
+def build_intents() -> IntentRouter:
+    intents = IntentRouter()
+    intents.add("fleet_status", ["jarvis status", "how many clients"])
+    intents.add("lights_on", ["lights on"])
+    intents.add("lights_off", ["lights off"])
+    intents.add("play_music", ["play music"])
+    intents.add("time", ["what time"])
+    return intents
+
+
+async def replay(pipeline: VoicePipeline, pcm: bytes, speed: float, chunk_ms: int):
+    events = []
+
+    async def on_event(event):
+        event["wall"] = time.perf_counter()
+        events.append(event)
+
+    stream = pipeline.open_stream(on_event)
+    chunk = SAMPLE_RATE * 2 * chunk_ms // 1000
+    start = time.perf_counter()
+    for offset in range(0, len(pcm), chunk):
+        await stream.feed(pcm[offset:offset + chunk])
+        # Pace the replay like a live microphone
+        await asyncio.sleep(max(0.0, start + (offset + chunk) / (2 * SAMPLE_RATE) / speed - time.perf_counter()))
+    await stream.close()
+    return start, events
+
+
+async def run(args) -> None:
+    if args.engine == "tones":
+        directory = tempfile.mkdtemp()
+        rng = np.random.default_rng(1)
+        for i, command in enumerate(COMMANDS):
+            write_wav(os.path.join(directory, f"{i}_{command.replace(' ', '_')}.wav"), synthesize(command, rng))
+        factory = lambda sample_rate: ToneRecognizer(sample_rate, args.decode_rtf)
+    else:
+        directory = args.wav_dir
+        factory = create_recognizer_factory(args.engine)
+        if factory is None:
+            raise SystemExit(f"Engine {args.engine!r} is not installed")
+    files = sorted(glob.glob(os.path.join(directory, "*.wav")))
+    if not files:
+        raise SystemExit(f"No WAV files in {directory}")
+    recordings = [read_wav(path) for path in files]
+
+    pipeline = VoicePipeline(factory, build_intents(), workers=args.workers, max_streams=args.streams,
+                             partial_confidence=1.1 if args.no_early else 0.85)
+    latencies, finals, intents = [], 0, 0
+    for round_start in range(0, args.rounds * args.streams, args.streams):
+        batch = [recordings[(round_start + i) % len(recordings)] for i in range(args.streams)]
+        results = await asyncio.gather(*(replay(pipeline, pcm, args.speed, args.chunk_ms) for pcm in batch))
+        for start, events in results:
+            speech_end = {e["utterance"]: start + e["speech_end_ms"] / 1000 / args.speed
+                          for e in events if e["type"] == "final"}
+            finals += len(speech_end)
+            for e in events:
+                if e["type"] == "intent" and e["utterance"] in speech_end:
+                    intents += 1
+                    latencies.append((e["wall"] - speech_end[e["utterance"]]) * 1000)
+    pipeline.close()
+
+    audio_seconds = sum(len(pcm) for pcm in recordings) / (2 * SAMPLE_RATE)
+    stats = pipeline.stats()
+    print(f"engine={args.engine} files={len(files)} ({audio_seconds:.1f}s audio) streams={args.streams} "
+          f"workers={args.workers} decode_rtf={args.decode_rtf} early={'off' if args.no_early else 'on'}")
+    print(f"utterances={finals} intents={intents} early={stats['early_intents']} "
+          f"steps/utterance={stats['steps'] / max(1, stats['utterances']):.1f} "
+          f"silence dropped by VAD={stats['dropped_seconds']:.1f}s")
+    if latencies:
+        ordered = sorted(latencies)
+        print(f"speech end -> intent p50: {ordered[len(ordered) // 2]:.0f} ms")
+        print(f"speech end -> intent p99: {ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]:.0f} ms")
+        print(f"speech end -> intent mean: {statistics.fmean(latencies):.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engine", default="tones", choices=["tones", "vosk", "sphinx"])
+    parser.add_argument("--wav-dir", help="Recorded WAV files (16-bit mono, 16 kHz) for real engines")
+    parser.add_argument("--streams", type=int, default=8, help="Concurrent audio streams")
+    parser.add_argument("--workers", type=int, default=2, help="Recognition pool size")
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed (1.0 = real time)")
+    parser.add_argument("--chunk-ms", type=int, default=40, help="Audio per client frame")
+    parser.add_argument("--decode-rtf", type=float, default=0.2, help="Simulated engine cost (tones only)")
+    parser.add_argument("--no-early", action="store_true", help="Dispatch intents on final results only")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
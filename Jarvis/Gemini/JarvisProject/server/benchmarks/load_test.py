@@ -0,0 +1,310 @@
+# server/benchmarks/load_test.py
+"""
+Load test: N concurrent clients against register, heartbeat and status.
+
+Each simulated client registers once, then sends heartbeats for --duration
+seconds (as fast as the server answers, or every --interval seconds) and
+reads /status every --status-every heartbeats, like a dashboard would.
+Reports throughput, p50/p99/max latency per endpoint, errors and server
+memory per registered client, for each client count in --clients.
+
+The app runs in-process through httpx's ASGI transport (--mode inprocess,
+no network, memory includes the simulated clients) or as a uvicorn
+subprocess on localhost (--mode server, memory is the server's own RSS).
+--url points the clients at a server that is already running instead.
+Against a server every simulated client holds its own keep-alive connection
+and speaks minimal HTTP/1.1, so the load generator costs far less CPU than
+a full HTTP client would (it usually shares the machine with the server).
+
+Results are written as JSON (--output, by default under
+server/benchmarks/results/<git revision>.json). --compare takes an earlier
+results file and exits with status 1 if throughput dropped or p99 latency
+rose by more than --tolerance, so two versions can be compared in CI.
+
+Run from the JarvisProject directory:
+    python -m server.benchmarks.load_test --clients 10,100,1000 --duration 10
+    python -m server.benchmarks.load_test --mode server --clients 1000 --compare results/base.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import httpx
+
+try:
+    import psutil
+except ImportError:  # Optional: without it memory per client is not reported
+    psutil = None
+
+from .bench_color_ingest import start_server
+from .bench_failover import free_port, percentile, wait_until
+from .bench_heartbeat_batch import write_clients_file
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+ENDPOINTS = ("register", "heartbeat", "status")
+
+
+class Recorder:
+    """Latencies and errors per endpoint for one run."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {name: [] for name in ENDPOINTS}
+        self.errors: Dict[str, int] = {name: 0 for name in ENDPOINTS}
+
+    async def call(self, name: str, request) -> None:
+        start = time.perf_counter()
+        try:
+            ok = await request == 200
+        except (httpx.HTTPError, OSError, asyncio.IncompleteReadError):
+            ok = False
+        if ok:
+            self.latencies[name].append(time.perf_counter() - start)
+        else:
+            self.errors[name] += 1
+
+    def summary(self, elapsed: Dict[str, float]) -> Dict[str, Any]:
+        report = {}
+        for name in ENDPOINTS:
+            values = self.latencies[name]
+            seconds = elapsed[name]
+            report[name] = {
+                "requests": len(values), "errors": self.errors[name],
+                "throughput_rps": round(len(values) / seconds, 1) if seconds else 0.0,
+                "p50_ms": round(percentile(values, 0.5) * 1000, 3) if values else None,
+                "p99_ms": round(percentile(values, 0.99) * 1000, 3) if values else None,
+                "max_ms": round(max(values) * 1000, 3) if values else None,
+            }
+        return report
+
+
+class ServerMemory:
+    """Resident size of the process holding the registry (this one in-process, the subprocess otherwise)."""
+
+    def __init__(self, pid: int | None):
+        self._process = psutil.Process(pid) if psutil is not None and pid is not None else None
+
+    def rss(self) -> int | None:
+        if self._process is None:
+            return None
+        gc.collect()
+        return self._process.memory_info().rss
+
+
+def headers_for(index: int) -> Dict[str, str]:
+    return {"X-Client-ID": f"bench_{index}", "X-Client-Secret": f"secret_{index}"}
+
+
+class ASGIClient:
+    """One simulated client calling the app in-process; returns status codes."""
+
+    def __init__(self, http: httpx.AsyncClient, index: int):
+        self._http = http
+        self._headers = headers_for(index)
+
+    async def request(self, method: str, target: str) -> int:
+        return (await self._http.request(method, target, headers=self._headers)).status_code
+
+    async def close(self) -> None:
+        pass
+
+
+class SocketClient:
+    """
+    One simulated client on its own keep-alive connection, writing HTTP/1.1
+    requests by hand and reading just enough of the response to find its end.
+    """
+
+    def __init__(self, host: str, port: int, index: int):
+        self._address = (host, port)
+        self._headers = "".join(f"{name}: {value}\r\n" for name, value in headers_for(index).items())
+        self._host = f"{host}:{port}"
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def request(self, method: str, target: str) -> int:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(*self._address)
+        try:
+            self._writer.write(f"{method} {target} HTTP/1.1\r\nHost: {self._host}\r\n{self._headers}"
+                               f"Content-Length: 0\r\n\r\n".encode())
+            head = await self._reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n")[1:]:
+                if line[:15].lower() == b"content-length:":
+                    length = int(line[15:])
+            await self._reader.readexactly(length)
+            return int(head[9:12])
+        except Exception:
+            await self.close()  # Reconnect on the next request
+            raise
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = self._reader = None
+
+
+async def run_clients(connections: List, args, memory: ServerMemory) -> Dict[str, Any]:
+    recorder = Recorder()
+    elapsed = {}
+    status_target = "/status" + (f"?{args.status_query}" if args.status_query else "")
+
+    baseline = memory.rss()
+    start = time.perf_counter()
+    await asyncio.gather(*(recorder.call("register", connection.request("POST", "/register"))
+                           for connection in connections))
+    elapsed["register"] = time.perf_counter() - start
+    registered = memory.rss()
+
+    deadline = time.perf_counter() + args.duration
+
+    async def client(connection) -> None:
+        sent = 0
+        while time.perf_counter() < deadline:
+            await recorder.call("heartbeat", connection.request("POST", "/heartbeat"))
+            sent += 1
+            if args.status_every and sent % args.status_every == 0:
+                await recorder.call("status", connection.request("GET", status_target))
+            if args.interval:
+                await asyncio.sleep(args.interval)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(connection) for connection in connections))
+    elapsed["heartbeat"] = elapsed["status"] = time.perf_counter() - start
+    await asyncio.gather(*(connection.close() for connection in connections))
+    clients = len(connections)
+
+    result = {"clients": clients, "duration_s": round(elapsed["heartbeat"], 2),
+              "endpoints": recorder.summary(elapsed)}
+    if baseline is not None:
+        result["memory"] = {"rss_mb": round(registered / 2**20, 1),
+                            "per_client_kb": round(max(0, registered - baseline) / clients / 1024, 2)}
+    return result
+
+
+async def run_inprocess(clients: int, args) -> Dict[str, Any]:
+    from server.app.core.registry import client_registry
+    from server.app.main import app
+
+    for entry in list(client_registry):  # Each client count starts from an empty registry
+        client_registry.remove(entry.client_id)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        connections = [ASGIClient(http, i) for i in range(clients)]
+        return await run_clients(connections, args, ServerMemory(os.getpid()))
+
+
+async def run_remote(url: str, pid: int | None, clients: int, args) -> Dict[str, Any]:
+    address = httpx.URL(url)
+    connections = [SocketClient(address.host, address.port or 80, i) for i in range(clients)]
+    return await run_clients(connections, args, ServerMemory(pid))
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {"revision": revision, "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions against an earlier results file, matched by client count."""
+    previous = {run["clients"]: run for run in baseline["runs"]}
+    regressions = []
+    for run in results["runs"]:
+        before = previous.get(run["clients"])
+        if before is None:
+            continue
+        for name in ENDPOINTS:
+            now, then = run["endpoints"][name], before["endpoints"][name]
+            if then["throughput_rps"] and now["throughput_rps"] < then["throughput_rps"] * (1 - tolerance):
+                regressions.append(f"{run['clients']} clients {name}: throughput "
+                                   f"{then['throughput_rps']} -> {now['throughput_rps']} req/s")
+            if then["p99_ms"] and now["p99_ms"] and now["p99_ms"] > then["p99_ms"] * (1 + tolerance):
+                regressions.append(f"{run['clients']} clients {name}: p99 {then['p99_ms']} -> {now['p99_ms']} ms")
+    return regressions
+
+
+def print_run(run: Dict[str, Any]) -> None:
+    memory = run.get("memory")
+    extra = f", {memory['per_client_kb']} KB/client (RSS {memory['rss_mb']} MB)" if memory else ""
+    print(f"{run['clients']} clients, {run['duration_s']}s{extra}")
+    for name, stats in run["endpoints"].items():
+        if stats["requests"] or stats["errors"]:
+            print(f"  {name:<9} {stats['throughput_rps']:>9.1f} req/s  p50={stats['p50_ms']} ms  "
+                  f"p99={stats['p99_ms']} ms  max={stats['max_ms']} ms  errors={stats['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", default="10,100,1000", help="Comma-separated client counts, one run each")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of heartbeats per run")
+    parser.add_argument("--interval", type=float, default=0.0, help="Pause between a client's heartbeats")
+    parser.add_argument("--status-every", type=int, default=10, help="GET /status every N heartbeats (0: never)")
+    parser.add_argument("--status-query", default="limit=100", help="Query string for /status (empty: full map)")
+    parser.add_argument("--mode", choices=("inprocess", "server"), default="inprocess")
+    parser.add_argument("--url", help="Use an already running server (its clients file must have bench_N)")
+    parser.add_argument("--output", help="Results file (default: results/<revision>.json next to this script)")
+    parser.add_argument("--compare", help="Earlier results file; exit 1 on a regression beyond --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+    counts = [int(count) for count in args.clients.split(",")]
+
+    clients_file = write_clients_file(max(counts))
+    os.environ["JARVIS_CLIENTS_FILE"] = clients_file
+    server = None
+    if args.mode == "server" and not args.url:
+        port = free_port()
+        server = start_server(port, clients_file)
+        args.url = f"http://127.0.0.1:{port}"
+        wait_until(lambda: httpx.get(args.url + "/").status_code == 200, 20)
+
+    runs = []
+    try:
+        for count in counts:
+            if args.url:
+                run = asyncio.run(run_remote(args.url, server.pid if server else None, count, args))
+            else:
+                run = asyncio.run(run_inprocess(count, args))
+            print_run(run)
+            runs.append(run)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    results = {"environment": environment(),
+               "settings": {"mode": "remote" if args.url and server is None else args.mode,
+                            "duration_s": args.duration, "interval_s": args.interval,
+                            "status_every": args.status_every, "status_query": args.status_query},
+               "runs": runs}
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['environment']['revision'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
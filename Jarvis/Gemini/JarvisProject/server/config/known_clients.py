@@ -0,0 +1,57 @@
+# server/config/known_clients.py
+
+import json
+import os
+
+# WARNING: Storing secrets directly like this is insecure.
+# This is for initial development ONLY.
+# TODO: Replace with a secure method (e.g., hashed secrets in DB/config file, Vault)
+# Entries may use "secret_hash" (see server/app/core/auth_index.py hash_secret) instead of "secret".
+# If CLIENTS_FILE exists it takes precedence and is hot-reloaded when it changes.
+# A gateway/relay entry may list "relay_for": [client ids] (or "*") to use /heartbeat/batch.
+CLIENTS = {
+    "windows_pc_1": {
+        "secret": "SUPER_SECRET_WINDOWS_KEY", # Replace with a real random secret
+        "description": "Main Windows 11 PC"
+    },
+    "kali_pc_1": {
+        "secret": "VERY_SECRET_KALI_KEY",     # Replace with a real random secret
+        "description": "Kali Linux Machine"
+    },
+    "esp32_color_1": {
+        "secret": "ESP32_COLOR_SENSOR_KEY",   # Replace with a real random secret
+        "description": "ESP32 colour sensor (streams to /color)"
+    },
+    # Add more clients as needed
+    "web_ui_internal": { # Example for potential backend communication from Web UI
+        "secret": "WEB_UI_SECRET_KEY",
+        "description": "Internal access for Web UI"
+    }
+}
+
+CLIENTS_FILE = os.getenv(
+    "JARVIS_CLIENTS_FILE", os.path.join(os.path.dirname(__file__), "clients.json")
+)
+
+def load_clients() -> dict:
+    """Returns the client table, read from CLIENTS_FILE when present."""
+    if os.path.exists(CLIENTS_FILE):
+        with open(CLIENTS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return CLIENTS
+
+def clients_file_mtime() -> float | None:
+    """Modification time of CLIENTS_FILE, or None if it does not exist."""
+    try:
+        return os.stat(CLIENTS_FILE).st_mtime
+    except FileNotFoundError:
+        return None
+
+def get_client_secret(client_id: str) -> str | None:
+    """Retrieves the secret for a given client ID."""
+    client = CLIENTS.get(client_id)
+    return client.get("secret") if client else None
+
+def is_known_client(client_id: str) -> bool:
+    """Checks if a client ID is known."""
+    return client_id in CLIENTS
\ No newline at end of file
@@ -0,0 +1,71 @@
+# server/launcher.py
+"""
+Production entry point for the Jarvis server.
+
+Settings come from server/config/config.json (or --config / JARVIS_CONFIG_FILE),
+the environment and the .env file (server/config/.env or --env-file), and the
+command line, in increasing priority (see server/app/core/settings.py).
+
+With --workers N uvicorn binds the socket once and N worker processes accept
+on it. Only the client registry is shared between them, and only with
+STATE_BACKEND=sqlite or redis (more than one worker is refused otherwise).
+WebSocket sessions, commands, scheduled tasks, liveness and mode switches stay
+per process, so a command reaches only clients connected to the worker that
+received it. uvloop and httptools are used when installed (--loop / --http to force).
+Each worker logs its startup time and resident size once it is ready.
+
+Run from the JarvisProject directory:
+    python -m server.launcher --workers 4
+    python -m server.launcher --config ../../Claude/jarvis/config.json --port 8080
+"""
+
+import argparse
+import os
+import time
+
+APP = "server.app.main:app"
+
+
+def main():
+    launched = time.time()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--loop", choices=("auto", "uvloop", "asyncio"))
+    parser.add_argument("--http", choices=("auto", "httptools", "h11"))
+    parser.add_argument("--backlog", type=int)
+    parser.add_argument("--reload", action="store_true", default=None, help="Development only")
+    parser.add_argument("--log-level")
+    parser.add_argument("--env-file", help="Default: server/config/.env, then server/.env")
+    parser.add_argument("--config", help="JSON config with a \"server\" section")
+    args = parser.parse_args()
+
+    from .app.core.settings import LAUNCH_TIME_ENV, load_settings
+
+    try:
+        settings = load_settings(args.env_file, args.config, host=args.host, port=args.port, workers=args.workers,
+                                 loop=args.loop, http=args.http, backlog=args.backlog, reload=args.reload,
+                                 log_level=args.log_level)
+    except ValueError as e:  # pydantic's ValidationError (a bad value) or a malformed config file
+        parser.error(str(e))
+    workers = 1 if settings.reload else settings.workers
+    try:
+        warning = settings.check_workers()
+    except ValueError as e:
+        parser.error(str(e))
+    if warning:
+        print(f"WARNING: {warning}")
+    loop, http = settings.resolved_loop(), settings.resolved_http()
+    os.environ[LAUNCH_TIME_ENV] = str(launched)
+    print(f"Starting Jarvis Server on {settings.host}:{settings.port} "
+          f"({workers} worker{'s' if workers > 1 else ''}, loop={loop}, http={http})")
+
+    import uvicorn
+
+    uvicorn.run(APP, host=settings.host, port=settings.port, workers=workers, loop=loop, http=http,
+                backlog=settings.backlog, reload=settings.reload, log_level=settings.log_level.lower())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# server/scripts/resp_standin.py
+"""
+Tiny in-memory server speaking the Redis protocol, enough for RedisStateStore
+(PING, HSET, HGET, HMGET, HGETALL, HDEL, ZADD, ZREM, ZRANGEBYSCORE, DEL,
+FLUSHALL). Meant for local development
+and tests when no Redis is installed; nothing is persisted.
+
+    python server/scripts/resp_standin.py --port 6379
+    STATE_BACKEND=redis uvicorn server.app.main:app
+"""
+
+import argparse
+import asyncio
+
+
+class RespStandin:
+    def __init__(self):
+        self.hashes: dict[bytes, dict[bytes, bytes]] = {}
+        self.sorted_sets: dict[bytes, dict[bytes, float]] = {}
+
+    @staticmethod
+    def _bound(value: bytes) -> tuple[float, bool]:
+        """A ZRANGEBYSCORE bound: (score, exclusive)."""
+        exclusive = value.startswith(b"(")
+        return float(value[1:] if exclusive else value), exclusive
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, str):
+            return b"+%s\r\n" % value.encode()
+        if isinstance(value, bytes):
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if isinstance(value, Exception):
+            return b"-ERR %s\r\n" % str(value).encode()
+        return b"*%d\r\n" % len(value) + b"".join(RespStandin._encode(v) for v in value)
+
+    def execute(self, args: list[bytes]):
+        command, args = args[0].upper(), args[1:]
+        if command == b"PING":
+            return "PONG"
+        if command == b"HSET":
+            table = self.hashes.setdefault(args[0], {})
+            added = 0
+            for field, value in zip(args[1::2], args[2::2]):
+                added += field not in table
+                table[field] = value
+            return added
+        if command == b"HGET":
+            return self.hashes.get(args[0], {}).get(args[1])
+        if command == b"HMGET":
+            table = self.hashes.get(args[0], {})
+            return [table.get(field) for field in args[1:]]
+        if command == b"HGETALL":
+            return [item for pair in self.hashes.get(args[0], {}).items() for item in pair]
+        if command == b"HDEL":
+            table = self.hashes.get(args[0], {})
+            return sum(table.pop(field, None) is not None for field in args[1:])
+        if command == b"ZADD":
+            scores = self.sorted_sets.setdefault(args[0], {})
+            added = 0
+            for score, member in zip(args[1::2], args[2::2]):
+                added += member not in scores
+                scores[member] = float(score)
+            return added
+        if command == b"ZREM":
+            scores = self.sorted_sets.get(args[0], {})
+            return sum(scores.pop(member, None) is not None for member in args[1:])
+        if command == b"ZRANGEBYSCORE":
+            (low, low_open), (high, high_open) = self._bound(args[1]), self._bound(args[2])
+            members = sorted(self.sorted_sets.get(args[0], {}).items(), key=lambda item: item[1])
+            return [member for member, score in members
+                    if (score > low if low_open else score >= low) and (score < high if high_open else score <= high)]
+        if command == b"DEL":
+            return sum((self.hashes.pop(key, None) is not None) + (self.sorted_sets.pop(key, None) is not None)
+                       for key in args)
+        if command == b"FLUSHALL":
+            self.hashes.clear()
+            self.sorted_sets.clear()
+            return "OK"
+        return ValueError(f"unknown command '{command.decode()}'")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                count = int(header[1:-2])
+                args = []
+                for _ in range(count):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self._encode(self.execute(args)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def main(host: str, port: int) -> None:
+    server = await RespStandin().serve(host, port)
+    print(f"RESP stand-in listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-memory Redis-protocol stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    asyncio.run(main(args.host, args.port))
@@ -0,0 +1,79 @@
+# server/tests/test_auth_index.py
+
+import json
+
+import pytest
+
+from server.app.core.auth_index import AuthIndex, hash_secret
+
+
+class ClientsFile:
+    """Stands in for known_clients: a JSON file whose mtime is bumped on every write."""
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = 0.0
+
+    def write(self, text: str) -> None:
+        self.path.write_text(text, encoding="utf-8")
+        self.mtime += 1.0
+
+    def load(self) -> dict:
+        return json.loads(self.path.read_text(encoding="utf-8"))
+
+
+@pytest.fixture
+def clients(tmp_path):
+    clients = ClientsFile(tmp_path / "clients.json")
+    clients.write(json.dumps({
+        "plain": {"secret": "s1"},
+        "hashed": {"secret_hash": hash_secret("s2", iterations=1000)},
+        "gateway": {"secret": "s3", "relay_for": ["plain"]},
+    }))
+    return clients
+
+
+@pytest.fixture
+def index(clients):
+    return AuthIndex(loader=clients.load, source_mtime=lambda: clients.mtime, reload_interval=0.0)
+
+
+def test_plain_secret_verifies_without_pbkdf2(index):
+    assert index.verify_cached("plain", "s1") is True
+    assert index.verify_cached("plain", "wrong") is False
+    assert index.verify_cached("nobody", "s1") is False
+
+
+def test_hashed_secret_is_cached_after_first_verify(index):
+    # Only PBKDF2 can decide the first time; afterwards the fast digest is cached
+    assert index.verify_cached("hashed", "s2") is None
+    assert index.verify("hashed", "s2") is True
+    assert index.verify_cached("hashed", "s2") is True
+    assert index.verify("hashed", "wrong") is False
+
+
+def test_relay_permissions(index):
+    assert index.can_relay_for("gateway", "plain") is False  # index not built yet
+    assert index.is_known("gateway")
+    assert index.can_relay_for("gateway", "plain")
+    assert not index.can_relay_for("gateway", "hashed")
+    assert not index.can_relay_for("plain", "hashed")
+
+
+def test_reload_picks_up_changed_file(index, clients):
+    assert index.verify("plain", "s1")
+    clients.write(json.dumps({"plain": {"secret": "rotated"}}))
+    assert not index.verify("plain", "s1")
+    assert index.verify("plain", "rotated")
+    assert not index.is_known("hashed")
+
+
+def test_malformed_file_keeps_previous_index(index, clients):
+    assert index.verify("hashed", "s2")
+    clients.write("{not json")
+    assert index.verify("plain", "s1")
+    assert index.verify_cached("hashed", "s2") is True
+
+    # A later valid write is picked up again
+    clients.write(json.dumps({"plain": {"secret": "fixed"}}))
+    assert index.verify("plain", "fixed")
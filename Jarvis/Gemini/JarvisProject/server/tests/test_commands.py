@@ -0,0 +1,127 @@
+# server/tests/test_commands.py
+
+import asyncio
+import time
+
+import pytest
+
+from server.app.services.commands import ACKED, DELIVERED, DROPPED, EXPIRED, QUEUED, CommandDispatcher, QueueFull
+
+
+class FakeConnections:
+    """Stands in for connection_manager: records frames sent to "connected" clients."""
+
+    def __init__(self, *connected: str):
+        self.connected = set(connected)
+        self.sent = []
+
+    def is_connected(self, client_id: str) -> bool:
+        return client_id in self.connected
+
+    async def send(self, client_id: str, frame: dict) -> bool:
+        if client_id not in self.connected:
+            return False
+        self.sent.append((client_id, frame["command_id"], frame["attempt"]))
+        return True
+
+
+def dispatcher(connections: FakeConnections, **kwargs) -> CommandDispatcher:
+    options = {"queue_size": 4, "ttl": 60.0, "ack_timeout": 1.0, "window": 8}
+    return CommandDispatcher(connections=connections, **{**options, **kwargs})
+
+
+async def settle() -> None:
+    """Lets the delivery tasks started by submit()/_kick() run."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_redelivered_after_ack_timeout():
+    async def scenario():
+        connections = FakeConnections("pc")
+        commands = dispatcher(connections)
+        command = commands.submit("pc", "lock")
+        await settle()
+        assert connections.sent == [("pc", command.command_id, 1)]
+
+        commands.expire_due(now=time.monotonic() + 0.5)  # Ack not overdue yet
+        await settle()
+        assert len(connections.sent) == 1
+
+        commands.expire_due(now=time.monotonic() + 1.5)
+        await settle()
+        assert connections.sent[-1] == ("pc", command.command_id, 2)
+        assert command.state == DELIVERED and commands.counters["redelivered"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_duplicate_ack_is_counted_once():
+    async def scenario():
+        connections = FakeConnections("pc")
+        commands = dispatcher(connections)
+        command = commands.submit("pc", "lock")
+        await settle()
+
+        assert commands.acknowledge("pc", command.command_id, {"ok": True, "result": 1})
+        assert commands.acknowledge("pc", command.command_id, {"ok": False, "error": "late"})
+        assert command.state == ACKED and command.result == 1
+        assert commands.counters[ACKED] == 1 and commands.counters["duplicate_acks"] == 1
+        # Another client cannot ack it, and unknown ids are left to connection_manager
+        assert not commands.acknowledge("other", command.command_id, {"ok": True})
+        assert not commands.acknowledge("pc", "push-1", {"ok": True})
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_displaces_lower_priority():
+    async def scenario():
+        commands = dispatcher(FakeConnections(), queue_size=2)  # Not connected: commands stay queued
+        low = commands.submit("pc", "a", priority=0)
+        commands.submit("pc", "b", priority=1)
+
+        high = commands.submit("pc", "c", priority=2)
+        assert low.state == DROPPED and high.state == QUEUED
+        with pytest.raises(QueueFull):
+            commands.submit("pc", "d", priority=1)
+        assert commands.counters["rejected"] == 1
+
+        frames = await commands.poll("pc", wait=0)
+        assert [frame["action"] for frame in frames] == ["c", "b"]
+
+    asyncio.run(scenario())
+
+
+def test_ttl_zero_expires_at_once():
+    async def scenario():
+        commands = dispatcher(FakeConnections())
+        command = commands.submit("pc", "lock", ttl=0)
+        commands.expire_due()
+        assert command.state == EXPIRED
+        assert await commands.poll("pc", wait=0) == []
+        assert commands.stats()["clients"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_requeues_unacked_commands():
+    async def scenario():
+        connections = FakeConnections("pc")
+        commands = dispatcher(connections)
+        first = commands.submit("pc", "a")
+        second = commands.submit("pc", "b")
+        await settle()
+        commands.acknowledge("pc", first.command_id, {"ok": True})
+
+        connections.connected.clear()
+        commands.disconnected("pc")
+        assert second.state == QUEUED
+
+        # The next session picks it up again
+        connections.connected.add("pc")
+        commands.connected("pc")
+        await settle()
+        assert connections.sent[-1] == ("pc", second.command_id, 2)
+        assert second.state == DELIVERED
+
+    asyncio.run(scenario())
@@ -0,0 +1,88 @@
+# server/tests/test_liveness.py
+
+import time
+
+from server.app.core.registry import ClientRegistry
+from server.app.services.liveness import OFFLINE, ONLINE, SUSPECT, LivenessDetector
+
+
+def detector(registry=None) -> LivenessDetector:
+    return LivenessDetector(registry, acceptable_pause=0.0, min_sample=1.0, granularity=0.5)
+
+
+def heartbeats(liveness: LivenessDetector, client_id: str, start: float, count: int, interval: float) -> float:
+    """Feeds ``count`` heartbeats ``interval`` seconds apart; returns the time of the last one."""
+    for i in range(count):
+        liveness.put(client_id, {"last_seen": start + i * interval})
+    return start + (count - 1) * interval
+
+
+def transitions(events):
+    return [(event["client_id"], event["from"], event["to"]) for event in events]
+
+
+def test_regular_client_stays_online():
+    now = time.time()
+    liveness = detector()
+    last = heartbeats(liveness, "a", now, 10, 5.0)
+    assert liveness.tick(now=last + 6) == []
+    assert liveness.describe("a", now=last + 6)["state"] == ONLINE
+
+
+def test_late_tick_crosses_suspect_and_offline_at_once():
+    now = time.time()
+    liveness = detector()
+    last = heartbeats(liveness, "a", now, 10, 5.0)
+
+    events = liveness.tick(now=last + 3600)
+    assert transitions(events) == [("a", ONLINE, SUSPECT), ("a", SUSPECT, OFFLINE)]
+    assert liveness.stats()["clients"] == {ONLINE: 0, SUSPECT: 0, OFFLINE: 1}
+    assert liveness.stats()["scheduled"] == 0
+    assert liveness.tick(now=last + 7200) == []
+
+
+def test_suspect_before_offline_with_timely_ticks():
+    now = time.time()
+    liveness = detector()
+    last = heartbeats(liveness, "a", now, 10, 5.0)
+    suspect_in = liveness.describe("a", now=last)["suspect_in_s"]
+    offline_in = liveness.describe("a", now=last)["offline_in_s"]
+    assert 0 < suspect_in < offline_in
+
+    assert transitions(liveness.tick(now=last + suspect_in + 1)) == [("a", ONLINE, SUSPECT)]
+    assert transitions(liveness.tick(now=last + offline_in + 1)) == [("a", SUSPECT, OFFLINE)]
+
+
+def test_sign_of_life_recovers_on_next_tick():
+    now = time.time()
+    liveness = detector()
+    last = heartbeats(liveness, "a", now, 10, 5.0)
+    liveness.tick(now=last + 3600)
+
+    liveness.put("a", {"last_seen": last + 3601})
+    assert liveness.describe("a", now=last + 3601)["state"] == ONLINE
+    assert transitions(liveness.tick(now=last + 3601)) == [("a", OFFLINE, ONLINE)]
+    assert liveness.transitions == {SUSPECT: 1, OFFLINE: 1, ONLINE: 1}
+    # Tracked again (the long gap is now part of its history, so it takes longer)
+    assert transitions(liveness.tick(now=last + 100_000))[-1] == ("a", SUSPECT, OFFLINE)
+
+
+def test_rebuild_after_merge_tracks_restored_clients():
+    now = time.time()
+    source = ClientRegistry(shards=4, expiry=7200.0)
+    source.register("a")
+    source.register("b")
+    records = [entry.to_record() for entry in source]
+
+    registry = ClientRegistry(shards=4, expiry=7200.0)
+    liveness = detector(registry)
+    registry.attach_sink(liveness)
+    registry.merge(records)  # Does not call the sinks
+    assert liveness.stats()["clients"][ONLINE] == 0
+
+    liveness.rebuild(registry)
+    assert liveness.stats()["clients"][ONLINE] == 2
+    events = liveness.tick(now=now + 3600)
+    assert sorted(transitions(events)) == [("a", ONLINE, SUSPECT), ("a", SUSPECT, OFFLINE),
+                                           ("b", ONLINE, SUSPECT), ("b", SUSPECT, OFFLINE)]
+    assert registry.get("a").status == OFFLINE and registry.get("b").status == OFFLINE
@@ -0,0 +1,97 @@
+# server/tests/test_registry.py
+
+import time
+
+from server.app.core.registry import ClientRegistry
+
+
+class RecordingSink:
+    def __init__(self):
+        self.puts, self.deletes = [], []
+
+    def put(self, client_id, record):
+        self.puts.append(client_id)
+
+    def delete(self, client_id):
+        self.deletes.append(client_id)
+
+
+def test_expiry_follows_last_seen():
+    now = time.monotonic()
+    registry = ClientRegistry(shards=4, expiry=10.0)
+    registry.register("a", now=now)
+    registry.register("b", now=now)
+    registry.touch("b", now=now + 8)
+
+    assert registry.expire(now=now + 5) == []
+    assert registry.expire(now=now + 12) == ["a"]
+    assert "a" not in registry and "b" in registry
+    assert registry.expire(now=now + 20) == ["b"]
+    assert len(registry) == 0
+
+
+def test_expiry_after_long_gap_jumps_to_occupied_slots():
+    now = time.monotonic()
+    registry = ClientRegistry(shards=1, expiry=10.0)
+    registry.register("a", now=now)
+    registry.expire(now=now)
+    registry.register("b", now=now + 50_000)
+
+    # Sparse wheel: only the due slot is visited, "b" stays scheduled
+    assert registry.expire(now=now + 100) == ["a"]
+    assert registry.expire(now=now + 50_012) == ["b"]
+
+
+def test_changes_since_returns_changed_and_removed():
+    now = time.monotonic()
+    registry = ClientRegistry(shards=4, expiry=10.0)
+    registry.register("a", now=now)
+    registry.register("b", now=now)
+    since = registry.version
+
+    registry.touch("a", status="busy", now=now + 1)
+    registry.remove("b")
+    registry.register("c", now=now + 1)
+
+    version, changed, removed = registry.changes_since(since)
+    assert version == registry.version == since + 3
+    assert sorted(entry.client_id for entry in changed) == ["a", "c"]
+    assert removed == ["b"]
+    assert registry.changes_since(version) == (version, [], [])
+
+
+def test_changes_since_before_dropped_tombstones_needs_snapshot():
+    now = time.monotonic()
+    registry = ClientRegistry(shards=4, expiry=10.0, max_tombstones=2)
+    for client_id in "abc":
+        registry.register(client_id, now=now)
+    since = registry.version
+    for client_id in "abc":
+        registry.remove(client_id)
+
+    assert registry.changes_since(since) is None
+    assert registry.changes_since(0) is None
+    version, changed, removed = registry.changes_since(registry.version - 2)
+    assert changed == [] and removed == ["c", "b"]
+
+
+def test_merge_does_not_echo_to_sinks():
+    now = time.monotonic()
+    source = ClientRegistry(shards=4, expiry=10.0)
+    source.register("a", now=now)
+    source.register("stale", now=now - 60)
+    records = [entry.to_record() for entry in source]
+
+    registry = ClientRegistry(shards=4, expiry=10.0)
+    sink = RecordingSink()
+    registry.attach_sink(sink)
+    assert registry.merge(records, now=now) == 1
+    assert "a" in registry and "stale" not in registry
+    assert sink.puts == []
+    assert [entry.client_id for entry in registry.changes_since(0)[1]] == ["a"]
+
+    # Older records do not overwrite a fresher local entry
+    registry.touch("a", status="busy", now=now + 5)
+    assert registry.merge(records, now=now + 5) == 0
+    assert registry.get("a").status == "busy"
+    assert sink.puts == ["a"]
@@ -0,0 +1,67 @@
+# server/tests/test_state_store.py
+
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from server.app.services.state_store import RedisStateStore
+from server.scripts.resp_standin import RespStandin
+
+
+@pytest.fixture
+def standin():
+    """A RESP stand-in served from a background event loop; yields (standin, port)."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    standin = RespStandin()
+    server = asyncio.run_coroutine_threadsafe(standin.serve("127.0.0.1", 0), loop).result(5)
+    port = server.sockets[0].getsockname()[1]
+    yield standin, port
+    server.close()
+    asyncio.run_coroutine_threadsafe(server.wait_closed(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+def record(client_id: str, last_seen: float) -> dict:
+    return {"client_id": client_id, "status": "online", "registered_at": 1.0, "last_seen": last_seen,
+            "connection": None, "details": {"os": "Linux"}}
+
+
+def test_redis_store_round_trip(standin):
+    _, port = standin
+    store = RedisStateStore(port=port, chunk_size=2)
+    try:
+        store.save_many([record("a", 100.0), record("b", 200.0), record("c", 300.0)])
+        assert sorted(r["client_id"] for r in store.load()) == ["a", "b", "c"]
+        assert store.load()[0]["details"] == {"os": "Linux"}
+
+        # Incremental load reads only clients seen after ``since`` (from the index)
+        assert sorted(r["client_id"] for r in store.load(since=150.0)) == ["b", "c"]
+        assert store.load(since=300.0) == []
+
+        store.save_many([record("a", 400.0)])
+        assert [r["client_id"] for r in store.load(since=350.0)] == ["a"]
+
+        store.delete_many(["a", "c"])
+        assert [r["client_id"] for r in store.load()] == ["b"]
+        assert [r["client_id"] for r in store.load(since=1.0)] == ["b"]
+    finally:
+        store.close()
+
+
+def test_redis_store_reconnects_after_connection_loss(standin):
+    _, port = standin
+    store = RedisStateStore(port=port)
+    try:
+        store.save_many([record("a", 100.0)])
+        store._conn._sock.shutdown(socket.SHUT_RDWR)  # Simulate a dropped connection
+        with pytest.raises(OSError):
+            store.save_many([record("b", 200.0)])
+        store.save_many([record("b", 200.0)])  # Next call connects again
+        assert sorted(r["client_id"] for r in store.load()) == ["a", "b"]
+    finally:
+        store.close()
@@ -1,2 +1,28 @@
 // Main entry point for the frontend application (e.g., Vue, React)
-console.log('Web UI Initializing...');
\ No newline at end of file
+// Until a framework is chosen: polls the server-side aggregates and renders them as tables.
+console.log('Web UI Initializing...');
+
+const REFRESH_MS = 5000;
+
+function table(title, rows) {
+    const body = rows.map(cells => `<tr>${cells.map(cell => `<td>${cell}</td>`).join('')}</tr>`).join('');
+    return `<h2>${title}</h2><table>${body}</table>`;
+}
+
+async function refresh() {
+    const [summary, slowest] = await Promise.all([
+        fetch('/dashboard/summary').then(response => response.json()),
+        fetch('/dashboard/slowest?limit=10').then(response => response.json()),
+    ]);
+    document.getElementById('app').innerHTML = [
+        `<h1>Jarvis Control Panel</h1><p>${summary.total} clients</p>`,
+        table('By status', Object.entries(summary.by_status)),
+        table('By OS', Object.entries(summary.by_os)),
+        table('Heartbeat age', Object.entries(summary.heartbeat_age)),
+        table('Slowest clients (average heartbeat interval)',
+              slowest.clients.map(c => [c.client_id, `${c.avg_interval_s}s`, `seen ${c.last_seen_age_s}s ago`, c.status, c.os])),
+    ].join('');
+}
+
+refresh().catch(console.error);
+setInterval(() => refresh().catch(console.error), REFRESH_MS);